@@ -1,7 +1,9 @@
 """
 Contents API 端點
 """
-from fastapi import APIRouter, HTTPException, Path
+from typing import Any, Dict, Union
+
+from fastapi import APIRouter, HTTPException, Path, Query, Request
 from app.schemas.content import (
     ContentCreate,
     ContentUpdate,
@@ -10,8 +12,13 @@ from app.schemas.content import (
     ContentVersionResponse,
     GenerateContentRequest,
 )
+from app.schemas.common import PaginationResponse
 from app.services.repositories.content_repository import ContentRepository
+from app.services.repositories.base_repository import VersionConflictError
 from app.services.repositories.topic_repository import TopicRepository
+from app.services.repositories.projections import CONTENT_SUMMARY_FIELDS
+from app.utils.response_cache import get_response_cache, compute_etag, not_modified_or_none
+from app.utils.serialization import project
 from datetime import datetime
 import logging
 
@@ -24,8 +31,14 @@ content_repo = ContentRepository()
 topic_repo = TopicRepository()
 
 
-def _convert_to_response(content_doc: dict) -> ContentResponse:
-    """將 MongoDB 文檔轉換為 ContentResponse"""
+def _convert_to_response(content_doc: dict, trusted: bool = False) -> Union[ContentResponse, Dict[str, Any]]:
+    """
+    將 MongoDB 文檔轉換為 ContentResponse
+    
+    Args:
+        content_doc: 內容文件
+        trusted: 文件已在寫入時驗證，直接取出回應欄位返回 dict（略過建立與驗證模型）
+    """
     from datetime import datetime
     
     # 保存 _id（如果需要）
@@ -70,14 +83,21 @@ def _convert_to_response(content_doc: dict) -> ContentResponse:
     if "updated_at" not in content_doc:
         content_doc["updated_at"] = content_doc.get("generated_at", datetime.utcnow())
     
+    if trusted:
+        return project(ContentResponse, content_doc)
     return ContentResponse(**content_doc)
 
 
 @router.get("/{topic_id}", response_model=ContentResponse)
-async def get_content(topic_id: str = Path(..., description="主題 ID")):
+async def get_content(request: Request, topic_id: str = Path(..., description="主題 ID")):
     """
     取得主題內容
     """
+    cache = get_response_cache()
+    cached = cache.lookup(request)
+    if cached is not None:
+        return cached
+    
     try:
         content = await content_repo.get_content_by_topic_id(topic_id)
         if not content:
@@ -86,7 +106,13 @@ async def get_content(topic_id: str = Path(..., description="主題 ID")):
                 detail=f"內容不存在: topic_id={topic_id}"
             )
         
-        return _convert_to_response(content)
+        # 內容未變更時直接返回 304
+        etag = compute_etag([content])
+        unchanged = not_modified_or_none(request, etag)
+        if unchanged is not None:
+            return unchanged
+        
+        return cache.store(request, _convert_to_response(content, trusted=True), etag, ("contents",))
     except HTTPException:
         raise
     except Exception as e:
@@ -161,7 +187,7 @@ async def generate_content(
         estimated_duration = word_count // 17  # 假設每 17 字 = 1 秒
         
         # 檢查是否已存在內容
-        existing_content = await content_repo.get_content_by_topic_id(topic_id)
+        existing_content = await content_repo.get_content_by_topic_id(topic_id, fields=CONTENT_SUMMARY_FIELDS)
         
         now = datetime.utcnow()
         
@@ -223,26 +249,16 @@ async def update_content(
     更新內容
     """
     try:
-        # 準備更新資料
+        # 準備更新資料（字數和時長由 Repository 在同一次更新中重新計算）
         update_dict = update_data.model_dump(exclude_unset=True)
-        
-        # 更新字數統計（如果內容有變更）
-        if "article" in update_dict or "script" in update_dict:
-            content = await content_repo.get_content_by_topic_id(topic_id)
-            if content:
-                article = update_dict.get("article", content.get("article", ""))
-                script = update_dict.get("script", content.get("script", ""))
-                word_count = len(article) + len(script)
-                update_dict["word_count"] = word_count
-                
-                # 估算時長（假設每 17 字 = 1 秒）
-                update_dict["estimated_duration"] = word_count // 17
+        expected_version = update_dict.pop("version", None)
         
         # 更新內容
         updated = await content_repo.update_content_by_topic_id(
             topic_id,
             update_dict,
-            create_version=True
+            create_version=True,
+            expected_version=expected_version
         )
         
         if not updated:
@@ -252,6 +268,11 @@ async def update_content(
             )
         
         return _convert_to_response(updated)
+    except VersionConflictError as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"內容已被其他編輯更新（編輯時版本 {e.expected_version}），請重新載入後再編輯"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -260,18 +281,25 @@ async def update_content(
 
 
 @router.get("/{topic_id}/versions", response_model=ContentVersionsResponse)
-async def get_content_versions(topic_id: str = Path(..., description="主題 ID")):
+async def get_content_versions(
+    topic_id: str = Path(..., description="主題 ID"),
+    page: int = Query(1, ge=1, description="頁碼"),
+    limit: int = Query(20, ge=1, le=100, description="每頁數量")
+):
     """
-    取得內容版本歷史
+    取得內容版本歷史（分頁，新到舊）
     """
     try:
-        versions = await content_repo.get_content_versions(topic_id)
+        versions, total = await content_repo.get_content_versions(topic_id, page, limit)
         
         version_responses = []
         for version in versions:
             version_responses.append(ContentVersionResponse(**version))
         
-        return ContentVersionsResponse(data=version_responses)
+        return ContentVersionsResponse(
+            data=version_responses,
+            pagination=PaginationResponse.create(page, limit, total)
+        )
     except Exception as e:
         logger.error(f"取得版本歷史失敗: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,62 @@
+"""
+資料匯入 API 端點
+接收與 GET /api/v1/export 相同格式的 NDJSON（可 gzip 壓縮），串流分批寫入
+"""
+import zlib
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.services.repositories.bulk_importer import BulkImporter
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/import", tags=["import"])
+
+
+@router.post("")
+async def import_topics(
+    request: Request,
+    batch_size: int = Query(1000, ge=1, le=10000, description="每批寫入的文件數量"),
+    rebuild_indexes: bool = Query(True, description="匯入空集合前移除次要索引，匯入後重建")
+):
+    """
+    串流匯入主題（含內容與圖片）
+
+    請求內容為 NDJSON（Content-Type: application/x-ndjson），每行一個主題；
+    gzip 壓縮的檔案請使用 Content-Encoding: gzip 或 Content-Type: application/gzip。
+    以 id 為鍵：不存在的文件會建立，已存在的文件會被取代
+    """
+    compressed = (
+        "gzip" in request.headers.get("content-encoding", "").lower()
+        or request.headers.get("content-type", "").lower().startswith("application/gzip")
+    )
+    decompressor = zlib.decompressobj(47) if compressed else None
+
+    importer = BulkImporter(batch_size=batch_size, rebuild_indexes=rebuild_indexes)
+    try:
+        await importer.start()
+
+        remainder = b""
+        async for chunk in request.stream():
+            if decompressor:
+                chunk = decompressor.decompress(chunk)
+            lines = (remainder + chunk).split(b"\n")
+            remainder = lines.pop()
+            for line in lines:
+                await importer.add_line(line)
+
+        if decompressor:
+            remainder += decompressor.flush()
+        if remainder.strip():
+            await importer.add_line(remainder)
+
+        return await importer.finish()
+    except zlib.error as e:
+        raise HTTPException(status_code=400, detail=f"gzip 解壓縮失敗: {e}")
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"內容不是 UTF-8 編碼: {e}")
+    except Exception as e:
+        logger.error(f"匯入失敗: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # 匯入失敗或用戶端中斷時也重建已移除的索引
+        await importer.close()
@@ -0,0 +1,123 @@
+"""
+資料匯出 API 端點
+以 NDJSON（每行一個 JSON）串流匯出主題、內容與圖片
+"""
+import json
+import zlib
+from datetime import datetime, timedelta
+from typing import Optional, Any, AsyncIterator
+from bson import ObjectId
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.models.topic import Category, Status
+from app.services.repositories.topic_repository import TopicRepository
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+# Repository 實例
+topic_repo = TopicRepository()
+
+# 累積多少位元組後送出一次（避免每行一個 chunk）
+FLUSH_BYTES = 64 * 1024
+
+
+def _json_default(value: Any) -> Any:
+    """JSON 序列化 MongoDB 特有型別"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f"無法序列化的型別: {type(value).__name__}")
+
+
+def _parse_date(value: Optional[str], name: str) -> Optional[datetime]:
+    """解析 YYYY-MM-DD 日期參數"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} 格式錯誤，應為 YYYY-MM-DD: {value}")
+
+
+async def _stream_ndjson(
+    documents: AsyncIterator[dict],
+    compress: bool
+) -> AsyncIterator[bytes]:
+    """
+    將文件逐筆轉為 NDJSON，可選擇以 gzip 串流壓縮
+
+    Args:
+        documents: 文件非同步迭代器
+        compress: 是否 gzip 壓縮
+
+    Yields:
+        回應內容片段
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = bytearray()
+    count = 0
+
+    async for document in documents:
+        buffer += json.dumps(document, ensure_ascii=False, default=_json_default).encode("utf-8")
+        buffer += b"\n"
+        count += 1
+        if len(buffer) >= FLUSH_BYTES:
+            chunk = compressor.compress(bytes(buffer)) if compressor else bytes(buffer)
+            buffer.clear()
+            if chunk:
+                yield chunk
+
+    tail = bytes(buffer)
+    if compressor:
+        tail = compressor.compress(tail) + compressor.flush()
+    if tail:
+        yield tail
+    logger.info(f"匯出完成: {count} 個主題")
+
+
+@router.get("")
+async def export_topics(
+    start_date: Optional[str] = Query(None, description="生成日期起始（YYYY-MM-DD，包含）"),
+    end_date: Optional[str] = Query(None, description="生成日期結束（YYYY-MM-DD，包含）"),
+    category: Optional[Category] = Query(None, description="分類篩選"),
+    status: Optional[Status] = Query(None, description="狀態篩選"),
+    batch_size: int = Query(100, ge=1, le=1000, description="資料庫游標每批讀取的主題數量"),
+    gzip: bool = Query(False, description="是否以 gzip 壓縮（下載 .ndjson.gz）")
+):
+    """
+    串流匯出主題（含內容與圖片）
+
+    每行一個主題 JSON，content 為內容（不含版本歷史），images 為依順序排列的圖片；
+    使用伺服器端游標逐批讀取，記憶體用量與匯出數量無關
+    """
+    start = _parse_date(start_date, "start_date")
+    end = _parse_date(end_date, "end_date")
+    if end:
+        end += timedelta(days=1)
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="start_date 不能晚於 end_date")
+
+    documents = topic_repo.iter_topics_with_relations(
+        start_date=start,
+        end_date=end,
+        category=category,
+        status=status,
+        batch_size=batch_size
+    )
+
+    filename = f"topics_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.ndjson"
+    if gzip:
+        filename += ".gz"
+    media_type = "application/gzip" if gzip else "application/x-ndjson"
+
+    return StreamingResponse(
+        _stream_ndjson(documents, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
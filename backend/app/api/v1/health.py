@@ -5,6 +5,7 @@ from fastapi import APIRouter
 from datetime import datetime
 from app.config import settings
 from app.database import check_connection
+from app.db_monitoring import get_command_metrics_listener
 from app.utils.env_validator import EnvironmentValidator
 
 router = APIRouter()
@@ -28,6 +29,18 @@ async def health_check():
     }
 
 
+@router.get("/health/db-stats")
+async def db_stats():
+    """
+    MongoDB 指令統計
+    各集合、各指令的次數與耗時，最近的慢查詢與抽樣 explain 發現的全表掃描（查詢條件只包含結構，不含數值）
+    """
+    return {
+        **get_command_metrics_listener().get_stats(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+
+
 @router.get("/health/detailed")
 async def detailed_health_check():
     """
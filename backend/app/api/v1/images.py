@@ -1,8 +1,8 @@
 """
 Images API 端點
 """
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Query, Path, Body
+from typing import Any, Dict, Optional, Union
+from fastapi import APIRouter, HTTPException, Query, Path, Body, Request, Response
 from app.schemas.image import (
     ImageCreate,
     ImageUpdate,
@@ -15,6 +15,8 @@ from app.services.repositories.image_repository import ImageRepository
 from app.services.repositories.topic_repository import TopicRepository
 from app.models.image import ImageSource
 from app.config import settings
+from app.utils.response_cache import get_response_cache, compute_etag, not_modified_or_none
+from app.utils.serialization import project
 from datetime import datetime
 import logging
 
@@ -27,8 +29,14 @@ image_repo = ImageRepository()
 topic_repo = TopicRepository()
 
 
-def _convert_to_response(image_doc: dict) -> ImageResponse:
-    """將 MongoDB 文檔轉換為 ImageResponse"""
+def _convert_to_response(image_doc: dict, trusted: bool = False) -> Union[ImageResponse, Dict[str, Any]]:
+    """
+    將 MongoDB 文檔轉換為 ImageResponse
+    
+    Args:
+        image_doc: 圖片文件
+        trusted: 文件已在寫入時驗證，直接取出回應欄位返回 dict（略過建立與驗證模型）
+    """
     from datetime import datetime
     
     # 保存 _id（如果需要）
@@ -62,6 +70,8 @@ def _convert_to_response(image_doc: dict) -> ImageResponse:
         except:
             logger.warning(f"無法轉換 source: {image_doc.get('source')}")
     
+    if trusted:
+        return project(ImageResponse, image_doc)
     return ImageResponse(**image_doc)
 
 
@@ -210,11 +220,123 @@ async def search_images(
         )
 
 
+@router.post("/verify")
+async def start_image_verification(
+    force: bool = Query(False, description="是否重新檢查所有圖片（忽略上次驗證時間）")
+):
+    """
+    啟動圖片連結驗證（背景執行）
+    
+    批次檢查圖片 URL 是否有效並補齊寬高，失效圖片不會再出現在主題圖片列表
+    """
+    from app.services.images.image_verifier import get_image_verifier
+    
+    verifier = get_image_verifier()
+    started = verifier.start(force=force)
+    return {
+        "started": started,
+        "message": "圖片驗證已啟動" if started else "圖片驗證已在執行中",
+        "progress": verifier.get_progress(),
+    }
+
+
+@router.get("/verify/status")
+async def get_image_verification_status():
+    """
+    取得圖片連結驗證進度（含吞吐量）
+    """
+    from app.services.images.image_verifier import get_image_verifier
+    
+    return get_image_verifier().get_progress()
+
+
+@router.post("/verify/cancel")
+async def cancel_image_verification():
+    """
+    停止圖片連結驗證（目前批次寫回後停止）
+    """
+    from app.services.images.image_verifier import get_image_verifier
+    
+    verifier = get_image_verifier()
+    cancelled = verifier.cancel()
+    return {
+        "cancelled": cancelled,
+        "progress": verifier.get_progress(),
+    }
+
+
+@router.get("/proxy/{image_id}")
+async def proxy_image(
+    request: Request,
+    image_id: str = Path(..., description="圖片 ID"),
+    w: int = Query(640, ge=16, le=4096, description="縮圖寬度（會對齊到 160/320/640/960/1280/1920）"),
+    format: Optional[str] = Query(None, pattern="^(webp|jpeg)$", description="輸出格式（預設依 Accept 標頭選擇）"),
+    v: Optional[str] = Query(None, pattern="^[0-9a-f]{8}$", description="原圖 URL 版本碼（與目前 URL 相符時回應可長期快取）")
+):
+    """
+    圖片縮圖代理
+    
+    首次請求時下載原圖並存入本地磁碟快取，之後直接返回快取的縮圖，
+    避免前端直接載入原始大圖或因外部連結失效而無法顯示
+    
+    網址只以圖片 ID 區分，圖片 URL 可被修改：只有帶有目前版本碼 v 的網址回應 immutable，
+    其他請求只短暫快取並以 ETag 重新驗證
+    """
+    from app.services.images.thumbnail_cache import (
+        get_thumbnail_cache,
+        snap_width,
+        source_version,
+        ThumbnailCacheError,
+    )
+    
+    # 只代理資料庫中已登記的圖片 URL（不接受任意 URL），已驗證為失效連結的不再下載
+    image = await image_repo.get_image_by_id(image_id)
+    if (
+        not image
+        or image.get("link_status") == "dead"
+        or not str(image.get("url", "")).startswith(("http://", "https://"))
+    ):
+        raise HTTPException(status_code=404, detail=f"圖片不存在: {image_id}")
+    
+    # 未指定格式時依瀏覽器支援選擇 WebP 或 JPEG
+    negotiated = format is None
+    if negotiated:
+        format = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    
+    width = snap_width(w)
+    if v is not None and v == source_version(image["url"]):
+        headers = {"Cache-Control": "public, max-age=31536000, immutable"}
+    else:
+        headers = {"Cache-Control": "public, max-age=300"}
+    if negotiated:
+        headers["Vary"] = "Accept"
+    
+    cache = get_thumbnail_cache()
+    
+    # 縮圖內容由原圖雜湊、寬度、格式決定：ETag 相同時直接返回 304
+    etag = await cache.peek_etag(image["url"], width, format)
+    if etag and etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={**headers, "ETag": etag})
+    
+    try:
+        content, etag, media_type = await cache.get_thumbnail(image["url"], width, format)
+    except ThumbnailCacheError as e:
+        logger.warning(f"圖片代理失敗: {image_id} - {e}")
+        raise HTTPException(status_code=502, detail=str(e))
+    
+    return Response(content=content, media_type=media_type, headers={**headers, "ETag": etag})
+
+
 @router.get("/{topic_id}", response_model=ImageListResponse)
-async def get_topic_images(topic_id: str = Path(..., description="主題 ID")):
+async def get_topic_images(request: Request, topic_id: str = Path(..., description="主題 ID")):
     """
     取得主題圖片列表
     """
+    cache = get_response_cache()
+    cached = cache.lookup(request)
+    if cached is not None:
+        return cached
+    
     try:
         # 檢查主題是否存在
         topic = await topic_repo.get_topic_by_id(topic_id)
@@ -226,11 +348,17 @@ async def get_topic_images(topic_id: str = Path(..., description="主題 ID")):
         
         images = await image_repo.get_images_by_topic_id(topic_id)
         
+        # 圖片未變更時直接返回 304
+        etag = compute_etag(images)
+        unchanged = not_modified_or_none(request, etag)
+        if unchanged is not None:
+            return unchanged
+        
         image_responses = []
         for image in images:
-            image_responses.append(_convert_to_response(image))
+            image_responses.append(_convert_to_response(image, trusted=True))
         
-        return ImageListResponse(data=image_responses)
+        return cache.store(request, {"data": image_responses}, etag, ("topics", "images"))
     except HTTPException:
         raise
     except Exception as e:
@@ -395,13 +523,15 @@ async def match_photos_for_topic(
     """
     try:
         from app.services.images.enhanced_photo_matcher import EnhancedPhotoMatcher
+        from app.services.images.deduplication import ImageDeduplicator, canonicalize_url
         from app.services.repositories.content_repository import ContentRepository
+        from app.services.repositories.projections import CONTENT_TEXT_FIELDS
         
         photo_matcher = EnhancedPhotoMatcher()
         content_repo = ContentRepository()
         
         # 取得文章內容
-        content = await content_repo.get_content_by_topic_id(topic_id)
+        content = await content_repo.get_content_by_topic_id(topic_id, fields=CONTENT_TEXT_FIELDS)
         if not content:
             raise HTTPException(
                 status_code=404,
@@ -410,20 +540,32 @@ async def match_photos_for_topic(
         
         article_text = content.get("article", "")
         
-        # 匹配照片
+        # 匹配照片（多取一倍候選，去除重複後仍有足夠的照片）
         match_result = await photo_matcher.match_photos_with_layers(
             article_text=article_text,
             topic_id=topic_id,
-            min_count=min_count
+            min_count=min_count,
+            candidate_count=min_count * 2
         )
         
         # 保存匹配的照片到資料庫
         matched_photos = match_result.get("matched_photos", [])
         saved_images = []
         
-        existing_images = await image_repo.get_images_by_topic_id(topic_id)
+        existing_images = await image_repo.get_images_by_topic_id(topic_id, include_dead=True)
         max_order = max([img.get("order", 0) for img in existing_images]) if existing_images else -1
         
+        # 跨來源去重（URL 正規化 + 感知雜湊），不重複儲存主題已有的圖片
+        matched_photos = await ImageDeduplicator().deduplicate(
+            matched_photos,
+            limit=min_count,
+            existing_urls={
+                img.get("canonical_url") or canonicalize_url(img.get("url", ""))
+                for img in existing_images
+            },
+            find_stored_duplicates=lambda phash: image_repo.find_near_duplicates(phash, topic_id=topic_id)
+        )
+        
         for idx, photo in enumerate(matched_photos):
             try:
                 image_data = {
@@ -440,8 +582,12 @@ async def match_photos_for_topic(
                     "height": photo.get("height"),
                     "fetched_at": datetime.utcnow(),
                     "match_score": photo.get("overall_score", 0.0),
-                    "matches_item": photo.get("matches_item")
+                    "matches_item": photo.get("matches_item"),
+                    "canonical_url": photo.get("canonical_url")
                 }
+                if photo.get("phash"):
+                    image_data["phash"] = photo["phash"]
+                    image_data["phash_bands"] = photo["phash_bands"]
                 
                 created = await image_repo.create_image(image_data)
                 saved_images.append(_convert_to_response(created))
@@ -468,12 +614,13 @@ async def validate_photo_match(
     try:
         from app.services.images.enhanced_photo_matcher import EnhancedPhotoMatcher
         from app.services.repositories.content_repository import ContentRepository
+        from app.services.repositories.projections import CONTENT_TEXT_FIELDS
         
         photo_matcher = EnhancedPhotoMatcher()
         content_repo = ContentRepository()
         
         # 取得文章內容
-        content = await content_repo.get_content_by_topic_id(topic_id)
+        content = await content_repo.get_content_by_topic_id(topic_id, fields=CONTENT_TEXT_FIELDS)
         if not content:
             raise HTTPException(
                 status_code=404,
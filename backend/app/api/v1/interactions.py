@@ -1,18 +1,21 @@
 """
 Interactions API 端點
 """
-from typing import Optional
+from typing import Any, Dict, Optional, Union
 from fastapi import APIRouter, HTTPException, Query, Path
 from app.schemas.interaction import (
     InteractionCreate,
+    InteractionBatchCreate,
+    InteractionBatchResponse,
     InteractionResponse,
     InteractionListResponse,
     InteractionStatsResponse,
 )
 from app.services.repositories.interaction_repository import InteractionRepository
-from app.services.repositories.topic_repository import TopicRepository
+from app.services.repositories.interaction_buffer import get_interaction_buffer
 from app.models.interaction import InteractionAction
 from app.models.topic import Category
+from app.utils.serialization import project, trusted_response
 from datetime import datetime
 import logging
 
@@ -22,43 +25,69 @@ router = APIRouter(prefix="/interactions", tags=["interactions"])
 
 # Repository 實例
 interaction_repo = InteractionRepository()
-topic_repo = TopicRepository()
 
 
-def _convert_to_response(interaction_doc: dict) -> InteractionResponse:
-    """將 MongoDB 文檔轉換為 InteractionResponse"""
+def _convert_to_response(interaction_doc: dict, trusted: bool = False) -> Union[InteractionResponse, Dict[str, Any]]:
+    """
+    將 MongoDB 文檔轉換為 InteractionResponse
+    
+    Args:
+        interaction_doc: 互動記錄文件
+        trusted: 文件已在寫入時驗證，直接取出回應欄位返回 dict（略過建立與驗證模型）
+    """
     interaction_doc.pop("_id", None)
+    if trusted:
+        return project(InteractionResponse, interaction_doc)
     return InteractionResponse(**interaction_doc)
 
 
+def _build_interaction(interaction_data: InteractionCreate) -> dict:
+    """將請求轉換為互動記錄文件（分類由寫入緩衝補齊）"""
+    return InteractionRepository.build_interaction(
+        user_id=interaction_data.user_id,
+        topic_id=interaction_data.topic_id,
+        action=interaction_data.action,
+        article_id=interaction_data.article_id,
+        photo_id=interaction_data.photo_id,
+        script_id=interaction_data.script_id,
+        duration=interaction_data.duration
+    )
+
+
 @router.post("", response_model=InteractionResponse)
 async def create_interaction(interaction_data: InteractionCreate):
     """
     記錄互動
+    
+    記錄先放入寫入緩衝，稍後批次寫入資料庫
     """
     try:
-        # 取得主題資訊以獲取分類
-        topic = await topic_repo.get_topic_by_id(interaction_data.topic_id)
-        category = topic.get("category") if topic else None
+        interaction = _build_interaction(interaction_data)
+        await get_interaction_buffer().add(interaction)
         
-        # 建立互動記錄
-        created = await interaction_repo.create_interaction(
-            user_id=interaction_data.user_id,
-            topic_id=interaction_data.topic_id,
-            action=interaction_data.action,
-            article_id=interaction_data.article_id,
-            photo_id=interaction_data.photo_id,
-            script_id=interaction_data.script_id,
-            duration=interaction_data.duration,
-            category=category
-        )
-        
-        return _convert_to_response(created)
+        return _convert_to_response(dict(interaction))
     except Exception as e:
         logger.error(f"記錄互動失敗: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/batch", response_model=InteractionBatchResponse)
+async def create_interactions_batch(batch: InteractionBatchCreate):
+    """
+    批次記錄互動（最多 500 筆）
+    
+    適用於前端累積後一次送出的瀏覽時間等事件
+    """
+    try:
+        interactions = [_build_interaction(item) for item in batch.interactions]
+        await get_interaction_buffer().add_many(interactions)
+        
+        return InteractionBatchResponse(accepted=len(interactions))
+    except Exception as e:
+        logger.error(f"批次記錄互動失敗: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{user_id}", response_model=InteractionListResponse)
 async def get_user_interactions(
     user_id: str = Path(..., description="顧客 ID"),
@@ -90,17 +119,18 @@ async def get_user_interactions(
         
         # 轉換為回應格式
         interaction_responses = [
-            _convert_to_response(interaction) for interaction in interactions
+            _convert_to_response(interaction, trusted=True) for interaction in interactions
         ]
         
         from app.schemas.common import PaginationResponse
         pagination = PaginationResponse.create(page, limit, total)
         
-        return InteractionListResponse(
-            user_id=user_id,
-            interactions=interaction_responses,
-            pagination=pagination
-        )
+        # 互動記錄由 InteractionCreate 驗證後寫入：直接序列化，不再經過 response_model 驗證
+        return trusted_response({
+            "user_id": user_id,
+            "interactions": interaction_responses,
+            "pagination": pagination
+        })
     except Exception as e:
         logger.error(f"查詢互動記錄失敗: {e}")
         raise HTTPException(status_code=500, detail=str(e))
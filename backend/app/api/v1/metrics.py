@@ -0,0 +1,15 @@
+"""
+Prometheus 指標端點
+"""
+from fastapi import APIRouter
+from starlette.responses import Response
+
+from app.utils.metrics import CONTENT_TYPE, REGISTRY
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """以 Prometheus 文字格式輸出目前行程的指標"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -1,12 +1,19 @@
 """
 排程 API 端點
 """
-from typing import Optional, List
-from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, Body
-from datetime import datetime
+from typing import Optional, List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, Body, Request
+from datetime import datetime, date, timedelta
+from zoneinfo import ZoneInfo
 from app.models.topic import Category
 from app.services.automation.scheduler import SchedulerService
-from app.services.repositories.topic_repository import TopicRepository
+from app.services.repositories.topic_repository import (
+    TopicRepository,
+    SCHEDULE_TIME_SLOTS,
+    SCHEDULE_TIMEZONE,
+)
+from app.services.repositories.projections import TOPIC_SCHEDULE_FIELDS
+from app.utils.response_cache import get_response_cache, compute_etag, not_modified_or_none
 from pydantic import BaseModel
 import logging
 
@@ -14,6 +21,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/schedules", tags=["schedules"])
 
+# 行事曆查詢的最大日期範圍
+MAX_SCHEDULE_RANGE_DAYS = 62
+
 # 排程服務實例（單例模式）
 _scheduler_service: Optional[SchedulerService] = None
 
@@ -46,102 +56,127 @@ class GenerateTodayRequest(BaseModel):
     force: bool = False  # 是否強制重新生成
 
 
-@router.get("", response_model=List[ScheduleResponse])
-async def get_schedules(date: Optional[str] = Query(None, description="日期篩選（YYYY-MM-DD）")):
-    """
-    取得排程列表
-    
-    如果指定日期，返回該日期的排程；否則返回今天的排程
-    """
+def _hk_today() -> date:
+    """香港時間的今天日期"""
+    return datetime.now(ZoneInfo(SCHEDULE_TIMEZONE)).date()
+
+
+def _parse_date(value: str, field: str) -> date:
     try:
-        target_date = date or datetime.now().strftime("%Y-%m-%d")
-        
-        # 取得該日期的主題
-        topic_repo = TopicRepository()
-        try:
-            topics, _ = await topic_repo.list_topics(
-                date=target_date,
-                limit=100
-            )
-        except Exception as e:
-            logger.warning(f"取得日期 {target_date} 的主題失敗: {e}")
-            topics = []  # 如果查詢失敗，使用空列表
-        
-        # 按時間段分組
-        time_slots = {
-            "07:00": {"category": Category.FASHION, "topics": []},
-            "12:00": {"category": Category.FOOD, "topics": []},
-            "18:00": {"category": Category.TREND, "topics": []},
-        }
-        
-        for topic in topics:
-            generated_at = topic.get("generated_at")
-            if isinstance(generated_at, str):
-                try:
-                    generated_at = datetime.fromisoformat(generated_at.replace('Z', '+00:00'))
-                except:
-                    continue
-            
-            if isinstance(generated_at, datetime):
-                hour = generated_at.hour
-                if 6 <= hour < 10:  # 07:00 時間段
-                    time_slots["07:00"]["topics"].append(topic)
-                elif 11 <= hour < 14:  # 12:00 時間段
-                    time_slots["12:00"]["topics"].append(topic)
-                elif 17 <= hour < 20:  # 18:00 時間段
-                    time_slots["18:00"]["topics"].append(topic)
-        
-        # 構建響應
-        schedules = []
-        for time_slot, data in time_slots.items():
-            topics_count = len(data["topics"])
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{field} 日期格式錯誤，應為 YYYY-MM-DD: {value}")
+
+
+def _build_schedule_responses(
+    start_date: date,
+    end_date: date,
+    rows: List[Dict[str, Any]]
+) -> List[ScheduleResponse]:
+    """將聚合結果展開為每日每個時間段的排程（沒有主題的時間段為 pending）"""
+    summary = {(row["date"], row["time_slot"]): row for row in rows}
+    
+    schedules = []
+    current = start_date
+    while current <= end_date:
+        date_str = current.strftime("%Y-%m-%d")
+        for time_slot, _, _ in SCHEDULE_TIME_SLOTS:
+            row = summary.get((date_str, time_slot))
+            topics_count = row["count"] if row else 0
             status = "completed" if topics_count >= 3 else ("processing" if topics_count > 0 else "pending")
-            
-            completed_at = None
-            if topics_count > 0:
-                # 使用最後一個主題的生成時間
-                last_topic = data["topics"][-1]
-                completed_at = last_topic.get("generated_at")
-                if isinstance(completed_at, datetime):
-                    completed_at = completed_at.isoformat()
+            completed_at = row["last_generated_at"] if row else None
+            if isinstance(completed_at, datetime):
+                completed_at = completed_at.isoformat()
             
             schedules.append(ScheduleResponse(
-                date=target_date,
+                date=date_str,
                 timeSlot=time_slot,
                 status=status,
                 topicsCount=topics_count,
                 completedAt=completed_at
             ))
-        
-        return schedules
-        
+        current += timedelta(days=1)
+    
+    return schedules
+
+
+@router.get("", response_model=List[ScheduleResponse])
+async def get_schedules(
+    request: Request,
+    date: Optional[str] = Query(None, description="日期篩選（YYYY-MM-DD，香港時間）")
+):
+    """
+    取得排程列表
+    
+    如果指定日期，返回該日期的排程；否則返回今天（香港時間）的排程
+    """
+    target_date = _parse_date(date, "date") if date else _hk_today()
+    
+    cache = get_response_cache()
+    cached = cache.lookup(request)
+    if cached is not None:
+        return cached
+    
+    try:
+        rows = await TopicRepository().aggregate_schedule_slots(target_date, target_date)
     except Exception as e:
+        # 查詢失敗時返回空排程（pending），前端仍可正常顯示（不放入快取）
         logger.error(f"取得排程失敗: {e}", exc_info=True)
-        # 即使出現異常，也返回空排程列表而不是 500 錯誤
-        # 這樣前端可以正常顯示，只是沒有排程數據
-        return [
-            ScheduleResponse(
-                date=target_date if 'target_date' in locals() else datetime.now().strftime("%Y-%m-%d"),
-                timeSlot="07:00",
-                status="pending",
-                topicsCount=0,
-                completedAt=None
-            ),
-            ScheduleResponse(
-                date=target_date if 'target_date' in locals() else datetime.now().strftime("%Y-%m-%d"),
-                timeSlot="12:00",
-                status="pending",
-                topicsCount=0,
-                completedAt=None
-            ),
-            ScheduleResponse(
-                date=target_date if 'target_date' in locals() else datetime.now().strftime("%Y-%m-%d"),
-                timeSlot="18:00",
-                status="pending",
-                topicsCount=0,
-                completedAt=None
-            ),
-        ]
+        return _build_schedule_responses(target_date, target_date, [])
+    
+    # 排程依主題數量與最後生成時間決定；未指定日期時「今天」會改變，日期也納入 ETag
+    etag = compute_etag(
+        rows,
+        fields=("date", "time_slot", "count", "last_generated_at"),
+        extra=(target_date,)
+    )
+    unchanged = not_modified_or_none(request, etag)
+    if unchanged is not None:
+        return unchanged
+    
+    return cache.store(
+        request,
+        _build_schedule_responses(target_date, target_date, rows),
+        etag,
+        ("topics",)
+    )
+
+
+@router.get("/range", response_model=List[ScheduleResponse])
+async def get_schedules_range(
+    start: Optional[str] = Query(None, description="起始日期（YYYY-MM-DD，香港時間）"),
+    end: Optional[str] = Query(None, description="結束日期（YYYY-MM-DD，含）"),
+    month: Optional[str] = Query(None, description="月份（YYYY-MM），指定時忽略 start/end")
+):
+    """
+    取得多日排程摘要（行事曆檢視）
+    
+    以單次聚合查詢返回整段期間每日每個時間段的主題數量與最後完成時間
+    """
+    if month:
+        try:
+            start_date = datetime.strptime(month, "%Y-%m").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"month 格式錯誤，應為 YYYY-MM: {month}")
+        next_month = (start_date.replace(day=28) + timedelta(days=4)).replace(day=1)
+        end_date = next_month - timedelta(days=1)
+    else:
+        today = _hk_today()
+        start_date = _parse_date(start, "start") if start else today.replace(day=1)
+        end_date = _parse_date(end, "end") if end else today
+    
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="結束日期不能早於起始日期")
+    if (end_date - start_date).days >= MAX_SCHEDULE_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"日期範圍最多 {MAX_SCHEDULE_RANGE_DAYS} 天")
+    
+    try:
+        rows = await TopicRepository().aggregate_schedule_slots(start_date, end_date)
+    except Exception as e:
+        logger.error(f"取得排程範圍失敗: {e}", exc_info=True)
+        rows = []
+    
+    return _build_schedule_responses(start_date, end_date, rows)
 
 
 @router.post("/generate", response_model=dict)
@@ -197,7 +232,7 @@ async def generate_today_all_topics(
         # 檢查今日是否已有主題
         topic_repo = TopicRepository()
         today = datetime.now().strftime("%Y-%m-%d")
-        existing_topics, _ = await topic_repo.list_topics(date=today, limit=100)
+        existing_topics, _ = await topic_repo.list_topics(date=today, limit=100, fields=TOPIC_SCHEDULE_FIELDS)
         
         if not request.force and len(existing_topics) >= 9:
             return {
@@ -1,8 +1,9 @@
 """
 Topics API 端點
 """
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Query, Path
+import asyncio
+from typing import Any, Dict, Optional, Union
+from fastapi import APIRouter, HTTPException, Query, Path, Request
 from app.schemas.topic import (
     TopicCreate,
     TopicUpdate,
@@ -10,12 +11,18 @@ from app.schemas.topic import (
     TopicResponse,
     TopicDetailResponse,
     TopicListResponse,
+    TopicBulkRequest,
+    TopicBulkResponse,
+    TopicBulkItemResult,
 )
 from app.schemas.common import PaginationResponse, ErrorResponse
 from app.services.repositories.topic_repository import TopicRepository
 from app.services.repositories.content_repository import ContentRepository
 from app.services.repositories.image_repository import ImageRepository
+from app.services.repositories.projections import TOPIC_LIST_FIELDS
 from app.models.topic import Category, Status
+from app.utils.response_cache import get_response_cache, compute_etag, not_modified_or_none, ETAG_FIELDS
+from app.utils.serialization import project
 from bson import ObjectId
 from datetime import datetime
 import logging
@@ -24,21 +31,33 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/topics", tags=["topics"])
 
+# 主題回應包含內容字數與圖片數量：三個集合任一寫入時快取失效
+TOPIC_CACHE_TAGS = ("topics", "contents", "images")
+
 # Repository 實例
 topic_repo = TopicRepository()
 content_repo = ContentRepository()
 image_repo = ImageRepository()
 
 
-def _convert_to_response(topic_doc: dict) -> TopicResponse:
-    """將 MongoDB 文檔轉換為 TopicResponse"""
+def _convert_to_response(topic_doc: dict, trusted: bool = False) -> Union[TopicResponse, Dict[str, Any]]:
+    """
+    將 MongoDB 文檔轉換為 TopicResponse
+    
+    Args:
+        topic_doc: 主題文件
+        trusted: 文件已在寫入時驗證，直接取出回應欄位返回 dict（略過建立與驗證模型）
+    """
     # 移除 MongoDB 的 _id
     topic_doc.pop("_id", None)
+    if trusted:
+        return project(TopicResponse, topic_doc)
     return TopicResponse(**topic_doc)
 
 
 @router.get("", response_model=TopicListResponse)
 async def list_topics(
+    request: Request,
     category: Optional[Category] = Query(None, description="分類篩選"),
     status: Optional[Status] = Query(None, description="狀態篩選"),
     date: Optional[str] = Query(None, description="日期篩選（YYYY-MM-DD）"),
@@ -53,6 +72,11 @@ async def list_topics(
     
     支援篩選、搜尋、分頁和排序
     """
+    cache = get_response_cache()
+    cached = cache.lookup(request)
+    if cached is not None:
+        return cached
+    
     try:
         topics, total = await topic_repo.list_topics(
             category=category,
@@ -62,60 +86,125 @@ async def list_topics(
             page=page,
             limit=limit,
             sort=sort,
-            order=order
+            order=order,
+            fields=TOPIC_LIST_FIELDS
         )
         
+        # 圖片數量和字數：整頁各一次批次查詢並行執行（如果查詢失敗，使用默認值）。
+        # 圖片與內容寫入不會更新主題的 updated_at，兩者必須參與 ETag 計算，否則會誤回 304
+        topic_ids = [topic["id"] for topic in topics]
+        image_counts, word_counts = await asyncio.gather(
+            image_repo.count_by_topic_ids(topic_ids),
+            content_repo.get_word_counts_by_topic_ids(topic_ids),
+            return_exceptions=True
+        )
+        if isinstance(image_counts, Exception):
+            logger.warning(f"取得主題圖片數量失敗: {image_counts}")
+            image_counts = {}
+        if isinstance(word_counts, Exception):
+            logger.warning(f"取得主題內容字數失敗: {word_counts}")
+            word_counts = {}
+        for topic in topics:
+            topic["image_count"] = image_counts.get(topic["id"], 0)
+            topic["word_count"] = word_counts.get(topic["id"], 0)
+        
+        # 資料未變更時直接返回 304，不建立回應模型
+        etag = compute_etag(topics, fields=ETAG_FIELDS + ("image_count", "word_count"), extra=(total,))
+        unchanged = not_modified_or_none(request, etag)
+        if unchanged is not None:
+            return unchanged
+        
         # 轉換為回應格式
         topic_responses = []
         for topic in topics:
             try:
-                # 取得圖片數量和字數（如果查詢失敗，使用默認值）
-                try:
-                    image_count = await image_repo.count_by_topic_id(topic["id"])
-                except Exception as e:
-                    logger.warning(f"取得主題 {topic['id']} 的圖片數量失敗: {e}")
-                    image_count = 0
-                
-                try:
-                    content = await content_repo.get_content_by_topic_id(topic["id"])
-                    word_count = content.get("word_count", 0) if content else 0
-                except Exception as e:
-                    logger.warning(f"取得主題 {topic['id']} 的內容失敗: {e}")
-                    word_count = 0
-                
-                topic["image_count"] = image_count
-                topic["word_count"] = word_count
-                topic_responses.append(_convert_to_response(topic))
+                topic_responses.append(_convert_to_response(topic, trusted=True))
             except Exception as e:
-                logger.warning(f"處理主題 {topic.get('id', 'unknown')} 時發生錯誤: {e}")
                 # 即使處理單個主題失敗，也繼續處理其他主題
-                # 使用默認值
-                topic["image_count"] = 0
-                topic["word_count"] = 0
-                try:
-                    topic_responses.append(_convert_to_response(topic))
-                except Exception as e2:
-                    logger.error(f"無法轉換主題 {topic.get('id', 'unknown')} 為回應格式: {e2}")
-                    continue
+                logger.error(f"無法轉換主題 {topic.get('id', 'unknown')} 為回應格式: {e}")
+                continue
         
         pagination = PaginationResponse.create(page, limit, total)
         
-        return TopicListResponse(
-            data=topic_responses,
-            pagination=pagination
+        return cache.store(
+            request,
+            {"data": topic_responses, "pagination": pagination},
+            etag,
+            TOPIC_CACHE_TAGS
         )
     except Exception as e:
         logger.error(f"取得主題列表失敗: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/bulk", response_model=TopicBulkResponse)
+async def bulk_topic_operation(request: TopicBulkRequest):
+    """
+    批次主題操作
+    
+    - status：批次更新狀態（例如批次確認）
+    - soft_delete：批次軟刪除（狀態設為 deleted）
+    - hard_delete：批次硬刪除，同時刪除內容、版本歷史與圖片
+    
+    每個集合只執行一次 update_many / delete_many，並返回每個主題的結果
+    """
+    try:
+        deleted_contents = 0
+        deleted_images = 0
+        
+        if request.operation == "hard_delete":
+            outcomes = await topic_repo.bulk_hard_delete(request.ids)
+            deleted_ids = [topic_id for topic_id, outcome in outcomes.items() if outcome == "deleted"]
+            if deleted_ids:
+                deleted_contents = await content_repo.delete_by_topic_ids(deleted_ids)
+                deleted_images = await image_repo.delete_by_topic_ids(deleted_ids)
+                
+                # 移除互動寫入緩衝中的主題分類快取
+                from app.services.repositories.interaction_buffer import get_interaction_buffer
+                category_cache = get_interaction_buffer().category_cache
+                for topic_id in deleted_ids:
+                    category_cache.invalidate(topic_id)
+        else:
+            status = request.status if request.operation == "status" else Status.DELETED
+            outcomes = await topic_repo.bulk_update_status(request.ids, status)
+        
+        results = [
+            TopicBulkItemResult(id=topic_id, outcome=outcome)
+            for topic_id, outcome in outcomes.items()
+        ]
+        matched = sum(1 for result in results if result.outcome != "not_found")
+        modified = sum(1 for result in results if result.outcome in ("updated", "deleted"))
+        
+        logger.info(
+            f"批次主題操作 {request.operation}: {len(results)} 個主題，"
+            f"存在 {matched} 個，變更 {modified} 個"
+        )
+        
+        return TopicBulkResponse(
+            operation=request.operation,
+            matched=matched,
+            modified=modified,
+            results=results,
+            deleted_contents=deleted_contents,
+            deleted_images=deleted_images
+        )
+    except Exception as e:
+        logger.error(f"批次主題操作失敗: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{topic_id}", response_model=TopicDetailResponse)
-async def get_topic_detail(topic_id: str = Path(..., description="主題 ID")):
+async def get_topic_detail(request: Request, topic_id: str = Path(..., description="主題 ID")):
     """
     取得主題詳情
     
     包含內容和圖片資訊
     """
+    cache = get_response_cache()
+    cached = cache.lookup(request)
+    if cached is not None:
+        return cached
+    
     try:
         topic = await topic_repo.get_topic_by_id(topic_id)
         if not topic:
@@ -124,20 +213,26 @@ async def get_topic_detail(topic_id: str = Path(..., description="主題 ID")):
                 detail=f"主題不存在: {topic_id}"
             )
         
-        # 取得內容
+        # 取得內容與圖片列表
         content = await content_repo.get_content_by_topic_id(topic_id)
+        images = await image_repo.get_images_by_topic_id(topic_id)
+        
+        # 資料未變更時直接返回 304，不建立回應模型
+        etag = compute_etag([topic, content or {}, *images])
+        unchanged = not_modified_or_none(request, etag)
+        if unchanged is not None:
+            return unchanged
+        
         content_response = None
         if content:
             try:
                 from app.schemas.content import ContentResponse
                 from app.api.v1.contents import _convert_to_response
-                content_response = _convert_to_response(content)
+                content_response = _convert_to_response(content, trusted=True)
             except Exception as e:
                 logger.warning(f"轉換內容資料失敗，跳過: {e}, content keys: {list(content.keys()) if isinstance(content, dict) else 'not dict'}")
                 content_response = None
         
-        # 取得圖片列表
-        images = await image_repo.get_images_by_topic_id(topic_id)
         from app.schemas.image import ImageResponse
         image_responses = []
         for image in images:
@@ -150,7 +245,7 @@ async def get_topic_detail(topic_id: str = Path(..., description="主題 ID")):
                     image["order"] = 0
                 if "license" not in image or not image.get("license"):
                     image["license"] = "Unknown"
-                image_responses.append(ImageResponse(**image))
+                image_responses.append(project(ImageResponse, image))
             except Exception as e:
                 logger.warning(f"處理圖片資料失敗，跳過: {e}, image keys: {list(image.keys()) if isinstance(image, dict) else 'not dict'}")
                 continue
@@ -197,7 +292,7 @@ async def get_topic_detail(topic_id: str = Path(..., description="主題 ID")):
                         else:
                             from datetime import datetime
                             source["fetched_at"] = datetime.utcnow()
-                    processed_sources.append(SourceInfo(**source))
+                    processed_sources.append(project(SourceInfo, source))
                 except Exception as e:
                     logger.warning(f"處理 source 資料失敗，跳過: {e}")
                     continue
@@ -222,12 +317,14 @@ async def get_topic_detail(topic_id: str = Path(..., description="主題 ID")):
                 except:
                     logger.warning(f"無法轉換 status: {topic.get('status')}")
             
-            response = TopicDetailResponse(
-                **topic,
+            # 資料已在寫入時驗證：直接取出回應欄位，略過建立與驗證模型
+            response = project(
+                TopicDetailResponse,
+                topic,
                 content=content_response,
                 images=image_responses
             )
-            return response
+            return cache.store(request, response, etag, TOPIC_CACHE_TAGS)
         except Exception as e:
             logger.error(f"建立 TopicDetailResponse 失敗: {e}")
             logger.error(f"Topic 資料: {topic}")
@@ -0,0 +1,53 @@
+"""
+互動彙總回填腳本
+將啟用彙總前的歷史互動計入每日彙總（interaction_rollups）
+
+使用方式：
+    python -m app.backfill_interaction_rollups                      # 回填所有顧客（可在服務運行時執行）
+    python -m app.backfill_interaction_rollups --user-id X          # 只回填指定顧客
+    python -m app.backfill_interaction_rollups --rebuild [--user-id X]  # 從全部互動記錄重建（需停止寫入互動）
+"""
+import argparse
+import asyncio
+import logging
+import time
+from app.database import connect_to_mongo, close_mongo_connection
+from app.db_init import create_indexes
+from app.services.repositories.interaction_rollup_repository import InteractionRollupRepository
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def backfill_rollups(user_id: str = None, rebuild: bool = False):
+    """
+    回填或重建互動彙總
+
+    Args:
+        user_id: 只處理指定顧客（None 表示全部）
+        rebuild: 從全部互動記錄重建（取代現有彙總）
+    """
+    try:
+        await connect_to_mongo()
+        
+        # $merge 需要彙總鍵的唯一索引
+        await create_indexes()
+        
+        start = time.perf_counter()
+        repo = InteractionRollupRepository()
+        count = await (repo.rebuild(user_id) if rebuild else repo.backfill(user_id))
+        logger.info(f"✅ 互動彙總{'重建' if rebuild else '回填'}完成: {count} 個彙總文件，耗時 {time.perf_counter() - start:.2f} 秒")
+        
+    except Exception as e:
+        logger.error(f"❌ 互動彙總{'重建' if rebuild else '回填'}失敗: {e}")
+        raise
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="將歷史互動計入每日互動彙總")
+    parser.add_argument("--user-id", default=None, help="只處理指定顧客")
+    parser.add_argument("--rebuild", action="store_true", help="從全部互動記錄重建彙總（需停止寫入互動）")
+    args = parser.parse_args()
+    asyncio.run(backfill_rollups(args.user_id, args.rebuild))
@@ -68,6 +68,42 @@ class Settings(BaseSettings):
     GOOGLE_API_KEY: str = ""
     GOOGLE_SEARCH_ENGINE_ID: str = ""  # Custom Search Engine ID
     
+    # 圖片縮圖代理快取配置
+    IMAGE_CACHE_DIR: str = "cache/images"  # 磁碟快取目錄（原圖與縮圖）
+    IMAGE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 快取總大小上限，超過時依 LRU 淘汰
+    IMAGE_CACHE_MAX_SOURCE_BYTES: int = 20 * 1024 * 1024  # 單張原圖下載上限
+    THUMBNAIL_WORKERS: int = 2  # 產生縮圖的行程數
+    
+    # 互動記錄寫入緩衝配置
+    INTERACTION_BUFFER_MAX_BATCH: int = 500  # 累積多少筆時立即批次寫入
+    INTERACTION_BUFFER_FLUSH_INTERVAL: float = 1.0  # 最長寫入間隔（秒）
+    INTERACTION_STORAGE_MODE: str = "standard"  # standard（一般集合）或 timeseries（MongoDB 5.0+ 時間序列集合）
+    INTERACTION_TTL_DAYS: int = 0  # 互動記錄保留天數（0 表示不過期）
+    CONTENT_VERSION_COMPRESSION: bool = True  # 版本歷史以 zlib 壓縮儲存
+    CONTENT_VERSION_SNAPSHOT_INTERVAL: int = 10  # 每幾個版本存一次完整快照（其餘存相對前一版本的差異）
+    
+    # API 回應快取配置（主題、內容、圖片、排程等讀取端點）
+    RESPONSE_CACHE_TTL: float = 5.0  # 序列化回應的快取時間（秒，0 表示只使用 ETag 不快取回應）
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000  # 最多快取的回應數量
+    
+    # 回應壓縮配置（依 Accept-Encoding 使用 gzip / Brotli）
+    COMPRESSION_ENABLED: bool = True  # 是否壓縮回應
+    COMPRESSION_MIN_SIZE: int = 1024  # 小於此大小（位元組）的回應不壓縮
+    COMPRESSION_GZIP_LEVEL: int = 5  # gzip 壓縮等級（1-9，越高越小但越耗 CPU）
+    COMPRESSION_BROTLI_QUALITY: int = 4  # Brotli 壓縮品質（0-11，需安裝 brotli）
+    
+    # 監控配置
+    METRICS_ENABLED: bool = True  # 是否記錄 HTTP 請求指標並提供 GET /metrics（Prometheus 格式）
+    
+    # 工作流追蹤配置（span 格式與 OpenTelemetry 相容，有安裝 opentelemetry-sdk 時使用 OpenTelemetry）
+    TRACING_EXPORTER: str = "none"  # none（停用）、console（標準輸出）或 file（每行一個 span 的 JSON，不會輪替，僅供排查時啟用）
+    TRACING_FILE: str = "logs/traces.jsonl"  # file 模式的輸出檔案
+    TRACING_SERVICE_NAME: str = "ai-agent-webapp"  # span 的 service.name
+    
+    # MongoDB 指令監控配置
+    MONGODB_SLOW_QUERY_MS: float = 100  # 超過此時間（毫秒）的指令記錄為慢查詢（記錄去除數值的查詢條件結構，0 表示停用）
+    MONGODB_EXPLAIN_SAMPLE_RATE: float = 0.01  # 查詢指令抽樣執行 explain 檢查全表掃描（COLLSCAN）的比例（0 表示停用）
+    
     # 安全配置
     # API Key 認證（可選，如果未設定則不啟用認證）
     API_KEY: str = ""
@@ -75,6 +111,9 @@ class Settings(BaseSettings):
     # 請求限流配置
     RATE_LIMIT_PER_MINUTE: int = 60
     RATE_LIMIT_PER_HOUR: int = 1000
+    RATE_LIMIT_BACKEND: str = "memory"  # memory（單一行程）、mongodb 或 redis（多個 worker / 副本共享計數）
+    RATE_LIMIT_SYNC_INTERVAL: float = 1.0  # 共享後端同步本地計數的間隔（秒）
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"  # redis 後端連線位址（Redis 相容服務皆可）
     
     # CORS 配置
     # 支援格式：
@@ -105,6 +144,9 @@ class Settings(BaseSettings):
     # 日誌配置
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/app.log"
+    LOG_FORMAT: str = "text"  # text 或 json（每行一筆 JSON，方便日誌收集系統解析）
+    LOG_RATE_LIMIT: float = 0  # 每個 logger 每秒最多輸出幾筆 INFO 以下日誌（0 表示不限制，WARNING 以上與存取日誌不受影響）
+    LOG_QUEUE_SIZE: int = 10000  # 控制台日誌佇列上限（滿時捨棄 INFO 以下日誌，WARNING 以上最多等待 1 秒）
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -4,6 +4,7 @@ MongoDB 資料庫連接管理
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 from app.config import settings
+from app.db_monitoring import CommandTracingListener, get_command_metrics_listener
 import logging
 
 # 設定日誌
@@ -29,12 +30,15 @@ async def connect_to_mongo():
     
     try:
         # 建立 MongoDB 客戶端
+        command_listener = get_command_metrics_listener()
         client = AsyncIOMotorClient(
             settings.MONGODB_URL,
             serverSelectionTimeoutMS=5000,  # 5 秒超時
             connectTimeoutMS=5000,
             socketTimeoutMS=5000,
+            event_listeners=[command_listener, CommandTracingListener()],  # 指令耗時、慢查詢與全表掃描統計、工作流寫入追蹤
         )
+        command_listener.attach(client)  # 抽樣 explain 使用同一個客戶端
         
         # 測試連接
         await client.admin.command("ping")
@@ -6,6 +6,7 @@ import asyncio
 import logging
 from app.database import connect_to_mongo, get_database, close_mongo_connection
 from app.config import settings
+from app.services.repositories.interaction_storage import active_mode, ensure_interactions_collection
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -49,6 +50,17 @@ async def create_indexes():
         
         logger.info("✅ Contents 集合索引建立完成")
         
+        # ContentVersions 集合索引
+        content_versions_collection = db["content_versions"]
+        
+        # 唯一索引：content_id + version（重建版本時的區間查詢）
+        await content_versions_collection.create_index([("content_id", 1), ("version", 1)], unique=True)
+        
+        # 複合索引：topic_id + version（版本歷史分頁）
+        await content_versions_collection.create_index([("topic_id", 1), ("version", -1)])
+        
+        logger.info("✅ ContentVersions 集合索引建立完成")
+        
         # Images 集合索引
         images_collection = db["images"]
         
@@ -61,6 +73,15 @@ async def create_indexes():
         # 來源索引：source
         await images_collection.create_index([("source", 1)])
         
+        # 去重索引：topic_id + canonical_url（正規化後的 URL）
+        await images_collection.create_index([("topic_id", 1), ("canonical_url", 1)])
+        
+        # 近似重複索引：感知雜湊分桶（多鍵索引，用於漢明距離查詢）
+        await images_collection.create_index([("phash_bands", 1)], sparse=True)
+        
+        # 驗證任務索引：verified_at（找出未驗證或需重新驗證的圖片）
+        await images_collection.create_index([("verified_at", 1)])
+        
         logger.info("✅ Images 集合索引建立完成")
         
         # UserPreferences 集合索引
@@ -71,6 +92,26 @@ async def create_indexes():
         
         logger.info("✅ UserPreferences 集合索引建立完成")
         
+        # Interactions 集合（一般集合或時間序列集合）與索引：
+        # 複合索引 user_id + created_at（顧客互動歷史查詢、彙總回填），並依設定啟用自動過期
+        await ensure_interactions_collection(db)
+        
+        logger.info(f"✅ Interactions 集合索引建立完成（{active_mode()}）")
+        
+        # InteractionRollups 集合索引
+        interaction_rollups_collection = db["interaction_rollups"]
+        
+        # 唯一索引：user_id + day + category（遞增更新的 upsert 鍵，$merge 也需要）
+        await interaction_rollups_collection.create_index(
+            [("user_id", 1), ("day", 1), ("category", 1)],
+            unique=True
+        )
+        
+        # 唯一索引：user_id（歷史互動回填完成標記，"*" 表示全部顧客）
+        await db["interaction_rollup_backfills"].create_index("user_id", unique=True)
+        
+        logger.info("✅ InteractionRollups 集合索引建立完成")
+        
         # AuditLogs 集合索引
         audit_logs_collection = db["audit_logs"]
         
@@ -85,6 +126,14 @@ async def create_indexes():
         
         logger.info("✅ AuditLogs 集合索引建立完成")
         
+        # RateLimits 集合索引（RATE_LIMIT_BACKEND=mongodb 時的共享計數）
+        rate_limits_collection = db["rate_limits"]
+        
+        # TTL 索引：計數文件在 expires_at 之後自動刪除
+        await rate_limits_collection.create_index([("expires_at", 1)], expireAfterSeconds=0)
+        
+        logger.info("✅ RateLimits 集合索引建立完成")
+        
         logger.info("🎉 所有索引建立完成！")
         
     except Exception as e:
@@ -0,0 +1,365 @@
+"""
+MongoDB 指令監控
+透過 pymongo 的 CommandListener 記錄每個集合、每種指令的執行時間，記錄慢查詢（只記錄去除數值的查詢條件結構），
+抽樣執行 explain 統計全表掃描（COLLSCAN），並為工作流中的寫入指令建立追蹤 span
+
+Motor 在執行緒池中執行 pymongo 指令，所以監聽器的回呼都在執行緒池中執行；
+explain 以 run_coroutine_threadsafe 排入事件迴圈，一次只執行一個，同一查詢結構在間隔時間內只檢查一次
+"""
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import monitoring
+
+from app.config import settings
+from app.utils.metrics import (
+    MONGODB_COLLSCANS,
+    MONGODB_COMMAND_DURATION,
+    MONGODB_EXPLAIN_SAMPLES,
+    MONGODB_SLOW_COMMANDS,
+)
+from app.utils.tracing import end_span, start_child_span
+
+logger = logging.getLogger(__name__)
+
+# 連線握手、健康檢查與監控本身的 explain，不列入統計
+IGNORED_COMMANDS = frozenset({
+    "hello", "isMaster", "ismaster", "ping", "buildInfo",
+    "saslStart", "saslContinue", "endSessions", "explain",
+})
+
+# 寫入指令（bulk_write 也會拆成這些指令）
+WRITE_COMMANDS = frozenset({"insert", "update", "delete", "findAndModify"})
+
+# 各指令中描述查詢條件的欄位（sort 與 distinct 的 key 不含使用者資料，保留原值）
+SHAPE_FIELDS = {
+    "find": ("filter", "sort"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+}
+UNREDACTED_FIELDS = frozenset({"sort", "key"})
+
+# 不帶入 explain 的欄位（工作階段、交易與寫入確認）
+EXPLAIN_EXCLUDED_FIELDS = frozenset({"lsid", "txnNumber", "autocommit", "startTransaction", "writeConcern"})
+
+EXPLAIN_SHAPE_INTERVAL = 600  # 同一查詢結構重新 explain 的最短間隔（秒）
+MAX_EXPLAINED_SHAPES = 1000  # 最多記住幾個已 explain 的查詢結構
+RECENT_LIMIT = 50  # db-stats 保留的最近慢查詢與全表掃描筆數
+
+PendingCommand = Tuple[str, str, str, Dict[str, Any]]
+
+
+def _collection_name(command_name: str, command: Dict) -> str:
+    """取得指令作用的集合名稱"""
+    if command_name == "getMore":
+        collection = command.get("collection")
+    else:
+        collection = command.get(command_name)
+    return collection if isinstance(collection, str) else ""
+
+
+def redact(value: Any) -> Any:
+    """把查詢條件中的數值換成 "?"，只保留欄位與運算子結構（陣列中相同結構只保留一個）"""
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shape = redact(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    return "?"
+
+
+def query_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    取得指令的查詢條件結構（數值已去除）
+
+    Args:
+        command_name: 指令名稱
+        command: 指令內容
+
+    Returns:
+        例如 {"filter": {"category": "?", "status": {"$in": ["?"]}}, "sort": {"created_at": -1}}
+    """
+    shape = {}
+    for field in SHAPE_FIELDS.get(command_name, ()):
+        value = command.get(field)
+        if value is None:
+            continue
+        if field in UNREDACTED_FIELDS:
+            shape[field] = value
+        elif field in ("updates", "deletes"):
+            shape["q"] = redact([statement.get("q") for statement in value])
+        else:
+            shape[field] = redact(value)
+    return shape
+
+
+def _explain_command(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    """由原始指令建立 explain 的內容（update / delete 只取第一個語句）"""
+    explained = {
+        key: value for key, value in command.items()
+        if not key.startswith("$") and key not in EXPLAIN_EXCLUDED_FIELDS
+    }
+    if command_name in ("update", "delete"):
+        field = "updates" if command_name == "update" else "deletes"
+        explained[field] = list(explained.get(field, []))[:1]
+    return explained
+
+
+def has_collscan(node: Any, in_winning_plan: bool = False) -> bool:
+    """explain 結果的最佳計畫（winningPlan）中是否有全表掃描"""
+    if isinstance(node, dict):
+        if in_winning_plan and node.get("stage") == "COLLSCAN":
+            return True
+        return any(
+            has_collscan(value, in_winning_plan or key == "winningPlan")
+            for key, value in node.items()
+            if key != "rejectedPlans"
+        )
+    if isinstance(node, list):
+        return any(has_collscan(item, in_winning_plan) for item in node)
+    return False
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """記錄 MongoDB 指令執行時間、慢查詢與抽樣 explain 的全表掃描"""
+
+    def __init__(self, slow_query_ms: float = 100, explain_sample_rate: float = 0.0):
+        """
+        初始化監聽器
+
+        Args:
+            slow_query_ms: 慢查詢門檻（毫秒，0 表示停用）
+            explain_sample_rate: 查詢指令抽樣 explain 的比例（0 表示停用）
+        """
+        self.slow_query_ms = slow_query_ms
+        self.explain_sample_rate = explain_sample_rate
+        # request_id → (集合, 指令, 資料庫, 指令內容)
+        self._pending: Dict[int, PendingCommand] = {}
+        self.recent_slow = deque(maxlen=RECENT_LIMIT)
+        self.recent_collscans = deque(maxlen=RECENT_LIMIT)
+        self.slow_commands = 0
+        self.explain_samples = 0
+        self.explain_failures = 0
+        self.collscans = 0
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._explaining = False
+        self._explained_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, client) -> None:
+        """設定執行 explain 使用的客戶端（在事件迴圈中呼叫）"""
+        self._client = client
+        self._loop = asyncio.get_running_loop()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        self._pending[event.request_id] = (
+            _collection_name(event.command_name, event.command),
+            event.command_name,
+            event.database_name,
+            event.command,
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pending = self._record(event, "success")
+        if pending is not None and self.explain_sample_rate > 0 and pending[1] in SHAPE_FIELDS:
+            if random.random() < self.explain_sample_rate:
+                self._schedule_explain(*pending)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event, "error")
+
+    def _record(self, event, outcome: str) -> Optional[PendingCommand]:
+        pending = self._pending.pop(event.request_id, None)
+        if pending is None:
+            return None
+        collection, command_name, _, command = pending
+        MONGODB_COMMAND_DURATION.observe(event.duration_micros / 1_000_000, (collection, command_name, outcome))
+
+        duration_ms = event.duration_micros / 1000
+        if self.slow_query_ms and duration_ms >= self.slow_query_ms:
+            shape = query_shape(command_name, command)
+            MONGODB_SLOW_COMMANDS.inc((collection, command_name))
+            self.slow_commands += 1
+            self.recent_slow.append({
+                "time": datetime.utcnow().isoformat() + "Z",
+                "collection": collection,
+                "command": command_name,
+                "duration_ms": round(duration_ms, 1),
+                "outcome": outcome,
+                "shape": shape,
+            })
+            logger.warning(
+                f"MongoDB 慢查詢: {collection}.{command_name} {duration_ms:.1f} ms "
+                f"shape={json.dumps(shape, ensure_ascii=False, default=str)}"
+            )
+        return pending
+
+    def _schedule_explain(self, collection: str, command_name: str, database: str, command: Dict[str, Any]) -> None:
+        """排入 explain（已有 explain 執行中或同一查詢結構最近已檢查時略過）"""
+        if self._client is None or self._loop is None or self._loop.is_closed():
+            return
+        shape = query_shape(command_name, command)
+        key = f"{collection}.{command_name}:{json.dumps(shape, sort_keys=True, default=str)}"
+        now = time.monotonic()
+        with self._lock:
+            if self._explaining or now - self._explained_at.get(key, float("-inf")) < EXPLAIN_SHAPE_INTERVAL:
+                return
+            if len(self._explained_at) >= MAX_EXPLAINED_SHAPES:
+                self._explained_at.clear()
+            self._explained_at[key] = now
+            self._explaining = True
+        coroutine = self._explain(collection, command_name, database, _explain_command(command_name, command), shape)
+        try:
+            asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        except RuntimeError:
+            # 事件迴圈已關閉
+            coroutine.close()
+            self._explaining = False
+
+    async def _explain(
+        self,
+        collection: str,
+        command_name: str,
+        database: str,
+        command: Dict[str, Any],
+        shape: Dict[str, Any]
+    ) -> None:
+        """執行 explain（queryPlanner，不實際執行查詢）並統計全表掃描"""
+        try:
+            result = await self._client[database].command({"explain": command, "verbosity": "queryPlanner"})
+        except Exception as e:
+            self.explain_failures += 1
+            logger.debug(f"explain {collection}.{command_name} 失敗: {e}")
+            return
+        finally:
+            self._explaining = False
+
+        MONGODB_EXPLAIN_SAMPLES.inc((collection, command_name))
+        self.explain_samples += 1
+        if has_collscan(result):
+            MONGODB_COLLSCANS.inc((collection, command_name))
+            self.collscans += 1
+            self.recent_collscans.append({
+                "time": datetime.utcnow().isoformat() + "Z",
+                "collection": collection,
+                "command": command_name,
+                "shape": shape,
+            })
+            logger.warning(
+                f"MongoDB 全表掃描（COLLSCAN）: {collection}.{command_name} "
+                f"shape={json.dumps(shape, ensure_ascii=False, default=str)}"
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得統計（供 /api/v1/health/db-stats 使用）
+
+        Returns:
+            各集合、各指令的次數與耗時（毫秒），以及最近的慢查詢與全表掃描
+        """
+        commands: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for entry in MONGODB_COMMAND_DURATION.snapshot():
+            labels = entry["labels"]
+            stats = commands.setdefault((labels["collection"], labels["command"]), {
+                "collection": labels["collection"],
+                "command": labels["command"],
+                "count": 0,
+                "errors": 0,
+                "total_ms": 0.0,
+                "p50_ms": None,
+                "p95_ms": None,
+            })
+            stats["count"] += entry["count"]
+            stats["total_ms"] += entry["sum"] * 1000
+            if labels["outcome"] == "error":
+                stats["errors"] += entry["count"]
+            else:
+                stats["p50_ms"] = entry["p50"] * 1000 if entry["p50"] is not None else None
+                stats["p95_ms"] = entry["p95"] * 1000 if entry["p95"] is not None else None
+
+        for stats in commands.values():
+            stats["avg_ms"] = round(stats["total_ms"] / stats["count"], 2) if stats["count"] else 0.0
+            stats["total_ms"] = round(stats["total_ms"], 1)
+
+        return {
+            "slow_query_ms": self.slow_query_ms,
+            "explain_sample_rate": self.explain_sample_rate,
+            "slow_commands": self.slow_commands,
+            "explain_samples": self.explain_samples,
+            "explain_failures": self.explain_failures,
+            "collscans": self.collscans,
+            "commands": sorted(commands.values(), key=lambda stats: stats["total_ms"], reverse=True),
+            "recent_slow": list(self.recent_slow),
+            "recent_collscans": list(self.recent_collscans),
+        }
+
+
+class CommandTracingListener(monitoring.CommandListener):
+    """
+    為工作流中的 MongoDB 寫入指令建立 span
+
+    Motor 在執行緒池執行指令時會複製呼叫端的 contextvars，所以回呼中取得的目前 span 就是發出指令的工作流 span；
+    沒有目前 span（一般 API 請求）時不記錄
+    """
+
+    def __init__(self):
+        # request_id → span
+        self._spans: Dict[int, object] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name not in WRITE_COMMANDS:
+            return
+        collection = _collection_name(event.command_name, event.command)
+        child = start_child_span(
+            f"mongodb.{event.command_name} {collection}",
+            **{
+                "db.system": "mongodb",
+                "db.namespace": event.database_name,
+                "db.collection.name": collection,
+                "db.operation.name": event.command_name,
+            }
+        )
+        if child is not None:
+            self._spans[event.request_id] = child
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        child = self._spans.pop(event.request_id, None)
+        if child is not None:
+            end_span(child)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        child = self._spans.pop(event.request_id, None)
+        if child is not None:
+            end_span(child, str(event.failure.get("errmsg", "")) if isinstance(event.failure, dict) else "failed")
+
+
+_command_metrics_listener: Optional[CommandMetricsListener] = None
+
+
+def get_command_metrics_listener() -> CommandMetricsListener:
+    """取得指令監控監聽器單例"""
+    global _command_metrics_listener
+    if _command_metrics_listener is None:
+        _command_metrics_listener = CommandMetricsListener(
+            slow_query_ms=settings.MONGODB_SLOW_QUERY_MS,
+            explain_sample_rate=settings.MONGODB_EXPLAIN_SAMPLE_RATE,
+        )
+    return _command_metrics_listener
@@ -0,0 +1,66 @@
+"""
+資料匯入腳本
+匯入 GET /api/v1/export 產生的 NDJSON 檔案（.ndjson 或 .ndjson.gz），用於還原或建立大量範例資料
+
+使用方式：
+    python -m app.import_data topics.ndjson
+    python -m app.import_data topics.ndjson.gz --batch-size 5000
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+from app.database import connect_to_mongo, close_mongo_connection
+from app.services.repositories.bulk_importer import BulkImporter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 每匯入多少行輸出一次進度
+PROGRESS_INTERVAL = 10000
+
+
+async def import_file(path: str, batch_size: int = 1000, rebuild_indexes: bool = True):
+    """
+    匯入 NDJSON 檔案
+
+    Args:
+        path: 檔案路徑（.gz 結尾時以 gzip 解壓縮）
+        batch_size: 每批寫入的文件數量
+        rebuild_indexes: 匯入空集合前是否移除次要索引，並在匯入後重建
+    """
+    try:
+        await connect_to_mongo()
+        
+        importer = BulkImporter(batch_size=batch_size, rebuild_indexes=rebuild_indexes)
+        try:
+            await importer.start()
+            
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rb") as file:
+                for line in file:
+                    await importer.add_line(line)
+                    if importer.lines % PROGRESS_INTERVAL == 0:
+                        logger.info(f"已讀取 {importer.lines} 行")
+            
+            stats = await importer.finish()
+        finally:
+            # 匯入失敗時也重建已移除的索引
+            await importer.close()
+        logger.info(f"✅ 匯入完成:\n{json.dumps(stats, ensure_ascii=False, indent=2)}")
+        
+    except Exception as e:
+        logger.error(f"❌ 匯入失敗: {e}")
+        raise
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="匯入 NDJSON 主題資料（含內容與圖片）")
+    parser.add_argument("path", help="NDJSON 檔案路徑（.ndjson 或 .ndjson.gz）")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每批寫入的文件數量")
+    parser.add_argument("--no-rebuild-indexes", action="store_true", help="不移除次要索引（寫入時同時維護索引）")
+    args = parser.parse_args()
+    asyncio.run(import_file(args.path, args.batch_size, not args.no_rebuild_indexes))
@@ -4,88 +4,23 @@ FastAPI 應用入口
 from contextlib import asynccontextmanager
 import asyncio
 import logging
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 from app.config import settings
 from app.database import connect_to_mongo, close_mongo_connection, check_connection
 from app.middleware.auth import APIKeyMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.cors import CustomCORSMiddleware
 from app.middleware.rate_limit import RateLimitMiddleware
-from app.utils.logger import setup_logging
+from app.middleware.rate_limit_backends import create_rate_limit_backend
+from app.utils.serialization import DefaultJSONResponse
+from app.utils.logger import setup_logging, shutdown_logging
+from app.utils.tracing import setup_tracing, shutdown_tracing
 
 logger = logging.getLogger(__name__)
 
 
-class CustomCORSMiddleware(BaseHTTPMiddleware):
-    """自定義 CORS 中間件，確保 CORS header 正確設定"""
-    
-    async def dispatch(self, request: Request, call_next):
-        # 獲取請求來源
-        origin = request.headers.get("origin")
-        
-        # 解析允許的來源列表
-        allowed_origins = settings.CORS_ORIGINS
-        if isinstance(allowed_origins, str):
-            allowed_origins = [o.strip() for o in allowed_origins.split(',') if o.strip()]
-        elif not isinstance(allowed_origins, list):
-            allowed_origins = list(allowed_origins) if allowed_origins else []
-        
-        # 如果沒有設定允許的來源，允許所有來源（開發環境）
-        if not allowed_origins:
-            allowed_origins = ["*"]
-        
-        # 處理 OPTIONS 預檢請求
-        if request.method == "OPTIONS":
-            response = Response(status_code=200)
-            # 對於預檢請求，總是設定 CORS header
-            if "*" in allowed_origins:
-                response.headers["Access-Control-Allow-Origin"] = "*"
-            elif origin and origin in allowed_origins:
-                response.headers["Access-Control-Allow-Origin"] = origin
-            elif origin:
-                # 如果 origin 不在列表中，但仍然允許（開發環境）
-                response.headers["Access-Control-Allow-Origin"] = origin
-                logger.warning(f"⚠️ CORS: 允許未列出的來源 {origin}")
-            else:
-                # 沒有 origin header，使用第一個允許的來源
-                if allowed_origins and allowed_origins[0] != "*":
-                    response.headers["Access-Control-Allow-Origin"] = allowed_origins[0]
-                else:
-                    response.headers["Access-Control-Allow-Origin"] = "*"
-            
-            response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
-            response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization, X-API-Key, Accept"
-            response.headers["Access-Control-Allow-Credentials"] = "true"
-            response.headers["Access-Control-Max-Age"] = "3600"
-            logger.debug(f"✅ CORS preflight 回應: {origin} -> {response.headers.get('Access-Control-Allow-Origin')}")
-            return response
-        
-        # 處理實際請求
-        response = await call_next(request)
-        
-        # 設定 CORS header（確保所有響應都有）
-        if "*" in allowed_origins:
-            response.headers["Access-Control-Allow-Origin"] = "*"
-        elif origin and origin in allowed_origins:
-            response.headers["Access-Control-Allow-Origin"] = origin
-            response.headers["Access-Control-Allow-Credentials"] = "true"
-        elif origin:
-            # 開發環境：允許未列出的來源
-            response.headers["Access-Control-Allow-Origin"] = origin
-            response.headers["Access-Control-Allow-Credentials"] = "true"
-            logger.debug(f"⚠️ CORS: 允許未列出的來源 {origin}")
-        else:
-            # 沒有 origin，使用第一個允許的來源或 *
-            if allowed_origins and allowed_origins[0] != "*":
-                response.headers["Access-Control-Allow-Origin"] = allowed_origins[0]
-            else:
-                response.headers["Access-Control-Allow-Origin"] = "*"
-        
-        response.headers["Access-Control-Expose-Headers"] = "X-RateLimit-Limit, X-RateLimit-Remaining, X-RateLimit-Reset"
-        
-        return response
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -98,6 +33,16 @@ async def lifespan(app: FastAPI):
     setup_logging(
         log_level=settings.LOG_LEVEL,
         log_file=settings.LOG_FILE if settings.ENVIRONMENT != "development" else None,
+        log_format=settings.LOG_FORMAT,
+        rate_limit=settings.LOG_RATE_LIMIT,
+        queue_size=settings.LOG_QUEUE_SIZE,
+    )
+    
+    # 設定工作流追蹤
+    setup_tracing(
+        exporter=settings.TRACING_EXPORTER,
+        file_path=settings.TRACING_FILE,
+        service_name=settings.TRACING_SERVICE_NAME,
     )
     
     # 1. 環境變數驗證（強制檢查，缺失則阻止啟動）
@@ -160,6 +105,21 @@ async def lifespan(app: FastAPI):
     # 連接 MongoDB
     await connect_to_mongo()
     
+    # 確保互動集合符合儲存模式（時間序列集合必須在第一次寫入前建立）
+    try:
+        from app.database import get_database
+        from app.services.repositories.interaction_storage import ensure_interactions_collection
+        await ensure_interactions_collection(await get_database())
+    except Exception as e:
+        logger.error(f"建立互動集合失敗: {e}")
+    
+    # 啟動互動記錄寫入緩衝
+    from app.services.repositories.interaction_buffer import get_interaction_buffer
+    get_interaction_buffer().start()
+    
+    # 啟動限流計數同步（共享後端才有背景任務）
+    rate_limit_backend.start()
+    
     # 調試：輸出 CORS 設定
     logger.info(f"CORS_ORIGINS 設定值: {settings.CORS_ORIGINS}")
     logger.info(f"CORS_ORIGINS 類型: {type(settings.CORS_ORIGINS)}")
@@ -220,8 +180,34 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"停止排程服務失敗: {e}")
     
+    # 寫入緩衝中剩餘的互動記錄（需在斷開 MongoDB 之前）
+    try:
+        await get_interaction_buffer().stop()
+    except Exception as e:
+        logger.error(f"寫入剩餘互動記錄失敗: {e}")
+    
+    # 寫入尚未同步的限流計數
+    try:
+        await rate_limit_backend.stop()
+    except Exception as e:
+        logger.error(f"停止限流後端失敗: {e}")
+    
+    # 關閉縮圖產生行程池
+    from app.services.images.thumbnail_cache import shutdown_thumbnail_cache
+    shutdown_thumbnail_cache()
+    
+    # 關閉 DuckDuckGo 共用連線池與備援執行緒池
+    from app.services.images.duckduckgo import close_duckduckgo_resources
+    await close_duckduckgo_resources()
+    
     # 斷開 MongoDB 連接
     await close_mongo_connection()
+    
+    # 匯出剩餘的追蹤 span
+    shutdown_tracing()
+    
+    # 寫出佇列中剩餘的日誌
+    shutdown_logging()
 
 
 # 建立 FastAPI 應用
@@ -230,12 +216,13 @@ app = FastAPI(
     version=settings.APP_VERSION,
     debug=settings.DEBUG,
     lifespan=lifespan,
+    default_response_class=DefaultJSONResponse,  # 有安裝 orjson 時使用 orjson 編碼
 )
 
 # 設定 CORS（安全策略）
 # 調試：輸出 CORS 設定
-logger.info(f"設定 CORS，允許的來源: {settings.CORS_ORIGINS}")
-logger.info(f"CORS_ORIGINS 類型: {type(settings.CORS_ORIGINS)}")
+logger.debug(f"設定 CORS，允許的來源: {settings.CORS_ORIGINS}")
+logger.debug(f"CORS_ORIGINS 類型: {type(settings.CORS_ORIGINS)}")
 
 # 確保 CORS_ORIGINS 是列表格式
 cors_origins_list = settings.CORS_ORIGINS
@@ -246,6 +233,10 @@ elif not isinstance(cors_origins_list, list):
 
 logger.info(f"解析後的 CORS_ORIGINS: {cors_origins_list}")
 
+# 回應壓縮（最內層：只壓縮路由產生的回應，已壓縮的快取回應與匯出 .gz 不重複處理）
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
 # 添加標準 CORS 中間件（FastAPI 內建）
 app.add_middleware(
     CORSMiddleware,
@@ -258,19 +249,31 @@ app.add_middleware(
 
 # 添加自定義 CORS 中間件（作為備份，確保 header 不被覆蓋）
 # 注意：中間件的順序很重要，後添加的中間件會先執行
-app.add_middleware(CustomCORSMiddleware)
+app.add_middleware(CustomCORSMiddleware, allowed_origins=cors_origins_list)
 
 # 添加請求限流中間件（在 CORS 之後）
+# 限流後端依 RATE_LIMIT_BACKEND 建立（多個 worker 時使用 mongodb / redis 共享計數）
+rate_limit_backend = create_rate_limit_backend(
+    [
+        (settings.RATE_LIMIT_PER_MINUTE, 60, "minute"),
+        (settings.RATE_LIMIT_PER_HOUR, 3600, "hour"),
+    ]
+)
 app.add_middleware(
     RateLimitMiddleware,
     requests_per_minute=settings.RATE_LIMIT_PER_MINUTE,
     requests_per_hour=settings.RATE_LIMIT_PER_HOUR,
+    backend=rate_limit_backend,
 )
 
 # 添加 API Key 認證中間件（在限流之後）
 if settings.API_KEY:
     app.add_middleware(APIKeyMiddleware)
 
+# HTTP 指標（最外層：包含所有中間件的處理時間，被限流或認證擋下的請求也會記錄）
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 
 @app.get("/")
 async def root():
@@ -294,7 +297,7 @@ async def health_check():
 
 
 # 註冊 API 路由
-from app.api.v1 import topics, contents, images, user, health, schedules, interactions, recommendations, discover, validate
+from app.api.v1 import topics, contents, images, user, health, schedules, interactions, recommendations, discover, validate, export, data_import, metrics
 
 app.include_router(health.router, prefix="/api/v1")
 app.include_router(topics.router, prefix="/api/v1")
@@ -306,6 +309,21 @@ app.include_router(interactions.router, prefix="/api/v1")
 app.include_router(recommendations.router, prefix="/api/v1")
 app.include_router(discover.router, prefix="/api/v1")
 app.include_router(validate.router, prefix="/api/v1")
+app.include_router(export.router, prefix="/api/v1")
+app.include_router(data_import.router, prefix="/api/v1")
+
+# Prometheus 指標（/metrics，Prometheus 慣用路徑）
+if settings.METRICS_ENABLED:
+    from app.services.repositories.interaction_buffer import get_interaction_buffer
+    from app.utils.logger import get_logging_stats
+    from app.utils.metrics import REGISTRY
+    from app.utils.response_cache import get_response_cache
+
+    REGISTRY.register_stats("rate_limit", "限流後端狀態", rate_limit_backend.get_stats)
+    REGISTRY.register_stats("response_cache", "API 回應快取狀態", lambda: get_response_cache().get_stats())
+    REGISTRY.register_stats("interaction_buffer", "互動記錄寫入緩衝狀態", lambda: get_interaction_buffer().get_stats())
+    REGISTRY.register_stats("logging", "日誌管線狀態", get_logging_stats)
+    app.include_router(metrics.router)
 
 
 if __name__ == "__main__":
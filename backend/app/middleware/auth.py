@@ -4,9 +4,9 @@ API Key 認證中間件
 """
 from fastapi import Request, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from starlette.responses import Response
-from typing import Callable
+from starlette.types import ASGIApp, Receive, Scope, Send
 import os
 from app.config import settings
 
@@ -44,50 +44,55 @@ class APIKeyAuth(HTTPBearer):
         return None
 
 
-class APIKeyMiddleware(BaseHTTPMiddleware):
-    """API Key 認證中間件"""
+class APIKeyMiddleware:
+    """API Key 認證中間件（純 ASGI）"""
     
-    def __init__(self, app, exclude_paths: list = None):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, exclude_paths: list = None, protected_paths: list = None):
+        self.app = app
         self.exclude_paths = exclude_paths or [
             "/health",
             "/api/v1/health",
             "/docs",
             "/openapi.json",
             "/redoc",
+            "/api/v1/images/proxy",  # 縮圖代理（<img> 無法帶認證標頭，且內容已快取）
         ]
+        # 位於排除路徑之下但仍需認證的路徑（資料庫查詢統計包含查詢條件與慢查詢細節）
+        self.protected_paths = protected_paths or [
+            "/api/v1/health/db-stats",
+        ]
+        self._exclude_prefixes = tuple(self.exclude_paths)
+        self._protected_prefixes = tuple(self.protected_paths)
         self.api_key = settings.API_KEY if hasattr(settings, 'API_KEY') else None
+        self._bearer = f"Bearer {self.api_key}" if self.api_key else None
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         # 如果未設定 API Key，則跳過認證
-        if not self.api_key:
-            return await call_next(request)
+        if scope["type"] != "http" or not self.api_key:
+            await self.app(scope, receive, send)
+            return
         
         # 排除的路徑不需要認證
-        if any(request.url.path.startswith(path) for path in self.exclude_paths):
-            return await call_next(request)
+        path = scope["path"]
+        if path.startswith(self._exclude_prefixes) and not path.startswith(self._protected_prefixes):
+            await self.app(scope, receive, send)
+            return
         
-        # 檢查 API Key
-        api_key_header = request.headers.get("X-API-Key")
-        auth_header = request.headers.get("Authorization")
+        headers = Headers(scope=scope)
         
-        # 檢查 X-API-Key header
-        if api_key_header and api_key_header == self.api_key:
-            return await call_next(request)
-        
-        # 檢查 Authorization header (Bearer token)
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.replace("Bearer ", "")
-            if token == self.api_key:
-                return await call_next(request)
+        # 檢查 X-API-Key header 或 Authorization header (Bearer token)
+        if headers.get("X-API-Key") == self.api_key or headers.get("Authorization") == self._bearer:
+            await self.app(scope, receive, send)
+            return
         
         # 認證失敗
-        return Response(
+        response = Response(
             content='{"detail": "Invalid or missing API Key"}',
             status_code=status.HTTP_401_UNAUTHORIZED,
             media_type="application/json",
             headers={"WWW-Authenticate": "Bearer"},
         )
+        await response(scope, receive, send)
 
 
 # 建立認證實例
@@ -0,0 +1,119 @@
+"""
+回應壓縮中間件
+依 Accept-Encoding 以 gzip / Brotli 壓縮 JSON 等文字回應；
+串流回應（例如匯出）逐段壓縮，已壓縮的回應與 SSE 不處理
+"""
+import logging
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.compression import StreamCompressor, choose_encoding, compress_body, is_compressible
+
+logger = logging.getLogger(__name__)
+
+
+def add_vary(headers: MutableHeaders) -> None:
+    """在 Vary header 加上 Accept-Encoding"""
+    vary = headers.get("vary")
+    if not vary:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+class CompressionMiddleware:
+    """
+    回應壓縮中間件（純 ASGI）
+    
+    只有一個 body 訊息的回應在超過 min_size 時整段壓縮；
+    分段送出的串流回應不緩衝，每段壓縮後立即送出
+    """
+    
+    def __init__(self, app: ASGIApp, min_size: Optional[int] = None):
+        """
+        初始化中間件
+        
+        Args:
+            app: 下一層 ASGI 應用
+            min_size: 最小壓縮大小（位元組，預設讀取 settings.COMPRESSION_MIN_SIZE）
+        """
+        if min_size is None:
+            from app.config import settings
+            min_size = settings.COMPRESSION_MIN_SIZE
+        self.app = app
+        self.min_size = min_size
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start_message: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+        
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+            message_type = message["type"]
+            
+            if message_type == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                passthrough = (
+                    message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type"))
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # 等第一個 body 訊息才知道大小與是否為串流
+                    start_message = message
+                return
+            
+            if message_type != "http.response.body" or passthrough:
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            
+            if start_message is not None:
+                headers = MutableHeaders(scope=start_message)
+                if not more_body and len(body) < self.min_size:
+                    # 太小：壓縮效益不如 CPU 成本
+                    add_vary(headers)
+                    await send(start_message)
+                    start_message = None
+                    passthrough = True
+                    await send(message)
+                    return
+                
+                headers["Content-Encoding"] = encoding
+                add_vary(headers)
+                if not more_body:
+                    body = compress_body(body, encoding)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    start_message = None
+                    await send({"type": "http.response.body", "body": body, "more_body": False})
+                    return
+                
+                # 串流回應：長度未知，改用 chunked
+                del headers["Content-Length"]
+                compressor = StreamCompressor(encoding)
+                await send(start_message)
+                start_message = None
+            
+            chunk = compressor.compress(body) if body else b""
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,100 @@
+"""
+自定義 CORS 中間件
+確保所有回應（包含錯誤回應）都帶有正確的 CORS header
+"""
+import logging
+from typing import List, Union
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+ALLOW_METHODS = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
+ALLOW_HEADERS = "Content-Type, Authorization, X-API-Key, Accept"
+EXPOSE_HEADERS = "X-RateLimit-Limit, X-RateLimit-Remaining, X-RateLimit-Reset"
+MAX_WARNED_ORIGINS = 1000
+
+
+def parse_origins(origins: Union[str, List[str], None]) -> List[str]:
+    """解析 CORS_ORIGINS（逗號分隔字串或列表），未設定時允許所有來源"""
+    if isinstance(origins, str):
+        origins = [origin.strip() for origin in origins.split(",") if origin.strip()]
+    elif not isinstance(origins, list):
+        origins = list(origins) if origins else []
+    return origins or ["*"]
+
+
+class CustomCORSMiddleware:
+    """
+    自定義 CORS 中間件（純 ASGI）
+    
+    允許的來源在建立時解析一次；OPTIONS 預檢請求直接回應，
+    其他請求在 http.response.start 時補上 CORS header，不緩衝回應內容（串流回應不受影響）
+    """
+    
+    def __init__(self, app: ASGIApp, allowed_origins: Union[str, List[str], None] = None):
+        """
+        初始化中間件
+        
+        Args:
+            app: 下一層 ASGI 應用
+            allowed_origins: 允許的來源（預設讀取 settings.CORS_ORIGINS）
+        """
+        if allowed_origins is None:
+            from app.config import settings
+            allowed_origins = settings.CORS_ORIGINS
+        self.app = app
+        origins = parse_origins(allowed_origins)
+        self.allow_all = "*" in origins
+        self.allowed_origins = frozenset(origins)
+        # 沒有 origin header 時使用的來源
+        self.default_origin = "*" if self.allow_all else origins[0]
+        # 已警告過的未列出來源（每個來源只警告一次，避免每個預檢請求都輸出日誌）
+        self._warned_origins = set()
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        origin = Headers(scope=scope).get("origin")
+        
+        # 處理 OPTIONS 預檢請求
+        if scope["method"] == "OPTIONS":
+            response = Response(status_code=200)
+            headers = response.headers
+            if self.allow_all:
+                headers["Access-Control-Allow-Origin"] = "*"
+            elif origin:
+                # 不在列表中的來源仍然允許（開發環境）
+                headers["Access-Control-Allow-Origin"] = origin
+                if origin not in self.allowed_origins and origin not in self._warned_origins:
+                    if len(self._warned_origins) < MAX_WARNED_ORIGINS:
+                        self._warned_origins.add(origin)
+                    logger.warning(f"⚠️ CORS: 允許未列出的來源 {origin}")
+            else:
+                headers["Access-Control-Allow-Origin"] = self.default_origin
+            headers["Access-Control-Allow-Methods"] = ALLOW_METHODS
+            headers["Access-Control-Allow-Headers"] = ALLOW_HEADERS
+            headers["Access-Control-Allow-Credentials"] = "true"
+            headers["Access-Control-Max-Age"] = "3600"
+            await response(scope, receive, send)
+            return
+        
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if self.allow_all:
+                    headers["Access-Control-Allow-Origin"] = "*"
+                elif origin:
+                    # 開發環境：未列出的來源也允許
+                    headers["Access-Control-Allow-Origin"] = origin
+                    headers["Access-Control-Allow-Credentials"] = "true"
+                else:
+                    headers["Access-Control-Allow-Origin"] = self.default_origin
+                headers["Access-Control-Expose-Headers"] = EXPOSE_HEADERS
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
@@ -0,0 +1,58 @@
+"""
+HTTP 指標中間件
+記錄每個請求的處理時間，標籤使用路由樣板（例如 /api/v1/topics/{topic_id}）避免標籤數量無限增加
+"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import HTTP_REQUEST_DURATION
+
+# 沒有匹配到路由的請求（404、被限流或認證擋下）
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _route_template(scope: Scope) -> str:
+    """取得路由樣板（路由處理後由 Starlette 寫入 scope）"""
+    # 新版 FastAPI 延遲展開 include_router，scope["route"].path 不含前綴，完整樣板在 effective_route_context
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    path = getattr(context, "path", None)
+    if path:
+        return path
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path:
+        return path
+    endpoint = scope.get("endpoint")
+    if endpoint is not None:
+        return getattr(endpoint, "__name__", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """HTTP 指標中間件（純 ASGI）"""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        status_code = 500
+        
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                (scope["method"], _route_template(scope), str(status_code)),
+            )
@@ -2,26 +2,31 @@
 請求限流中間件
 防止 API 濫用
 """
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import status
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.responses import Response
-from typing import Callable, Dict, Tuple
-from datetime import datetime, timedelta
-from collections import defaultdict
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Optional
 import time
+from app.middleware.rate_limit_backends import (
+    RateLimitBackend,
+    create_rate_limit_backend,
+)
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """請求限流中間件"""
+class RateLimitMiddleware:
+    """請求限流中間件（純 ASGI，限流資訊在 http.response.start 時寫入響應頭）"""
     
     def __init__(
         self,
-        app,
+        app: ASGIApp,
         requests_per_minute: int = 60,
         requests_per_hour: int = 1000,
         exclude_paths: list = None,
+        max_tracked_clients: int = 10000,
+        backend: Optional[RateLimitBackend] = None,
     ):
-        super().__init__(app)
+        self.app = app
         self.requests_per_minute = requests_per_minute
         self.requests_per_hour = requests_per_hour
         self.exclude_paths = exclude_paths or [
@@ -30,111 +35,81 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             "/docs",
             "/openapi.json",
             "/redoc",
+            "/metrics",  # Prometheus 定期抓取
         ]
-        # 儲存請求記錄：{ip: [(timestamp, ...), ...]}
-        self.request_history: Dict[str, list] = defaultdict(list)
-        # 清理間隔（秒）
-        self.cleanup_interval = 3600  # 1 小時
-        self.last_cleanup = time.time()
+        self._exclude_prefixes = tuple(self.exclude_paths)
+        self._limit_header = str(requests_per_minute)
+        # 每個 IP 只保存固定大小的計數狀態，最多追蹤 max_tracked_clients 個 IP；
+        # 多個 worker 時以共享後端（mongodb / redis）合併計數
+        self.backend = backend or create_rate_limit_backend(
+            [
+                (requests_per_minute, 60, "minute"),
+                (requests_per_hour, 3600, "hour"),
+            ],
+            max_keys=max_tracked_clients,
+        )
     
-    def _get_client_ip(self, request: Request) -> str:
+    def _get_client_ip(self, headers: Headers, scope: Scope) -> str:
         """取得客戶端 IP"""
         # 檢查 X-Forwarded-For header（用於反向代理）
-        forwarded_for = request.headers.get("X-Forwarded-For")
+        forwarded_for = headers.get("X-Forwarded-For")
         if forwarded_for:
             return forwarded_for.split(",")[0].strip()
         
         # 檢查 X-Real-IP header
-        real_ip = request.headers.get("X-Real-IP")
+        real_ip = headers.get("X-Real-IP")
         if real_ip:
             return real_ip
         
         # 使用直接連接的 IP
-        if request.client:
-            return request.client.host
+        client = scope.get("client")
+        if client:
+            return client[0]
         
         return "unknown"
     
-    def _cleanup_old_requests(self):
-        """清理舊的請求記錄"""
-        current_time = time.time()
-        if current_time - self.last_cleanup < self.cleanup_interval:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
             return
         
-        self.last_cleanup = current_time
-        cutoff_time = current_time - 3600  # 保留 1 小時內的記錄
-        
-        for ip in list(self.request_history.keys()):
-            self.request_history[ip] = [
-                ts for ts in self.request_history[ip] if ts > cutoff_time
-            ]
-            if not self.request_history[ip]:
-                del self.request_history[ip]
-    
-    def _check_rate_limit(self, ip: str) -> Tuple[bool, str]:
-        """檢查是否超過限流"""
-        current_time = time.time()
-        one_minute_ago = current_time - 60
-        one_hour_ago = current_time - 3600
-        
-        # 取得該 IP 的請求記錄
-        requests = self.request_history[ip]
-        
-        # 計算最近 1 分鐘的請求數
-        recent_minute = [ts for ts in requests if ts > one_minute_ago]
-        if len(recent_minute) >= self.requests_per_minute:
-            return False, f"Rate limit exceeded: {self.requests_per_minute} requests per minute"
-        
-        # 計算最近 1 小時的請求數
-        recent_hour = [ts for ts in requests if ts > one_hour_ago]
-        if len(recent_hour) >= self.requests_per_hour:
-            return False, f"Rate limit exceeded: {self.requests_per_hour} requests per hour"
-        
-        # 記錄此次請求
-        requests.append(current_time)
-        
-        return True, ""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # 排除的路徑不需要限流
-        if any(request.url.path.startswith(path) for path in self.exclude_paths):
-            return await call_next(request)
-        
-        # 清理舊記錄
-        self._cleanup_old_requests()
+        if scope["path"].startswith(self._exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
         
         # 取得客戶端 IP
-        client_ip = self._get_client_ip(request)
+        client_ip = self._get_client_ip(Headers(scope=scope), scope)
         
         # 檢查限流
-        allowed, error_message = self._check_rate_limit(client_ip)
+        current_time = time.time()
+        result = await self.backend.hit(client_ip, current_time)
         
-        if not allowed:
-            return Response(
-                content=f'{{"detail": "{error_message}"}}',
+        if not result.allowed:
+            response = Response(
+                content=f'{{"detail": "{result.message}"}}',
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 media_type="application/json",
                 headers={
-                    "X-RateLimit-Limit": str(self.requests_per_minute),
+                    "X-RateLimit-Limit": self._limit_header,
                     "X-RateLimit-Remaining": "0",
-                    "Retry-After": "60",
+                    "Retry-After": str(result.retry_after),
                 },
             )
+            await response(scope, receive, send)
+            return
         
-        # 計算剩餘請求數
-        current_time = time.time()
-        one_minute_ago = current_time - 60
-        requests = self.request_history[client_ip]
-        recent_minute = [ts for ts in requests if ts > one_minute_ago]
-        remaining = max(0, self.requests_per_minute - len(recent_minute))
-        
-        # 執行請求
-        response = await call_next(request)
+        remaining = str(result.remaining)
+        reset = str(int(current_time + 60))
         
-        # 添加限流資訊到響應頭
-        response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(int(current_time + 60))
+        async def send_with_headers(message: Message) -> None:
+            # 添加限流資訊到響應頭
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-RateLimit-Limit"] = self._limit_header
+                headers["X-RateLimit-Remaining"] = remaining
+                headers["X-RateLimit-Reset"] = reset
+            await send(message)
         
-        return response
-
+        # 執行請求
+        await self.app(scope, receive, send_with_headers)
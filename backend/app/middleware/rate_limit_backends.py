@@ -0,0 +1,495 @@
+"""
+請求限流後端
+- memory：計數只存在目前行程（單一 worker）
+- mongodb：以 MongoDB 原子 $inc 計數共享（計數文件以 TTL 索引自動過期）
+- redis：以 Redis 相容服務（Redis / Valkey / KeyDB）的 INCRBY 計數共享
+
+共享後端在本地預先彙總：請求只更新本地計數，由背景任務每 sync_interval 秒
+把累積的增量一次批次寫入共享儲存，並取回各 worker 的合計數，請求路徑不會等待共享儲存
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 計數增量：(計數鍵, 增量, 過期時間戳記)
+CounterIncrement = Tuple[str, int, float]
+
+
+class RateLimitResult(NamedTuple):
+    """限流檢查結果"""
+    allowed: bool
+    remaining: int  # 第一個時間窗（每分鐘）剩餘的請求數
+    retry_after: int  # 被拒絕時，建議多少秒後重試
+    message: str
+
+
+def retry_after_seconds(previous: float, current: float, elapsed: float, window: int, limit: int) -> int:
+    """
+    計算滑動視窗估算值降到可再接受一個請求所需的秒數
+
+    解 previous × (1 - (elapsed + t) / window) + current + 1 <= limit 的最小 t；
+    目前視窗內無法達成（current + 1 > limit）時需等到下一視窗，
+    屆時目前計數成為上一視窗計數，再解 current × (1 - t' / window) + 1 <= limit
+
+    Args:
+        previous: 上一視窗計數
+        current: 目前視窗計數
+        elapsed: 目前視窗已過秒數
+        window: 時間窗秒數
+        limit: 請求上限
+
+    Returns:
+        建議重試秒數（至少 1 秒）
+    """
+    if current + 1 <= limit:
+        wait = window * (1 - (limit - current - 1) / previous) - elapsed if previous > 0 else 0.0
+    else:
+        wait = window - elapsed + max(0.0, window * (1 - (limit - 1) / current))
+    return max(1, math.ceil(wait))
+
+
+class SlidingWindowRateLimiter:
+    """
+    滑動視窗計數器限流
+    
+    每個 key 每個時間窗只保存「目前視窗計數」與「上一個視窗計數」，
+    以上一個視窗計數按剩餘比例加權估算滑動視窗內的請求數：
+        估算值 = 上一視窗計數 × (1 - 目前視窗已過比例) + 目前視窗計數
+    每次檢查為 O(1)，每個 key 的記憶體固定；追蹤的 key 數量以 LRU 上限控制
+    """
+    
+    def __init__(
+        self,
+        limits: Sequence[Tuple[int, int, str]],
+        max_keys: int = 10000
+    ):
+        """
+        初始化限流器
+        
+        Args:
+            limits: [(請求上限, 時間窗秒數, 說明)]，例如 [(60, 60, "minute"), (1000, 3600, "hour")]
+            max_keys: 最多追蹤的 key 數量（超過時淘汰最久未出現的 key）
+        """
+        self.limits = list(limits)
+        self.max_keys = max_keys
+        # {key: [視窗編號, 目前計數, 上一視窗計數] × 時間窗數量}
+        self._states: "OrderedDict[str, List[float]]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._states)
+    
+    def hit(self, key: str, now: Optional[float] = None) -> RateLimitResult:
+        """
+        檢查並記錄一次請求（被拒絕的請求不計入）
+        
+        Args:
+            key: 限流鍵（例如客戶端 IP）
+            now: 目前時間（預設為 time.time()）
+        
+        Returns:
+            限流檢查結果
+        """
+        now = time.time() if now is None else now
+        state = self._states.get(key)
+        if state is None:
+            state = [0.0] * (3 * len(self.limits))
+            self._states[key] = state
+            if len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+        else:
+            self._states.move_to_end(key)
+        
+        remaining = 0
+        for index, (limit, window, label) in enumerate(self.limits):
+            offset = index * 3
+            window_id = now // window
+            if state[offset] != window_id:
+                # 進入新視窗：相鄰視窗保留計數作為上一視窗，否則歸零
+                state[offset + 2] = state[offset + 1] if window_id - state[offset] == 1 else 0
+                state[offset + 1] = 0
+                state[offset] = window_id
+            
+            elapsed = now - window_id * window
+            estimate = state[offset + 2] * (1 - elapsed / window) + state[offset + 1]
+            if estimate + 1 > limit:
+                return RateLimitResult(
+                    allowed=False,
+                    remaining=0,
+                    retry_after=retry_after_seconds(state[offset + 2], state[offset + 1], elapsed, window, limit),
+                    message=f"Rate limit exceeded: {limit} requests per {label}",
+                )
+            if index == 0:
+                remaining = max(0, int(limit - estimate - 1))
+        
+        for index in range(len(self.limits)):
+            state[index * 3 + 1] += 1
+        
+        return RateLimitResult(allowed=True, remaining=remaining, retry_after=0, message="")
+
+
+class RateLimitBackend:
+    """限流後端介面"""
+    
+    name = "base"
+    
+    def start(self) -> None:
+        """啟動背景任務（不需要時為空操作）"""
+    
+    async def stop(self) -> None:
+        """停止背景任務並寫入剩餘計數"""
+    
+    async def hit(self, key: str, now: Optional[float] = None) -> RateLimitResult:
+        """檢查並記錄一次請求"""
+        raise NotImplementedError
+    
+    def get_stats(self) -> Dict[str, object]:
+        """取得後端狀態"""
+        return {"backend": self.name}
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """行程內限流（每個 worker 各自計數）"""
+    
+    name = "memory"
+    
+    def __init__(self, limits: Sequence[Tuple[int, int, str]], max_keys: int = 10000):
+        self.limiter = SlidingWindowRateLimiter(limits, max_keys=max_keys)
+    
+    async def hit(self, key: str, now: Optional[float] = None) -> RateLimitResult:
+        return self.limiter.hit(key, now)
+    
+    def get_stats(self) -> Dict[str, object]:
+        return {"backend": self.name, "tracked_keys": len(self.limiter)}
+
+
+class CounterStore:
+    """共享計數儲存介面"""
+    
+    async def increment(self, increments: List[CounterIncrement]) -> Dict[str, int]:
+        """
+        批次增加計數
+        
+        Args:
+            increments: [(計數鍵, 增量, 過期時間戳記)]
+        
+        Returns:
+            {計數鍵: 增加後的合計數}
+        """
+        raise NotImplementedError
+    
+    async def close(self) -> None:
+        """關閉連線"""
+
+
+class MongoCounterStore(CounterStore):
+    """MongoDB 計數儲存（upsert + $inc，expires_at 上的 TTL 索引自動清除過期計數）"""
+    
+    def __init__(self, collection_name: str = "rate_limits"):
+        self.collection_name = collection_name
+        self._index_ready = False
+    
+    async def _get_collection(self):
+        from app.database import get_database
+        collection = (await get_database())[self.collection_name]
+        if not self._index_ready:
+            await collection.create_index([("expires_at", 1)], expireAfterSeconds=0)
+            self._index_ready = True
+        return collection
+    
+    async def increment(self, increments: List[CounterIncrement]) -> Dict[str, int]:
+        from datetime import datetime
+        from pymongo import UpdateOne
+        
+        collection = await self._get_collection()
+        operations = [
+            UpdateOne(
+                {"_id": counter_key},
+                {
+                    "$inc": {"count": delta},
+                    "$setOnInsert": {"expires_at": datetime.utcfromtimestamp(expire_at)},
+                },
+                upsert=True,
+            )
+            for counter_key, delta, expire_at in increments
+        ]
+        await collection.bulk_write(operations, ordered=False)
+        
+        keys = [counter_key for counter_key, _, _ in increments]
+        cursor = collection.find({"_id": {"$in": keys}}, {"count": 1})
+        return {document["_id"]: int(document.get("count", 0)) async for document in cursor}
+
+
+class RedisCounterStore(CounterStore):
+    """Redis 相容服務計數儲存（INCRBY + EXPIREAT，以 pipeline 一次送出）"""
+    
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("使用 redis 限流後端需要安裝 redis 套件（pip install redis）") from e
+        self.client = redis_asyncio.from_url(url)
+    
+    async def increment(self, increments: List[CounterIncrement]) -> Dict[str, int]:
+        pipeline = self.client.pipeline(transaction=False)
+        for counter_key, delta, expire_at in increments:
+            pipeline.incrby(counter_key, delta)
+            pipeline.expireat(counter_key, int(expire_at))
+        results = await pipeline.execute()
+        return {
+            counter_key: int(results[index * 2])
+            for index, (counter_key, _, _) in enumerate(increments)
+        }
+    
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class SharedRateLimitBackend(RateLimitBackend):
+    """
+    跨 worker 共享的滑動視窗限流（本地預先彙總）
+    
+    每個 key 每個時間窗保存 [視窗編號, 本 worker 計數, 已同步計數, 其他 worker 計數, 上一視窗合計]，
+    滑動視窗估算值 = 上一視窗合計 × (1 - 已過比例) + 其他 worker 計數 + 本 worker 計數；
+    其他 worker 計數在每次同步時更新，同步之間最多多放行 worker 數 × 同步間隔內的請求
+    """
+    
+    name = "shared"
+    
+    def __init__(
+        self,
+        store: CounterStore,
+        limits: Sequence[Tuple[int, int, str]],
+        max_keys: int = 10000,
+        sync_interval: float = 1.0,
+        name: str = "shared",
+    ):
+        """
+        初始化共享限流後端
+        
+        Args:
+            store: 共享計數儲存
+            limits: [(請求上限, 時間窗秒數, 說明)]
+            max_keys: 最多追蹤的 key 數量
+            sync_interval: 同步間隔（秒）
+            name: 後端名稱（顯示於狀態）
+        """
+        self.store = store
+        self.limits = list(limits)
+        self.max_keys = max_keys
+        self.sync_interval = sync_interval
+        self.name = name
+        self._states: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._dirty: Set[str] = set()
+        # 已換窗但尚未同步的舊視窗增量
+        self._carry: List[CounterIncrement] = []
+        self._sync_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"syncs": 0, "sync_failures": 0, "synced_counters": 0}
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._sync_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"共享限流後端已啟動（{self.name}，每 {self.sync_interval} 秒同步）")
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.sync()
+        except Exception as e:
+            logger.error(f"關閉時同步限流計數失敗: {e}")
+        await self.store.close()
+    
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"同步限流計數失敗: {e}")
+    
+    def _counter_key(self, key: str, label: str, window_id: float) -> str:
+        return f"ratelimit:{key}:{label}:{int(window_id)}"
+    
+    async def hit(self, key: str, now: Optional[float] = None) -> RateLimitResult:
+        now = time.time() if now is None else now
+        state = self._states.get(key)
+        if state is None:
+            state = [0.0] * (5 * len(self.limits))
+            self._states[key] = state
+            if len(self._states) > self.max_keys:
+                evicted, _ = self._states.popitem(last=False)
+                self._dirty.discard(evicted)
+        else:
+            self._states.move_to_end(key)
+        
+        remaining = 0
+        for index, (limit, window, label) in enumerate(self.limits):
+            offset = index * 5
+            window_id = now // window
+            if state[offset] != window_id:
+                old_window_id = state[offset]
+                unsynced = int(state[offset + 1] - state[offset + 2])
+                if unsynced > 0:
+                    self._carry.append((
+                        self._counter_key(key, label, old_window_id),
+                        unsynced,
+                        (old_window_id + 2) * window,
+                    ))
+                adjacent = window_id - old_window_id == 1
+                state[offset + 4] = state[offset + 1] + state[offset + 3] if adjacent else 0
+                state[offset + 1] = 0
+                state[offset + 2] = 0
+                state[offset + 3] = 0
+                state[offset] = window_id
+            
+            elapsed = now - window_id * window
+            estimate = (
+                state[offset + 4] * (1 - elapsed / window)
+                + state[offset + 3]
+                + state[offset + 1]
+            )
+            if estimate + 1 > limit:
+                return RateLimitResult(
+                    allowed=False,
+                    remaining=0,
+                    retry_after=retry_after_seconds(
+                        state[offset + 4], state[offset + 3] + state[offset + 1], elapsed, window, limit
+                    ),
+                    message=f"Rate limit exceeded: {limit} requests per {label}",
+                )
+            if index == 0:
+                remaining = max(0, int(limit - estimate - 1))
+        
+        for index in range(len(self.limits)):
+            state[index * 5 + 1] += 1
+        self._dirty.add(key)
+        
+        return RateLimitResult(allowed=True, remaining=remaining, retry_after=0, message="")
+    
+    async def sync(self) -> int:
+        """
+        將本地累積的增量批次寫入共享儲存，並取回各計數的合計數
+        
+        Returns:
+            同步的計數數量
+        """
+        async with self._sync_lock:
+            carry, self._carry = self._carry, []
+            increments = list(carry)
+            # (key, state, offset, 視窗編號, 計數增量)
+            pending = []
+            for key in self._dirty:
+                state = self._states.get(key)
+                if state is None:
+                    continue
+                for index, (_, window, label) in enumerate(self.limits):
+                    offset = index * 5
+                    delta = int(state[offset + 1] - state[offset + 2])
+                    increment = (
+                        self._counter_key(key, label, state[offset]),
+                        delta,
+                        (state[offset] + 2) * window,
+                    )
+                    increments.append(increment)
+                    state[offset + 2] += delta
+                    pending.append((key, state, offset, state[offset], increment))
+            self._dirty = set()
+            
+            if not increments:
+                return 0
+            
+            try:
+                totals = await self.store.increment(increments)
+            except Exception:
+                # 寫入失敗：增量留待下次同步
+                self.stats["sync_failures"] += 1
+                self._carry.extend(carry)
+                for key, state, offset, window_id, increment in pending:
+                    if state[offset] == window_id:
+                        state[offset + 2] -= increment[1]
+                        self._dirty.add(key)
+                    elif increment[1] > 0:
+                        # 同步期間已換窗：舊視窗的增量改由 carry 寫入
+                        self._carry.append(increment)
+                # 共享儲存長時間無法連線時，只保留最近的舊視窗增量
+                self._carry = self._carry[-self.max_keys * len(self.limits):]
+                raise
+            
+            for _, state, offset, window_id, increment in pending:
+                if state[offset] == window_id and increment[0] in totals:
+                    state[offset + 3] = max(0, totals[increment[0]] - state[offset + 2])
+            
+            self.stats["syncs"] += 1
+            self.stats["synced_counters"] += len(increments)
+            return len(increments)
+    
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "backend": self.name,
+            "tracked_keys": len(self._states),
+            "dirty_keys": len(self._dirty),
+            "running": self.is_running,
+            **self.stats,
+        }
+
+
+def create_rate_limit_backend(
+    limits: Sequence[Tuple[int, int, str]],
+    max_keys: int = 10000,
+    backend: Optional[str] = None,
+) -> RateLimitBackend:
+    """
+    依設定建立限流後端
+
+    Args:
+        limits: [(請求上限, 時間窗秒數, 說明)]
+        max_keys: 最多追蹤的 key 數量
+        backend: memory / mongodb / redis（預設讀取 RATE_LIMIT_BACKEND）
+
+    Returns:
+        限流後端
+    """
+    backend = (backend or settings.RATE_LIMIT_BACKEND).lower()
+    if backend == "mongodb":
+        return SharedRateLimitBackend(
+            MongoCounterStore(),
+            limits,
+            max_keys=max_keys,
+            sync_interval=settings.RATE_LIMIT_SYNC_INTERVAL,
+            name="mongodb",
+        )
+    if backend == "redis":
+        try:
+            store = RedisCounterStore(settings.RATE_LIMIT_REDIS_URL)
+        except RuntimeError as e:
+            logger.error(f"{e}，改用行程內限流")
+            return MemoryRateLimitBackend(limits, max_keys=max_keys)
+        return SharedRateLimitBackend(
+            store,
+            limits,
+            max_keys=max_keys,
+            sync_interval=settings.RATE_LIMIT_SYNC_INTERVAL,
+            name="redis",
+        )
+    if backend != "memory":
+        logger.warning(f"未知的限流後端 {backend}，改用行程內限流")
+    return MemoryRateLimitBackend(limits, max_keys=max_keys)
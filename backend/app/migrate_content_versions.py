@@ -0,0 +1,53 @@
+"""
+內容版本遷移腳本
+將內嵌在 contents 文件 versions 陣列中的版本歷史移至 content_versions 集合
+
+已遷移的版本會略過，中途中斷後可直接重新執行
+
+使用方式：
+    python -m app.migrate_content_versions
+"""
+import asyncio
+import logging
+import time
+from app.database import connect_to_mongo, close_mongo_connection, get_database
+from app.db_init import create_indexes
+from app.services.repositories.content_repository import ContentRepository
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def migrate_versions():
+    """遷移所有內嵌的版本歷史"""
+    try:
+        await connect_to_mongo()
+        
+        # content_versions 的 content_id + version 唯一索引
+        await create_indexes()
+        
+        db = await get_database()
+        content_repo = ContentRepository()
+        
+        start = time.perf_counter()
+        contents = 0
+        versions = 0
+        cursor = db["contents"].find({"versions": {"$exists": True}})
+        async for content in cursor:
+            versions += await content_repo.migrate_embedded_versions(content)
+            contents += 1
+        
+        logger.info(
+            f"✅ 內容版本遷移完成: {contents} 個內容、{versions} 個版本，"
+            f"耗時 {time.perf_counter() - start:.2f} 秒"
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ 內容版本遷移失敗: {e}")
+        raise
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_versions())
@@ -29,6 +29,8 @@ class Image(BaseModel):
     order: int = Field(default=0, ge=0, description="排序")
     width: Optional[int] = Field(None, ge=1, description="寬度")
     height: Optional[int] = Field(None, ge=1, description="高度")
+    link_status: Optional[str] = Field(None, description="連結狀態（alive/dead，由圖片驗證任務更新）")
+    verified_at: Optional[datetime] = Field(None, description="最後驗證時間")
     fetched_at: datetime = Field(default_factory=datetime.utcnow, description="取得時間")
 
     class Config:
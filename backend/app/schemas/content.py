@@ -5,6 +5,7 @@ Content Schemas
 from typing import Optional, Literal
 from datetime import datetime
 from pydantic import BaseModel, Field
+from app.schemas.common import PaginationResponse
 
 
 class ContentBase(BaseModel):
@@ -22,7 +23,7 @@ class ContentCreate(ContentBase):
 
 class ContentUpdate(ContentBase):
     """更新 Content 請求"""
-    pass
+    version: Optional[int] = Field(None, description="編輯時讀取的版本號（提供時會檢查是否已被其他編輯更新）")
 
 
 class GenerateContentRequest(BaseModel):
@@ -75,4 +76,5 @@ class ContentResponse(BaseModel):
 
 class ContentVersionsResponse(BaseModel):
     """內容版本歷史回應"""
-    data: list[ContentVersionResponse] = Field(..., description="版本列表")
+    data: list[ContentVersionResponse] = Field(..., description="版本列表（新到舊）")
+    pagination: PaginationResponse = Field(..., description="分頁資訊")
@@ -51,6 +51,8 @@ class ImageResponse(BaseModel):
     order: int = Field(..., description="排序")
     width: Optional[int] = Field(None, description="寬度")
     height: Optional[int] = Field(None, description="高度")
+    link_status: Optional[str] = Field(None, description="連結狀態（alive/dead，未驗證為空）")
+    verified_at: Optional[datetime] = Field(None, description="最後驗證時間")
     fetched_at: datetime = Field(..., description="取得時間")
 
     class Config:
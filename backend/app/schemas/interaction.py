@@ -20,6 +20,16 @@ class InteractionCreate(BaseModel):
     duration: Optional[int] = Field(None, ge=0, description="停留時間（秒）")
 
 
+class InteractionBatchCreate(BaseModel):
+    """批次建立 Interaction 請求（例如前端累積的瀏覽時間事件）"""
+    interactions: List[InteractionCreate] = Field(..., min_length=1, max_length=500, description="互動記錄列表")
+
+
+class InteractionBatchResponse(BaseModel):
+    """批次建立 Interaction 回應"""
+    accepted: int = Field(..., description="已接收的互動記錄數量")
+
+
 class InteractionResponse(BaseModel):
     """Interaction 回應模型"""
     id: str = Field(..., description="互動唯一識別碼")
@@ -2,9 +2,9 @@
 Topic Schemas
 用於 Topic API 的請求和回應模型
 """
-from typing import List, Optional
+from typing import List, Optional, Literal
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from app.models.topic import Category, Status, SourceInfo
 from app.schemas.content import ContentResponse
 from app.schemas.image import ImageResponse
@@ -37,6 +37,39 @@ class TopicStatusUpdate(BaseModel):
     status: Status = Field(..., description="主題狀態")
 
 
+class TopicBulkRequest(BaseModel):
+    """批次主題操作請求"""
+    ids: List[str] = Field(..., min_length=1, max_length=500, description="主題 ID 列表（最多 500 個）")
+    operation: Literal["status", "soft_delete", "hard_delete"] = Field(
+        ...,
+        description="操作類型：status（更新狀態）、soft_delete（軟刪除）、hard_delete（硬刪除，同時刪除內容與圖片）"
+    )
+    status: Optional[Status] = Field(None, description="新狀態（operation 為 status 時必填）")
+
+    @model_validator(mode='after')
+    def validate_status(self):
+        """更新狀態時必須提供 status"""
+        if self.operation == "status" and self.status is None:
+            raise ValueError('operation 為 status 時必須提供 status')
+        return self
+
+
+class TopicBulkItemResult(BaseModel):
+    """單一主題的批次操作結果"""
+    id: str = Field(..., description="主題 ID")
+    outcome: Literal["updated", "unchanged", "deleted", "not_found"] = Field(..., description="操作結果")
+
+
+class TopicBulkResponse(BaseModel):
+    """批次主題操作回應"""
+    operation: str = Field(..., description="操作類型")
+    matched: int = Field(..., description="存在的主題數量")
+    modified: int = Field(..., description="實際更新或刪除的主題數量")
+    results: List[TopicBulkItemResult] = Field(..., description="每個主題的操作結果（依請求順序）")
+    deleted_contents: int = Field(default=0, description="連帶刪除的內容數量（硬刪除）")
+    deleted_images: int = Field(default=0, description="連帶刪除的圖片數量（硬刪除）")
+
+
 class TopicResponse(BaseModel):
     """Topic 回應模型（列表用）"""
     id: str = Field(..., description="主題唯一識別碼")
@@ -85,7 +85,7 @@ class AIServiceFactory:
             # 創建服務實例
             service_instance = service_class()
             
-            logger.info(f"✅ 成功載入 AI 服務: {service_name} ({class_name})")
+            logger.debug(f"✅ 成功載入 AI 服務: {service_name} ({class_name})")
             return service_instance
             
         except ImportError as e:
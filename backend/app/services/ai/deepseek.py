@@ -7,6 +7,7 @@ import json
 from typing import Optional, Dict, Any
 from app.services.ai.base import AIServiceBase
 from app.config import settings
+from app.utils.metrics import AI_CALL_DURATION, record_ai_tokens, timed
 import logging
 
 logger = logging.getLogger(__name__)
@@ -41,6 +42,7 @@ class DeepSeekService(AIServiceBase):
             from app.prompts.script_prompt import build_script_prompt
             return build_script_prompt(topic_title, topic_category, keywords, int(target))
     
+    @timed(AI_CALL_DURATION, "deepseek")
     async def _call_api(self, prompt: str) -> str:
         """
         調用 DeepSeek API（OpenAI 兼容格式）
@@ -83,6 +85,8 @@ class DeepSeekService(AIServiceBase):
                 response.raise_for_status()
                 
                 result = response.json()
+                usage = result.get("usage") or {}
+                record_ai_tokens("deepseek", usage.get("prompt_tokens"), usage.get("completion_tokens"))
                 
                 # 解析 OpenAI 兼容格式的回應
                 if "choices" in result and len(result["choices"]) > 0:
@@ -6,6 +6,7 @@ import google.generativeai as genai
 from typing import Dict, Any
 from app.services.ai.base import AIServiceBase
 from app.config import settings
+from app.utils.metrics import AI_CALL_DURATION, record_ai_tokens, timed
 import logging
 
 logger = logging.getLogger(__name__)
@@ -45,7 +46,19 @@ class GeminiService(AIServiceBase):
         else:  # script
             from app.prompts.script_prompt import build_script_prompt
             return build_script_prompt(topic_title, topic_category, keywords, int(target))
-    
+
+    @staticmethod
+    def _record_usage(response) -> None:
+        """記錄 Gemini 回報的 token 數"""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            record_ai_tokens(
+                "gemini",
+                getattr(usage, "prompt_token_count", None),
+                getattr(usage, "candidates_token_count", None)
+            )
+
+    @timed(AI_CALL_DURATION, "gemini")
     async def generate_article(
         self,
         topic_title: str,
@@ -65,6 +78,7 @@ class GeminiService(AIServiceBase):
                     "max_output_tokens": length * 2,  # 估算 token 數量
                 }
             )
+            self._record_usage(response)
             
             return response.text
             
@@ -72,6 +86,7 @@ class GeminiService(AIServiceBase):
             logger.error(f"Gemini 生成短文失敗: {e}")
             raise
     
+    @timed(AI_CALL_DURATION, "gemini")
     async def generate_script(
         self,
         topic_title: str,
@@ -91,6 +106,7 @@ class GeminiService(AIServiceBase):
                     "max_output_tokens": duration * 17 * 2,  # 估算 token 數量
                 }
             )
+            self._record_usage(response)
             
             return response.text
             
@@ -6,6 +6,7 @@ import httpx
 from typing import Dict, Any
 from app.services.ai.base import AIServiceBase
 from app.config import settings
+from app.utils.metrics import AI_CALL_DURATION, record_ai_tokens, timed
 import logging
 
 logger = logging.getLogger(__name__)
@@ -73,6 +74,7 @@ class OllamaService(AIServiceBase):
             from app.prompts.script_prompt import build_script_prompt
             return build_script_prompt(topic_title, topic_category, keywords, int(target))
     
+    @timed(AI_CALL_DURATION, "ollama")
     async def _call_api(self, prompt: str) -> str:
         """
         調用 Ollama API（支援本地和雲端）
@@ -113,6 +115,8 @@ class OllamaService(AIServiceBase):
                 response.raise_for_status()
                 
                 result = response.json()
+                if isinstance(result, dict):
+                    record_ai_tokens("ollama", result.get("prompt_eval_count"), result.get("eval_count"))
                 # 處理不同的回應格式
                 if "response" in result:
                     return result["response"]
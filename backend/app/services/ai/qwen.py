@@ -6,6 +6,7 @@ import json
 from typing import Optional, Dict, Any
 from app.services.ai.base import AIServiceBase
 from app.config import settings
+from app.utils.metrics import AI_CALL_DURATION, record_ai_tokens, timed
 import logging
 
 logger = logging.getLogger(__name__)
@@ -40,6 +41,7 @@ class QwenService(AIServiceBase):
             from app.prompts.script_prompt import build_script_prompt
             return build_script_prompt(topic_title, topic_category, keywords, int(target))
     
+    @timed(AI_CALL_DURATION, "qwen")
     async def _call_api(self, prompt: str) -> str:
         """
         調用通義千問 API
@@ -84,6 +86,8 @@ class QwenService(AIServiceBase):
                 response.raise_for_status()
                 
                 result = response.json()
+                usage = result.get("usage") or {}
+                record_ai_tokens("qwen", usage.get("input_tokens"), usage.get("output_tokens"))
                 
                 # 解析回應
                 if "output" in result and "choices" in result["output"]:
@@ -3,14 +3,17 @@
 使用 APScheduler 執行定時任務
 """
 import logging
-from datetime import datetime, time
+from datetime import datetime, time, timezone
 from typing import Dict, Any, List
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED, JobEvent
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from app.services.automation.topic_collector import TopicCollector
 from app.services.automation.workflow import AutomationWorkflow
 from app.services.repositories.topic_repository import TopicRepository
 from app.models.topic import Category, Status
+from app.utils.metrics import SCHEDULER_JOB_DURATION, SCHEDULER_JOB_MISSED
+from app.utils.tracing import current_span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -68,11 +71,24 @@ class SchedulerService:
             replace_existing=True
         )
         
+        # 03:00 香港時間 = 19:00 UTC：離峰時段驗證圖片連結與補齊尺寸
+        self.scheduler.add_job(
+            self._verify_images,
+            CronTrigger(hour=19, minute=0, timezone='UTC'),
+            id="verify_images_03:00",
+            replace_existing=True
+        )
+        
         logger.info("排程任務已設定：")
         logger.info("  - 07:00 HKT (23:00 UTC) - 時尚趨勢")
         logger.info("  - 12:00 HKT (04:00 UTC) - 美食推薦")
         logger.info("  - 18:00 HKT (10:00 UTC) - 社會趨勢")
+        logger.info("  - 03:00 HKT (19:00 UTC) - 圖片連結驗證")
         
+        self.scheduler.add_listener(
+            self._record_job_event,
+            EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED
+        )
         self.scheduler.start()
         self.is_running = True
         logger.info("排程服務已啟動")
@@ -86,6 +102,18 @@ class SchedulerService:
         self.is_running = False
         logger.info("排程服務已停止")
     
+    @staticmethod
+    def _record_job_event(event: JobEvent) -> None:
+        """記錄排程任務指標（耗時從預定執行時間起算）"""
+        if event.code == EVENT_JOB_MISSED:
+            SCHEDULER_JOB_MISSED.inc((event.job_id,))
+            return
+        
+        outcome = "error" if event.code == EVENT_JOB_ERROR else "success"
+        elapsed = (datetime.now(timezone.utc) - event.scheduled_run_time).total_seconds()
+        SCHEDULER_JOB_DURATION.observe(max(elapsed, 0.0), (event.job_id, outcome))
+    
+    @traced("scheduler.generate_topics")
     async def _generate_topics_for_timeslot(
         self,
         category: Category,
@@ -99,6 +127,8 @@ class SchedulerService:
             time_slot: 時間段（07:00, 12:00, 18:00）
         """
         logger.info(f"開始為時間段 {time_slot} 生成 {category.value} 主題")
+        current_span().set_attribute("topic.category", category.value)
+        current_span().set_attribute("scheduler.time_slot", time_slot)
         
         try:
             # 收集主題
@@ -143,7 +173,20 @@ class SchedulerService:
             
         except Exception as e:
             logger.error(f"為時間段 {time_slot} 生成主題失敗: {e}")
+            raise
+    
+    async def _verify_images(self):
+        """驗證圖片連結（與 API 共用同一個驗證器，避免重複執行）"""
+        from app.services.images.image_verifier import get_image_verifier
+        
+        verifier = get_image_verifier()
+        # 透過 start() 建立任務：API 的 is_running、cancel() 與排程共用同一個任務
+        if not verifier.start():
+            logger.info("圖片驗證已在執行中，跳過本次排程")
+            return
+        await verifier.wait()
     
+    @traced("scheduler.manual_generation")
     async def trigger_manual_generation(
         self,
         category: Category,
@@ -160,6 +203,7 @@ class SchedulerService:
             建立的主題列表
         """
         logger.info(f"手動觸發生成 {count} 個 {category.value} 主題")
+        current_span().set_attribute("topic.category", category.value)
         
         try:
             # 收集主題
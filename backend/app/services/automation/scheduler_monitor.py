@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 from app.services.automation.scheduler import SchedulerService
 from app.services.repositories.topic_repository import TopicRepository
+from app.services.repositories.projections import TOPIC_SCHEDULE_FIELDS
 
 logger = logging.getLogger(__name__)
 
@@ -59,7 +60,9 @@ class SchedulerMonitor:
             
             # 檢查今日是否有生成主題
             today = datetime.now().strftime("%Y-%m-%d")
-            topics, _ = await self.topic_repo.list_topics(date=today, limit=100)
+            topics, _ = await self.topic_repo.list_topics(
+                date=today, limit=100, fields=TOPIC_SCHEDULE_FIELDS
+            )
             
             # 檢查每個時間段的主題數量
             time_slots = {
@@ -113,7 +116,9 @@ class SchedulerMonitor:
         """
         try:
             today = datetime.now().strftime("%Y-%m-%d")
-            topics, _ = await self.topic_repo.list_topics(date=today, limit=100)
+            topics, _ = await self.topic_repo.list_topics(
+                date=today, limit=100, fields=TOPIC_SCHEDULE_FIELDS
+            )
             
             if len(topics) < 9:  # 應該有 9 個主題（3 個分類 × 3 個）
                 logger.info(f"今日主題不足（{len(topics)}/9），自動觸發生成...")
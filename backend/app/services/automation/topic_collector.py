@@ -7,6 +7,8 @@ import httpx
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from app.models.topic import Category, SourceInfo
+from app.utils.metrics import WORKFLOW_STAGE_DURATION, timed
+from app.utils.tracing import span, traced
 
 try:
     import feedparser
@@ -59,6 +61,8 @@ class TopicCollector:
             ],
         }
     
+    @timed(WORKFLOW_STAGE_DURATION, "collect_topics")
+    @traced("topics.collect")
     async def collect_topics(
         self,
         category: Category,
@@ -115,7 +119,8 @@ class TopicCollector:
         async with httpx.AsyncClient(timeout=10.0) as client:
             for feed_url in feeds:
                 try:
-                    response = await client.get(feed_url)
+                    with span("topics.fetch_feed", **{"url.full": feed_url}):
+                        response = await client.get(feed_url)
                     feed = feedparser.parse(response.text)
                     
                     for entry in feed.entries[:count]:
@@ -179,7 +184,8 @@ class TopicCollector:
                 try:
                     # 使用 AI 生成中文標題
                     prompt = build_title_prompt(category, keyword=keyword)
-                    chinese_title = await ai_service._call_api(prompt)
+                    with span("topics.generate_title", **{"ai.provider": settings.AI_SERVICE}):
+                        chinese_title = await ai_service._call_api(prompt)
                     
                     # 清理標題（移除可能的引號、換行等）
                     chinese_title = chinese_title.strip().strip('"').strip("'").strip()
@@ -268,7 +274,8 @@ class TopicCollector:
             
             ai_service = AIServiceFactory.get_service(settings.AI_SERVICE)
             prompt = build_title_prompt(category, english_title=english_title)
-            chinese_title = await ai_service._call_api(prompt)
+            with span("topics.translate_title", **{"ai.provider": settings.AI_SERVICE}):
+                chinese_title = await ai_service._call_api(prompt)
             
             # 清理標題
             chinese_title = chinese_title.strip().strip('"').strip("'").strip()
@@ -8,12 +8,16 @@ from datetime import datetime
 from app.services.repositories.topic_repository import TopicRepository
 from app.services.repositories.content_repository import ContentRepository
 from app.services.repositories.image_repository import ImageRepository
+from app.services.repositories.projections import CONTENT_SUMMARY_FIELDS, CONTENT_TEXT_FIELDS
 from app.services.ai.ai_service_factory import AIServiceFactory
 from app.services.images.image_service import ImageService
+from app.services.images.deduplication import ImageDeduplicator, canonicalize_url
 from app.config import settings
 from app.models.topic import Status
 from app.utils.error_reporter import ErrorReporter, ErrorType
 from app.utils.retry_wrapper import retry_with_backoff, RetryConfig
+from app.utils.metrics import WORKFLOW_STAGE_DURATION, timed
+from app.utils.tracing import current_span, span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +31,7 @@ class AutomationWorkflow:
         self.image_repo = ImageRepository()
         # 不再在初始化時固定 AI Service，改為動態獲取
         self.image_service = ImageService()
+        self.deduplicator = ImageDeduplicator()
     
     def _get_ai_service(self):
         """
@@ -38,6 +43,7 @@ class AutomationWorkflow:
         """
         return AIServiceFactory.get_service(settings.AI_SERVICE)
     
+    @traced("workflow.process_topic")
     async def process_topic(
         self,
         topic_id: str,
@@ -63,6 +69,7 @@ class AutomationWorkflow:
             "images_added": 0,
             "errors": [],
         }
+        current_span().set_attribute("topic.id", topic_id)
         
         try:
             # 1. 取得主題
@@ -138,6 +145,8 @@ class AutomationWorkflow:
             result["errors"].append(error_msg)
             return result
     
+    @timed(WORKFLOW_STAGE_DURATION, "generate_content")
+    @traced("workflow.generate_content")
     @retry_with_backoff(
         config=RetryConfig(max_attempts=3, initial_delay=1.0, max_delay=10.0),
         service_name="AI_Service"
@@ -157,21 +166,21 @@ class AutomationWorkflow:
         # 動態獲取 AI Service（每次調用時獲取最新配置）
         ai_service = self._get_ai_service()
         
-        # 生成內容（短文和腳本）
-        result = await ai_service.generate_both(
-            topic_title=topic_title,
-            topic_category=topic_category,
-            keywords=keywords,
-            article_length=500,
-            script_duration=30
-        )
+        # 生成內容（短文和腳本，分開呼叫以便分別追蹤耗時；與 generate_both 同樣依序生成）
+        with span("ai.generate_article", **{"ai.provider": settings.AI_SERVICE}) as current:
+            article = await ai_service.generate_article(topic_title, topic_category, keywords, 500)
+            current.set_attribute("ai.output_chars", len(article or ""))
+        with span("ai.generate_script", **{"ai.provider": settings.AI_SERVICE}) as current:
+            script = await ai_service.generate_script(topic_title, topic_category, keywords, 30)
+            current.set_attribute("ai.output_chars", len(script or ""))
+        result = {"article": article, "script": script}
         
         # 計算字數和時長
         word_count = len(result["article"] or "") + len(result["script"] or "")
         estimated_duration = word_count // 17  # 假設每 17 字 = 1 秒
         
         # 檢查是否已存在內容
-        existing_content = await self.content_repo.get_content_by_topic_id(topic_id)
+        existing_content = await self.content_repo.get_content_by_topic_id(topic_id, fields=CONTENT_SUMMARY_FIELDS)
         
         now = datetime.utcnow()
         
@@ -185,9 +194,8 @@ class AutomationWorkflow:
                 "estimated_duration": estimated_duration,
                 "model_used": getattr(ai_service, 'model_name', 'unknown'),
                 "prompt_version": "v1.0",
-                "version": existing_content.get("version", 0) + 1,
-                "updated_at": now,
             }
+            # 版本號與更新時間由 Repository 在同一次原子更新中設定
             await self.content_repo.update_content(content_id, update_data)
         else:
             # 建立新內容
@@ -208,6 +216,8 @@ class AutomationWorkflow:
         
         logger.info(f"主題 {topic_id} 內容生成完成")
     
+    @timed(WORKFLOW_STAGE_DURATION, "search_images")
+    @traced("workflow.search_images")
     async def _search_and_add_images(
         self,
         topic: Dict[str, Any],
@@ -218,7 +228,7 @@ class AutomationWorkflow:
         topic_title = topic["title"]
         
         # 1. 優先從已生成的內容中提取關鍵字
-        content = await self.content_repo.get_content_by_topic_id(topic_id)
+        content = await self.content_repo.get_content_by_topic_id(topic_id, fields=CONTENT_TEXT_FIELDS)
         keywords_list = []
         
         if content:
@@ -251,17 +261,28 @@ class AutomationWorkflow:
         search_keywords = " ".join(keywords_list[:3]) if keywords_list else topic_title
         
         try:
-            # 搜尋圖片（帶重試機制）
+            # 搜尋圖片（帶重試機制，多取一些候選以便去重後仍有足夠數量）
             images = await self._search_images_with_retry(
                 search_keywords,
-                count
+                count * 2
             )
             
             # 添加圖片到主題
             added_count = 0
-            existing_images = await self.image_repo.get_images_by_topic_id(topic_id)
+            existing_images = await self.image_repo.get_images_by_topic_id(topic_id, include_dead=True)
             max_order = max([img.get("order", 0) for img in existing_images]) if existing_images else -1
             
+            # 跨來源去重（URL 正規化 + 感知雜湊），避免同一主題儲存重複圖片
+            images = await self.deduplicator.deduplicate(
+                images,
+                limit=count,
+                existing_urls={
+                    img.get("canonical_url") or canonicalize_url(img.get("url", ""))
+                    for img in existing_images
+                },
+                find_stored_duplicates=lambda phash: self.image_repo.find_near_duplicates(phash, topic_id=topic_id)
+            )
+            
             for idx, image in enumerate(images[:count]):
                 try:
                     # 處理圖片來源
@@ -286,7 +307,11 @@ class AutomationWorkflow:
                         "width": image.get("width"),
                         "height": image.get("height"),
                         "fetched_at": datetime.utcnow(),
+                        "canonical_url": image.get("canonical_url"),
                     }
+                    if image.get("phash"):
+                        image_data["phash"] = image["phash"]
+                        image_data["phash_bands"] = image["phash_bands"]
                     
                     await self.image_repo.create_image(image_data)
                     added_count += 1
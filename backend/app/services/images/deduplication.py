@@ -0,0 +1,295 @@
+"""
+圖片去重服務
+跨來源（Pexels / Pixabay / Unsplash / Google / DuckDuckGo）去除重複圖片：
+1. URL 正規化：已知圖片 CDN 移除尺寸、壓縮等查詢參數（其他網站保留原查詢字串）
+2. 感知雜湊（pHash）：下載縮圖計算 64 位元雜湊，以漢明距離判斷近似重複
+"""
+import asyncio
+import io
+import logging
+import re
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
+
+import httpx
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 圖片 CDN 上會改變尺寸或壓縮方式、但不改變圖片本身的查詢參數
+# （只對 SIZE_QUERY_HOSTS 生效：其他網站的 v、s、q 等參數可能就是圖片識別碼）
+SIZE_QUERY_PARAMS = {
+    "w", "h", "width", "height", "size", "resize", "fit", "crop", "auto", "q",
+    "quality", "fm", "format", "cs", "dpr", "ixid", "ixlib", "rect", "s", "sz",
+    "cb", "ts", "v", "sig",
+}
+
+# 這些網域的查詢參數全部只影響輸出格式，可以整段移除
+STRIP_ALL_QUERY_HOSTS = (
+    "images.pexels.com",
+    "images.unsplash.com",
+    "plus.unsplash.com",
+    "cdn.pixabay.com",
+    "pixabay.com",
+)
+
+# 這些圖片 CDN 以查詢參數調整尺寸/格式，移除 SIZE_QUERY_PARAMS 後保留其餘參數
+SIZE_QUERY_HOSTS = (
+    "imgix.net",
+    "images.ctfassets.net",
+    "wp.com",
+    "cdn.shopify.com",
+    "images.squarespace-cdn.com",
+)
+
+# Pixabay 以檔名後綴區分尺寸：xxx_150.jpg / xxx_640.jpg / xxx_1280.jpg
+PIXABAY_SIZE_SUFFIX = re.compile(r"_(?:\d{2,4}|\d{2,4}x\d{2,4})(\.[a-z0-9]+)$", re.IGNORECASE)
+
+# 感知雜湊參數
+PHASH_BITS = 64
+PHASH_BAND_COUNT = 8  # 64 位元切成 8 段，每段 8 位元
+PHASH_BAND_BITS = PHASH_BITS // PHASH_BAND_COUNT
+DEFAULT_MAX_DISTANCE = 6  # 漢明距離 ≤ 6 視為同一張圖（8 段分桶保證 ≤ 7 必有一段相同）
+
+
+def _host_matches(host: str, domains: Tuple[str, ...]) -> bool:
+    """網域是否為 domains 之一或其子網域"""
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    正規化圖片 URL，讓同一張圖片的不同尺寸/參數得到相同結果
+
+    Args:
+        url: 原始圖片 URL
+
+    Returns:
+        正規化後的 URL（無法解析時返回原值）
+    """
+    if not url:
+        return ""
+
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+
+    host = (parts.hostname or "").lower()
+    query = parts.query
+    path = parts.path
+
+    # DuckDuckGo / Bing 代理：解開實際圖片 URL
+    if host == "external-content.duckduckgo.com":
+        for key, value in parse_qsl(query):
+            if key == "u" and value:
+                return canonicalize_url(unquote(value))
+
+    if _host_matches(host, STRIP_ALL_QUERY_HOSTS):
+        query = ""
+    elif _host_matches(host, SIZE_QUERY_HOSTS):
+        kept = [(k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k.lower() not in SIZE_QUERY_PARAMS]
+        query = urlencode(sorted(kept))
+
+    if host.endswith("pixabay.com"):
+        path = PIXABAY_SIZE_SUFFIX.sub(r"_X\1", path)
+
+    # 同一張圖片的 http/https 版本視為相同，統一使用 https
+    return urlunsplit(("https", parts.netloc.lower(), path.rstrip("/") or "/", query, ""))
+
+
+def compute_phash(image_bytes: bytes) -> Optional[int]:
+    """
+    計算感知雜湊（DCT pHash，64 位元）
+
+    Args:
+        image_bytes: 圖片原始位元組
+
+    Returns:
+        64 位元整數雜湊，無法解碼時返回 None
+    """
+    try:
+        from PIL import Image
+        from scipy.fft import dctn
+    except ImportError:
+        logger.warning("Pillow 或 SciPy 未安裝，跳過感知雜湊計算")
+        return None
+
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            pixels = np.asarray(
+                img.convert("L").resize((32, 32), Image.Resampling.LANCZOS),
+                dtype=np.float64
+            )
+    except Exception as e:
+        logger.debug(f"無法解碼圖片，跳過感知雜湊: {e}")
+        return None
+
+    # 取低頻 8x8 區塊（排除直流分量計算中位數）
+    low_freq = dctn(pixels, norm="ortho")[:8, :8].ravel()
+    median = np.median(low_freq[1:])
+    bits = low_freq > median
+
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def phash_to_hex(value: int) -> str:
+    """將雜湊轉為固定長度 16 進位字串（存入 MongoDB）"""
+    return f"{value:016x}"
+
+
+def phash_bands(value: int) -> List[str]:
+    """
+    將雜湊切成分桶鍵，用於索引查詢近似重複
+
+    兩個雜湊漢明距離 ≤ PHASH_BAND_COUNT - 1 時，至少有一段完全相同
+
+    Returns:
+        ["0:ab", "1:3f", ...]（段號前綴避免不同段的值互相匹配）
+    """
+    mask = (1 << PHASH_BAND_BITS) - 1
+    return [
+        f"{band}:{(value >> (band * PHASH_BAND_BITS)) & mask:02x}"
+        for band in range(PHASH_BAND_COUNT)
+    ]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """計算兩個雜湊的漢明距離"""
+    return bin(a ^ b).count("1")
+
+
+class ImageDeduplicator:
+    """圖片去重器（URL 正規化 + 感知雜湊）"""
+
+    def __init__(
+        self,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        max_concurrency: int = 8,
+        download_timeout: float = 5.0,
+        max_thumbnail_bytes: int = 2 * 1024 * 1024
+    ):
+        """
+        初始化去重器
+
+        Args:
+            max_distance: 視為重複的最大漢明距離
+            max_concurrency: 同時下載縮圖的數量上限
+            download_timeout: 縮圖下載超時（秒）
+            max_thumbnail_bytes: 縮圖大小上限（超過則不計算雜湊）
+        """
+        self.max_distance = max_distance
+        self.max_concurrency = max_concurrency
+        self.download_timeout = download_timeout
+        self.max_thumbnail_bytes = max_thumbnail_bytes
+
+    async def _download_thumbnail(self, client: httpx.AsyncClient, url: str) -> Optional[bytes]:
+        """下載縮圖（失敗時返回 None，不影響主流程）"""
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+            content = response.content
+            if len(content) > self.max_thumbnail_bytes:
+                return None
+            return content
+        except Exception as e:
+            logger.debug(f"下載縮圖失敗，跳過感知雜湊: {url} - {e}")
+            return None
+
+    async def _hash_candidates(self, candidates: List[Dict[str, Any]]) -> None:
+        """為候選圖片下載縮圖並計算感知雜湊（結果寫入 candidate["phash_value"]）"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with httpx.AsyncClient(timeout=self.download_timeout, follow_redirects=True) as client:
+            async def hash_one(candidate: Dict[str, Any]) -> None:
+                url = candidate.get("thumbnail_url") or candidate.get("url")
+                if not url:
+                    return
+                async with semaphore:
+                    content = await self._download_thumbnail(client, url)
+                if content:
+                    # 圖片解碼與 DCT 屬 CPU 工作，移到執行緒避免阻塞事件迴圈
+                    candidate["phash_value"] = await asyncio.to_thread(compute_phash, content)
+
+            await asyncio.gather(*(hash_one(c) for c in candidates))
+
+    async def deduplicate(
+        self,
+        candidates: List[Dict[str, Any]],
+        limit: int,
+        existing_urls: Optional[Set[str]] = None,
+        find_stored_duplicates: Optional[Callable[[str], Awaitable[List[Dict[str, Any]]]]] = None,
+        use_phash: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        去除重複圖片，返回最多 limit 張不重複的圖片
+
+        Args:
+            candidates: 候選圖片（搜尋結果格式）
+            limit: 需要的圖片數量
+            existing_urls: 已儲存圖片的正規化 URL
+            find_stored_duplicates: 以感知雜湊（16 進位）查詢已儲存近似圖片的函式
+                （例如 ImageRepository.find_near_duplicates，使用 phash_bands 分桶索引）
+            use_phash: 是否下載縮圖計算感知雜湊
+
+        Returns:
+            不重複的圖片列表（已加入 canonical_url、phash、phash_bands 欄位）
+        """
+        seen_urls = set(existing_urls or [])
+        accepted_hashes: List[int] = []
+
+        # 1. URL 正規化去重（不需要網路請求）
+        unique: List[Dict[str, Any]] = []
+        for candidate in candidates:
+            canonical = canonicalize_url(candidate.get("url", ""))
+            if not canonical or canonical in seen_urls:
+                continue
+            seen_urls.add(canonical)
+            unique.append({**candidate, "canonical_url": canonical})
+
+        if not use_phash:
+            return unique[:limit]
+
+        # 2. 感知雜湊去重（依原順序逐一接受，直到數量足夠）
+        # 每批下載 limit * 2 張縮圖：通常一批就足夠，不必下載全部候選；
+        # 近似重複被移除後數量不足時再下載下一批，每張被接受的圖片都經過雜湊比對
+        batch_size = max(limit * 2, 1)
+        accepted: List[Dict[str, Any]] = []
+        for start in range(0, len(unique), batch_size):
+            if len(accepted) >= limit:
+                break
+            batch = unique[start:start + batch_size]
+            await self._hash_candidates(batch)
+
+            for candidate in batch:
+                if len(accepted) >= limit:
+                    break
+
+                value = candidate.pop("phash_value", None)
+                if value is not None:
+                    if await self._is_near_duplicate(value, accepted_hashes, find_stored_duplicates):
+                        logger.info(f"跳過近似重複圖片: {candidate.get('url')}")
+                        continue
+                    accepted_hashes.append(value)
+                    candidate["phash"] = phash_to_hex(value)
+                    candidate["phash_bands"] = phash_bands(value)
+
+                accepted.append(candidate)
+
+        return accepted
+
+    async def _is_near_duplicate(
+        self,
+        value: int,
+        accepted_hashes: List[int],
+        find_stored_duplicates: Optional[Callable[[str], Awaitable[List[Dict[str, Any]]]]]
+    ) -> bool:
+        """是否與本次已接受或已儲存的圖片近似"""
+        if any(hamming_distance(value, other) <= self.max_distance for other in accepted_hashes):
+            return True
+        if find_stored_duplicates is None:
+            return False
+        return bool(await find_stored_duplicates(phash_to_hex(value)))
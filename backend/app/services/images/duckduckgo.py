@@ -2,16 +2,75 @@
 DuckDuckGo 圖片服務（無需 API Key）
 使用網頁爬蟲方式搜尋圖片，類似 Google 圖片搜尋
 """
+import asyncio
 import httpx
-from typing import List, Dict, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from app.services.images.base import ImageServiceBase
 from app.models.image import ImageSource
 import logging
 import re
+import time
 from urllib.parse import quote
 
 logger = logging.getLogger(__name__)
 
+# vqd token 快取：同一關鍵字在有效期內重複使用，省去每次抓取搜尋頁面
+VQD_TTL_SECONDS = 600
+VQD_CACHE_MAX_ENTRIES = 256
+
+# 同步 DDGS 備援在獨立執行緒池執行，避免阻塞事件迴圈
+DDGS_MAX_WORKERS = 2
+DDGS_TIMEOUT_SECONDS = 15.0
+
+_vqd_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_ddgs_executor: Optional[ThreadPoolExecutor] = None
+
+# 共用連線池（依事件迴圈建立，避免跨迴圈使用同一個 client）
+_shared_client: Optional[httpx.AsyncClient] = None
+_shared_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_shared_client() -> httpx.AsyncClient:
+    """取得共用 HTTP client（保持連線，重複使用 TLS 連線）"""
+    global _shared_client, _shared_client_loop
+    loop = asyncio.get_running_loop()
+    if _shared_client is None or _shared_client.is_closed or _shared_client_loop is not loop:
+        _shared_client = httpx.AsyncClient(
+            timeout=10.0,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            headers={
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+            },
+        )
+        _shared_client_loop = loop
+    return _shared_client
+
+
+def _get_ddgs_executor() -> ThreadPoolExecutor:
+    """取得同步 DDGS 備援專用的執行緒池"""
+    global _ddgs_executor
+    if _ddgs_executor is None:
+        _ddgs_executor = ThreadPoolExecutor(max_workers=DDGS_MAX_WORKERS, thread_name_prefix="ddgs")
+    return _ddgs_executor
+
+
+async def close_duckduckgo_resources() -> None:
+    """關閉共用 client 與執行緒池（應用關閉時呼叫）"""
+    global _shared_client, _ddgs_executor
+    if _shared_client is not None and not _shared_client.is_closed:
+        try:
+            await _shared_client.aclose()
+        except RuntimeError:
+            # client 屬於已關閉的事件迴圈
+            pass
+    _shared_client = None
+    if _ddgs_executor is not None:
+        _ddgs_executor.shutdown(wait=False, cancel_futures=True)
+        _ddgs_executor = None
+
 
 class DuckDuckGoService(ImageServiceBase):
     """DuckDuckGo 圖片服務（無需 API Key）"""
@@ -21,6 +80,54 @@ class DuckDuckGoService(ImageServiceBase):
         # DuckDuckGo 允許爬蟲，不需要 API Key
         logger.info("初始化 DuckDuckGo 圖片服務（無需 API Key）")
     
+    @staticmethod
+    def _normalize_query(keywords: str) -> str:
+        """
+        正規化搜尋關鍵字（小寫、合併空白）
+
+        vqd token 綁定取得時的查詢字串：快取鍵、取得 token 與使用 token 搜尋都必須使用同一個正規化結果
+        """
+        return " ".join(keywords.lower().split())
+    
+    async def _get_vqd(self, client: httpx.AsyncClient, keywords: str) -> Tuple[str, bool]:
+        """
+        取得 vqd token（有效期內直接使用快取）
+        
+        Args:
+            keywords: 已正規化的搜尋關鍵字（_normalize_query）
+        
+        Returns:
+            (vqd token, 是否來自快取)；無法取得時 token 為空字串
+        """
+        key = self._normalize_query(keywords)
+        cached = _vqd_cache.get(key)
+        if cached and cached[1] > time.monotonic():
+            _vqd_cache.move_to_end(key)
+            return cached[0], True
+        
+        # 先訪問搜尋頁面獲取 token
+        search_page_url = f"{self.base_url}/?q={quote(key)}&iax=images&ia=images"
+        response = await client.get(search_page_url)
+        
+        # 從 HTML 中提取 vqd token
+        html_content = response.text
+        vqd_match = re.search(r'vqd="([^"]+)"', html_content)
+        if not vqd_match:
+            # 如果找不到 vqd，嘗試另一種方式
+            vqd_match = re.search(r'vqd=([^&]+)', html_content)
+        
+        vqd = vqd_match.group(1) if vqd_match else ""
+        if vqd:
+            _vqd_cache[key] = (vqd, time.monotonic() + VQD_TTL_SECONDS)
+            _vqd_cache.move_to_end(key)
+            while len(_vqd_cache) > VQD_CACHE_MAX_ENTRIES:
+                _vqd_cache.popitem(last=False)
+        return vqd, False
+    
+    def _invalidate_vqd(self, keywords: str) -> None:
+        """清除失效的 vqd token"""
+        _vqd_cache.pop(self._normalize_query(keywords), None)
+    
     async def search_images(
         self,
         keywords: str,
@@ -44,67 +151,62 @@ class DuckDuckGoService(ImageServiceBase):
             # 使用 DuckDuckGo Images API（非官方，但穩定）
             # 方法：使用 DuckDuckGo 的圖片搜尋端點
             search_url = f"{self.base_url}/i.js"
+            client = _get_shared_client()
+            query = self._normalize_query(keywords)
             
-            # 第一次請求獲取 token
-            async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
-                # 先訪問搜尋頁面獲取 token
-                search_page_url = f"{self.base_url}/?q={quote(keywords)}&iax=images&ia=images"
-                response = await client.get(search_page_url)
-                
-                # 從 HTML 中提取 vqd token（DuckDuckGo 需要的認證 token）
-                html_content = response.text
-                vqd_match = re.search(r'vqd="([^"]+)"', html_content)
-                if not vqd_match:
-                    # 如果找不到 vqd，嘗試另一種方式
-                    vqd_match = re.search(r'vqd=([^&]+)', html_content)
-                
-                vqd = vqd_match.group(1) if vqd_match else ""
-                
-                if not vqd:
-                    logger.warning("無法獲取 DuckDuckGo vqd token，嘗試直接搜尋...")
-                    # 如果無法獲取 token，使用簡化方法
-                    return await self._search_images_simple(keywords, limit)
+            # 取得 vqd token（DuckDuckGo 需要的認證 token，優先使用快取）
+            vqd, from_cache = await self._get_vqd(client, query)
+            if not vqd:
+                logger.warning("無法獲取 DuckDuckGo vqd token，嘗試直接搜尋...")
+                # 如果無法獲取 token，使用簡化方法
+                return await self._search_images_simple(keywords, limit)
+            
+            # 使用 token 搜尋圖片
+            params = {
+                "q": query,
+                "o": "json",
+                "p": "1" if page == 1 else str(page),
+                "s": str((page - 1) * limit),  # 起始位置
+                "f": ",,,",
+                "u": "bing",
+            }
+            
+            response = await client.get(search_url, params={**params, "vqd": vqd})
+            
+            # 快取的 token 可能已失效：清除後重新取得一次
+            if response.status_code != 200 and from_cache:
+                self._invalidate_vqd(query)
+                vqd, _ = await self._get_vqd(client, query)
+                if vqd:
+                    response = await client.get(search_url, params={**params, "vqd": vqd})
+            
+            if response.status_code == 200:
+                data = response.json()
+                images = data.get("results", [])
                 
-                # 使用 token 搜尋圖片
-                params = {
-                    "q": keywords,
-                    "o": "json",
-                    "p": "1" if page == 1 else str(page),
-                    "s": str((page - 1) * limit),  # 起始位置
-                    "vqd": vqd,
-                    "f": ",,,",
-                    "u": "bing",
-                }
+                # 轉換為統一格式
+                result = []
+                for img in images[:limit]:
+                    result.append({
+                        "id": f"ddg_{img.get('image', '')[:50]}",  # 使用 URL 的一部分作為 ID
+                        "url": img.get("image", ""),
+                        "thumbnail_url": img.get("thumbnail", img.get("image", "")),
+                        "width": img.get("width", 0),
+                        "height": img.get("height", 0),
+                        "title": img.get("title", ""),
+                        "source": ImageSource.DUCKDUCKGO.value,
+                        "photographer": img.get("title", "").split(" - ")[0] if " - " in img.get("title", "") else "",
+                        "photographer_url": "",
+                        "license": "Unknown",  # DuckDuckGo 不提供授權資訊
+                        "keywords": [keywords],
+                    })
                 
-                response = await client.get(search_url, params=params)
+                logger.info(f"✅ DuckDuckGo 搜尋成功，找到 {len(result)} 張圖片")
+                return result
+            else:
+                logger.warning(f"DuckDuckGo API 返回錯誤，嘗試簡化方法...")
+                return await self._search_images_simple(keywords, limit)
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    images = data.get("results", [])
-                    
-                    # 轉換為統一格式
-                    result = []
-                    for img in images[:limit]:
-                        result.append({
-                            "id": f"ddg_{img.get('image', '')[:50]}",  # 使用 URL 的一部分作為 ID
-                            "url": img.get("image", ""),
-                            "thumbnail_url": img.get("thumbnail", img.get("image", "")),
-                            "width": img.get("width", 0),
-                            "height": img.get("height", 0),
-                            "title": img.get("title", ""),
-                            "source": ImageSource.DUCKDUCKGO.value,
-                            "photographer": img.get("title", "").split(" - ")[0] if " - " in img.get("title", "") else "",
-                            "photographer_url": "",
-                            "license": "Unknown",  # DuckDuckGo 不提供授權資訊
-                            "keywords": [keywords],
-                        })
-                    
-                    logger.info(f"✅ DuckDuckGo 搜尋成功，找到 {len(result)} 張圖片")
-                    return result
-                else:
-                    logger.warning(f"DuckDuckGo API 返回錯誤，嘗試簡化方法...")
-                    return await self._search_images_simple(keywords, limit)
-                    
         except Exception as e:
             logger.error(f"DuckDuckGo 搜尋失敗: {e}")
             # 如果 API 方法失敗，嘗試簡化方法
@@ -124,11 +226,20 @@ class DuckDuckGoService(ImageServiceBase):
             try:
                 from duckduckgo_images import DDGS
                 
-                ddgs = DDGS()
-                results = ddgs.images(
-                    keywords=keywords,
-                    max_results=limit,
-                    safesearch='moderate'
+                def run_sync_search():
+                    ddgs = DDGS()
+                    # 在執行緒內完整取出結果（部分版本返回產生器，迭代時才發送請求）
+                    return list(ddgs.images(
+                        keywords=keywords,
+                        max_results=limit,
+                        safesearch='moderate'
+                    ))
+                
+                # 同步庫在獨立執行緒池執行，並限制等待時間，避免阻塞事件迴圈
+                loop = asyncio.get_running_loop()
+                results = await asyncio.wait_for(
+                    loop.run_in_executor(_get_ddgs_executor(), run_sync_search),
+                    timeout=DDGS_TIMEOUT_SECONDS
                 )
                 
                 result = []
@@ -172,55 +283,54 @@ class DuckDuckGoService(ImageServiceBase):
         try:
             search_url = f"{self.base_url}/?q={quote(keywords)}&iax=images&ia=images"
             
-            async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
-                response = await client.get(search_url, headers={
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-                })
-                
-                html = response.text
-                
-                # 從 HTML 中提取圖片 URL
-                # DuckDuckGo 的圖片 URL 通常在 data-src 或 src 屬性中
-                image_patterns = [
-                    r'data-src="([^"]+)"',
-                    r'src="([^"]+\.(?:jpg|jpeg|png|gif|webp))"',
-                    r'data-image="([^"]+)"',
-                ]
-                
-                result = []
-                seen_urls = set()
-                
-                for pattern in image_patterns:
-                    matches = re.findall(pattern, html)
-                    for url in matches:
-                        if url and url.startswith("http") and url not in seen_urls:
-                            # 過濾掉一些無關的 URL
-                            if any(skip in url.lower() for skip in ['logo', 'icon', 'button', 'avatar']):
-                                continue
-                            seen_urls.add(url)
-                            result.append({
-                                "id": f"ddg_{hash(url) % 1000000}",
-                                "url": url,
-                                "thumbnail_url": url,
-                                "width": 0,
-                                "height": 0,
-                                "title": keywords,
-                                "source": ImageSource.DUCKDUCKGO.value,
-                                "photographer": "",
-                                "photographer_url": "",
-                                "license": "Unknown",
-                                "keywords": [keywords],
-                            })
-                            
-                            if len(result) >= limit:
-                                break
-                    
-                    if len(result) >= limit:
-                        break
-                
-                logger.info(f"✅ DuckDuckGo HTML 解析成功，找到 {len(result)} 張圖片")
-                return result
+            # 共用連線池（預設已帶瀏覽器 User-Agent）
+            client = _get_shared_client()
+            response = await client.get(search_url)
+            
+            html = response.text
+            
+            # 從 HTML 中提取圖片 URL
+            # DuckDuckGo 的圖片 URL 通常在 data-src 或 src 屬性中
+            image_patterns = [
+                r'data-src="([^"]+)"',
+                r'src="([^"]+\.(?:jpg|jpeg|png|gif|webp))"',
+                r'data-image="([^"]+)"',
+            ]
+            
+            result = []
+            seen_urls = set()
+            
+            for pattern in image_patterns:
+                matches = re.findall(pattern, html)
+                for url in matches:
+                    if url and url.startswith("http") and url not in seen_urls:
+                        # 過濾掉一些無關的 URL
+                        if any(skip in url.lower() for skip in ['logo', 'icon', 'button', 'avatar']):
+                            continue
+                        seen_urls.add(url)
+                        result.append({
+                            "id": f"ddg_{hash(url) % 1000000}",
+                            "url": url,
+                            "thumbnail_url": url,
+                            "width": 0,
+                            "height": 0,
+                            "title": keywords,
+                            "source": ImageSource.DUCKDUCKGO.value,
+                            "photographer": "",
+                            "photographer_url": "",
+                            "license": "Unknown",
+                            "keywords": [keywords],
+                        })
+                        
+                        if len(result) >= limit:
+                            break
                 
+                if len(result) >= limit:
+                    break
+            
+            logger.info(f"✅ DuckDuckGo HTML 解析成功，找到 {len(result)} 張圖片")
+            return result
+            
         except Exception as e:
             logger.error(f"DuckDuckGo HTML 解析失敗: {e}")
             raise
@@ -1,10 +1,12 @@
 """
 增強版照片匹配器
 加入分層閾值檢查（專家建議：核心≥0.85，非核心≥0.75）
+候選照片以 PhotoRanker 進行相關度排序後取前 N 張
 """
 import logging
 from typing import Dict, Any, List, Optional
 from app.services.images.image_service import ImageService
+from app.services.images.photo_ranker import PhotoRanker
 from app.models.image import ImageSource
 
 logger = logging.getLogger(__name__)
@@ -15,12 +17,14 @@ class EnhancedPhotoMatcher:
     
     def __init__(self):
         self.image_service = ImageService()
+        self.ranker = PhotoRanker()
     
     async def match_photos_with_layers(
         self,
         article_text: str,
         topic_id: str,
-        min_count: int = 8
+        min_count: int = 8,
+        candidate_count: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         分層匹配度檢查（專家建議）
@@ -29,6 +33,7 @@ class EnhancedPhotoMatcher:
             article_text: 文章內容
             topic_id: 主題 ID
             min_count: 最少照片數量
+            candidate_count: 返回的候選照片數量（預設為 min_count；呼叫端之後還要去重時應多取一些）
             
         Returns:
             匹配結果
@@ -59,37 +64,35 @@ class EnhancedPhotoMatcher:
             )
             all_photos.extend(photos)
         
-        # 驗證匹配度
-        for photo in all_photos[:min_count * 2]:  # 搜尋更多以確保有足夠匹配的
-            # 核心要素匹配（必須 ≥ 0.85）
+        # 相關度排序（字元 n-gram TF-IDF，批次計算所有候選照片）
+        candidates = self._deduplicate(all_photos)
+        ranked = self.ranker.rank(
+            candidates,
+            queries=[
+                (" ".join(core_features), 2.0),
+                (" ".join(non_core_features), 1.0),
+                (article_text, 0.5),
+            ],
+            top_k=candidate_count or min_count
+        )
+        
+        for index, relevance_score in ranked:
+            photo = candidates[index]
             core_match_score = self._calculate_core_match_score(core_features, photo)
-            
-            if core_match_score < 0.85:
-                continue  # 核心要素不匹配，跳過
-            
-            # 非核心要素匹配（必須 ≥ 0.75）
             non_core_match_score = self._calculate_non_core_match_score(non_core_features, photo)
             
-            if non_core_match_score < 0.75:
-                continue  # 非核心要素不匹配，跳過
-            
-            # 計算整體分數
-            overall_score = (core_match_score * 0.6 + non_core_match_score * 0.4)
-            
             matched_photos.append({
                 **photo,
                 "core_match_score": core_match_score,
                 "non_core_match_score": non_core_match_score,
-                "overall_score": overall_score,
+                "relevance_score": relevance_score,
+                "overall_score": relevance_score,
                 "matches_item": self._find_matched_item(core_features, photo)
             })
-            
-            if len(matched_photos) >= min_count:
-                break
         
         return {
             "topic_id": topic_id,
-            "matched_photos": matched_photos[:min_count],
+            "matched_photos": matched_photos[:candidate_count or min_count],
             "summary": {
                 "total_found": len(all_photos),
                 "matched_items": len([p for p in matched_photos if p.get("matches_item")]),
@@ -98,6 +101,18 @@ class EnhancedPhotoMatcher:
             }
         }
     
+    def _deduplicate(self, photos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """移除重複的候選照片（不同關鍵字可能搜尋到同一張照片）"""
+        seen = set()
+        unique_photos = []
+        for photo in photos:
+            key = photo.get("url") or photo.get("id")
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            unique_photos.append(photo)
+        return unique_photos
+    
     def _extract_core_features(self, text: str) -> List[str]:
         """
         提取核心要素（品牌、品項、明確詞）
@@ -161,8 +176,8 @@ class EnhancedPhotoMatcher:
         if not core_features:
             return 1.0  # 沒有核心要素，視為匹配
         
-        photo_keywords = photo.get("keywords", [])
-        photo_description = photo.get("description", "").lower()
+        photo_keywords = photo.get("keywords") or []
+        photo_description = (photo.get("description") or "").lower()
         
         matches = 0
         for feature in core_features:
@@ -190,8 +205,8 @@ class EnhancedPhotoMatcher:
         if not non_core_features:
             return 1.0  # 沒有非核心要素，視為匹配
         
-        photo_keywords = photo.get("keywords", [])
-        photo_description = photo.get("description", "").lower()
+        photo_keywords = photo.get("keywords") or []
+        photo_description = (photo.get("description") or "").lower()
         
         matches = 0
         for feature in non_core_features:
@@ -214,8 +229,8 @@ class EnhancedPhotoMatcher:
         photo: Dict[str, Any]
     ) -> Optional[str]:
         """找出匹配的核心要素"""
-        photo_description = photo.get("description", "").lower()
-        photo_keywords = photo.get("keywords", [])
+        photo_description = (photo.get("description") or "").lower()
+        photo_keywords = photo.get("keywords") or []
         
         for feature in core_features:
             feature_lower = feature.lower()
@@ -8,7 +8,10 @@ from app.services.images.pexels import PexelsService
 from app.services.images.pixabay import PixabayService
 from app.services.images.duckduckgo import DuckDuckGoService
 from app.models.image import ImageSource
+from app.utils.metrics import IMAGE_PROVIDER_DURATION
+from app.utils.tracing import span
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -64,7 +67,7 @@ class ImageService:
                 raise ValueError(f"不支援的圖片來源: {source}")
             
             try:
-                return await service.search_images(keywords, page, limit)
+                return await self._search_provider(service, source, keywords, page, limit)
             except Exception as e:
                 logger.error(f"{source.value} 搜尋失敗: {e}")
                 if not use_fallback:
@@ -75,7 +78,7 @@ class ImageService:
         last_error = None
         for service, service_source in self.services:
             try:
-                images = await service.search_images(keywords, page, limit)
+                images = await self._search_provider(service, service_source, keywords, page, limit)
                 logger.info(f"使用 {service_source.value} 成功搜尋圖片")
                 return images
             except ValueError as e:
@@ -91,7 +94,7 @@ class ImageService:
         if use_fallback:
             logger.info("所有 API 服務都失敗或未設定 API Key，嘗試使用 DuckDuckGo（不需要 API Key）...")
             try:
-                images = await self.duckduckgo.search_images(keywords, page, limit)
+                images = await self._search_provider(self.duckduckgo, ImageSource.DUCKDUCKGO, keywords, page, limit)
                 logger.info(f"✅ DuckDuckGo 搜尋成功，找到 {len(images)} 張圖片")
                 return images
             except Exception as e:
@@ -105,6 +108,31 @@ class ImageService:
             raise last_error
         raise ValueError("沒有可用的圖片服務（所有 API Key 都未設定）")
     
+    async def _search_provider(
+        self,
+        service: Any,
+        service_source: ImageSource,
+        keywords: str,
+        page: int,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """使用單一來源搜尋圖片（記錄追蹤 span 與耗時指標，結果標籤與 ImageServiceManager 的 attempts status 相同）"""
+        outcome = "exception"
+        start = time.perf_counter()
+        with span("images.search", **{"image.provider": service_source.value, "image.keywords": keywords}) as current:
+            try:
+                images = await service.search_images(keywords, page, limit)
+                outcome = "success" if images else "no_results"
+                current.set_attribute("image.count", len(images or []))
+                return images
+            except ValueError:
+                # API Key 未設定
+                outcome = "unavailable"
+                raise
+            finally:
+                current.set_attribute("image.outcome", outcome)
+                IMAGE_PROVIDER_DURATION.observe(time.perf_counter() - start, (service_source.value, outcome))
+    
     async def get_image_info(
         self,
         image_id: str,
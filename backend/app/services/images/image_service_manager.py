@@ -4,6 +4,7 @@
 """
 from typing import List, Dict, Any, Optional
 import logging
+import time
 from app.services.images.unsplash import UnsplashService
 from app.services.images.pexels import PexelsService
 from app.services.images.pixabay import PixabayService
@@ -11,6 +12,8 @@ from app.services.images.duckduckgo import DuckDuckGoService
 from app.services.images.google_custom_search import GoogleCustomSearchService
 from app.services.images.exceptions import ImageSearchError, ErrorCode
 from app.models.image import ImageSource
+from app.utils.metrics import IMAGE_PROVIDER_DURATION
+from app.utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -111,9 +114,30 @@ class ImageServiceManager:
         trace_id: str,
         attempts: List[Dict]
     ) -> Dict[str, Any]:
-        """嘗試使用單個服務提供者"""
+        """嘗試使用單個服務提供者（記錄追蹤 span 與搜尋耗時，結果標籤同 attempts 的 status）"""
+        start = time.perf_counter()
+        with span("images.search", **{"image.provider": service_source, "image.keywords": keywords}) as current:
+            result = await self._search_provider(service, service_name, service_source, keywords, page, limit, trace_id, attempts)
+            outcome = attempts[-1]["status"]
+            current.set_attribute("image.outcome", outcome)
+            current.set_attribute("image.count", len(result["items"]))
+        IMAGE_PROVIDER_DURATION.observe(time.perf_counter() - start, (service_source, outcome))
+        return result
+    
+    async def _search_provider(
+        self,
+        service: Any,
+        service_name: str,
+        service_source: str,
+        keywords: str,
+        page: int,
+        limit: int,
+        trace_id: str,
+        attempts: List[Dict]
+    ) -> Dict[str, Any]:
+        """使用單個服務提供者搜尋圖片"""
         try:
-            logger.info(f"[{trace_id}] 嘗試使用 {service_name} 搜尋圖片: keywords='{keywords}'")
+            logger.debug(f"[{trace_id}] 嘗試使用 {service_name} 搜尋圖片: keywords='{keywords}'")
             
             # 檢查服務是否有 search_images 方法且支援 trace_id
             if hasattr(service, 'search_images'):
@@ -0,0 +1,364 @@
+"""
+圖片連結驗證服務
+批次檢查 images 集合中的圖片 URL 是否仍然有效，並補齊缺少的寬高：
+1. 以 _id 遞增分批讀取圖片，每批以高並發 HEAD / Range GET 檢查
+2. 只讀取足夠解析 JPEG / PNG / WebP / GIF 檔頭的位元組取得尺寸
+3. 以 bulk_write 一次寫回整批的連結狀態與尺寸
+"""
+import asyncio
+import logging
+import struct
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+from pymongo import UpdateOne
+
+from app.database import get_database
+from app.utils.response_cache import get_response_cache
+
+logger = logging.getLogger(__name__)
+
+# 連結狀態
+LINK_ALIVE = "alive"
+LINK_DEAD = "dead"
+LINK_UNKNOWN = "unknown"  # 暫時性錯誤（逾時、無法連線、5xx、429），保留原狀態下次再檢查
+
+# 明確表示圖片已不存在的 HTTP 狀態碼
+DEAD_STATUS_CODES = {404, 410, 451}
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+def parse_image_dimensions(data: bytes) -> Optional[Tuple[str, int, int]]:
+    """
+    從檔頭解析圖片格式與尺寸（不需要完整圖片）
+
+    Args:
+        data: 圖片開頭的位元組
+
+    Returns:
+        (格式, 寬度, 高度)，無法解析時返回 None
+    """
+    if len(data) < 16:
+        return None
+
+    # PNG：簽章後第一個 chunk 必定是 IHDR
+    if data.startswith(b"\x89PNG\r\n\x1a\n") and data[12:16] == b"IHDR" and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return "png", width, height
+
+    # GIF：邏輯螢幕尺寸（little-endian）
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        width, height = struct.unpack("<HH", data[6:10])
+        return "gif", width, height
+
+    # WebP：RIFF 容器，依 VP8 / VP8L / VP8X 區塊解析
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP" and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b"VP8 " and data[23:26] == b"\x9d\x01\x2a":
+            width, height = struct.unpack("<HH", data[26:30])
+            return "webp", width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L" and data[20] == 0x2F:
+            bits = int.from_bytes(data[21:25], "little")
+            return "webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            width = int.from_bytes(data[24:27], "little") + 1
+            height = int.from_bytes(data[27:30], "little") + 1
+            return "webp", width, height
+        return None
+
+    # JPEG：依序走訪 marker，直到 SOFn（尺寸可能在 EXIF 縮圖之後）
+    if data[:2] == b"\xff\xd8":
+        index = 2
+        length = len(data)
+        while index + 9 < length:
+            if data[index] != 0xFF:
+                index += 1
+                continue
+            marker = data[index + 1]
+            if marker == 0xFF:
+                index += 1
+                continue
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                index += 2
+                continue
+            segment_length = struct.unpack(">H", data[index + 2:index + 4])[0]
+            # SOF0-SOF15（排除 DHT 0xC4、JPG 0xC8、DAC 0xCC）
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[index + 5:index + 9])
+                return "jpeg", width, height
+            index += 2 + segment_length
+        return None
+
+    return None
+
+
+class ImageVerifier:
+    """圖片連結批次驗證器"""
+
+    def __init__(
+        self,
+        batch_size: int = 200,
+        concurrency: int = 32,
+        timeout: float = 8.0,
+        probe_bytes: int = 64 * 1024,
+        recheck_after: timedelta = timedelta(days=7)
+    ):
+        """
+        初始化驗證器
+
+        Args:
+            batch_size: 每批讀取與寫回的圖片數量
+            concurrency: 同時進行的 HTTP 請求數量
+            timeout: 單一請求超時（秒）
+            probe_bytes: 解析尺寸時最多讀取的位元組數
+            recheck_after: 已驗證的圖片多久後重新檢查
+        """
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.probe_bytes = probe_bytes
+        self.recheck_after = recheck_after
+        self._task: Optional[asyncio.Task] = None
+        self._cancel_requested = False
+        self._started_monotonic: Optional[float] = None
+        self.progress: Dict[str, Any] = self._new_progress("idle")
+
+    @staticmethod
+    def _new_progress(status: str) -> Dict[str, Any]:
+        return {
+            "status": status,  # idle / running / completed / cancelled / failed
+            "total": 0,
+            "processed": 0,
+            "alive": 0,
+            "dead": 0,
+            "unknown": 0,
+            "dimensions_updated": 0,
+            "batches": 0,
+            "started_at": None,
+            "finished_at": None,
+            "elapsed_seconds": 0.0,
+            "images_per_second": 0.0,
+            "error": None,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def get_progress(self) -> Dict[str, Any]:
+        """取得目前進度與吞吐量"""
+        progress = dict(self.progress)
+        if progress["status"] == "running" and self._started_monotonic:
+            elapsed = time.monotonic() - self._started_monotonic
+            progress["elapsed_seconds"] = round(elapsed, 2)
+            progress["images_per_second"] = round(progress["processed"] / elapsed, 2) if elapsed > 0 else 0.0
+        return progress
+
+    def start(self, force: bool = False) -> bool:
+        """
+        在背景啟動驗證任務
+
+        Args:
+            force: 是否忽略 recheck_after，重新檢查所有圖片
+
+        Returns:
+            是否成功啟動（已有任務執行中時返回 False）
+        """
+        if self.is_running:
+            return False
+        self._task = asyncio.create_task(self.run(force=force))
+        return True
+
+    async def wait(self) -> Dict[str, Any]:
+        """
+        等待背景驗證任務結束
+
+        Returns:
+            最終進度（沒有執行中的任務時返回目前進度）
+        """
+        if self._task is not None:
+            await asyncio.shield(self._task)
+        return self.get_progress()
+
+    def cancel(self) -> bool:
+        """要求停止目前的驗證任務（在當前批次寫回後停止）"""
+        if not self.is_running:
+            return False
+        self._cancel_requested = True
+        return True
+
+    def _build_filter(self, force: bool) -> Dict[str, Any]:
+        if force:
+            return {}
+        cutoff = datetime.utcnow() - self.recheck_after
+        return {"$or": [{"verified_at": None}, {"verified_at": {"$lt": cutoff}}]}
+
+    async def run(self, force: bool = False) -> Dict[str, Any]:
+        """
+        執行一次完整驗證（依 _id 遞增分批，避免 skip 造成的重複掃描）
+
+        Args:
+            force: 是否重新檢查所有圖片
+
+        Returns:
+            最終進度
+        """
+        self._cancel_requested = False
+        self.progress = self._new_progress("running")
+        self.progress["started_at"] = datetime.utcnow().isoformat()
+        self._started_monotonic = time.monotonic()
+
+        try:
+            db = await get_database()
+            collection = db["images"]
+            base_filter = self._build_filter(force)
+            self.progress["total"] = await collection.count_documents(base_filter)
+            logger.info(f"開始驗證圖片連結，共 {self.progress['total']} 張")
+
+            projection = {"_id": 1, "url": 1, "width": 1, "height": 1}
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            last_id = None
+
+            async with httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=limits,
+                headers={"User-Agent": USER_AGENT},
+            ) as client:
+                while not self._cancel_requested:
+                    batch_filter = base_filter
+                    if last_id is not None:
+                        batch_filter = {**base_filter, "_id": {"$gt": last_id}}
+
+                    batch = await collection.find(batch_filter, projection).sort("_id", 1).limit(self.batch_size).to_list(length=self.batch_size)
+                    if not batch:
+                        break
+                    last_id = batch[-1]["_id"]
+
+                    await self._process_batch(collection, client, batch)
+
+            self.progress["status"] = "cancelled" if self._cancel_requested else "completed"
+        except Exception as e:
+            logger.error(f"圖片連結驗證失敗: {e}", exc_info=True)
+            self.progress["status"] = "failed"
+            self.progress["error"] = str(e)
+        finally:
+            elapsed = time.monotonic() - self._started_monotonic
+            self.progress["finished_at"] = datetime.utcnow().isoformat()
+            self.progress["elapsed_seconds"] = round(elapsed, 2)
+            self.progress["images_per_second"] = round(self.progress["processed"] / elapsed, 2) if elapsed > 0 else 0.0
+            self._started_monotonic = None
+            logger.info(
+                f"圖片連結驗證結束（{self.progress['status']}）: "
+                f"{self.progress['processed']} 張, 有效 {self.progress['alive']}, 失效 {self.progress['dead']}, "
+                f"未知 {self.progress['unknown']}, {self.progress['images_per_second']} 張/秒"
+            )
+
+        return self.progress
+
+    async def _process_batch(self, collection, client: httpx.AsyncClient, batch: List[Dict[str, Any]]) -> None:
+        """並發檢查一批圖片並以 bulk_write 寫回"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def probe_one(image: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                needs_dimensions = not (image.get("width") and image.get("height"))
+                return await self.probe(client, image.get("url", ""), needs_dimensions)
+
+        results = await asyncio.gather(*(probe_one(image) for image in batch))
+
+        now = datetime.utcnow()
+        operations = []
+        for image, result in zip(batch, results):
+            status = result["status"]
+            self.progress[status] += 1
+
+            update: Dict[str, Any] = {"verified_at": now, "http_status": result.get("http_status")}
+            if status != LINK_UNKNOWN:
+                update["link_status"] = status
+            if result.get("width") and result.get("height"):
+                update["width"] = result["width"]
+                update["height"] = result["height"]
+                self.progress["dimensions_updated"] += 1
+            operations.append(UpdateOne({"_id": image["_id"]}, {"$set": update}))
+
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+            get_response_cache().invalidate("images")
+
+        self.progress["processed"] += len(batch)
+        self.progress["batches"] += 1
+
+    async def probe(self, client: httpx.AsyncClient, url: str, needs_dimensions: bool) -> Dict[str, Any]:
+        """
+        檢查單一圖片 URL
+
+        已有尺寸時只發送 HEAD；需要尺寸（或伺服器不支援 HEAD）時使用 Range GET，
+        讀到足夠解析檔頭的位元組即關閉連線
+
+        Returns:
+            {"status": alive/dead/unknown, "http_status": int, "width": int, "height": int}
+        """
+        if not url or not url.startswith(("http://", "https://")):
+            return {"status": LINK_DEAD, "http_status": None}
+
+        try:
+            if not needs_dimensions:
+                response = await client.head(url)
+                # 部分 CDN 不支援 HEAD（405 / 403 / 501），改用 Range GET 確認
+                if response.status_code < 400 or response.status_code in DEAD_STATUS_CODES:
+                    return self._classify(response.status_code, response.headers.get("content-type", ""))
+
+            headers = {"Range": f"bytes=0-{self.probe_bytes - 1}"}
+            async with client.stream("GET", url, headers=headers) as response:
+                result = self._classify(response.status_code, response.headers.get("content-type", ""))
+                if result["status"] != LINK_ALIVE or not needs_dimensions:
+                    return result
+
+                buffer = bytearray()
+                async for chunk in response.aiter_bytes():
+                    buffer.extend(chunk)
+                    parsed = parse_image_dimensions(bytes(buffer))
+                    if parsed or len(buffer) >= self.probe_bytes:
+                        break
+                else:
+                    parsed = parse_image_dimensions(bytes(buffer))
+
+                if parsed:
+                    result["format"], result["width"], result["height"] = parsed
+                return result
+        except (httpx.TimeoutException, httpx.RemoteProtocolError, httpx.ConnectError) as e:
+            # DNS 解析失敗、拒絕連線也可能只是暫時的網路或 CDN 問題：不標記為失效，
+            # 只有伺服器明確回應 DEAD_STATUS_CODES 才視為失效
+            logger.debug(f"圖片驗證逾時或無法連線: {url} - {e}")
+            return {"status": LINK_UNKNOWN, "http_status": None}
+        except Exception as e:
+            logger.debug(f"圖片驗證失敗: {url} - {e}")
+            return {"status": LINK_UNKNOWN, "http_status": None}
+
+    @staticmethod
+    def _classify(status_code: int, content_type: str) -> Dict[str, Any]:
+        """依 HTTP 狀態碼與 Content-Type 判斷連結狀態"""
+        if status_code in DEAD_STATUS_CODES:
+            return {"status": LINK_DEAD, "http_status": status_code}
+        if 200 <= status_code < 300:
+            # 200 但返回 HTML（例如停放網域、登入頁）也視為失效
+            if content_type and not content_type.startswith(("image/", "application/octet-stream", "binary/")):
+                return {"status": LINK_DEAD, "http_status": status_code}
+            return {"status": LINK_ALIVE, "http_status": status_code}
+        return {"status": LINK_UNKNOWN, "http_status": status_code}
+
+
+# 全域驗證器實例（API 與排程共用，確保同一時間只有一個驗證任務）
+_image_verifier: Optional[ImageVerifier] = None
+
+
+def get_image_verifier() -> ImageVerifier:
+    """取得全域圖片驗證器實例"""
+    global _image_verifier
+    if _image_verifier is None:
+        _image_verifier = ImageVerifier()
+    return _image_verifier
@@ -0,0 +1,185 @@
+"""
+照片相關度排序器
+以字元 n-gram TF-IDF 向量化文章特徵與候選照片文字（標題、描述、關鍵字），
+透過單次稀疏矩陣運算為所有候選照片評分，僅使用 CPU（NumPy / SciPy）
+"""
+import logging
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple, Iterable, Optional
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=65536)
+def _token_ngrams(token: str, min_n: int, max_n: int) -> Tuple[str, ...]:
+    """單一詞的字元 n-gram（快取：標題與關鍵字中的詞重複率很高）"""
+    length = len(token)
+    return tuple(
+        token[start:start + n]
+        for n in range(min_n, max_n + 1)
+        for start in range(0, length - n + 1)
+    )
+
+
+class PhotoRanker:
+    """照片相關度排序器（字元 n-gram TF-IDF + 餘弦相似度）"""
+
+    def __init__(self, ngram_range: Tuple[int, int] = (1, 3), max_text_length: int = 2000):
+        """
+        初始化排序器
+
+        Args:
+            ngram_range: 字元 n-gram 範圍（中文以單字/雙字/三字組合為主）
+            max_text_length: 每段文字最多取用的字元數（避免長文拖慢向量化）
+        """
+        self.ngram_range = ngram_range
+        self.max_text_length = max_text_length
+
+    @staticmethod
+    def photo_text(photo: Dict[str, Any]) -> str:
+        """組合照片可用於比對的文字（標題、描述、關鍵字）"""
+        keywords = photo.get("keywords") or []
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        parts = [
+            photo.get("title") or "",
+            photo.get("description") or "",
+            " ".join(str(kw) for kw in keywords),
+        ]
+        return " ".join(part for part in parts if part)
+
+    def _char_ngrams(self, text: str) -> Iterable[str]:
+        """產生字元 n-gram（以空白分隔的詞分別處理，避免跨詞組合）"""
+        min_n, max_n = self.ngram_range
+        for token in text.lower()[:self.max_text_length].split():
+            yield from _token_ngrams(token, min_n, max_n)
+
+    def _count_matrix(
+        self,
+        texts: List[str],
+        vocabulary: Dict[str, int],
+        grow: bool
+    ) -> sparse.csr_matrix:
+        """
+        建立詞頻稀疏矩陣
+
+        Args:
+            texts: 文字列表
+            vocabulary: n-gram → 欄位索引
+            grow: 是否允許新增詞彙（查詢向量只使用候選照片已有的詞彙）
+        """
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+
+        for text in texts:
+            for gram, count in Counter(self._char_ngrams(text)).items():
+                index = vocabulary.get(gram)
+                if index is None:
+                    if not grow:
+                        continue
+                    index = vocabulary[gram] = len(vocabulary)
+                indices.append(index)
+                data.append(count)
+            indptr.append(len(indices))
+
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(texts), len(vocabulary))
+        )
+
+    @staticmethod
+    def _l2_normalize(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+        """逐列 L2 正規化（直接修改 data 陣列）"""
+        row_ids = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        norms = np.sqrt(np.bincount(row_ids, weights=matrix.data.astype(np.float64) ** 2, minlength=matrix.shape[0]))
+        norms[norms == 0] = 1.0
+        matrix.data /= norms[row_ids].astype(np.float32)
+        return matrix
+
+    def score(
+        self,
+        photos: List[Dict[str, Any]],
+        queries: List[Tuple[str, float]]
+    ) -> np.ndarray:
+        """
+        為所有候選照片計算相關度分數（0.0 - 1.0）
+
+        Args:
+            photos: 候選照片列表
+            queries: (查詢文字, 權重) 列表，例如核心要素權重較高
+
+        Returns:
+            與 photos 同長度的分數陣列
+        """
+        if not photos:
+            return np.zeros(0, dtype=np.float32)
+
+        vocabulary: Dict[str, int] = {}
+        photo_matrix = self._count_matrix([self.photo_text(p) for p in photos], vocabulary, grow=True)
+        if not vocabulary:
+            return np.zeros(len(photos), dtype=np.float32)
+
+        # 次線性詞頻 + 平滑 IDF（以候選照片為語料）
+        document_frequency = np.bincount(photo_matrix.indices, minlength=len(vocabulary))
+        idf = (np.log((1.0 + len(photos)) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+
+        photo_matrix.data = (1.0 + np.log(photo_matrix.data)) * idf[photo_matrix.indices]
+        photo_matrix = self._l2_normalize(photo_matrix)
+
+        # 查詢向量：各段查詢文字分別正規化後依權重加總
+        texts = [text for text, weight in queries if text and weight > 0]
+        weights = np.asarray([weight for text, weight in queries if text and weight > 0], dtype=np.float32)
+        if not texts:
+            return np.zeros(len(photos), dtype=np.float32)
+
+        query_matrix = self._count_matrix(texts, vocabulary, grow=False)
+        query_matrix.data = (1.0 + np.log(query_matrix.data)) * idf[query_matrix.indices]
+        query_matrix = self._l2_normalize(query_matrix)
+        query_vector = sparse.csr_matrix(weights @ query_matrix)
+        query_vector = self._l2_normalize(query_vector)
+
+        # 單次批次矩陣運算取得所有候選照片的餘弦相似度
+        scores = (photo_matrix @ query_vector.T).toarray().ravel()
+        return np.clip(scores, 0.0, 1.0)
+
+    def rank(
+        self,
+        photos: List[Dict[str, Any]],
+        queries: List[Tuple[str, float]],
+        top_k: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        取得前 top_k 張照片的排序（分數相同時保留原始順序）
+
+        Args:
+            photos: 候選照片列表
+            queries: (查詢文字, 權重) 列表
+            top_k: 返回數量（None 表示全部）
+
+        Returns:
+            [(照片索引, 分數), ...]，依分數由高到低
+        """
+        scores = self.score(photos, queries)
+        total = len(scores)
+        if total == 0:
+            return []
+
+        k = total if top_k is None else max(0, min(top_k, total))
+        if k == 0:
+            return []
+
+        if k < total:
+            # argpartition 只保證第 k 名的分數，分界上分數相同的照片會被任意挑選：
+            # 取分數不低於第 k 名的所有照片，再以穩定排序決定名次
+            cutoff = scores[np.argpartition(-scores, k - 1)[k - 1]]
+            candidates = np.flatnonzero(scores >= cutoff)
+        else:
+            candidates = np.arange(total)
+
+        order = candidates[np.lexsort((candidates, -scores[candidates]))][:k]
+        return [(int(index), float(scores[index])) for index in order]
@@ -0,0 +1,431 @@
+"""
+圖片縮圖快取服務
+以內容雜湊（SHA-256）定址的磁碟快取：
+1. 每個原始圖片 URL 只下載一次，原圖依內容雜湊儲存（相同圖片只存一份）
+2. 縮圖（WebP / JPEG）於行程池中以 Pillow 產生，避免阻塞事件迴圈
+3. 快取總大小超過上限時，依最近存取時間淘汰（LRU）
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 允許的縮圖寬度（請求寬度會向上取最接近的值，避免產生過多變體）
+THUMBNAIL_WIDTHS = (160, 320, 640, 960, 1280, 1920)
+
+# 支援的輸出格式 → (Pillow 格式, Content-Type)
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+
+
+def snap_width(width: int) -> int:
+    """將請求寬度對齊到允許的縮圖寬度"""
+    for allowed in THUMBNAIL_WIDTHS:
+        if width <= allowed:
+            return allowed
+    return THUMBNAIL_WIDTHS[-1]
+
+
+def source_version(url: str) -> str:
+    """
+    原圖 URL 的版本碼（FNV-1a 32 位元，前端 getImageProxyUrl 以相同演算法產生 v 參數）
+
+    代理網址帶有與目前 URL 相符的版本碼時才可長期快取：圖片 URL 被修改後版本碼隨之改變，
+    瀏覽器會以新網址重新下載
+    """
+    value = 0x811C9DC5
+    for byte in url.encode("utf-8"):
+        value = ((value ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return f"{value:08x}"
+
+
+def render_thumbnail(source_path: str, target_path: str, width: int, image_format: str, quality: int) -> int:
+    """
+    產生縮圖（於子行程執行，必須是模組層級函數才能被 pickle）
+
+    Args:
+        source_path: 原圖路徑
+        target_path: 縮圖輸出路徑
+        width: 最大寬度（原圖較小時不放大）
+        image_format: Pillow 輸出格式（WEBP / JPEG）
+        quality: 壓縮品質
+
+    Returns:
+        縮圖檔案大小（位元組）
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.Resampling.LANCZOS)
+
+        if image_format == "JPEG":
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+        buffer = io.BytesIO()
+        img.save(buffer, format=image_format, quality=quality, optimize=True)
+
+    # 先寫入暫存檔再改名，避免其他請求讀到寫入一半的檔案
+    tmp_path = f"{target_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(buffer.getvalue())
+    os.replace(tmp_path, target_path)
+    return len(buffer.getvalue())
+
+
+class ThumbnailCacheError(Exception):
+    """無法取得或產生縮圖"""
+
+
+class ThumbnailCache:
+    """內容定址的縮圖磁碟快取（含 LRU 淘汰）"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        max_source_bytes: Optional[int] = None,
+        workers: Optional[int] = None,
+        quality: int = 80,
+        download_timeout: float = 15.0
+    ):
+        """
+        初始化縮圖快取
+
+        Args:
+            cache_dir: 快取目錄
+            max_bytes: 快取總大小上限（位元組）
+            max_source_bytes: 原圖大小上限（超過則拒絕下載）
+            workers: 產生縮圖的行程數
+            quality: WebP / JPEG 壓縮品質
+            download_timeout: 原圖下載超時（秒）
+        """
+        self.cache_dir = Path(cache_dir or settings.IMAGE_CACHE_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.IMAGE_CACHE_MAX_BYTES
+        self.max_source_bytes = max_source_bytes if max_source_bytes is not None else settings.IMAGE_CACHE_MAX_SOURCE_BYTES
+        self.workers = workers if workers is not None else settings.THUMBNAIL_WORKERS
+        self.quality = quality
+        self.download_timeout = download_timeout
+
+        self._objects_dir = self.cache_dir / "objects"
+        self._thumbs_dir = self.cache_dir / "thumbs"
+        self._refs_dir = self.cache_dir / "refs"
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # 鍵 → [鎖, 持有及等待中的請求數]（歸零時移除，表格大小只取決於並發請求數）
+        self._locks: Dict[str, List] = {}
+        self._load_lock = asyncio.Lock()
+        # 路徑 → 檔案大小，依最近存取時間排序（最舊的在前）
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._loaded = False
+
+    # ---------- 路徑與索引 ----------
+
+    @staticmethod
+    def _sharded(base: Path, key: str, suffix: str = "") -> Path:
+        """以雜湊前兩碼分目錄，避免單一目錄檔案過多"""
+        return base / key[:2] / f"{key}{suffix}"
+
+    @staticmethod
+    def url_key(url: str) -> str:
+        """原始 URL 的雜湊鍵"""
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _ref_path(self, url: str) -> Path:
+        return self._sharded(self._refs_dir, self.url_key(url))
+
+    def _object_path(self, digest: str) -> Path:
+        return self._sharded(self._objects_dir, digest)
+
+    def _thumb_path(self, digest: str, width: int, fmt: str) -> Path:
+        return self._sharded(self._thumbs_dir, digest, f"_{width}.{fmt}")
+
+    @staticmethod
+    def make_etag(digest: str, width: int, fmt: str) -> str:
+        """強 ETag：縮圖由原圖內容、寬度、格式完全決定"""
+        return f'"{digest[:32]}-{width}-{fmt}"'
+
+    async def _load_index(self) -> None:
+        """首次使用時掃描快取目錄，依最後存取時間重建 LRU 索引（掃描於執行緒中進行，不阻塞事件迴圈）"""
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            files = await asyncio.to_thread(self._scan_files)
+            for path, size in files:
+                # 掃描期間新加入的檔案已登記為最近使用，保留其位置
+                if path not in self._entries:
+                    self._entries[path] = size
+                    self._entries.move_to_end(path, last=False)
+                    self._total_bytes += size
+            self._loaded = True
+            self._evict()
+
+        logger.info(f"縮圖快取索引載入完成: {len(self._entries)} 個檔案, {self._total_bytes / 1024 / 1024:.1f} MB")
+
+    def _scan_files(self) -> List[Tuple[str, int]]:
+        """
+        掃描快取目錄
+
+        Returns:
+            [(路徑, 檔案大小)]，依最後存取時間由新到舊排序
+        """
+        files = []
+        for base in (self._objects_dir, self._thumbs_dir):
+            if not base.exists():
+                continue
+            for path in base.rglob("*"):
+                if not path.is_file() or path.suffix == ".tmp":
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((max(stat.st_atime, stat.st_mtime), str(path), stat.st_size))
+
+        return [(path, size) for _, path, size in sorted(files, reverse=True)]
+
+    def _touch(self, path: Path) -> None:
+        """標記為最近使用（同時更新檔案時間，讓重啟後仍保留 LRU 順序）"""
+        key = str(path)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        try:
+            now = time.time()
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+
+    def _add_entry(self, path: Path, size: int) -> None:
+        """登記新檔案並在超過上限時淘汰最舊的檔案"""
+        key = str(path)
+        self._total_bytes -= self._entries.pop(key, 0)
+        self._entries[key] = size
+        self._total_bytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        """LRU 淘汰，直到總大小不超過上限（最新加入的檔案不淘汰）"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            path, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"刪除快取檔案失敗: {path} - {e}")
+
+    @asynccontextmanager
+    async def _locked(self, key: str) -> AsyncIterator[None]:
+        """取得指定鍵的鎖（最後一個持有者釋放後移除，避免鎖表隨 URL 數量無限增長）"""
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    # ---------- 原圖 ----------
+
+    @staticmethod
+    def _read_ref_file(path: Path) -> Optional[str]:
+        try:
+            return path.read_text().strip() or None
+        except (FileNotFoundError, OSError):
+            return None
+
+    async def _read_ref(self, url: str) -> Optional[str]:
+        """讀取 URL 對應的原圖雜湊（磁碟讀取移到執行緒，不阻塞事件迴圈）"""
+        return await asyncio.to_thread(self._read_ref_file, self._ref_path(url))
+
+    async def peek_etag(self, url: str, width: int, fmt: str) -> Optional[str]:
+        """
+        不讀取圖片即取得 ETag（供 If-None-Match 提早返回 304）
+
+        Returns:
+            ETag，URL 尚未下載過時返回 None
+        """
+        digest = await self._read_ref(url)
+        return self.make_etag(digest, width, fmt) if digest else None
+
+    async def _download(self, url: str) -> bytes:
+        """下載原圖（限制大小）"""
+        async with httpx.AsyncClient(timeout=self.download_timeout, follow_redirects=True) as client:
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+                chunks = []
+                received = 0
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    if received > self.max_source_bytes:
+                        raise ThumbnailCacheError(f"原圖超過大小上限 {self.max_source_bytes} bytes: {url}")
+                    chunks.append(chunk)
+                return b"".join(chunks)
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    async def _ensure_source(self, url: str) -> Tuple[str, Path]:
+        """
+        確保原圖已在快取中（同一 URL 的並發請求只下載一次）
+
+        Returns:
+            (內容雜湊, 原圖路徑)
+        """
+        url_key = self.url_key(url)
+        async with self._locked(f"src:{url_key}"):
+            digest = await self._read_ref(url)
+            if digest:
+                path = self._object_path(digest)
+                if await asyncio.to_thread(path.exists):
+                    self._touch(path)
+                    return digest, path
+
+            try:
+                data = await self._download(url)
+            except ThumbnailCacheError:
+                raise
+            except Exception as e:
+                raise ThumbnailCacheError(f"下載原圖失敗: {url} - {e}") from e
+
+            digest = hashlib.sha256(data).hexdigest()
+            path = self._object_path(digest)
+            if not path.exists():
+                await asyncio.to_thread(self._write_atomic, path, data)
+                self._add_entry(path, len(data))
+            await asyncio.to_thread(self._write_atomic, self._ref_path(url), digest.encode("ascii"))
+            return digest, path
+
+    # ---------- 縮圖 ----------
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=max(1, self.workers))
+        return self._executor
+
+    async def get_thumbnail(self, url: str, width: int, fmt: str = "webp") -> Tuple[bytes, str, str]:
+        """
+        取得縮圖（必要時下載原圖並產生縮圖）
+
+        Args:
+            url: 原始圖片 URL
+            width: 請求寬度（會對齊到 THUMBNAIL_WIDTHS）
+            fmt: 輸出格式（webp / jpeg）
+
+        Returns:
+            (縮圖內容, ETag, Content-Type)
+        """
+        if fmt not in THUMBNAIL_FORMATS:
+            raise ValueError(f"不支援的縮圖格式: {fmt}")
+
+        await self._load_index()
+        width = snap_width(width)
+        pil_format, media_type = THUMBNAIL_FORMATS[fmt]
+
+        # 已有縮圖時直接讀取（不需要原圖）
+        digest = await self._read_ref(url)
+        if digest:
+            cached = await self._read_thumbnail(digest, width, fmt)
+            if cached is not None:
+                return cached, self.make_etag(digest, width, fmt), media_type
+
+        digest, source_path = await self._ensure_source(url)
+        thumb_path = self._thumb_path(digest, width, fmt)
+
+        async with self._locked(f"thumb:{thumb_path.name}"):
+            cached = await self._read_thumbnail(digest, width, fmt)
+            if cached is None:
+                thumb_path.parent.mkdir(parents=True, exist_ok=True)
+                loop = asyncio.get_running_loop()
+                try:
+                    size = await loop.run_in_executor(
+                        self._get_executor(),
+                        render_thumbnail,
+                        str(source_path),
+                        str(thumb_path),
+                        width,
+                        pil_format,
+                        self.quality,
+                    )
+                except Exception as e:
+                    raise ThumbnailCacheError(f"產生縮圖失敗: {url} - {e}") from e
+                self._add_entry(thumb_path, size)
+                cached = await self._read_thumbnail(digest, width, fmt)
+                if cached is None:
+                    raise ThumbnailCacheError(f"縮圖產生後隨即被淘汰: {url}")
+
+        return cached, self.make_etag(digest, width, fmt), media_type
+
+    async def _read_thumbnail(self, digest: str, width: int, fmt: str) -> Optional[bytes]:
+        """讀取已快取的縮圖（直接讀入記憶體，避免傳送途中被淘汰）"""
+        path = self._thumb_path(digest, width, fmt)
+        try:
+            data = await asyncio.to_thread(path.read_bytes)
+        except (FileNotFoundError, OSError):
+            return None
+        self._touch(path)
+        return data
+
+    async def stats(self) -> Dict[str, int]:
+        """快取使用狀況"""
+        await self._load_index()
+        return {
+            "files": len(self._entries),
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def shutdown(self) -> None:
+        """關閉縮圖行程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# 全域快取實例（行程池於第一次產生縮圖時才建立）
+_thumbnail_cache: Optional[ThumbnailCache] = None
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """取得全域縮圖快取實例"""
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        _thumbnail_cache = ThumbnailCache()
+    return _thumbnail_cache
+
+
+def shutdown_thumbnail_cache() -> None:
+    """關閉全域縮圖快取（應用關閉時呼叫）"""
+    if _thumbnail_cache is not None:
+        _thumbnail_cache.shutdown()
@@ -6,13 +6,32 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorCollection
 from pydantic import BaseModel
+from pymongo import ReturnDocument
 from bson import ObjectId
 from app.database import get_database
+from app.services.repositories.projections import Fields, build_projection
+from app.utils.response_cache import get_response_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class VersionConflictError(Exception):
+    """樂觀鎖衝突：文件已被其他請求更新"""
+    
+    def __init__(self, id: str, expected_version: int):
+        """
+        初始化錯誤
+        
+        Args:
+            id: 文件 ID
+            expected_version: 呼叫端讀取時的版本號
+        """
+        self.id = id
+        self.expected_version = expected_version
+        super().__init__(f"文件 {id} 已被更新（預期版本 {expected_version}）")
+
+
 class BaseRepository:
     """基礎 Repository 類別"""
     
@@ -34,6 +53,10 @@ class BaseRepository:
             self._collection = self._db[self.collection_name]
         return self._collection
     
+    def _invalidate_cache(self) -> None:
+        """寫入後讓依賴此集合的 API 回應快取失效"""
+        get_response_cache().invalidate(self.collection_name)
+    
     async def create(self, document: Dict[str, Any]) -> Dict[str, Any]:
         """
         建立文件
@@ -47,40 +70,48 @@ class BaseRepository:
         collection = await self._get_collection()
         result = await collection.insert_one(document)
         document["_id"] = result.inserted_id
+        self._invalidate_cache()
         return document
     
-    async def find_by_id(self, id: str) -> Optional[Dict[str, Any]]:
+    async def find_by_id(self, id: str, fields: Optional[Fields] = None) -> Optional[Dict[str, Any]]:
         """
         根據 ID 查詢文件
         
         Args:
             id: 文件 ID
+            fields: 只取回的欄位（None 表示完整文件）
             
         Returns:
             文件資料，如果不存在則返回 None
         """
         collection = await self._get_collection()
-        return await collection.find_one({"id": id})
+        return await collection.find_one({"id": id}, build_projection(fields))
     
-    async def find_one(self, filter: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def find_one(
+        self,
+        filter: Dict[str, Any],
+        fields: Optional[Fields] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         查詢單一文件
         
         Args:
             filter: 查詢條件
+            fields: 只取回的欄位（None 表示完整文件）
             
         Returns:
             文件資料，如果不存在則返回 None
         """
         collection = await self._get_collection()
-        return await collection.find_one(filter)
+        return await collection.find_one(filter, build_projection(fields))
     
     async def find_many(
         self,
         filter: Optional[Dict[str, Any]] = None,
         skip: int = 0,
         limit: int = 10,
-        sort: Optional[List[tuple]] = None
+        sort: Optional[List[tuple]] = None,
+        fields: Optional[Fields] = None
     ) -> List[Dict[str, Any]]:
         """
         查詢多個文件
@@ -90,12 +121,13 @@ class BaseRepository:
             skip: 跳過數量
             limit: 限制數量
             sort: 排序條件
+            fields: 只取回的欄位（None 表示完整文件）
             
         Returns:
             文件列表
         """
         collection = await self._get_collection()
-        cursor = collection.find(filter or {})
+        cursor = collection.find(filter or {}, build_projection(fields))
         
         if sort:
             cursor = cursor.sort(sort)
@@ -120,18 +152,23 @@ class BaseRepository:
         self,
         id: str,
         update: Dict[str, Any],
-        upsert: bool = False
+        upsert: bool = False,
+        expected_version: Optional[int] = None
     ) -> Optional[Dict[str, Any]]:
         """
-        根據 ID 更新文件
+        根據 ID 更新文件（find_one_and_update，單次往返取得更新後的文件）
         
         Args:
             id: 文件 ID
             update: 更新資料
             upsert: 如果不存在是否建立
+            expected_version: 預期的 version 欄位值（指定時啟用樂觀鎖並遞增 version）
             
         Returns:
             更新後的文件，如果不存在則返回 None
+            
+        Raises:
+            VersionConflictError: 文件存在但 version 與預期不符
         """
         collection = await self._get_collection()
         
@@ -139,15 +176,24 @@ class BaseRepository:
         update["$set"] = update.get("$set", {})
         update["$set"]["updated_at"] = datetime.utcnow()
         
-        result = await collection.update_one(
-            {"id": id},
+        filter: Dict[str, Any] = {"id": id}
+        if expected_version is not None:
+            filter["version"] = expected_version
+            update["$set"].pop("version", None)
+            update.setdefault("$inc", {})["version"] = 1
+        
+        result = await collection.find_one_and_update(
+            filter,
             update,
-            upsert=upsert
+            upsert=upsert and expected_version is None,
+            return_document=ReturnDocument.AFTER
         )
+        if result is not None:
+            self._invalidate_cache()
         
-        if result.modified_count > 0 or result.upserted_id:
-            return await self.find_by_id(id)
-        return None
+        if result is None and expected_version is not None and await self.exists({"id": id}):
+            raise VersionConflictError(id, expected_version)
+        return result
     
     async def delete_by_id(self, id: str) -> bool:
         """
@@ -161,6 +207,8 @@ class BaseRepository:
         """
         collection = await self._get_collection()
         result = await collection.delete_one({"id": id})
+        if result.deleted_count:
+            self._invalidate_cache()
         return result.deleted_count > 0
     
     async def exists(self, filter: Dict[str, Any]) -> bool:
@@ -0,0 +1,264 @@
+"""
+批次匯入
+讀取與 GET /api/v1/export 相同格式的 NDJSON（每行一個主題，含 content 與 images），
+分批寫入 topics、contents、images 集合，以 id 為鍵（已存在的文件會被取代）
+
+- 集合原本是空的：以 insert_many(ordered=False) 快速寫入；rebuild_indexes 時匯入前先移除次要索引
+  （保留 _id 與唯一索引），匯入結束或失敗時統一重建（避免每筆寫入都維護索引）
+- 集合已有資料：以 ReplaceOne(upsert=True) 批次寫入，保留現有索引
+"""
+import json
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set, Union
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from app.database import get_database
+from app.utils.response_cache import get_response_cache
+
+logger = logging.getLogger(__name__)
+
+IMPORT_COLLECTIONS = ("topics", "contents", "images")
+
+# 最多記錄幾筆錯誤（避免錯誤過多時回應過大）
+MAX_REPORTED_ERRORS = 50
+
+
+def _restore_datetimes(document: Dict[str, Any]) -> Dict[str, Any]:
+    """將頂層 *_at 欄位的 ISO 字串轉回 datetime（匯出時序列化為字串）"""
+    for key, value in document.items():
+        if key.endswith("_at") and isinstance(value, str):
+            try:
+                document[key] = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                pass
+    return document
+
+
+class _CollectionWriter:
+    """單一集合的批次寫入器"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, name: str, batch_size: int):
+        self.collection = db[name]
+        self.name = name
+        self.batch_size = batch_size
+        self.fresh = False
+        self.dropped_indexes: List[str] = []
+        self._seen_ids: Set[str] = set()
+        self._pending: List[Dict[str, Any]] = []
+        self.inserted = 0
+        self.upserted = 0
+        self.failed = 0
+
+    async def prepare(self, drop_secondary_indexes: bool) -> None:
+        """
+        判斷寫入模式
+
+        Args:
+            drop_secondary_indexes: 空集合是否先移除次要索引（_id 與唯一索引保留，仍可防止重複）
+        """
+        self.fresh = await self.collection.estimated_document_count() == 0
+        if not (self.fresh and drop_secondary_indexes):
+            return
+        indexes = await self.collection.index_information()
+        for name, info in indexes.items():
+            if name == "_id_" or info.get("unique"):
+                continue
+            await self.collection.drop_index(name)
+            self.dropped_indexes.append(name)
+
+    async def add(self, document: Dict[str, Any]) -> None:
+        """加入文件，累積到批次大小時寫入"""
+        self._pending.append(document)
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """寫入累積的文件"""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+
+        if not self.fresh:
+            await self._upsert(batch)
+            return
+
+        # 空集合：本次匯入未出現過的 id 直接插入，重複出現的 id 以 upsert 取代
+        inserts = []
+        replacements = []
+        for document in batch:
+            document_id = document.get("id")
+            if document_id in self._seen_ids:
+                replacements.append(document)
+            else:
+                self._seen_ids.add(document_id)
+                inserts.append(document)
+
+        if inserts:
+            try:
+                result = await self.collection.insert_many(inserts, ordered=False)
+                self.inserted += len(result.inserted_ids)
+            except BulkWriteError as e:
+                self.inserted += e.details.get("nInserted", 0)
+                self.failed += len(e.details.get("writeErrors", []))
+                logger.warning(f"{self.name} 批次寫入部分失敗: {len(e.details.get('writeErrors', []))} 筆")
+        if replacements:
+            await self._upsert(replacements)
+
+    async def _upsert(self, batch: List[Dict[str, Any]]) -> None:
+        """以 id 為鍵取代或建立文件"""
+        operations = [ReplaceOne({"id": document["id"]}, document, upsert=True) for document in batch]
+        try:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            self.upserted += result.upserted_count + result.matched_count
+        except BulkWriteError as e:
+            details = e.details
+            self.upserted += details.get("nUpserted", 0) + details.get("nMatched", 0)
+            self.failed += len(details.get("writeErrors", []))
+            logger.warning(f"{self.name} 批次更新部分失敗: {len(details.get('writeErrors', []))} 筆")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "mode": "insert" if self.fresh else "upsert",
+            "inserted": self.inserted,
+            "upserted": self.upserted,
+            "failed": self.failed,
+        }
+
+
+class BulkImporter:
+    """NDJSON 批次匯入器"""
+
+    def __init__(self, batch_size: int = 1000, rebuild_indexes: bool = True):
+        """
+        初始化匯入器
+
+        Args:
+            batch_size: 每批寫入的文件數量
+            rebuild_indexes: 空集合匯入前是否移除次要索引，並在匯入結束後重建
+        """
+        self.batch_size = batch_size
+        self.rebuild_indexes = rebuild_indexes
+        self._writers: Dict[str, _CollectionWriter] = {}
+        self._indexes_restored = False
+        self._started_at: Optional[float] = None
+        self.lines = 0
+        self.topics = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.error_count = 0
+
+    async def start(self) -> None:
+        """準備各集合的寫入器"""
+        db = await get_database()
+        self._started_at = time.perf_counter()
+        for name in IMPORT_COLLECTIONS:
+            writer = _CollectionWriter(db, name, self.batch_size)
+            self._writers[name] = writer
+            await writer.prepare(self.rebuild_indexes)
+        fresh = [name for name, writer in self._writers.items() if writer.fresh]
+        if fresh:
+            logger.info(f"空集合以 insert 模式匯入: {', '.join(fresh)}")
+        dropped = [name for name, writer in self._writers.items() if writer.dropped_indexes]
+        if dropped:
+            logger.info(f"次要索引延後建立: {', '.join(dropped)}")
+
+    def _record_error(self, line_number: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "error": message})
+
+    async def add_line(self, line: Union[str, bytes]) -> None:
+        """
+        匯入一行 NDJSON（一個主題及其內容、圖片）
+
+        Args:
+            line: NDJSON 行
+        """
+        self.lines += 1
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.strip()
+        if not line:
+            return
+
+        try:
+            topic = json.loads(line)
+        except json.JSONDecodeError as e:
+            self._record_error(self.lines, f"JSON 格式錯誤: {e}")
+            return
+        if not isinstance(topic, dict) or not topic.get("id"):
+            self._record_error(self.lines, "缺少主題 id")
+            return
+
+        content = topic.pop("content", None)
+        images = topic.pop("images", None) or []
+        topic.pop("_id", None)
+        await self._writers["topics"].add(_restore_datetimes(topic))
+        self.topics += 1
+
+        if isinstance(content, dict):
+            content.pop("_id", None)
+            content.setdefault("topic_id", topic["id"])
+            content.setdefault("id", f"content_{topic['id']}")
+            await self._writers["contents"].add(_restore_datetimes(content))
+
+        for index, image in enumerate(images):
+            if not isinstance(image, dict) or not image.get("id"):
+                self._record_error(self.lines, f"第 {index + 1} 張圖片缺少 id")
+                continue
+            image.pop("_id", None)
+            image.setdefault("topic_id", topic["id"])
+            await self._writers["images"].add(_restore_datetimes(image))
+
+    async def finish(self) -> Dict[str, Any]:
+        """
+        寫入剩餘文件並重建索引
+
+        Returns:
+            匯入統計
+        """
+        for writer in self._writers.values():
+            await writer.flush()
+
+        write_seconds = time.perf_counter() - (self._started_at or time.perf_counter())
+        get_response_cache().invalidate(*IMPORT_COLLECTIONS)
+
+        index_start = time.perf_counter()
+        await self.close()
+        index_seconds = time.perf_counter() - index_start
+
+        documents = sum(
+            writer.inserted + writer.upserted for writer in self._writers.values()
+        )
+        stats = {
+            "lines": self.lines,
+            "topics": self.topics,
+            "documents": documents,
+            "collections": {name: writer.get_stats() for name, writer in self._writers.items()},
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "write_seconds": round(write_seconds, 3),
+            "index_seconds": round(index_seconds, 3),
+            "documents_per_second": round(documents / write_seconds, 1) if write_seconds > 0 else 0,
+        }
+        logger.info(
+            f"匯入完成: {self.topics} 個主題、{documents} 個文件，"
+            f"寫入 {write_seconds:.2f} 秒（{stats['documents_per_second']} 筆/秒），"
+            f"索引 {index_seconds:.2f} 秒"
+        )
+        return stats
+
+    async def close(self) -> None:
+        """
+        重建匯入前移除的次要索引（匯入失敗時也必須呼叫，避免集合留在沒有索引的狀態；重複呼叫不會重建兩次）
+        """
+        if self._indexes_restored:
+            return
+        self._indexes_restored = True
+        if any(writer.dropped_indexes for writer in self._writers.values()):
+            from app.db_init import create_indexes
+            await create_indexes()
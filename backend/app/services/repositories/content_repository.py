@@ -2,19 +2,30 @@
 Content Repository
 提供 Content 的 CRUD 操作
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
-from app.services.repositories.base_repository import BaseRepository
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.services.repositories.base_repository import BaseRepository, VersionConflictError
+from app.services.repositories.content_version_repository import ContentVersionRepository
+from app.services.repositories.projections import Fields, build_projection
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 估算腳本時長：每 17 字約 1 秒
+CHARS_PER_SECOND = 17
+
+# 預設投影：排除舊版內嵌的版本歷史（版本已移至 content_versions 集合）
+CONTENT_PROJECTION = {"versions": 0}
+
 
 class ContentRepository(BaseRepository):
     """Content Repository"""
     
     def __init__(self):
         super().__init__("contents")
+        self.version_repo = ContentVersionRepository()
     
     async def create_content(self, content_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -31,95 +42,234 @@ class ContentRepository(BaseRepository):
         content_data.setdefault("version", 1)
         content_data.setdefault("generated_at", now)
         content_data.setdefault("updated_at", now)
-        content_data.setdefault("versions", [])
         
         return await self.create(content_data)
     
-    async def get_content_by_topic_id(self, topic_id: str) -> Optional[Dict[str, Any]]:
+    async def get_content_by_topic_id(
+        self,
+        topic_id: str,
+        fields: Optional[Fields] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         根據 Topic ID 取得 Content
         
         Args:
             topic_id: Topic ID
+            fields: 只取回的欄位（例如 CONTENT_SUMMARY_FIELDS，None 表示除版本歷史外的完整文件）
             
         Returns:
             Content 資料
         """
-        return await self.find_one({"topic_id": topic_id})
+        collection = await self._get_collection()
+        return await collection.find_one({"topic_id": topic_id}, build_projection(fields) or CONTENT_PROJECTION)
     
-    async def get_content_by_id(self, content_id: str) -> Optional[Dict[str, Any]]:
+    async def get_word_counts_by_topic_ids(self, topic_ids: List[str]) -> Dict[str, int]:
+        """
+        以單次查詢取得多個 Topic 的內容字數
+        
+        Args:
+            topic_ids: Topic ID 列表
+            
+        Returns:
+            {topic_id: 字數}（沒有內容的 Topic 不在結果中）
+        """
+        if not topic_ids:
+            return {}
+        collection = await self._get_collection()
+        cursor = collection.find({"topic_id": {"$in": topic_ids}}, {"_id": 0, "topic_id": 1, "word_count": 1})
+        return {doc["topic_id"]: doc.get("word_count", 0) async for doc in cursor}
+    
+    async def get_content_by_id(
+        self,
+        content_id: str,
+        fields: Optional[Fields] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         根據 ID 取得 Content
         
         Args:
             content_id: Content ID
+            fields: 只取回的欄位（None 表示除版本歷史外的完整文件）
             
         Returns:
             Content 資料
         """
-        return await self.find_by_id(content_id)
+        collection = await self._get_collection()
+        return await collection.find_one({"id": content_id}, build_projection(fields) or CONTENT_PROJECTION)
     
-    async def update_content(
+    @staticmethod
+    def _count_words(article: Optional[str], script: Optional[str]) -> int:
+        """計算字數（與資料庫端的 $strLenCP 相同，以字元計算）"""
+        return len(article or "") + len(script or "")
+    
+    @staticmethod
+    def _build_update_pipeline(
+        update_data: Dict[str, Any],
+        create_version: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        建立更新管線（字數與版本號在資料庫端計算，與更新在同一次原子操作完成）
+        
+        Args:
+            update_data: 更新資料
+            create_version: 是否遞增版本號
+            
+        Returns:
+            aggregation pipeline 形式的更新
+        """
+        # 使用 $literal，避免以 $ 開頭的文字被當成欄位路徑
+        values = {key: {"$literal": value} for key, value in update_data.items()}
+        values["updated_at"] = datetime.utcnow()
+        if create_version:
+            values["version"] = {"$add": [{"$ifNull": ["$version", 1]}, 1]}
+        pipeline: List[Dict[str, Any]] = [{"$set": values}]
+        
+        # 只更新短文或腳本其中之一時，以資料庫中的另一項重新計算字數和時長
+        if ("article" in update_data or "script" in update_data) and "word_count" not in update_data:
+            word_count = {"$add": [
+                {"$strLenCP": {"$ifNull": ["$article", ""]}},
+                {"$strLenCP": {"$ifNull": ["$script", ""]}},
+            ]}
+            pipeline.append({"$set": {"word_count": word_count}})
+            pipeline.append({"$set": {
+                "estimated_duration": {"$toInt": {"$floor": {"$divide": ["$word_count", CHARS_PER_SECOND]}}}
+            }})
+        
+        return pipeline
+    
+    def _apply_locally(
         self,
-        content_id: str,
+        before: Dict[str, Any],
+        pipeline: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        由更新前文件推算更新後文件（與更新管線結果相同，省去再查詢一次）
+        
+        Args:
+            before: 更新前的文件
+            pipeline: 已執行的更新管線
+            
+        Returns:
+            更新後的文件
+        """
+        after = dict(before)
+        for key, value in pipeline[0]["$set"].items():
+            if isinstance(value, dict) and "$literal" in value:
+                after[key] = value["$literal"]
+            elif key == "version":
+                after["version"] = (before.get("version") or 1) + 1
+            else:
+                after[key] = value
+        if len(pipeline) > 1:
+            after["word_count"] = self._count_words(after.get("article"), after.get("script"))
+            after["estimated_duration"] = after["word_count"] // CHARS_PER_SECOND
+        return after
+    
+    async def _update_one(
+        self,
+        filter: Dict[str, Any],
         update_data: Dict[str, Any],
-        create_version: bool = True
+        create_version: bool,
+        expected_version: Optional[int]
     ) -> Optional[Dict[str, Any]]:
         """
-        更新 Content
+        以 find_one_and_update 更新單一 Content（單次往返）
+        
+        建立版本時取回更新前的文件，將舊內容寫入 content_versions，
+        並在本地推算更新後的文件；版本號由資料庫原子遞增，並行編輯不會遺失版本。
+        尚未遷移的 Content 仍有內嵌的 versions 時，先將其遷移到 content_versions，避免舊版本歷史消失
         
         Args:
-            content_id: Content ID
+            filter: 查詢條件
             update_data: 更新資料
             create_version: 是否建立版本記錄
+            expected_version: 預期的版本號（指定時啟用樂觀鎖）
             
         Returns:
-            更新後的 Content
+            更新後的 Content，不存在時返回 None
+            
+        Raises:
+            VersionConflictError: Content 已被其他編輯更新
         """
         collection = await self._get_collection()
         
-        # 準備更新操作
-        update_ops = {}
-        
+        update_data = dict(update_data)
+        update_data.pop("updated_at", None)
         if create_version:
-            # 取得當前內容
-            current = await self.find_by_id(content_id)
-            if current:
-                # 建立版本記錄
-                version_data = {
-                    "version": current.get("version", 1),
-                    "type": "edited",
-                    "article": current.get("article"),
-                    "script": current.get("script"),
-                    "edited_at": datetime.utcnow()
-                }
-                
-                # 增加版本號
-                new_version = current.get("version", 1) + 1
-                update_data["version"] = new_version
-                
-                # 添加到版本歷史（使用 $push）
-                update_ops["$push"] = {"versions": version_data}
-        
-        # 設定更新資料（使用 $set）
-        update_ops["$set"] = update_data
-        update_ops["$set"]["updated_at"] = datetime.utcnow()
-        
-        # 執行更新
-        result = await collection.update_one(
-            {"id": content_id},
-            update_ops
+            # 版本號由管線遞增
+            update_data.pop("version", None)
+        
+        if expected_version is not None:
+            filter = {**filter, "version": expected_version}
+        
+        pipeline = self._build_update_pipeline(update_data, create_version)
+        # 建立版本時連同 versions 取回（已遷移的文件沒有此欄位，不增加讀取量）
+        result = await collection.find_one_and_update(
+            filter,
+            pipeline,
+            projection=None if create_version else CONTENT_PROJECTION,
+            return_document=ReturnDocument.BEFORE if create_version else ReturnDocument.AFTER
         )
         
-        if result.modified_count > 0:
-            return await self.find_by_id(content_id)
-        return None
+        if result is None:
+            if expected_version is not None:
+                base_filter = {key: value for key, value in filter.items() if key != "version"}
+                if await self.exists(base_filter):
+                    raise VersionConflictError(
+                        base_filter.get("id") or base_filter.get("topic_id"),
+                        expected_version
+                    )
+            return None
+        
+        self._invalidate_cache()
+        if not create_version:
+            return result
+        
+        # 內容更新已經寫入：版本記錄寫入失敗時只記錄錯誤，不讓成功的編輯回應 500
+        # （缺少的版本之後的記錄會因找不到前一版本而存完整快照，不影響還原）
+        try:
+            if result.get("versions"):
+                await self.migrate_embedded_versions(result)
+            await self.version_repo.add_version(
+                content_id=result.get("id") or result["topic_id"],
+                topic_id=result["topic_id"],
+                version=result.get("version") or 1,
+                article=result.get("article"),
+                script=result.get("script"),
+                type="edited",
+            )
+        except Exception as e:
+            logger.error(f"寫入內容版本記錄失敗: {result.get('topic_id')} v{result.get('version') or 1} - {e}")
+        result.pop("versions", None)
+        return self._apply_locally(result, pipeline)
+    
+    async def update_content(
+        self,
+        content_id: str,
+        update_data: Dict[str, Any],
+        create_version: bool = True,
+        expected_version: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        更新 Content
+        
+        Args:
+            content_id: Content ID
+            update_data: 更新資料
+            create_version: 是否建立版本記錄
+            expected_version: 編輯時讀取的版本號（指定時，版本不符會拋出 VersionConflictError）
+            
+        Returns:
+            更新後的 Content
+        """
+        return await self._update_one({"id": content_id}, update_data, create_version, expected_version)
     
     async def update_content_by_topic_id(
         self,
         topic_id: str,
         update_data: Dict[str, Any],
-        create_version: bool = True
+        create_version: bool = True,
+        expected_version: Optional[int] = None
     ) -> Optional[Dict[str, Any]]:
         """
         根據 Topic ID 更新 Content
@@ -128,35 +278,84 @@ class ContentRepository(BaseRepository):
             topic_id: Topic ID
             update_data: 更新資料
             create_version: 是否建立版本記錄
+            expected_version: 編輯時讀取的版本號（指定時，版本不符會拋出 VersionConflictError）
             
         Returns:
             更新後的 Content
         """
-        content = await self.get_content_by_topic_id(topic_id)
-        if not content:
-            return None
-        
-        return await self.update_content(content["id"], update_data, create_version)
+        return await self._update_one({"topic_id": topic_id}, update_data, create_version, expected_version)
     
-    async def get_content_versions(self, topic_id: str) -> List[Dict[str, Any]]:
+    async def get_content_versions(
+        self,
+        topic_id: str,
+        page: int = 1,
+        limit: int = 20
+    ) -> Tuple[List[Dict[str, Any]], int]:
         """
-        取得 Content 版本歷史
+        分頁取得 Content 版本歷史（新到舊）
         
         Args:
             topic_id: Topic ID
+            page: 頁碼
+            limit: 每頁數量
             
         Returns:
-            版本列表
+            (版本列表, 總數量)
         """
-        content = await self.get_content_by_topic_id(topic_id)
-        if not content:
-            return []
+        total = await self.version_repo.count_versions(topic_id)
+        if total > 0:
+            return await self.version_repo.get_versions_page(topic_id, page, limit), total
         
-        return content.get("versions", [])
+        # 尚未遷移的舊資料：版本仍內嵌在 Content 文件中
+        collection = await self._get_collection()
+        content = await collection.find_one({"topic_id": topic_id}, {"versions": 1})
+        legacy = list(reversed((content or {}).get("versions") or []))
+        start = (page - 1) * limit
+        return legacy[start:start + limit], len(legacy)
+    
+    async def migrate_embedded_versions(self, content: Dict[str, Any]) -> int:
+        """
+        將內嵌在 Content 文件的版本歷史移至 content_versions 集合
+        
+        已存在於 content_versions 的版本（例如上次遷移中途中斷）會略過，可重複執行
+        
+        Args:
+            content: 包含 versions 欄位的 Content 文件
+            
+        Returns:
+            遷移的版本數量（不含已存在而略過的版本）
+        """
+        content_id = content.get("id") or content["topic_id"]
+        existing = await self.version_repo.get_version_numbers(content_id)
+        versions = sorted(content.get("versions") or [], key=lambda v: v.get("version", 0))
+        migrated = 0
+        for version in versions:
+            number = version.get("version", 1)
+            if number in existing:
+                continue
+            try:
+                await self.version_repo.add_version(
+                    content_id=content_id,
+                    topic_id=content["topic_id"],
+                    version=number,
+                    article=version.get("article"),
+                    script=version.get("script"),
+                    type=version.get("type", "edited"),
+                    edited_at=version.get("edited_at") or version.get("generated_at"),
+                )
+            except DuplicateKeyError:
+                # 同時執行的遷移已寫入此版本
+                continue
+            existing.add(number)
+            migrated += 1
+        
+        collection = await self._get_collection()
+        await collection.update_one({"_id": content["_id"]}, {"$unset": {"versions": ""}})
+        return migrated
     
     async def delete_content(self, content_id: str) -> bool:
         """
-        刪除 Content
+        刪除 Content（同時刪除版本歷史）
         
         Args:
             content_id: Content ID
@@ -164,4 +363,24 @@ class ContentRepository(BaseRepository):
         Returns:
             是否成功
         """
-        return await self.delete_by_id(content_id)
+        deleted = await self.delete_by_id(content_id)
+        if deleted:
+            await self.version_repo.delete_versions(content_id)
+        return deleted
+    
+    async def delete_by_topic_ids(self, topic_ids: List[str]) -> int:
+        """
+        刪除多個 Topic 的 Content（同時刪除版本歷史）
+        
+        Args:
+            topic_ids: Topic ID 列表
+            
+        Returns:
+            刪除的 Content 數量
+        """
+        collection = await self._get_collection()
+        result = await collection.delete_many({"topic_id": {"$in": topic_ids}})
+        await self.version_repo.delete_by_topic_ids(topic_ids)
+        if result.deleted_count:
+            self._invalidate_cache()
+        return result.deleted_count
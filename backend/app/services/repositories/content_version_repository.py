@@ -0,0 +1,283 @@
+"""
+Content Version Repository
+內容版本歷史獨立存放於 content_versions 集合，不再隨 Content 文件一起讀取。
+每個版本記錄可以是完整快照，或是相對前一版本的差異（delta）；
+每 CONTENT_VERSION_SNAPSHOT_INTERVAL 個版本存一次完整快照，讀取任一版本最多只需套用有限次差異。
+版本內容可選擇以 zlib 壓縮後儲存
+"""
+import json
+import zlib
+from difflib import SequenceMatcher
+from typing import Optional, List, Dict, Any, Set, Tuple, Union
+from datetime import datetime
+from bson import Binary
+from app.config import settings
+from app.services.repositories.base_repository import BaseRepository
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSION_FIELDS = ("article", "script")
+
+KIND_FULL = "full"
+KIND_DELTA = "delta"
+ENCODING_ZLIB = "zlib"
+ENCODING_NONE = "none"
+
+# 差異格式：["=", start, end] 表示複製前一版本的 [start, end)，["+", text] 表示插入文字
+Delta = List[list]
+
+
+def make_delta(base: str, target: str) -> Delta:
+    """
+    計算從 base 到 target 的差異
+
+    Args:
+        base: 前一版本文字
+        target: 目前版本文字
+
+    Returns:
+        差異操作列表
+    """
+    operations: Delta = []
+    matcher = SequenceMatcher(None, base, target, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            operations.append(["=", i1, i2])
+        elif tag in ("replace", "insert"):
+            operations.append(["+", target[j1:j2]])
+    return operations
+
+
+def apply_delta(base: str, delta: Delta) -> str:
+    """
+    將差異套用到前一版本文字
+
+    Args:
+        base: 前一版本文字
+        delta: 差異操作列表
+
+    Returns:
+        目前版本文字
+    """
+    parts = []
+    for operation in delta:
+        if operation[0] == "=":
+            parts.append(base[operation[1]:operation[2]])
+        else:
+            parts.append(operation[1])
+    return "".join(parts)
+
+
+def _encode(payload: Dict[str, Any], compress: bool) -> Tuple[str, Union[Binary, Dict[str, Any]]]:
+    """將版本內容編碼為儲存格式"""
+    if not compress:
+        return ENCODING_NONE, payload
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return ENCODING_ZLIB, Binary(zlib.compress(raw, 6))
+
+
+def _decode(record: Dict[str, Any]) -> Dict[str, Any]:
+    """將儲存格式解碼為版本內容"""
+    if record.get("encoding") == ENCODING_ZLIB:
+        return json.loads(zlib.decompress(record["data"]).decode("utf-8"))
+    return record.get("data") or {}
+
+
+class ContentVersionRepository(BaseRepository):
+    """Content Version Repository"""
+
+    def __init__(self):
+        super().__init__("content_versions")
+
+    @staticmethod
+    def _snapshot_base(version: int, interval: int) -> int:
+        """版本所屬快照區段的起始版本（該版本固定存完整快照）"""
+        return version - (version - 1) % interval
+
+    @staticmethod
+    def _rebuild(records: List[Dict[str, Any]]) -> Dict[int, Dict[str, Optional[str]]]:
+        """
+        依版本順序重建文字（遇到完整快照時重新開始，差異缺少前一版本時略過）
+
+        Args:
+            records: 版本記錄（需依版本號遞增排序）
+
+        Returns:
+            {版本號: {"article": ..., "script": ...}}
+        """
+        texts: Dict[int, Dict[str, Optional[str]]] = {}
+        for record in records:
+            version = record["version"]
+            payload = _decode(record)
+            if record.get("kind") == KIND_DELTA:
+                previous = texts.get(version - 1)
+                if previous is None:
+                    logger.warning(f"版本 {record.get('content_id')} v{version} 缺少前一版本，無法還原")
+                    continue
+                texts[version] = {
+                    field: apply_delta(previous[field] or "", payload[field])
+                    if isinstance(payload.get(field), list) else payload.get(field)
+                    for field in VERSION_FIELDS
+                }
+            else:
+                texts[version] = {field: payload.get(field) for field in VERSION_FIELDS}
+        return texts
+
+    async def _find_range(
+        self,
+        filter: Dict[str, Any],
+        start_version: int,
+        end_version: int
+    ) -> List[Dict[str, Any]]:
+        """查詢版本區間 [start_version, end_version] 的記錄（依版本號遞增）"""
+        collection = await self._get_collection()
+        cursor = collection.find(
+            {**filter, "version": {"$gte": start_version, "$lte": end_version}}
+        ).sort("version", 1)
+        return await cursor.to_list(length=None)
+
+    async def add_version(
+        self,
+        content_id: str,
+        topic_id: str,
+        version: int,
+        article: Optional[str],
+        script: Optional[str],
+        type: str = "edited",
+        edited_at: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        新增版本記錄
+
+        Args:
+            content_id: Content ID
+            topic_id: Topic ID
+            version: 版本號
+            article: 該版本的短文
+            script: 該版本的腳本
+            type: 版本類型
+            edited_at: 編輯時間
+
+        Returns:
+            建立的版本記錄
+        """
+        interval = max(1, settings.CONTENT_VERSION_SNAPSHOT_INTERVAL)
+        payload: Dict[str, Any] = {"article": article, "script": script}
+        kind = KIND_FULL
+
+        base = self._snapshot_base(version, interval)
+        if base < version:
+            # 讀取同一快照區段中較早的版本，重建前一版本文字
+            records = await self._find_range({"content_id": content_id}, base, version - 1)
+            previous = self._rebuild(records).get(version - 1)
+            if previous is not None:
+                delta = {
+                    field: make_delta(previous[field] or "", payload[field])
+                    if isinstance(payload[field], str) else payload[field]
+                    for field in VERSION_FIELDS
+                }
+                # 差異比完整內容還大時（例如整篇重寫）改存完整快照
+                if len(json.dumps(delta, ensure_ascii=False)) < len(json.dumps(payload, ensure_ascii=False)):
+                    payload = delta
+                    kind = KIND_DELTA
+
+        encoding, data = _encode(payload, settings.CONTENT_VERSION_COMPRESSION)
+        record = {
+            "content_id": content_id,
+            "topic_id": topic_id,
+            "version": version,
+            "type": type,
+            "kind": kind,
+            "encoding": encoding,
+            "data": data,
+            "edited_at": edited_at or datetime.utcnow(),
+        }
+        return await self.create(record)
+
+    async def get_version_numbers(self, content_id: str) -> Set[int]:
+        """取得 Content 已存在的版本號"""
+        collection = await self._get_collection()
+        cursor = collection.find({"content_id": content_id}, {"_id": 0, "version": 1})
+        return {record["version"] async for record in cursor}
+
+    async def count_versions(self, topic_id: str) -> int:
+        """計算主題內容的版本數量"""
+        return await self.count({"topic_id": topic_id})
+
+    async def get_versions_page(
+        self,
+        topic_id: str,
+        page: int = 1,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        分頁取得版本（新到舊）並還原內容
+
+        Args:
+            topic_id: Topic ID
+            page: 頁碼
+            limit: 每頁數量
+
+        Returns:
+            版本列表（version、type、article、script、edited_at）
+        """
+        collection = await self._get_collection()
+        cursor = collection.find(
+            {"topic_id": topic_id},
+            {"data": 0}
+        ).sort("version", -1).skip((page - 1) * limit).limit(limit)
+        headers = await cursor.to_list(length=limit)
+        if not headers:
+            return []
+
+        # 一次讀取還原本頁所需的版本區間（從最舊版本所屬快照到最新版本）
+        interval = max(1, settings.CONTENT_VERSION_SNAPSHOT_INTERVAL)
+        oldest = min(header["version"] for header in headers)
+        newest = max(header["version"] for header in headers)
+        records = await self._find_range(
+            {"topic_id": topic_id},
+            self._snapshot_base(oldest, interval),
+            newest
+        )
+        texts = self._rebuild(records)
+
+        versions = []
+        for header in headers:
+            text = texts.get(header["version"], {})
+            versions.append({
+                "version": header["version"],
+                "type": header.get("type", "edited"),
+                "article": text.get("article"),
+                "script": text.get("script"),
+                "edited_at": header.get("edited_at"),
+            })
+        return versions
+
+    async def delete_versions(self, content_id: str) -> int:
+        """
+        刪除 Content 的所有版本記錄
+
+        Args:
+            content_id: Content ID
+
+        Returns:
+            刪除的數量
+        """
+        collection = await self._get_collection()
+        result = await collection.delete_many({"content_id": content_id})
+        return result.deleted_count
+
+    async def delete_by_topic_ids(self, topic_ids: List[str]) -> int:
+        """
+        刪除多個 Topic 內容的所有版本記錄
+
+        Args:
+            topic_ids: Topic ID 列表
+
+        Returns:
+            刪除的數量
+        """
+        collection = await self._get_collection()
+        result = await collection.delete_many({"topic_id": {"$in": topic_ids}})
+        return result.deleted_count
@@ -5,6 +5,12 @@ Image Repository
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from app.services.repositories.base_repository import BaseRepository
+from app.services.images.deduplication import (
+    canonicalize_url,
+    phash_bands,
+    hamming_distance,
+    DEFAULT_MAX_DISTANCE,
+)
 from app.models.image import ImageSource
 import logging
 
@@ -30,6 +36,10 @@ class ImageRepository(BaseRepository):
         # 確保時間戳記
         image_data.setdefault("fetched_at", datetime.utcnow())
         
+        # 正規化 URL（用於跨來源去重）
+        if image_data.get("url") and not image_data.get("canonical_url"):
+            image_data["canonical_url"] = canonicalize_url(image_data["url"])
+        
         return await self.create(image_data)
     
     async def get_image_by_id(self, image_id: str) -> Optional[Dict[str, Any]]:
@@ -47,7 +57,8 @@ class ImageRepository(BaseRepository):
     async def get_images_by_topic_id(
         self,
         topic_id: str,
-        sort_by_order: bool = True
+        sort_by_order: bool = True,
+        include_dead: bool = False
     ) -> List[Dict[str, Any]]:
         """
         根據 Topic ID 取得所有 Images
@@ -55,11 +66,14 @@ class ImageRepository(BaseRepository):
         Args:
             topic_id: Topic ID
             sort_by_order: 是否按 order 排序
+            include_dead: 是否包含已驗證為失效連結的圖片
             
         Returns:
             Images 列表
         """
         filter = {"topic_id": topic_id}
+        if not include_dead:
+            filter["link_status"] = {"$ne": "dead"}
         sort = [("order", 1)] if sort_by_order else None
         
         return await self.find_many(filter, sort=sort, limit=100)
@@ -93,6 +107,22 @@ class ImageRepository(BaseRepository):
         """
         return await self.delete_by_id(image_id)
     
+    async def delete_by_topic_ids(self, topic_ids: List[str]) -> int:
+        """
+        刪除多個 Topic 的所有 Images
+        
+        Args:
+            topic_ids: Topic ID 列表
+            
+        Returns:
+            刪除的數量
+        """
+        collection = await self._get_collection()
+        result = await collection.delete_many({"topic_id": {"$in": topic_ids}})
+        if result.deleted_count:
+            self._invalidate_cache()
+        return result.deleted_count
+    
     async def reorder_images(
         self,
         topic_id: str,
@@ -122,6 +152,7 @@ class ImageRepository(BaseRepository):
         
         if operations:
             result = await collection.bulk_write(operations)
+            self._invalidate_cache()
             return result.modified_count > 0
         
         return False
@@ -137,3 +168,57 @@ class ImageRepository(BaseRepository):
             圖片數量
         """
         return await self.count({"topic_id": topic_id})
+    
+    async def count_by_topic_ids(self, topic_ids: List[str]) -> Dict[str, int]:
+        """
+        以單次聚合計算多個 Topic 的圖片數量
+        
+        Args:
+            topic_ids: Topic ID 列表
+            
+        Returns:
+            {topic_id: 圖片數量}（沒有圖片的 Topic 不在結果中）
+        """
+        if not topic_ids:
+            return {}
+        collection = await self._get_collection()
+        pipeline = [
+            {"$match": {"topic_id": {"$in": topic_ids}}},
+            {"$group": {"_id": "$topic_id", "count": {"$sum": 1}}},
+        ]
+        return {row["_id"]: row["count"] async for row in collection.aggregate(pipeline)}
+    
+    async def find_near_duplicates(
+        self,
+        phash: str,
+        topic_id: Optional[str] = None,
+        max_distance: int = DEFAULT_MAX_DISTANCE
+    ) -> List[Dict[str, Any]]:
+        """
+        查詢感知雜湊近似的圖片（使用 phash_bands 分桶索引）
+        
+        Args:
+            phash: 感知雜湊（16 進位字串）
+            topic_id: Topic ID（可選，限定同一主題）
+            max_distance: 最大漢明距離
+            
+        Returns:
+            近似圖片列表（依漢明距離排序，包含 hamming_distance 欄位）
+        """
+        value = int(phash, 16)
+        filter: Dict[str, Any] = {"phash_bands": {"$in": phash_bands(value)}}
+        if topic_id:
+            filter["topic_id"] = topic_id
+        
+        collection = await self._get_collection()
+        cursor = collection.find(filter, {"_id": 0, "id": 1, "topic_id": 1, "url": 1, "phash": 1})
+        
+        matches = []
+        async for doc in cursor:
+            distance = hamming_distance(value, int(doc["phash"], 16))
+            if distance <= max_distance:
+                doc["hamming_distance"] = distance
+                matches.append(doc)
+        
+        matches.sort(key=lambda doc: doc["hamming_distance"])
+        return matches
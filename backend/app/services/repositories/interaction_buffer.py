@@ -0,0 +1,265 @@
+"""
+互動記錄寫入緩衝
+點擊、瀏覽等互動事件先放入記憶體緩衝，達到數量或時間門檻時以 insert_many 批次寫入；
+主題分類透過快取的 topic → category 對照表取得，避免每個事件都查詢一次主題
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+from app.config import settings
+from app.services.repositories.interaction_repository import InteractionRepository
+from app.services.repositories.topic_repository import TopicRepository
+
+logger = logging.getLogger(__name__)
+
+
+class TopicCategoryCache:
+    """主題分類快取（主題分類建立後不會改變，可以長時間快取）"""
+
+    def __init__(self, ttl_seconds: float = 600.0, max_entries: int = 10000):
+        """
+        初始化快取
+
+        Args:
+            ttl_seconds: 快取有效時間（秒）
+            max_entries: 最多快取的主題數量（超過時淘汰最久未使用的）
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.topic_repo = TopicRepository()
+        self._entries: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+
+    def _get(self, topic_id: str, now: float) -> Tuple[bool, Optional[str]]:
+        entry = self._entries.get(topic_id)
+        if entry is None or entry[1] <= now:
+            return False, None
+        self._entries.move_to_end(topic_id)
+        return True, entry[0]
+
+    def _put(self, topic_id: str, category: Optional[str], now: float) -> None:
+        self._entries[topic_id] = (category, now + self.ttl_seconds)
+        self._entries.move_to_end(topic_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def resolve(self, topic_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        批次取得主題分類（未命中的主題以單次 $in 查詢補齊）
+
+        Args:
+            topic_ids: Topic ID 列表
+
+        Returns:
+            {topic_id: category}，主題不存在時為 None
+        """
+        now = time.monotonic()
+        result: Dict[str, Optional[str]] = {}
+        missing = []
+        for topic_id in set(topic_ids):
+            hit, category = self._get(topic_id, now)
+            if hit:
+                result[topic_id] = category
+            else:
+                missing.append(topic_id)
+
+        if missing:
+            found = await self.topic_repo.get_categories_by_ids(missing)
+            for topic_id in missing:
+                category = found.get(topic_id)
+                # 不存在的主題也快取（None），避免重複查詢
+                self._put(topic_id, category, now)
+                result[topic_id] = category
+
+        return result
+
+    def invalidate(self, topic_id: str) -> None:
+        """移除單一主題的快取（主題刪除時使用）"""
+        self._entries.pop(topic_id, None)
+
+
+class InteractionWriteBuffer:
+    """互動記錄寫入緩衝（write-behind）"""
+
+    def __init__(
+        self,
+        max_batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_pending: Optional[int] = None
+    ):
+        """
+        初始化寫入緩衝
+
+        Args:
+            max_batch_size: 累積多少筆時立即寫入
+            flush_interval: 最長等待多久寫入一次（秒）
+            max_pending: 緩衝上限（超過時新增記錄會等待寫入完成，避免記憶體無限成長）
+        """
+        self.max_batch_size = max_batch_size or settings.INTERACTION_BUFFER_MAX_BATCH
+        self.flush_interval = flush_interval or settings.INTERACTION_BUFFER_FLUSH_INTERVAL
+        self.max_pending = max_pending or self.max_batch_size * 20
+
+        self.interaction_repo = InteractionRepository()
+        self.category_cache = TopicCategoryCache()
+
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "failed": 0,
+            "flushes": 0,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """啟動背景寫入任務"""
+        if self.is_running:
+            return
+        self._flush_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"互動寫入緩衝已啟動（批次 {self.max_batch_size} 筆 / {self.flush_interval} 秒）")
+
+    async def stop(self) -> None:
+        """停止背景任務並寫入所有剩餘記錄"""
+        if self._task is not None:
+            # 不取消任務：取消會中斷進行中的批次寫入，改為通知迴圈結束並等待目前批次完成
+            self._stopping = True
+            self._flush_event.set()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                # 任務已被其他地方取消（未寫入的記錄已放回緩衝），繼續寫入剩餘記錄
+                if not self._task.cancelled():
+                    raise
+            self._task = None
+
+        while self._pending:
+            written = await self.flush()
+            if written == 0 and self._pending:
+                logger.error(f"關閉時無法寫入 {len(self._pending)} 筆互動記錄，已放棄")
+                self.stats["failed"] += len(self._pending)
+                self._pending = []
+                break
+        logger.info(f"互動寫入緩衝已停止（共寫入 {self.stats['written']} 筆）")
+
+    async def _run(self) -> None:
+        """依時間或數量門檻觸發寫入（stop() 設定 _stopping 後結束）"""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"互動記錄批次寫入失敗: {e}")
+
+    async def add_many(self, interactions: List[Dict[str, Any]]) -> None:
+        """
+        加入互動記錄（補齊主題分類後放入緩衝）
+
+        Args:
+            interactions: 互動記錄文件（由 InteractionRepository.build_interaction 建立）
+        """
+        if not interactions:
+            return
+
+        missing = [doc["topic_id"] for doc in interactions if not doc.get("category")]
+        if missing:
+            categories = await self.category_cache.resolve(missing)
+            for doc in interactions:
+                if not doc.get("category"):
+                    doc["category"] = categories.get(doc["topic_id"])
+
+        # 背景任務未啟動時（例如腳本或測試）直接寫入
+        if not self.is_running:
+            written = await self.interaction_repo.create_interactions(interactions)
+            self.stats["enqueued"] += len(interactions)
+            self.stats["written"] += written
+            return
+
+        # 緩衝已滿：等待寫入完成（背壓）
+        if len(self._pending) >= self.max_pending:
+            await self.flush()
+
+        self._pending.extend(interactions)
+        self.stats["enqueued"] += len(interactions)
+        if len(self._pending) >= self.max_batch_size:
+            self._flush_event.set()
+
+    async def add(self, interaction: Dict[str, Any]) -> None:
+        """加入單筆互動記錄"""
+        await self.add_many([interaction])
+
+    async def flush(self) -> int:
+        """
+        立即寫入緩衝中的記錄
+
+        Returns:
+            成功寫入的數量
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch, self._pending = self._pending, []
+            written = 0
+            start = 0
+            try:
+                while start < len(batch):
+                    chunk = batch[start:start + self.max_batch_size]
+                    written += await self.interaction_repo.create_interactions(chunk)
+                    self.stats["flushes"] += 1
+                    start += len(chunk)
+            except asyncio.CancelledError:
+                # 任務被取消（例如事件迴圈關閉）：未寫入的部分放回緩衝，避免記錄遺失
+                self._pending = batch[start:] + self._pending
+                self.stats["written"] += written
+                raise
+            except Exception as e:
+                # 寫入失敗（例如資料庫暫時無法連線）：未寫入的部分放回緩衝等待下次重試
+                remaining = batch[start:]
+                logger.warning(f"互動記錄寫入失敗，{len(remaining)} 筆將重試: {e}")
+                self._pending = remaining + self._pending
+                if len(self._pending) > self.max_pending:
+                    dropped = len(self._pending) - self.max_pending
+                    self._pending = self._pending[dropped:]
+                    self.stats["failed"] += dropped
+                    logger.error(f"互動寫入緩衝已滿，丟棄最舊的 {dropped} 筆記錄")
+
+            self.stats["written"] += written
+            return written
+
+    def get_stats(self) -> Dict[str, Any]:
+        """取得緩衝狀態"""
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "running": self.is_running,
+            "cached_topics": len(self.category_cache._entries),
+        }
+
+
+# 全域寫入緩衝實例
+_interaction_buffer: Optional[InteractionWriteBuffer] = None
+
+
+def get_interaction_buffer() -> InteractionWriteBuffer:
+    """取得全域互動寫入緩衝"""
+    global _interaction_buffer
+    if _interaction_buffer is None:
+        _interaction_buffer = InteractionWriteBuffer()
+    return _interaction_buffer
@@ -4,21 +4,43 @@ Interaction Repository
 """
 from typing import Optional, List, Dict, Any
 from datetime import datetime
+import uuid
 from app.services.repositories.base_repository import BaseRepository
+from app.services.repositories.interaction_rollup_repository import InteractionRollupRepository
+from app.services.repositories.interaction_storage import (
+    ROLLED_UP_FIELD,
+    to_storage,
+    from_storage,
+    translate_filter,
+)
 from app.models.interaction import InteractionAction
+from pymongo.errors import BulkWriteError
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class InteractionRepository(BaseRepository):
-    """Interaction Repository"""
+    """
+    Interaction Repository
+    
+    支援一般集合與時間序列集合兩種儲存結構（INTERACTION_STORAGE_MODE），
+    寫入前與讀取後透過 interaction_storage 轉換欄位
+    """
     
     def __init__(self):
         super().__init__("interactions")
+        self.rollup_repo = InteractionRollupRepository()
     
-    async def create_interaction(
-        self,
+    async def _update_rollups(self, interactions: List[Dict[str, Any]]) -> None:
+        """遞增更新互動彙總（失敗時只記錄，不影響互動寫入；可用回填指令的 --rebuild 修正）"""
+        try:
+            await self.rollup_repo.apply_interactions(interactions)
+        except Exception as e:
+            logger.warning(f"更新互動彙總失敗: {e}")
+    
+    @staticmethod
+    def build_interaction(
         user_id: str,
         topic_id: str,
         action: InteractionAction,
@@ -26,10 +48,11 @@ class InteractionRepository(BaseRepository):
         photo_id: Optional[str] = None,
         script_id: Optional[str] = None,
         duration: Optional[int] = None,
-        category: Optional[str] = None
+        category: Optional[str] = None,
+        created_at: Optional[datetime] = None
     ) -> Dict[str, Any]:
         """
-        建立互動記錄
+        建立互動記錄文件（不寫入資料庫）
         
         Args:
             user_id: 顧客 ID
@@ -40,12 +63,15 @@ class InteractionRepository(BaseRepository):
             script_id: 劇本 ID（可選）
             duration: 停留時間（秒）
             category: 主題分類
+            created_at: 建立時間（預設為現在）
             
         Returns:
-            建立的互動記錄
+            互動記錄文件
         """
-        interaction_data = {
-            "id": f"interaction_{datetime.utcnow().timestamp()}_{user_id}",
+        now = created_at or datetime.utcnow()
+        return {
+            # 加上隨機後綴，避免同一批次中相同時間戳記的 ID 重複
+            "id": f"interaction_{now.timestamp()}_{user_id}_{uuid.uuid4().hex[:8]}",
             "user_id": user_id,
             "topic_id": topic_id,
             "article_id": article_id,
@@ -54,10 +80,80 @@ class InteractionRepository(BaseRepository):
             "action": action.value if hasattr(action, 'value') else action,
             "duration": duration,
             "category": category,
-            "created_at": datetime.utcnow()
+            "created_at": now
         }
+    
+    async def create_interaction(
+        self,
+        user_id: str,
+        topic_id: str,
+        action: InteractionAction,
+        article_id: Optional[str] = None,
+        photo_id: Optional[str] = None,
+        script_id: Optional[str] = None,
+        duration: Optional[int] = None,
+        category: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        建立互動記錄
+        
+        Args:
+            user_id: 顧客 ID
+            topic_id: 主題 ID
+            action: 互動類型
+            article_id: 文章 ID（可選）
+            photo_id: 照片 ID（可選）
+            script_id: 劇本 ID（可選）
+            duration: 停留時間（秒）
+            category: 主題分類
+            
+        Returns:
+            建立的互動記錄
+        """
+        interaction_data = self.build_interaction(
+            user_id=user_id,
+            topic_id=topic_id,
+            action=action,
+            article_id=article_id,
+            photo_id=photo_id,
+            script_id=script_id,
+            duration=duration,
+            category=category
+        )
+        
+        await self.create(to_storage({**interaction_data, ROLLED_UP_FIELD: True}))
+        await self._update_rollups([interaction_data])
+        return interaction_data
+    
+    async def create_interactions(self, interactions: List[Dict[str, Any]]) -> int:
+        """
+        批次寫入互動記錄（unordered，單筆失敗不影響其他記錄）
         
-        return await self.create(interaction_data)
+        Args:
+            interactions: 互動記錄文件列表（由 build_interaction 建立）
+            
+        Returns:
+            成功寫入的數量
+        """
+        if not interactions:
+            return 0
+        
+        collection = await self._get_collection()
+        try:
+            await collection.insert_many(
+                [to_storage({**doc, ROLLED_UP_FIELD: True}) for doc in interactions],
+                ordered=False
+            )
+            inserted = interactions
+        except BulkWriteError as e:
+            details = e.details or {}
+            write_errors = details.get("writeErrors", [])
+            logger.warning(f"批次寫入互動記錄部分失敗: {len(write_errors)} 筆")
+            failed = {error.get("index") for error in write_errors}
+            inserted = [doc for index, doc in enumerate(interactions) if index not in failed]
+        
+        await self._update_rollups(inserted)
+        return len(inserted)
     
     async def get_interactions_by_user(
         self,
@@ -102,6 +198,7 @@ class InteractionRepository(BaseRepository):
                 query["created_at"] = {"$lte": end_date}
         
         skip = (page - 1) * limit
+        query = translate_filter(query)
         
         # 取得集合實例
         collection = await self._get_collection()
@@ -113,9 +210,10 @@ class InteractionRepository(BaseRepository):
         cursor = collection.find(query).sort("created_at", -1).skip(skip).limit(limit)
         interactions = await cursor.to_list(length=limit)
         
-        # 移除 MongoDB 的 _id
+        # 移除 MongoDB 的 _id，並轉換回一般結構
         for interaction in interactions:
             interaction.pop("_id", None)
+            from_storage(interaction)
         
         return interactions, total
     
@@ -124,7 +222,7 @@ class InteractionRepository(BaseRepository):
         user_id: str
     ) -> Dict[str, Any]:
         """
-        取得顧客的互動統計數據
+        取得顧客的互動統計數據（讀取每日彙總，不掃描完整互動歷史）
         
         Args:
             user_id: 顧客 ID
@@ -132,90 +230,9 @@ class InteractionRepository(BaseRepository):
         Returns:
             統計數據
         """
-        pipeline = [
-            {"$match": {"user_id": user_id}},
-            {"$group": {
-                "_id": "$action",
-                "count": {"$sum": 1}
-            }},
-            {"$group": {
-                "_id": None,
-                "total_likes": {
-                    "$sum": {"$cond": [{"$eq": ["$_id", "like"]}, "$count", 0]}
-                },
-                "total_dislikes": {
-                    "$sum": {"$cond": [{"$eq": ["$_id", "dislike"]}, "$count", 0]}
-                },
-                "total_edits": {
-                    "$sum": {"$cond": [{"$eq": ["$_id", "edit"]}, "$count", 0]}
-                },
-                "total_replaces": {
-                    "$sum": {"$cond": [{"$eq": ["$_id", "replace"]}, "$count", 0]}
-                },
-                "total_views": {
-                    "$sum": {"$cond": [{"$eq": ["$_id", "view"]}, "$count", 0]}
-                },
-                "avg_view_time": {
-                    "$avg": {
-                        "$cond": [
-                            {"$eq": ["$_id", "view"]},
-                            "$duration",
-                            None
-                        ]
-                    }
-                }
-            }},
-            {"$project": {
-                "_id": 0,
-                "total_likes": {"$ifNull": ["$total_likes", 0]},
-                "total_dislikes": {"$ifNull": ["$total_dislikes", 0]},
-                "total_edits": {"$ifNull": ["$total_edits", 0]},
-                "total_replaces": {"$ifNull": ["$total_replaces", 0]},
-                "total_views": {"$ifNull": ["$total_views", 0]},
-                "avg_view_time": {"$ifNull": ["$avg_view_time", 0]}
-            }}
-        ]
+        # 尚未回填的顧客：先將啟用彙總前的歷史互動計入彙總（與寫入時的遞增更新互不影響）
+        if not await self.rollup_repo.is_backfilled(user_id):
+            await self.rollup_repo.backfill(user_id)
         
-        # 取得集合實例
-        collection = await self._get_collection()
-        result = await collection.aggregate(pipeline).to_list(length=1)
-        
-        if result:
-            stats = result[0]
-        else:
-            stats = {
-                "total_likes": 0,
-                "total_dislikes": 0,
-                "total_edits": 0,
-                "total_replaces": 0,
-                "total_views": 0,
-                "avg_view_time": 0
-            }
-        
-        # 計算分類分佈
-        category_pipeline = [
-            {"$match": {"user_id": user_id, "category": {"$exists": True}}},
-            {"$group": {
-                "_id": "$category",
-                "likes": {
-                    "$sum": {"$cond": [{"$eq": ["$action", "like"]}, 1, 0]}
-                },
-                "dislikes": {
-                    "$sum": {"$cond": [{"$eq": ["$action", "dislike"]}, 1, 0]}
-                }
-            }}
-        ]
-        
-        category_result = await collection.aggregate(category_pipeline).to_list(length=None)
-        category_distribution = {
-            cat["_id"]: {
-                "likes": cat.get("likes", 0),
-                "dislikes": cat.get("dislikes", 0)
-            }
-            for cat in category_result
-        }
-        
-        stats["category_distribution"] = category_distribution
-        
-        return stats
-
+        rollups = await self.rollup_repo.get_user_rollups(user_id)
+        return self.rollup_repo.summarize(rollups)
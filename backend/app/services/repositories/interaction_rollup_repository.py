@@ -0,0 +1,325 @@
+"""
+Interaction Rollup Repository
+維護每位顧客、每日、每個分類的互動彙總（各互動類型次數、瀏覽時間總和與次數），
+互動寫入時遞增更新，統計查詢只需讀取少量彙總文件
+
+彙總文件分為兩部分：
+1. counts / view_duration_*：寫入互動時以 $inc 遞增（只包含有 rolled_up 欄位的互動）
+2. history：啟用彙總前的歷史互動（沒有 rolled_up 欄位），由回填以 $set 寫入
+兩者由不同來源計算、寫入不同欄位（重建時也依相同方式區分），
+回填可與寫入同時進行，重複執行或在重建後執行也不會重複計算
+"""
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+from datetime import datetime
+from pymongo import UpdateOne
+from app.services.repositories.base_repository import BaseRepository
+from app.models.interaction import InteractionAction
+from app.services.repositories.interaction_storage import ROLLED_UP_FIELD, field_path, translate_filter
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 沒有分類的互動（主題不存在）歸入此分類，避免彙總鍵出現 null
+UNCATEGORIZED = "uncategorized"
+
+ROLLUP_ACTIONS = [action.value for action in InteractionAction]
+
+# 回填完成標記集合；全部顧客回填完成時以此 user_id 標記
+BACKFILLS_COLLECTION = "interaction_rollup_backfills"
+ALL_USERS = "*"
+
+
+def _rollup_day(created_at: datetime) -> datetime:
+    """互動所屬日期（UTC 當日 00:00）"""
+    return datetime(created_at.year, created_at.month, created_at.day)
+
+
+class InteractionRollupRepository(BaseRepository):
+    """Interaction Rollup Repository"""
+
+    def __init__(self):
+        super().__init__("interaction_rollups")
+
+    @staticmethod
+    def _group_increments(
+        interactions: Iterable[Dict[str, Any]]
+    ) -> Dict[Tuple[str, datetime, str], Dict[str, int]]:
+        """先在記憶體中合併同一彙總鍵的互動，減少寫入次數"""
+        grouped: Dict[Tuple[str, datetime, str], Dict[str, int]] = {}
+        for interaction in interactions:
+            action = interaction.get("action")
+            action = action.value if hasattr(action, "value") else action
+            created_at = interaction.get("created_at") or datetime.utcnow()
+            key = (
+                interaction["user_id"],
+                _rollup_day(created_at),
+                interaction.get("category") or UNCATEGORIZED,
+            )
+            increments = grouped.setdefault(key, {})
+            increments[f"counts.{action}"] = increments.get(f"counts.{action}", 0) + 1
+
+            duration = interaction.get("duration")
+            if action == InteractionAction.VIEW.value and duration is not None:
+                increments["view_duration_sum"] = increments.get("view_duration_sum", 0) + duration
+                increments["view_duration_count"] = increments.get("view_duration_count", 0) + 1
+        return grouped
+
+    async def apply_interactions(self, interactions: List[Dict[str, Any]]) -> int:
+        """
+        將新寫入的互動累加到彙總文件（upsert + $inc）
+
+        Args:
+            interactions: 已寫入的互動記錄
+
+        Returns:
+            更新的彙總文件數量
+        """
+        grouped = self._group_increments(interactions)
+        if not grouped:
+            return 0
+
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"user_id": user_id, "day": day, "category": category},
+                {"$inc": increments, "$set": {"updated_at": now}},
+                upsert=True
+            )
+            for (user_id, day, category), increments in grouped.items()
+        ]
+
+        collection = await self._get_collection()
+        await collection.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    async def get_user_rollups(self, user_id: str) -> List[Dict[str, Any]]:
+        """
+        取得顧客的所有彙總文件
+
+        Args:
+            user_id: 顧客 ID
+
+        Returns:
+            彙總文件列表
+        """
+        collection = await self._get_collection()
+        cursor = collection.find(
+            {"user_id": user_id},
+            {"_id": 0, "category": 1, "counts": 1, "view_duration_sum": 1, "view_duration_count": 1, "history": 1}
+        )
+        return await cursor.to_list(length=None)
+
+    async def _backfills_collection(self):
+        collection = await self._get_collection()
+        return collection.database[BACKFILLS_COLLECTION]
+
+    async def is_backfilled(self, user_id: str) -> bool:
+        """
+        檢查顧客的歷史互動是否已回填（顧客本身或全部顧客已回填）
+
+        Args:
+            user_id: 顧客 ID
+
+        Returns:
+            是否已回填
+        """
+        backfills = await self._backfills_collection()
+        marker = await backfills.find_one({"user_id": {"$in": [user_id, ALL_USERS]}}, {"_id": 1})
+        return marker is not None
+
+    async def _mark_backfilled(self, user_id: Optional[str]) -> None:
+        backfills = await self._backfills_collection()
+        await backfills.update_one(
+            {"user_id": user_id or ALL_USERS},
+            {"$set": {"backfilled_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+    @staticmethod
+    def summarize(rollups: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        將彙總文件合併為統計數據（格式與原本的互動統計相同）
+
+        Args:
+            rollups: 彙總文件列表
+
+        Returns:
+            統計數據
+        """
+        totals = {action: 0 for action in ROLLUP_ACTIONS}
+        duration_sum = 0
+        duration_count = 0
+        category_distribution: Dict[str, Dict[str, int]] = {}
+
+        for rollup in rollups:
+            category = rollup.get("category")
+            # 寫入時遞增的部分與回填的歷史部分合併計算
+            for part in (rollup, rollup.get("history") or {}):
+                counts = part.get("counts") or {}
+                for action in ROLLUP_ACTIONS:
+                    totals[action] += counts.get(action, 0)
+                duration_sum += part.get("view_duration_sum", 0)
+                duration_count += part.get("view_duration_count", 0)
+
+                if category and category != UNCATEGORIZED:
+                    distribution = category_distribution.setdefault(category, {"likes": 0, "dislikes": 0})
+                    distribution["likes"] += counts.get("like", 0)
+                    distribution["dislikes"] += counts.get("dislike", 0)
+
+        return {
+            "total_likes": totals["like"],
+            "total_dislikes": totals["dislike"],
+            "total_edits": totals["edit"],
+            "total_replaces": totals["replace"],
+            "total_views": totals["view"],
+            "avg_view_time": duration_sum / duration_count if duration_count else 0,
+            "category_distribution": category_distribution,
+        }
+
+    @staticmethod
+    def _stat_accumulators(prefix: str = "", condition: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        $group 統計欄位（各互動類型次數、瀏覽時間總和與次數）
+
+        Args:
+            prefix: 輸出欄位前綴（同一個 $group 計算多組統計時區分）
+            condition: 只統計符合此條件的互動（None 表示全部）
+        """
+        def when(expression: Dict[str, Any]) -> Dict[str, Any]:
+            return {"$and": [expression, condition]} if condition else expression
+
+        is_timed_view = {
+            "$and": [
+                {"$eq": ["$action", InteractionAction.VIEW.value]},
+                {"$ne": [{"$ifNull": ["$duration", None]}, None]},
+            ]
+        }
+        accumulators = {
+            f"{prefix}{action}": {"$sum": {"$cond": [when({"$eq": ["$action", action]}), 1, 0]}}
+            for action in ROLLUP_ACTIONS
+        }
+        accumulators[f"{prefix}view_duration_sum"] = {"$sum": {"$cond": [when(is_timed_view), "$duration", 0]}}
+        accumulators[f"{prefix}view_duration_count"] = {"$sum": {"$cond": [when(is_timed_view), 1, 0]}}
+        return accumulators
+
+    @staticmethod
+    def _stat_fields(prefix: str = "") -> Dict[str, Any]:
+        """將 _stat_accumulators 的輸出欄位組成彙總文件的統計欄位"""
+        return {
+            "counts": {action: f"${prefix}{action}" for action in ROLLUP_ACTIONS},
+            "view_duration_sum": f"${prefix}view_duration_sum",
+            "view_duration_count": f"${prefix}view_duration_count",
+        }
+
+    async def _run_merge(
+        self,
+        user_id: Optional[str],
+        match: Dict[str, Any],
+        accumulators: Dict[str, Any],
+        fields: Dict[str, Any],
+        merge: Dict[str, Any]
+    ) -> int:
+        """
+        依彙總鍵分組互動記錄並以 $merge 寫入彙總集合
+
+        Args:
+            user_id: 只處理指定顧客（None 表示全部）
+            match: 額外的互動篩選條件
+            accumulators: $group 統計欄位
+            fields: 寫入彙總文件的統計欄位
+            merge: $merge 的 whenMatched / whenNotMatched 設定
+        """
+        collection = await self._get_collection()
+        interactions = collection.database["interactions"]
+
+        # $merge 需要 on 欄位的唯一索引（已存在時不會重建）
+        await collection.create_index([("user_id", 1), ("day", 1), ("category", 1)], unique=True)
+
+        if user_id:
+            match = {**translate_filter({"user_id": user_id}), **match}
+
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "user_id": f"${field_path('user_id')}",
+                    "day": {"$dateFromParts": {
+                        "year": {"$year": "$created_at"},
+                        "month": {"$month": "$created_at"},
+                        "day": {"$dayOfMonth": "$created_at"},
+                    }},
+                    "category": {"$ifNull": [f"${field_path('category')}", UNCATEGORIZED]},
+                },
+                **accumulators,
+            }},
+            {"$project": {
+                "_id": 0,
+                "user_id": "$_id.user_id",
+                "day": "$_id.day",
+                "category": "$_id.category",
+                **fields,
+                "updated_at": "$$NOW",
+            }},
+            {"$merge": {"into": self.collection_name, "on": ["user_id", "day", "category"], **merge}},
+        ]
+
+        await interactions.aggregate(pipeline).to_list(length=None)
+        await self._mark_backfilled(user_id)
+        return await self.count({"user_id": user_id} if user_id else None)
+
+    async def backfill(self, user_id: Optional[str] = None) -> int:
+        """
+        將啟用彙總前的歷史互動寫入彙總的 history 欄位
+
+        只計算沒有 rolled_up 欄位的互動，且只以 $set 更新 history，
+        不會影響寫入時遞增的欄位：可與互動寫入同時執行，重複執行結果相同
+
+        Args:
+            user_id: 只回填指定顧客（None 表示全部）
+
+        Returns:
+            回填後的彙總文件數量
+        """
+        count = await self._run_merge(
+            user_id,
+            match={ROLLED_UP_FIELD: {"$exists": False}},
+            accumulators=self._stat_accumulators(),
+            fields={"history": self._stat_fields()},
+            merge={
+                "whenMatched": [{"$set": {"history": "$$new.history", "updated_at": "$$new.updated_at"}}],
+                "whenNotMatched": "insert",
+            },
+        )
+        logger.info(f"互動彙總回填完成: {count} 個彙總文件" + (f"（顧客 {user_id}）" if user_id else ""))
+        return count
+
+    async def rebuild(self, user_id: Optional[str] = None) -> int:
+        """
+        從全部互動記錄重建彙總（以 $merge 取代相同彙總鍵的文件，用於修正遞增更新失敗造成的誤差）
+
+        與寫入時相同，已彙總的互動（有 rolled_up 欄位）計入 counts，啟用彙總前的互動只計入 history：
+        兩部分不會重疊，之後再執行 backfill 只會寫入相同的 history。
+        取代整份文件，與同時寫入的遞增更新會互相覆蓋：需在停止寫入互動時執行
+
+        Args:
+            user_id: 只重建指定顧客（None 表示全部）
+
+        Returns:
+            重建後的彙總文件數量
+        """
+        is_pre_rollup = {"$eq": [{"$type": f"${ROLLED_UP_FIELD}"}, "missing"]}
+        count = await self._run_merge(
+            user_id,
+            match={},
+            accumulators={
+                **self._stat_accumulators(condition={"$not": [is_pre_rollup]}),
+                **self._stat_accumulators("history_", condition=is_pre_rollup),
+            },
+            fields={**self._stat_fields(), "history": self._stat_fields("history_")},
+            merge={
+                "whenMatched": "replace",
+                "whenNotMatched": "insert",
+            },
+        )
+        logger.info(f"互動彙總重建完成: {count} 個彙總文件" + (f"（顧客 {user_id}）" if user_id else ""))
+        return count
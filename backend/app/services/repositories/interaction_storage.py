@@ -0,0 +1,152 @@
+"""
+互動記錄儲存模式
+支援兩種集合結構：
+1. standard：一般集合，user_id / category 為頂層欄位
+2. timeseries：MongoDB 時間序列集合（timeField=created_at，metaField=meta{user_id, category}），
+   同一顧客與分類的事件壓縮儲存於同一 bucket，並可設定自動過期
+Repository 透過本模組轉換欄位路徑與文件結構，呼叫端不需要知道實際結構
+"""
+import logging
+from typing import Dict, Any, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+INTERACTIONS_COLLECTION = "interactions"
+STORAGE_STANDARD = "standard"
+STORAGE_TIMESERIES = "timeseries"
+
+# 時間序列模式下放在 metaField 內的欄位
+META_FIELD = "meta"
+META_KEYS = ("user_id", "category")
+
+# 寫入時已遞增更新彙總的互動記錄帶有此欄位（沒有此欄位的是啟用彙總前的歷史資料，由回填計入）
+ROLLED_UP_FIELD = "rolled_up"
+
+# 實際使用的儲存模式（設定為 timeseries 但集合已是一般集合時改用 standard，避免以錯誤的欄位結構寫入）
+_active_mode: Optional[str] = None
+
+
+def active_mode() -> str:
+    """目前實際使用的儲存模式"""
+    return _active_mode or settings.INTERACTION_STORAGE_MODE.lower()
+
+
+def is_timeseries(mode: Optional[str] = None) -> bool:
+    """是否使用時間序列集合"""
+    return (mode or active_mode()).lower() == STORAGE_TIMESERIES
+
+
+def field_path(name: str, mode: Optional[str] = None) -> str:
+    """
+    取得欄位在目前儲存結構中的路徑
+
+    Args:
+        name: 邏輯欄位名稱（例如 user_id）
+        mode: 儲存模式（預設使用設定值）
+
+    Returns:
+        實際欄位路徑（例如 meta.user_id）
+    """
+    if is_timeseries(mode) and name in META_KEYS:
+        return f"{META_FIELD}.{name}"
+    return name
+
+
+def to_storage(document: Dict[str, Any], mode: Optional[str] = None) -> Dict[str, Any]:
+    """將互動記錄轉換為儲存結構（不修改原文件）"""
+    if not is_timeseries(mode):
+        return dict(document)
+    stored = {key: value for key, value in document.items() if key not in META_KEYS}
+    stored[META_FIELD] = {key: document.get(key) for key in META_KEYS}
+    return stored
+
+
+def from_storage(document: Dict[str, Any]) -> Dict[str, Any]:
+    """將儲存結構轉換回互動記錄（兩種結構都可讀取）"""
+    document.pop(ROLLED_UP_FIELD, None)
+    meta = document.pop(META_FIELD, None)
+    if isinstance(meta, dict):
+        for key in META_KEYS:
+            document.setdefault(key, meta.get(key))
+    return document
+
+
+def translate_filter(filter: Dict[str, Any], mode: Optional[str] = None) -> Dict[str, Any]:
+    """將以邏輯欄位撰寫的查詢條件轉換為實際欄位路徑（只處理頂層欄位）"""
+    if not is_timeseries(mode):
+        return filter
+    return {field_path(key, mode): value for key, value in filter.items()}
+
+
+async def ensure_interactions_collection(
+    db: AsyncIOMotorDatabase,
+    mode: Optional[str] = None,
+    ttl_days: Optional[int] = None
+) -> None:
+    """
+    依儲存模式建立互動集合、索引與過期設定
+
+    設定為 timeseries 但集合已是一般集合時，無法直接轉換：記錄錯誤並改以 standard 模式存取該集合
+
+    Args:
+        db: 資料庫實例
+        mode: 儲存模式（預設使用 INTERACTION_STORAGE_MODE）
+        ttl_days: 保留天數，0 表示不過期（預設使用 INTERACTION_TTL_DAYS）
+    """
+    global _active_mode
+
+    ttl_days = settings.INTERACTION_TTL_DAYS if ttl_days is None else ttl_days
+    expire_seconds = ttl_days * 86400 if ttl_days > 0 else None
+    existing = await db.list_collection_names(filter={"name": INTERACTIONS_COLLECTION})
+    collection = db[INTERACTIONS_COLLECTION]
+
+    if is_timeseries(mode):
+        if not existing:
+            options: Dict[str, Any] = {
+                "timeseries": {
+                    "timeField": "created_at",
+                    "metaField": META_FIELD,
+                    "granularity": "minutes",
+                }
+            }
+            if expire_seconds:
+                options["expireAfterSeconds"] = expire_seconds
+            await db.create_collection(INTERACTIONS_COLLECTION, **options)
+            logger.info(f"✅ 已建立時間序列互動集合（保留 {ttl_days or '不限'} 天）")
+        else:
+            info = (await db.command("listCollections", filter={"name": INTERACTIONS_COLLECTION}))["cursor"]["firstBatch"][0]
+            if info.get("type") != "timeseries":
+                logger.error(
+                    "❌ interactions 已是一般集合，無法直接轉換為時間序列集合，改以 standard 模式存取；"
+                    "如需時間序列集合，請先匯出資料並刪除集合後重新啟動"
+                )
+                mode = _active_mode = STORAGE_STANDARD
+            else:
+                # 更新過期設定（collMod 可隨時調整）
+                await db.command(
+                    "collMod",
+                    INTERACTIONS_COLLECTION,
+                    expireAfterSeconds=expire_seconds if expire_seconds else "off"
+                )
+
+    if is_timeseries(mode):
+        # 時間序列集合的次要索引（metaField + timeField）
+        await collection.create_index([(f"{META_FIELD}.user_id", 1), ("created_at", -1)])
+        return
+
+    # 一般集合：以 TTL 索引實現過期
+    await collection.create_index([("user_id", 1), ("created_at", -1)])
+    if expire_seconds:
+        try:
+            await collection.create_index([("created_at", 1)], expireAfterSeconds=expire_seconds, name="created_at_ttl")
+        except Exception:
+            # 已存在不同過期時間的 TTL 索引：改用 collMod 更新
+            await db.command(
+                "collMod",
+                INTERACTIONS_COLLECTION,
+                index={"name": "created_at_ttl", "expireAfterSeconds": expire_seconds}
+            )
@@ -10,6 +10,7 @@ from app.services.repositories.user_preferences_repository import UserPreference
 from app.services.repositories.interaction_repository import InteractionRepository
 from app.services.repositories.recommendation_repository import RecommendationRepository
 from app.services.repositories.topic_repository import TopicRepository
+from app.services.repositories.projections import TOPIC_RECOMMENDATION_FIELDS
 from app.models.topic import Category
 
 logger = logging.getLogger(__name__)
@@ -204,7 +205,8 @@ class PreferenceService:
             # 取得該分類的主題
             topics, _ = await self.topic_repo.list_topics(
                 category=cat,
-                limit=20
+                limit=20,
+                fields=TOPIC_RECOMMENDATION_FIELDS
             )
             
             for topic in topics:
@@ -0,0 +1,42 @@
+"""
+查詢投影（projection）
+Repository 查詢可以只取回需要的欄位，減少傳輸量與 BSON 解碼時間；
+常用欄位組合定義為具名預設，呼叫端不需要自行組合欄位
+"""
+from typing import Optional, Dict, Sequence
+
+# 欄位列表（None 表示取回完整文件）
+Fields = Sequence[str]
+
+# 主題列表（TopicResponse 需要的欄位）
+TOPIC_LIST_FIELDS: Fields = ("id", "title", "category", "status", "source", "generated_at", "updated_at")
+
+# 排程檢查（只需要數量與生成時間）
+TOPIC_SCHEDULE_FIELDS: Fields = ("id", "category", "generated_at")
+
+# 推薦計算（標題、分類、來源與生成時間）
+TOPIC_RECOMMENDATION_FIELDS: Fields = ("id", "title", "category", "source", "generated_at")
+
+# 內容摘要（列表顯示字數、判斷內容是否存在）
+CONTENT_SUMMARY_FIELDS: Fields = ("id", "topic_id", "word_count", "estimated_duration", "version")
+
+# 內容文字（關鍵字擷取、照片匹配）
+CONTENT_TEXT_FIELDS: Fields = ("id", "topic_id", "article", "script")
+
+
+def build_projection(fields: Optional[Fields]) -> Optional[Dict[str, int]]:
+    """
+    將欄位列表轉換為 MongoDB 投影
+
+    Args:
+        fields: 欄位列表（None 表示完整文件）
+
+    Returns:
+        MongoDB 投影（未指定 _id 時排除 _id），None 表示不投影
+    """
+    if fields is None:
+        return None
+    projection = {field: 1 for field in fields}
+    if "_id" not in projection:
+        projection["_id"] = 0
+    return projection
@@ -2,14 +2,24 @@
 Topic Repository
 提供 Topic 的 CRUD 操作
 """
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from typing import Optional, List, Dict, Any, AsyncIterator
+from datetime import datetime, date as date_type, time, timedelta, timezone
+from zoneinfo import ZoneInfo
 from app.services.repositories.base_repository import BaseRepository
+from app.services.repositories.projections import Fields
 from app.models.topic import Category, Status
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 排程時間段（香港時間）：(時間段, 起始小時, 結束小時)，與 SchedulerService 的 cron 設定對應
+SCHEDULE_TIME_SLOTS = [
+    ("07:00", 6, 10),
+    ("12:00", 11, 14),
+    ("18:00", 17, 20),
+]
+SCHEDULE_TIMEZONE = "Asia/Hong_Kong"
+
 
 class TopicRepository(BaseRepository):
     """Topic Repository"""
@@ -35,17 +45,22 @@ class TopicRepository(BaseRepository):
         
         return await self.create(topic_data)
     
-    async def get_topic_by_id(self, topic_id: str) -> Optional[Dict[str, Any]]:
+    async def get_topic_by_id(
+        self,
+        topic_id: str,
+        fields: Optional[Fields] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         根據 ID 取得 Topic
         
         Args:
             topic_id: Topic ID
+            fields: 只取回的欄位（None 表示完整文件）
             
         Returns:
             Topic 資料
         """
-        return await self.find_by_id(topic_id)
+        return await self.find_by_id(topic_id, fields=fields)
     
     async def list_topics(
         self,
@@ -56,7 +71,8 @@ class TopicRepository(BaseRepository):
         page: int = 1,
         limit: int = 10,
         sort: str = "generated_at",
-        order: str = "desc"
+        order: str = "desc",
+        fields: Optional[Fields] = None
     ) -> tuple[List[Dict[str, Any]], int]:
         """
         列出 Topics
@@ -70,6 +86,7 @@ class TopicRepository(BaseRepository):
             limit: 每頁數量
             sort: 排序欄位
             order: 排序順序（asc/desc）
+            fields: 只取回的欄位（例如 TOPIC_LIST_FIELDS，None 表示完整文件）
             
         Returns:
             (Topics 列表, 總數量)
@@ -114,11 +131,162 @@ class TopicRepository(BaseRepository):
         skip = (page - 1) * limit
         
         # 查詢
-        topics = await self.find_many(filter, skip=skip, limit=limit, sort=sort_list)
+        topics = await self.find_many(filter, skip=skip, limit=limit, sort=sort_list, fields=fields)
         total = await self.count(filter)
         
         return topics, total
     
+    async def iter_topics_with_relations(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        category: Optional[Category] = None,
+        status: Optional[Status] = None,
+        batch_size: int = 100
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        逐筆取得 Topic 及其內容與圖片（伺服器端游標，依 generated_at 排序）
+        
+        以 $lookup 在資料庫端合併 contents 與 images，游標每次只取回 batch_size 筆，
+        記憶體用量與結果總數無關
+        
+        Args:
+            start_date: 生成時間起始（包含）
+            end_date: 生成時間結束（不包含）
+            category: 分類篩選
+            status: 狀態篩選
+            batch_size: 游標每批取回的數量
+            
+        Yields:
+            Topic 文件（content 為內容或 None，images 為依順序排列的圖片列表）
+        """
+        match: Dict[str, Any] = {}
+        if start_date or end_date:
+            match["generated_at"] = {}
+            if start_date:
+                match["generated_at"]["$gte"] = start_date
+            if end_date:
+                match["generated_at"]["$lt"] = end_date
+        if category:
+            match["category"] = category.value if hasattr(category, 'value') else category
+        if status:
+            match["status"] = status.value if hasattr(status, 'value') else status
+        
+        pipeline = [
+            {"$match": match},
+            {"$sort": {"generated_at": 1}},
+            {"$lookup": {
+                "from": "contents",
+                "let": {"topic_id": "$id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$topic_id", "$$topic_id"]}}},
+                    {"$project": {"_id": 0, "versions": 0}},
+                    {"$limit": 1},
+                ],
+                "as": "content",
+            }},
+            {"$lookup": {
+                "from": "images",
+                "let": {"topic_id": "$id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$topic_id", "$$topic_id"]}}},
+                    {"$sort": {"order": 1}},
+                    {"$project": {"_id": 0}},
+                ],
+                "as": "images",
+            }},
+            {"$set": {"content": {"$ifNull": [{"$arrayElemAt": ["$content", 0]}, None]}}},
+            {"$project": {"_id": 0}},
+        ]
+        
+        collection = await self._get_collection()
+        cursor = collection.aggregate(pipeline, allowDiskUse=True, batchSize=batch_size)
+        async for document in cursor:
+            yield document
+    
+    async def get_categories_by_ids(self, topic_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        批次取得主題分類（只讀取 id 與 category 欄位）
+        
+        Args:
+            topic_ids: Topic ID 列表
+            
+        Returns:
+            {topic_id: category}，不存在的主題不會出現在結果中
+        """
+        if not topic_ids:
+            return {}
+        
+        collection = await self._get_collection()
+        cursor = collection.find({"id": {"$in": list(topic_ids)}}, {"_id": 0, "id": 1, "category": 1})
+        return {doc["id"]: doc.get("category") async for doc in cursor}
+    
+    async def aggregate_schedule_slots(
+        self,
+        start_date: date_type,
+        end_date: date_type,
+        tz: str = SCHEDULE_TIMEZONE
+    ) -> List[Dict[str, Any]]:
+        """
+        依日期與時間段彙總主題數量（單次聚合查詢，使用 generated_at 索引）
+        
+        generated_at 以 UTC 儲存，分組時以 $dateToParts 轉換為指定時區，
+        避免 UTC 與香港時間的日期、小時錯位
+        
+        Args:
+            start_date: 起始日期（指定時區，含）
+            end_date: 結束日期（指定時區，含）
+            tz: 時區名稱
+            
+        Returns:
+            [{"date": "YYYY-MM-DD", "time_slot": "07:00", "count": int, "last_generated_at": datetime}, ...]
+        """
+        zone = ZoneInfo(tz)
+        # 將當地日期邊界換算為 UTC（資料庫中為 naive UTC）
+        start_utc = datetime.combine(start_date, time.min, zone).astimezone(timezone.utc).replace(tzinfo=None)
+        end_utc = datetime.combine(end_date + timedelta(days=1), time.min, zone).astimezone(timezone.utc).replace(tzinfo=None)
+        
+        slot_branches = [
+            {
+                "case": {"$and": [{"$gte": ["$parts.hour", start_hour]}, {"$lt": ["$parts.hour", end_hour]}]},
+                "then": slot,
+            }
+            for slot, start_hour, end_hour in SCHEDULE_TIME_SLOTS
+        ]
+        
+        pipeline = [
+            {"$match": {"generated_at": {"$gte": start_utc, "$lt": end_utc}}},
+            {"$project": {
+                "generated_at": 1,
+                "parts": {"$dateToParts": {"date": "$generated_at", "timezone": tz}},
+            }},
+            {"$project": {
+                "generated_at": 1,
+                "year": "$parts.year",
+                "month": "$parts.month",
+                "day": "$parts.day",
+                "time_slot": {"$switch": {"branches": slot_branches, "default": None}},
+            }},
+            {"$match": {"time_slot": {"$ne": None}}},
+            {"$group": {
+                "_id": {"year": "$year", "month": "$month", "day": "$day", "time_slot": "$time_slot"},
+                "count": {"$sum": 1},
+                "last_generated_at": {"$max": "$generated_at"},
+            }},
+        ]
+        
+        collection = await self._get_collection()
+        results = []
+        async for row in collection.aggregate(pipeline):
+            key = row["_id"]
+            results.append({
+                "date": f"{key['year']:04d}-{key['month']:02d}-{key['day']:02d}",
+                "time_slot": key["time_slot"],
+                "count": row["count"],
+                "last_generated_at": row["last_generated_at"],
+            })
+        return results
+    
     async def update_topic(
         self,
         topic_id: str,
@@ -173,6 +341,73 @@ class TopicRepository(BaseRepository):
         )
         return result is not None
     
+    async def _get_existing_statuses(self, topic_ids: List[str]) -> Dict[str, Optional[str]]:
+        """批次取得主題目前的狀態（只讀取 id 與 status 欄位）"""
+        collection = await self._get_collection()
+        cursor = collection.find({"id": {"$in": topic_ids}}, {"_id": 0, "id": 1, "status": 1})
+        return {doc["id"]: doc.get("status") async for doc in cursor}
+    
+    async def bulk_update_status(
+        self,
+        topic_ids: List[str],
+        status: Status
+    ) -> Dict[str, str]:
+        """
+        批次更新 Topic 狀態（單次 update_many）
+        
+        Args:
+            topic_ids: Topic ID 列表
+            status: 新狀態
+            
+        Returns:
+            {topic_id: 結果}，結果為 updated / unchanged / not_found
+        """
+        status_value = status.value if hasattr(status, 'value') else status
+        topic_ids = list(dict.fromkeys(topic_ids))
+        existing = await self._get_existing_statuses(topic_ids)
+        
+        to_update = [topic_id for topic_id, current in existing.items() if current != status_value]
+        if to_update:
+            collection = await self._get_collection()
+            await collection.update_many(
+                {"id": {"$in": to_update}},
+                {"$set": {"status": status_value, "updated_at": datetime.utcnow()}}
+            )
+            self._invalidate_cache()
+        
+        outcomes = {}
+        for topic_id in topic_ids:
+            if topic_id not in existing:
+                outcomes[topic_id] = "not_found"
+            elif existing[topic_id] == status_value:
+                outcomes[topic_id] = "unchanged"
+            else:
+                outcomes[topic_id] = "updated"
+        return outcomes
+    
+    async def bulk_hard_delete(self, topic_ids: List[str]) -> Dict[str, str]:
+        """
+        批次硬刪除 Topic（單次 delete_many，不處理關聯資料）
+        
+        Args:
+            topic_ids: Topic ID 列表
+            
+        Returns:
+            {topic_id: 結果}，結果為 deleted / not_found
+        """
+        topic_ids = list(dict.fromkeys(topic_ids))
+        existing = await self._get_existing_statuses(topic_ids)
+        
+        if existing:
+            collection = await self._get_collection()
+            await collection.delete_many({"id": {"$in": list(existing)}})
+            self._invalidate_cache()
+        
+        return {
+            topic_id: "deleted" if topic_id in existing else "not_found"
+            for topic_id in topic_ids
+        }
+    
     async def hard_delete_topic(self, topic_id: str) -> bool:
         """
         硬刪除 Topic（從資料庫中完全刪除）
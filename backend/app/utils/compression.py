@@ -0,0 +1,120 @@
+"""
+HTTP 回應壓縮工具
+依 Accept-Encoding 協商 gzip / Brotli（有安裝 brotli 時），提供一次性壓縮與串流壓縮
+"""
+import logging
+import zlib
+from functools import lru_cache
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # brotli 為可選依賴，未安裝時只使用 gzip
+    brotli = None
+
+# 伺服器偏好順序（q 值相同時優先使用前面的編碼）
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# 不壓縮的內容類型：已壓縮的格式與需要即時送出的 SSE
+EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/octet-stream",
+    "image/",
+    "video/",
+    "audio/",
+)
+
+
+@lru_cache(maxsize=256)
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    依 Accept-Encoding 選擇壓縮編碼
+
+    Args:
+        accept_encoding: 請求的 Accept-Encoding header，例如 "gzip, deflate, br;q=0.9"
+
+    Returns:
+        "br"、"gzip"，或 None（不壓縮）
+    """
+    if not accept_encoding or not settings.COMPRESSION_ENABLED:
+        return None
+
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """檢查內容類型是否需要壓縮"""
+    if not content_type:
+        return False
+    content_type = content_type.lower()
+    return not any(content_type.startswith(excluded) for excluded in EXCLUDED_CONTENT_TYPES)
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    """
+    一次性壓縮完整回應內容
+
+    Args:
+        body: 回應內容
+        encoding: "br" 或 "gzip"
+
+    Returns:
+        壓縮後的內容
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+class StreamCompressor:
+    """串流壓縮器：每個片段壓縮後立即 flush，讓客戶端可以逐段解壓縮"""
+
+    def __init__(self, encoding: str):
+        """
+        初始化壓縮器
+
+        Args:
+            encoding: "br" 或 "gzip"
+        """
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        """壓縮一個片段（並 flush 已緩衝的資料）"""
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        """結束壓縮串流"""
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
@@ -1,54 +1,215 @@
 """
 日誌工具
 統一管理應用程式日誌
+
+標準 logging 的記錄由 QueueHandler 放入佇列，背景執行緒（QueueListener）再轉發到 loguru 寫出，
+呼叫端不等待格式化與 I/O；可選擇 JSON 格式，INFO 以下日誌可依 logger 限流，避免熱路徑每次呼叫都輸出（存取日誌不限流）
 """
 import logging
+import queue
 import sys
+import threading
+import time
+import traceback
+from functools import partial
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence
 from loguru import logger
 import json
 
+TEXT_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+FILE_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+
+# 使用自己 handler 的第三方 logger
+THIRD_PARTY_LOGGERS = ["uvicorn", "uvicorn.access", "fastapi"]
+
+# 不受限流影響的 logger（存取日誌需要完整記錄每個請求）
+RATE_LIMIT_EXEMPT_LOGGERS = ("uvicorn.access",)
+
+# 佇列滿時 WARNING 以上日誌最多等待幾秒（超過則捨棄並計數，避免寫出卡住時阻塞呼叫端）
+WARNING_ENQUEUE_TIMEOUT = 1.0
+
+# 標準 logging level 名稱 → loguru level（自訂 level 以數值傳遞）
+_LEVEL_NAMES: Dict[str, Any] = {}
+
+
+def _patch_location(source: logging.LogRecord, record: Dict[str, Any]) -> None:
+    """以標準 logging 記錄的位置覆寫 loguru 記錄（不需要逐層查找呼叫端 frame）"""
+    record["name"] = source.name
+    record["function"] = source.funcName
+    record["line"] = source.lineno
+    record["module"] = source.module
+
 
 class InterceptHandler(logging.Handler):
     """攔截標準 logging 並轉發到 loguru"""
     
     def emit(self, record):
         # 取得對應的 loguru level
-        try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
-        
-        # 找出調用者
-        frame, depth = sys._getframe(6), 6
-        while frame and frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back
-            depth += 1
+        level = _LEVEL_NAMES.get(record.levelname)
+        if level is None:
+            try:
+                level = logger.level(record.levelname).name
+            except ValueError:
+                level = record.levelno
+            _LEVEL_NAMES[record.levelname] = level
         
-        logger.opt(depth=depth, exception=record.exc_info).log(
+        logger.patch(partial(_patch_location, record)).opt(exception=record.exc_info).log(
             level, record.getMessage()
         )
 
 
+class EnqueueHandler(QueueHandler):
+    """
+    把標準 logging 記錄放入佇列的 handler（呼叫端只做這一步）
+    
+    佇列滿時捨棄 WARNING 以下的記錄；WARNING 以上最多等待 block_timeout 秒，仍無法放入時捨棄並另外計數
+    """
+    
+    def __init__(self, log_queue: queue.Queue, block_timeout: float = WARNING_ENQUEUE_TIMEOUT):
+        super().__init__(log_queue)
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.dropped_warnings = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 在呼叫端合併訊息參數（參數物件之後可能被修改）；例外資訊保留給背景執行緒格式化
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if record.levelno >= logging.WARNING:
+            try:
+                self.queue.put(record, timeout=self.block_timeout)
+            except queue.Full:
+                self.dropped_warnings += 1
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogRateLimitFilter(logging.Filter):
+    """
+    依 logger 限制 INFO 以下日誌的輸出速率（token bucket）
+    
+    WARNING 以上與 exempt 中的 logger 一律輸出；被略過的筆數附加在該 logger 下一筆輸出的日誌後面
+    """
+    
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: Optional[float] = None,
+        exempt: Sequence[str] = RATE_LIMIT_EXEMPT_LOGGERS
+    ):
+        """
+        初始化過濾器
+        
+        Args:
+            rate_per_second: 每個 logger 每秒可輸出的筆數
+            burst: 短時間內最多可連續輸出的筆數（預設等於 rate_per_second）
+            exempt: 不限流的 logger 名稱
+        """
+        super().__init__()
+        self.rate = rate_per_second
+        self.burst = burst or rate_per_second
+        self.exempt = frozenset(exempt)
+        self._buckets: Dict[str, List[float]] = {}  # logger 名稱 → [剩餘額度, 上次補充時間]
+        self._suppressed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.suppressed_total = 0
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or record.name in self.exempt:
+            return True
+        
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(record.name)
+            if bucket is None:
+                bucket = self._buckets[record.name] = [self.burst, now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                self._suppressed[record.name] = self._suppressed.get(record.name, 0) + 1
+                self.suppressed_total += 1
+                return False
+            bucket[0] -= 1
+            suppressed = self._suppressed.pop(record.name, 0)
+        
+        if suppressed:
+            record.msg = f"{record.getMessage()}（已略過 {suppressed} 筆同一來源的日誌）"
+            record.args = None
+        return True
+
+
+def _to_json(record: Dict[str, Any]) -> str:
+    """將 loguru 記錄轉為一行 JSON"""
+    data = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    if record["extra"]:
+        data["extra"] = record["extra"]
+    if record["exception"] is not None:
+        data["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def _json_sink(stream, message) -> None:
+    """JSON 輸出（每行一筆）"""
+    stream.write(_to_json(message.record) + "\n")
+    stream.flush()
+
+
+# 目前使用中的佇列 handler、背景轉發執行緒與限流過濾器
+_enqueue_handler: Optional[EnqueueHandler] = None
+_listener: Optional[QueueListener] = None
+_rate_limit_filter: Optional[LogRateLimitFilter] = None
+
+
 def setup_logging(
     log_level: str = "INFO",
     log_file: Optional[str] = None,
     rotation: str = "10 MB",
     retention: str = "7 days",
+    log_format: str = "text",
+    rate_limit: float = 0,
+    queue_size: int = 10000,
 ):
-    """設定日誌系統"""
-    # 移除預設的 handler
+    """
+    設定日誌系統
+    
+    Args:
+        log_level: 日誌等級
+        log_file: 日誌檔案路徑（可選）
+        rotation: 檔案輪替大小
+        retention: 檔案保留時間
+        log_format: text 或 json（每行一筆 JSON）
+        rate_limit: 每個 logger 每秒最多輸出幾筆 INFO 以下日誌（0 表示不限制；存取日誌不限流）
+        queue_size: 日誌佇列上限
+    """
+    global _enqueue_handler, _listener, _rate_limit_filter
+    json_format = log_format.lower() == "json"
+    
+    # 停止之前的背景轉發執行緒並移除預設的 handler
+    shutdown_logging()
     logger.remove()
     
-    # 添加控制台輸出
-    logger.add(
-        sys.stderr,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        level=log_level,
-        colorize=True,
-    )
+    # 添加控制台輸出（在背景轉發執行緒中寫出）
+    if json_format:
+        logger.add(partial(_json_sink, sys.stderr), format="{message}", level=log_level, colorize=False)
+    else:
+        logger.add(sys.stderr, format=TEXT_FORMAT, level=log_level, colorize=True)
     
     # 添加檔案輸出（如果指定）
     if log_file:
@@ -57,21 +218,52 @@ def setup_logging(
         
         logger.add(
             log_file,
-            format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+            format=FILE_FORMAT,
             level=log_level,
             rotation=rotation,
             retention=retention,
             compression="zip",
             encoding="utf-8",
+            serialize=json_format,
         )
     
-    # 攔截標準 logging
-    logging.basicConfig(handlers=[InterceptHandler()], level=0, force=True)
+    # 攔截標準 logging：呼叫端只放入佇列，背景執行緒轉發到 loguru
+    # （root 設為 log_level：低於此等級的日誌在建立記錄前就被略過）
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    _enqueue_handler = EnqueueHandler(log_queue)
+    _rate_limit_filter = LogRateLimitFilter(rate_limit) if rate_limit > 0 else None
+    if _rate_limit_filter is not None:
+        _enqueue_handler.addFilter(_rate_limit_filter)
+    _listener = QueueListener(log_queue, InterceptHandler())
+    _listener.start()
+    logging.basicConfig(handlers=[_enqueue_handler], level=log_level.upper(), force=True)
     
     # 設定第三方庫的日誌級別
-    for logger_name in ["uvicorn", "uvicorn.access", "fastapi"]:
+    for logger_name in THIRD_PARTY_LOGGERS:
         logging_logger = logging.getLogger(logger_name)
-        logging_logger.handlers = [InterceptHandler()]
+        logging_logger.handlers = [_enqueue_handler]
+
+
+def shutdown_logging():
+    """寫出佇列中剩餘的日誌並停止背景轉發執行緒（應用關閉時呼叫）"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        # 之後的記錄（例如伺服器關閉訊息）改為直接轉發到 loguru
+        handler = InterceptHandler()
+        for logger_name in ["", *THIRD_PARTY_LOGGERS]:
+            logging.getLogger(logger_name).handlers = [handler]
+
+
+def get_logging_stats() -> Dict[str, int]:
+    """取得日誌管線統計（限流略過、佇列捨棄與待寫出的筆數）"""
+    return {
+        "rate_limited": _rate_limit_filter.suppressed_total if _rate_limit_filter else 0,
+        "dropped": _enqueue_handler.dropped if _enqueue_handler else 0,
+        "dropped_warnings": _enqueue_handler.dropped_warnings if _enqueue_handler else 0,
+        "queued": _enqueue_handler.queue.qsize() if _enqueue_handler else 0,
+    }
 
 
 def log_request(request, response_time: float = None):
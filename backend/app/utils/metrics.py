@@ -0,0 +1,391 @@
+"""
+Prometheus 指標
+以行程內的計數器與直方圖記錄 HTTP 路由、AI 服務、圖片服務、MongoDB 指令、工作流階段與排程任務，
+由 GET /metrics 以 Prometheus 文字格式輸出
+
+指標只存在目前行程（每個 worker 各自一份，由 Prometheus 依 instance 彙總）；
+記錄只是在 dict 中累加數值，不需要額外依賴
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 直方圖區間（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SLOW_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """指標基礎類別"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        初始化指標
+
+        Args:
+            name: 指標名稱
+            documentation: 說明（HELP）
+            labelnames: 標籤名稱
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        """輸出 Prometheus 文字格式的行"""
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self._samples(),
+        ]
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """只增不減的計數器"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        """
+        增加計數
+
+        Args:
+            labels: 標籤值（順序與 labelnames 相同）
+            amount: 增加量
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def get(self, labels: LabelValues = ()) -> float:
+        """取得目前計數"""
+        return self._values.get(labels, 0.0)
+
+    def _samples(self) -> Iterable[str]:
+        for labels, value in list(self._values.items()):
+            yield f"{self.name}_total{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Metric):
+    """可增可減的數值；提供 callback 時在輸出時讀取"""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def set(self, value: float, labels: LabelValues = ()) -> None:
+        """設定數值"""
+        self._values[labels] = value
+
+    def _samples(self) -> Iterable[str]:
+        values = self.callback() if self.callback is not None else self._values
+        for labels, value in list(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """直方圖（各區間計數、總和與次數）"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 標籤值 → [各區間計數（非累計，最後一格為 +Inf）..., 總和, 次數]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        """
+        記錄一次觀測值
+
+        Args:
+            value: 觀測值（秒）
+            labels: 標籤值（順序與 labelnames 相同）
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0.0] * (len(self.buckets) + 3)
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def get_count(self, labels: LabelValues = ()) -> int:
+        """取得觀測次數"""
+        state = self._values.get(labels)
+        return int(state[-1]) if state else 0
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        取得各標籤組合的統計
+
+        Returns:
+            [{labels, count, sum, p50, p95}]，分位數以所在區間的上限估計（超過最大區間時為 None）
+        """
+        result = []
+        for labels, state in list(self._values.items()):
+            count = state[-1]
+            result.append({
+                "labels": dict(zip(self.labelnames, labels)),
+                "count": int(count),
+                "sum": state[-2],
+                "p50": self._quantile(state, 0.5),
+                "p95": self._quantile(state, 0.95),
+            })
+        return result
+
+    def _quantile(self, state: List[float], quantile: float) -> Optional[float]:
+        target = state[-1] * quantile
+        cumulative = 0.0
+        for bound, count in zip(self.buckets, state):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return None
+
+    def _samples(self) -> Iterable[str]:
+        bucket_names = self.labelnames + ("le",)
+        for labels, state in list(self._values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(bucket_names, labels + (_format_value(bound),))} {_format_value(cumulative)}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(state[-2])}"
+            yield f"{self.name}_count{label_text} {_format_value(state[-1])}"
+
+
+class StatsCollector(Metric):
+    """把元件 get_stats() 中的數值輸出為 <prefix>_<key>（未定型別，計數類欄位只增不減）"""
+
+    def __init__(self, prefix: str, documentation: str, get_stats: Callable[[], Dict[str, Any]]):
+        super().__init__(prefix, documentation)
+        self.get_stats = get_stats
+
+    def render(self) -> List[str]:
+        try:
+            stats = self.get_stats()
+        except Exception:
+            return []
+        lines = []
+        for key, value in stats.items():
+            if isinstance(value, bool):
+                value = int(value)
+            if not isinstance(value, (int, float)):
+                continue
+            name = f"{self.name}_{key}"
+            lines.append(f"# HELP {name} {self.documentation}: {key}")
+            lines.append(f"# TYPE {name} untyped")
+            lines.append(f"{name} {_format_value(float(value))}")
+        return lines
+
+
+class MetricsRegistry:
+    """指標登記處"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """登記指標（同名時返回已登記的指標）"""
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_stats(self, prefix: str, documentation: str, get_stats: Callable[[], Dict[str, Any]]) -> None:
+        """登記元件的 get_stats()（輸出時讀取）"""
+        self.register(StatsCollector(prefix, documentation, get_stats))
+
+    def render(self) -> str:
+        """輸出所有指標（Prometheus 文字格式）"""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP 請求處理時間（依路由樣板）",
+    ("method", "route", "status"),
+)
+AI_CALL_DURATION = REGISTRY.histogram(
+    "ai_provider_call_duration_seconds",
+    "AI 服務呼叫時間",
+    ("provider", "outcome"),
+    buckets=SLOW_BUCKETS,
+)
+AI_TOKENS = REGISTRY.counter(
+    "ai_provider_tokens",
+    "AI 服務回報的 token 數",
+    ("provider", "type"),
+)
+IMAGE_PROVIDER_DURATION = REGISTRY.histogram(
+    "image_provider_search_duration_seconds",
+    "圖片服務搜尋時間（outcome 同 attempts 的 status）",
+    ("provider", "outcome"),
+)
+MONGODB_COMMAND_DURATION = REGISTRY.histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB 指令執行時間",
+    ("collection", "command", "outcome"),
+    buckets=DB_BUCKETS,
+)
+MONGODB_SLOW_COMMANDS = REGISTRY.counter(
+    "mongodb_slow_commands",
+    "超過慢查詢門檻的 MongoDB 指令次數",
+    ("collection", "command"),
+)
+MONGODB_EXPLAIN_SAMPLES = REGISTRY.counter(
+    "mongodb_explain_samples",
+    "抽樣執行 explain 的 MongoDB 查詢次數",
+    ("collection", "command"),
+)
+MONGODB_COLLSCANS = REGISTRY.counter(
+    "mongodb_collscans",
+    "抽樣 explain 中使用全表掃描（COLLSCAN）的查詢次數",
+    ("collection", "command"),
+)
+WORKFLOW_STAGE_DURATION = REGISTRY.histogram(
+    "workflow_stage_duration_seconds",
+    "自動化工作流各階段耗時",
+    ("stage", "outcome"),
+    buckets=SLOW_BUCKETS,
+)
+SCHEDULER_JOB_DURATION = REGISTRY.histogram(
+    "scheduler_job_duration_seconds",
+    "排程任務執行時間（outcome: success / error）",
+    ("job", "outcome"),
+    buckets=SLOW_BUCKETS,
+)
+SCHEDULER_JOB_MISSED = REGISTRY.counter(
+    "scheduler_job_missed",
+    "錯過執行時間的排程任務次數",
+    ("job",),
+)
+
+
+class track:
+    """
+    記錄區塊耗時的 context manager（區塊拋出例外時 outcome 為 error）
+
+    用法：
+        with track(WORKFLOW_STAGE_DURATION, "collect_topics") as stage:
+            ...
+            stage.outcome = "no_results"  # 可自訂結果
+    """
+
+    __slots__ = ("histogram", "labels", "outcome", "_start")
+
+    def __init__(self, histogram: Histogram, *labels: str):
+        self.histogram = histogram
+        self.labels = labels
+        self.outcome = "success"
+        self._start = 0.0
+
+    def __enter__(self) -> "track":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None and self.outcome == "success":
+            self.outcome = "error"
+        self.histogram.observe(time.perf_counter() - self._start, self.labels + (self.outcome,))
+        return False
+
+
+def timed(histogram: Histogram, *labels: str):
+    """
+    記錄 async 函式耗時的裝飾器（最後一個標籤為 outcome：success / error）
+
+    Args:
+        histogram: 直方圖
+        *labels: outcome 以外的標籤值
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track(histogram, *labels):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_ai_tokens(provider: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+    """記錄 AI 服務回報的 token 數（未回報時略過）"""
+    if prompt_tokens:
+        AI_TOKENS.inc((provider, "prompt"), prompt_tokens)
+    if completion_tokens:
+        AI_TOKENS.inc((provider, "completion"), completion_tokens)
@@ -0,0 +1,233 @@
+"""
+API 回應快取
+讀取頻繁的端點（主題列表與詳情、內容、圖片、排程）以弱 ETag 支援條件請求（If-None-Match → 304），
+並在記憶體中短暫保存序列化後的回應（含依 Accept-Encoding 預先壓縮的版本）；
+Repository 寫入時依集合名稱讓相關快取失效
+
+快取只存在目前行程（每個 worker 各自一份），其他 worker 的寫入靠短 TTL 收斂
+"""
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, NamedTuple, Optional, Sequence, Set
+
+from fastapi import Request
+from starlette.responses import Response
+
+from app.config import settings
+from app.utils.compression import choose_encoding, compress_body
+from app.utils.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# 計算 ETag 時使用的文件欄位（文件內容改變時這些欄位會跟著改變）
+ETAG_FIELDS = ("id", "updated_at", "version", "verified_at")
+
+# 瀏覽器可以快取回應，但每次使用前都要以 If-None-Match 重新驗證
+CACHE_CONTROL = "private, no-cache"
+
+
+class CachedResponse(NamedTuple):
+    """快取的序列化回應"""
+    body: bytes
+    etag: str
+    expires_at: float
+    tags: FrozenSet[str]
+    # 壓縮後的內容（編碼 → 內容），第一次以該編碼回應時建立
+    encoded: Dict[str, bytes]
+
+
+def compute_etag(
+    documents: Iterable[Dict[str, Any]],
+    fields: Sequence[str] = ETAG_FIELDS,
+    extra: Sequence[Any] = ()
+) -> str:
+    """
+    由文件的 id / updated_at / version 等欄位計算弱 ETag（不需要序列化整個回應）
+
+    Args:
+        documents: 回應所依據的文件
+        fields: 參與計算的欄位
+        extra: 其他會影響回應的值（例如總數、查詢日期）
+
+    Returns:
+        弱 ETag，例如 W/"3f2a..."
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for document in documents:
+        for field in fields:
+            digest.update(f"{document.get(field)!s}\x1f".encode("utf-8"))
+        digest.update(b"\x1e")
+    for value in extra:
+        digest.update(f"{value!s}\x1f".encode("utf-8"))
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """檢查 If-None-Match 是否符合 ETag（弱比較）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    """304 回應"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def not_modified_or_none(request: Request, etag: str) -> Optional[Response]:
+    """If-None-Match 符合時返回 304 回應，否則返回 None"""
+    return not_modified(etag) if etag_matches(request, etag) else None
+
+
+class ResponseCache:
+    """序列化回應的短 TTL 記憶體快取（LRU，依標籤失效）"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        """
+        初始化快取
+
+        Args:
+            ttl_seconds: 快取有效時間（秒，0 表示不快取回應，只使用 ETag）
+            max_entries: 最多快取的回應數量
+        """
+        self.ttl_seconds = settings.RESPONSE_CACHE_TTL if ttl_seconds is None else ttl_seconds
+        self.max_entries = max_entries or settings.RESPONSE_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._tag_keys: Dict[str, Set[str]] = {}
+        # 每次失效時遞增；查詢開始後若有寫入，該次結果不放入快取
+        self._generation = 0
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0}
+
+    @staticmethod
+    def _key(request: Request) -> str:
+        query = request.url.query
+        return f"{request.url.path}?{query}" if query else request.url.path
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+
+    def lookup(self, request: Request) -> Optional[Response]:
+        """
+        查詢快取
+
+        Args:
+            request: 請求
+
+        Returns:
+            命中時返回 304 或快取的回應，否則返回 None
+        """
+        key = self._key(request)
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.stats["misses"] += 1
+            request.state.response_cache_generation = self._generation
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        if etag_matches(request, entry.etag):
+            self.stats["not_modified"] += 1
+            return not_modified(entry.etag)
+        return self._response(request, entry)
+
+    def _response(self, request: Request, entry: CachedResponse) -> Response:
+        """
+        建立回應：客戶端接受壓縮且內容夠大時返回壓縮後的內容
+
+        壓縮結果保存在快取項目中，之後的命中不需要重新壓縮；
+        已設定 Content-Encoding 的回應不會再被壓縮中間件處理
+        """
+        headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+        body = entry.body
+        if settings.COMPRESSION_ENABLED:
+            headers["Vary"] = "Accept-Encoding"
+            encoding = choose_encoding(request.headers.get("accept-encoding"))
+            if encoding is not None and len(body) >= settings.COMPRESSION_MIN_SIZE:
+                encoded = entry.encoded.get(encoding)
+                if encoded is None:
+                    encoded = entry.encoded[encoding] = compress_body(body, encoding)
+                body = encoded
+                headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def store(
+        self,
+        request: Request,
+        payload: Any,
+        etag: str,
+        tags: Iterable[str]
+    ) -> Response:
+        """
+        序列化回應並放入快取
+
+        Args:
+            request: 請求
+            payload: 回應資料（以 project 建立的 dict、Pydantic 模型或可 JSON 編碼的資料）
+            etag: 回應的 ETag
+            tags: 回應所依賴的集合名稱（這些集合寫入時快取失效）
+
+        Returns:
+            帶 ETag 的 JSON 回應（客戶端接受時已壓縮）
+        """
+        entry = CachedResponse(dumps(payload), etag, time.monotonic() + self.ttl_seconds, frozenset(tags), {})
+        generation = getattr(request.state, "response_cache_generation", self._generation)
+        if self.ttl_seconds > 0 and generation == self._generation:
+            key = self._key(request)
+            self._remove(key)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._tag_keys.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return self._response(request, entry)
+
+    def invalidate(self, *tags: str) -> None:
+        """讓依賴指定集合的快取失效"""
+        self._generation += 1
+        self.stats["invalidations"] += 1
+        for tag in tags:
+            for key in list(self._tag_keys.get(tag, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        """清除所有快取"""
+        self._generation += 1
+        self._entries.clear()
+        self._tag_keys.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """取得快取狀態"""
+        return {**self.stats, "entries": len(self._entries), "ttl_seconds": self.ttl_seconds}
+
+
+# 全域回應快取實例
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """取得全域回應快取"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
@@ -0,0 +1,146 @@
+"""
+JSON 序列化工具
+有安裝 orjson 時以 orjson 編碼回應（比標準 json 快數倍），否則退回標準 json；
+資料庫中已在寫入時驗證過的文件可以直接取出回應模型的欄位序列化，略過建立與驗證 Pydantic 模型
+（必填欄位缺少或為 null 時改為建立模型驗證，與一般路徑相同）
+"""
+import json
+import logging
+import types
+from functools import lru_cache
+from typing import Any, Dict, Tuple, Type, Union, get_args, get_origin
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # orjson 為可選依賴
+    orjson = None
+
+
+def _orjson_default(value: Any) -> Any:
+    """orjson 不支援的型別"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(by_alias=True, warnings=False)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"無法序列化的型別: {type(value).__name__}")
+
+
+def dumps(data: Any) -> bytes:
+    """
+    將資料編碼為 JSON（UTF-8 位元組）
+
+    Args:
+        data: dict / list / Pydantic 模型等
+
+    Returns:
+        JSON 位元組
+    """
+    if isinstance(data, BaseModel):
+        data = data.model_dump(by_alias=True, warnings=False)
+    if orjson is not None:
+        return orjson.dumps(data, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        jsonable_encoder(data),
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    以 dumps 編碼的 JSONResponse（應用程式的預設回應類別）
+
+    與 FastAPI 的 ORJSONResponse 不同，dict 的非字串鍵（例如以數字為鍵的統計）會轉為字串，
+    與標準 JSONResponse 的輸出相同；NaN / Infinity 輸出為 null（標準 JSONResponse 會拋出錯誤）
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# 沒有安裝 orjson 時 FastJSONResponse 只是多一層轉換，直接使用標準 JSONResponse
+DefaultJSONResponse = FastJSONResponse if orjson is not None else JSONResponse
+
+
+def _allows_none(annotation: Any) -> bool:
+    """型別標註是否接受 None（Optional[...] / X | None / Any）"""
+    if annotation is Any or annotation is None or annotation is type(None):
+        return True
+    if get_origin(annotation) in (Union, types.UnionType):
+        return any(_allows_none(arg) for arg in get_args(annotation))
+    return False
+
+
+@lru_cache(maxsize=None)
+def _model_fields(model_class: Type[BaseModel]) -> Tuple[Tuple[str, str, Any, bool, bool], ...]:
+    """回應模型的 (欄位名稱, 輸出名稱, 預設值, 是否必填, 是否可為 None)"""
+    fields = []
+    for name, field in model_class.model_fields.items():
+        required = field.is_required()
+        default = None if required else field.get_default(call_default_factory=True)
+        fields.append((name, field.alias or name, default, required, _allows_none(field.annotation)))
+    return tuple(fields)
+
+
+def project(model_class: Type[BaseModel], document: Dict[str, Any], **values: Any) -> Dict[str, Any]:
+    """
+    以已驗證的資料庫文件建立回應 dict（只取回應模型定義的欄位，不建立模型也不重新驗證）
+
+    未在模型中定義的欄位（例如 _id）會被忽略，缺少的欄位使用模型預設值；
+    巢狀欄位（例如 images）由呼叫端以 project 處理後透過 values 傳入。
+    必填欄位缺少（或不接受 None 卻為 None）時表示文件並非完整寫入，改為建立模型驗證：
+    與一般路徑相同地拋出 ValidationError，而不是輸出 null
+
+    Args:
+        model_class: 回應模型類別
+        document: 資料庫文件
+        **values: 覆寫或補充的欄位
+
+    Returns:
+        可直接序列化的 dict
+    """
+    result = {}
+    for name, output_name, default, required, nullable in _model_fields(model_class):
+        if name in values:
+            value = values[name]
+        elif name in document:
+            value = document[name]
+        elif required:
+            return _validated(model_class, document, values)
+        else:
+            # 預設值可能是可變物件（例如 list），每次複製一份
+            value = default.copy() if isinstance(default, (list, dict)) else default
+        if value is None and required and not nullable:
+            return _validated(model_class, document, values)
+        result[output_name] = value
+    return result
+
+
+def _validated(model_class: Type[BaseModel], document: Dict[str, Any], values: Dict[str, Any]) -> Dict[str, Any]:
+    """文件缺少必填欄位時改為建立模型（驗證失敗時拋出 ValidationError）"""
+    logger.debug(f"{model_class.__name__} 文件缺少必填欄位，改為驗證模型: {document.get('id')}")
+    return model_class(**{**document, **values}).model_dump(by_alias=True)
+
+
+def trusted_response(data: Any, status_code: int = 200) -> Response:
+    """
+    直接序列化回應（略過 FastAPI 依 response_model 再次驗證與轉換）
+
+    Args:
+        data: 以 project 建立的 dict、Pydantic 模型或可 JSON 編碼的資料
+        status_code: HTTP 狀態碼
+
+    Returns:
+        JSON 回應
+    """
+    return Response(content=dumps(data), status_code=status_code, media_type="application/json")
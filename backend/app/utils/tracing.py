@@ -0,0 +1,291 @@
+"""
+工作流追蹤
+以 span 記錄排程主題在各階段（主題收集、標題翻譯、短文與腳本生成、各圖片服務搜尋、資料庫寫入）的耗時，
+同一個排程任務的 span 共用 trace_id，可以看出每個主題的時間花在哪裡
+
+有安裝 opentelemetry-sdk 時使用 OpenTelemetry（以 ConsoleSpanExporter 輸出，之後可改接 OTLP collector）；
+未安裝時使用內建的輕量實作，輸出相同的 JSON 欄位（name、context、parent_id、start_time、end_time、
+status、attributes、events、resource），每行一個 span
+"""
+import contextvars
+import functools
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+try:
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:  # 未安裝 opentelemetry-sdk 時使用內建實作
+    otel_trace = None
+
+EXPORTERS = ("none", "console", "file")
+
+
+def _iso_time(time_ns: int) -> str:
+    """與 OpenTelemetry 相同的時間格式"""
+    return datetime.fromtimestamp(time_ns / 1e9, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class _NoopSpan:
+    """停用追蹤時使用的 span"""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _LiteSpan:
+    """內建實作的 span"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "events", "error")
+
+    def __init__(self, name: str, parent: Optional["_LiteSpan"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.events = []
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.error = f"{type(exception).__name__}: {exception}"
+        self.events.append({
+            "name": "exception",
+            "timestamp": _iso_time(time.time_ns()),
+            "attributes": {
+                "exception.type": type(exception).__name__,
+                "exception.message": str(exception),
+            },
+        })
+
+    def to_dict(self, resource: Dict[str, Any]) -> Dict[str, Any]:
+        status = {"status_code": "ERROR", "description": self.error} if self.error else {"status_code": "UNSET"}
+        return {
+            "name": self.name,
+            "context": {"trace_id": f"0x{self.trace_id}", "span_id": f"0x{self.span_id}"},
+            "kind": "SpanKind.INTERNAL",
+            "parent_id": f"0x{self.parent_id}" if self.parent_id else None,
+            "start_time": _iso_time(self.start_ns),
+            "end_time": _iso_time(self.end_ns),
+            "status": status,
+            "attributes": self.attributes,
+            "events": self.events,
+            "resource": {"attributes": resource},
+        }
+
+
+_current_span: contextvars.ContextVar[Optional[_LiteSpan]] = contextvars.ContextVar("current_span", default=None)
+
+
+class _LiteTracer:
+    """內建實作：span 結束時寫出一行 JSON（span 數量少，只在工作流中產生）"""
+
+    def __init__(self, stream: TextIO, service_name: str):
+        self.stream = stream
+        self.resource = {"service.name": service_name}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, attributes: Dict[str, Any]) -> Iterator[_LiteSpan]:
+        current = _LiteSpan(name, _current_span.get(), attributes)
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end(current)
+
+    def start_child(self, name: str, attributes: Dict[str, Any]) -> Optional[_LiteSpan]:
+        parent = _current_span.get()
+        return _LiteSpan(name, parent, attributes) if parent is not None else None
+
+    def end(self, span: _LiteSpan, error: Optional[str] = None) -> None:
+        span.end_ns = time.time_ns()
+        if error:
+            span.error = error
+        line = json.dumps(span.to_dict(self.resource), ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def current_span(self):
+        return _current_span.get() or NOOP_SPAN
+
+    def current_trace_id(self) -> str:
+        current = _current_span.get()
+        return current.trace_id if current else ""
+
+    def shutdown(self) -> None:
+        pass
+
+
+class _OTelTracer:
+    """OpenTelemetry 實作（由 BatchSpanProcessor 在背景執行緒匯出）"""
+
+    def __init__(self, stream: TextIO, service_name: str):
+        self.provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        exporter = ConsoleSpanExporter(out=stream, formatter=lambda span: span.to_json(indent=None) + "\n")
+        self.provider.add_span_processor(BatchSpanProcessor(exporter))
+        self.tracer = self.provider.get_tracer(__name__)
+
+    @contextmanager
+    def span(self, name: str, attributes: Dict[str, Any]):
+        with self.tracer.start_as_current_span(name, attributes=attributes) as current:
+            yield current
+
+    def start_child(self, name: str, attributes: Dict[str, Any]):
+        if not otel_trace.get_current_span().get_span_context().is_valid:
+            return None
+        return self.tracer.start_span(name, attributes=attributes)
+
+    def end(self, span, error: Optional[str] = None) -> None:
+        if error:
+            span.set_status(Status(StatusCode.ERROR, error))
+        span.end()
+
+    def current_span(self):
+        return otel_trace.get_current_span()
+
+    def current_trace_id(self) -> str:
+        context = otel_trace.get_current_span().get_span_context()
+        return format(context.trace_id, "032x") if context.is_valid else ""
+
+    def shutdown(self) -> None:
+        self.provider.shutdown()
+
+
+_tracer = None
+_stream: Optional[TextIO] = None
+
+
+def setup_tracing(
+    exporter: str = "none",
+    file_path: Optional[str] = None,
+    service_name: str = "ai-agent-webapp"
+) -> None:
+    """
+    設定工作流追蹤
+
+    Args:
+        exporter: none（停用）、console（標準輸出）或 file（寫入 file_path）
+        file_path: file 模式的輸出檔案（每行一個 span 的 JSON）
+        service_name: span 的 service.name
+    """
+    global _tracer, _stream
+
+    shutdown_tracing()
+    exporter = exporter.lower()
+    if exporter not in EXPORTERS:
+        raise ValueError(f"不支援的追蹤輸出: {exporter}（可用: {', '.join(EXPORTERS)}）")
+    if exporter == "none":
+        return
+
+    if exporter == "file":
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _stream = open(file_path, "a", encoding="utf-8")
+        stream = _stream
+    else:
+        stream = sys.stdout
+
+    tracer_class = _OTelTracer if otel_trace is not None else _LiteTracer
+    _tracer = tracer_class(stream, service_name)
+
+
+def shutdown_tracing() -> None:
+    """匯出剩餘的 span 並關閉輸出檔案"""
+    global _tracer, _stream
+
+    if _tracer is not None:
+        _tracer.shutdown()
+        _tracer = None
+    if _stream is not None:
+        _stream.close()
+        _stream = None
+
+
+@contextmanager
+def span(name: str, **attributes: Any):
+    """
+    建立 span（成為目前 span，區塊內建立的 span 都是它的子 span；區塊拋出例外時狀態為 ERROR）
+
+    用法：
+        with span("ai.generate_article", **{"ai.provider": "deepseek"}) as current:
+            ...
+            current.set_attribute("ai.output_chars", len(article))
+    """
+    if _tracer is None:
+        yield NOOP_SPAN
+        return
+    with _tracer.span(name, attributes) as current:
+        yield current
+
+
+def traced(name: str):
+    """
+    以 span 包住 async 函式的裝飾器
+
+    Args:
+        name: span 名稱
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_child_span(name: str, **attributes: Any):
+    """
+    在目前 span 下建立子 span，但不設為目前 span（用於開始與結束在不同回呼中的操作，例如 MongoDB 指令）
+
+    Returns:
+        span；沒有目前 span 或未啟用追蹤時返回 None（不記錄工作流以外的操作）
+    """
+    if _tracer is None:
+        return None
+    return _tracer.start_child(name, attributes)
+
+
+def end_span(child, error: Optional[str] = None) -> None:
+    """結束 start_child_span 建立的 span"""
+    if _tracer is not None:
+        _tracer.end(child, error)
+
+
+def current_span():
+    """取得目前 span（沒有時返回不記錄任何資料的 span）"""
+    return _tracer.current_span() if _tracer is not None else NOOP_SPAN
+
+
+def current_trace_id() -> str:
+    """取得目前的 trace_id（32 位十六進位；沒有時返回空字串）"""
+    return _tracer.current_trace_id() if _tracer is not None else ""
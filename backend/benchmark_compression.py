@@ -0,0 +1,136 @@
+"""
+回應壓縮效能測試
+以 100 個主題的列表、含完整內容的主題詳情與 NDJSON 匯出片段，比較 gzip 各壓縮等級
+（與有安裝 brotli 時的 Brotli 各品質）的壓縮率與耗時，用於調整 COMPRESSION_* 設定；
+另外比較回應快取命中時每次重新壓縮與使用預先壓縮內容的耗時
+
+使用方式：
+    python benchmark_compression.py          # 預設每種設定壓縮 200 次
+    python benchmark_compression.py 1000     # 指定壓縮次數
+"""
+import json
+import random
+import sys
+import os
+import time
+
+# 添加專案路徑
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from starlette.requests import Request
+
+from app.config import settings
+from app.schemas.common import PaginationResponse
+from app.schemas.content import ContentResponse
+from app.schemas.image import ImageResponse
+from app.models.topic import SourceInfo
+from app.schemas.topic import TopicDetailResponse, TopicResponse
+from app.utils import compression
+from app.utils.response_cache import ResponseCache
+from app.utils.serialization import dumps, project
+from benchmark_serialization import build_content, build_images, build_topic
+
+GZIP_LEVELS = (1, 3, 5, 6, 9)
+BROTLI_QUALITIES = (1, 4, 5, 6, 11)
+
+
+def build_payloads() -> dict:
+    """建立與 API 回應相同的序列化內容"""
+    rng = random.Random(42)
+    topics = [build_topic(index, rng) for index in range(100)]
+    detail = topics[0]
+    content = build_content(detail)
+    images = build_images(detail)
+
+    list_body = dumps({
+        "data": [project(TopicResponse, topic) for topic in topics],
+        "pagination": PaginationResponse.create(1, 100, 100),
+    })
+    detail_body = dumps(project(
+        TopicDetailResponse,
+        detail,
+        sources=[project(SourceInfo, source) for source in detail["sources"]],
+        content=project(ContentResponse, content),
+        images=[project(ImageResponse, image) for image in images],
+    ))
+    # 匯出每行一個主題（含內容與圖片），取 64 KB 為一個串流片段
+    line = dumps({**project(TopicResponse, detail), "content": content, "images": images}) + b"\n"
+    export_chunk = (line * (64 * 1024 // len(line) + 1))[:64 * 1024]
+    return {
+        "主題列表（100 個）": list_body,
+        "主題詳情（完整內容）": detail_body,
+        "匯出片段（64 KB）": export_chunk,
+    }
+
+
+def measure(body: bytes, encoding: str, count: int) -> tuple:
+    """返回 (壓縮後大小, 每次壓縮毫秒數)"""
+    compressed = compression.compress_body(body, encoding)
+    start = time.perf_counter()
+    for _ in range(count):
+        compression.compress_body(body, encoding)
+    return len(compressed), (time.perf_counter() - start) / count * 1000
+
+
+def make_request(accept_encoding: str) -> Request:
+    """建立只含 Accept-Encoding 的請求"""
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/topics/topic_000000",
+        "query_string": b"",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    })
+
+
+def run_benchmark(count: int = 200):
+    """執行效能測試"""
+    payloads = build_payloads()
+    default_level = settings.COMPRESSION_GZIP_LEVEL
+    default_quality = settings.COMPRESSION_BROTLI_QUALITY
+
+    print(f"\n{'='*50}")
+    print(f"壓縮次數: {count:,} / Brotli: {'已安裝' if compression.brotli else '未安裝（只測試 gzip）'}")
+    print(f"{'='*50}")
+
+    for label, body in payloads.items():
+        print(f"\n{label}，原始 {len(body) / 1024:.1f} KB")
+        for level in GZIP_LEVELS:
+            settings.COMPRESSION_GZIP_LEVEL = level
+            size, ms = measure(body, "gzip", count)
+            print(f"  gzip   {level:2d}: {size / 1024:7.1f} KB ({size / len(body):6.1%})  {ms:7.3f} ms")
+        if compression.brotli is not None:
+            for quality in BROTLI_QUALITIES:
+                settings.COMPRESSION_BROTLI_QUALITY = quality
+                size, ms = measure(body, "br", count)
+                print(f"  br     {quality:2d}: {size / 1024:7.1f} KB ({size / len(body):6.1%})  {ms:7.3f} ms")
+    settings.COMPRESSION_GZIP_LEVEL = default_level
+    settings.COMPRESSION_BROTLI_QUALITY = default_quality
+
+    # 回應快取命中：每次壓縮 vs 使用快取項目中預先壓縮的內容
+    body = payloads["主題詳情（完整內容）"]
+    cache = ResponseCache(ttl_seconds=60)
+    request = make_request("gzip, deflate, br")
+    encoding = compression.choose_encoding("gzip, deflate, br")
+    cache.store(request, json.loads(body), 'W/"benchmark"', ("topics",))
+
+    start = time.perf_counter()
+    for _ in range(count):
+        compression.compress_body(cache.lookup(make_request("identity")).body, encoding)
+    per_hit_ms = (time.perf_counter() - start) / count * 1000
+
+    start = time.perf_counter()
+    for _ in range(count):
+        cache.lookup(make_request("gzip, deflate, br"))
+    precompressed_ms = (time.perf_counter() - start) / count * 1000
+
+    print(f"\n快取命中（主題詳情，{encoding}）")
+    print(f"  每次重新壓縮: {per_hit_ms:7.3f} ms/請求")
+    print(f"  預先壓縮:     {precompressed_ms:7.3f} ms/請求")
+    print(f"  加速: {per_hit_ms / precompressed_ms:.1f}x")
+    print(f"\n{'='*50}\n")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    run_benchmark(count)
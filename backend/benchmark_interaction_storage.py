@@ -0,0 +1,160 @@
+"""
+互動記錄儲存模式效能測試
+比較一般集合（standard）與時間序列集合（timeseries）的寫入吞吐量、範圍查詢延遲與儲存大小
+
+使用方式：
+    python benchmark_interaction_storage.py                 # 預設 10,000,000 筆
+    python benchmark_interaction_storage.py 1000000         # 指定筆數
+    python benchmark_interaction_storage.py 1000000 keep    # 測試後保留集合
+
+需要 MongoDB 5.0 以上（時間序列集合），使用 MONGODB_URL 設定的伺服器，
+資料寫入獨立的 <MONGODB_DB_NAME>_benchmark 資料庫
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from statistics import mean, median
+
+# 添加專案路徑
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import settings
+from app.models.interaction import InteractionAction
+from app.services.repositories.interaction_repository import InteractionRepository
+from app.services.repositories.interaction_storage import (
+    ensure_interactions_collection,
+    field_path,
+    to_storage,
+    INTERACTIONS_COLLECTION,
+    STORAGE_STANDARD,
+    STORAGE_TIMESERIES,
+)
+
+BATCH_SIZE = 10000
+CONCURRENT_BATCHES = 4
+USER_COUNT = 10000
+TOPIC_COUNT = 2000
+DAYS = 90
+QUERY_ITERATIONS = 200
+
+ACTIONS = [action.value for action in InteractionAction]
+CATEGORIES = ["fashion", "food", "trend"]
+
+
+def build_batch(rng: random.Random, size: int, start: datetime) -> list:
+    """建立一批合成互動事件"""
+    span_seconds = DAYS * 86400
+    batch = []
+    for _ in range(size):
+        action = rng.choice(ACTIONS)
+        batch.append(InteractionRepository.build_interaction(
+            user_id=f"user_{rng.randrange(USER_COUNT)}",
+            topic_id=f"topic_{rng.randrange(TOPIC_COUNT)}",
+            action=action,
+            duration=rng.randrange(1, 300) if action == "view" else None,
+            category=rng.choice(CATEGORIES),
+            created_at=start + timedelta(seconds=rng.randrange(span_seconds)),
+        ))
+    return batch
+
+
+async def run_ingest(db, mode: str, total: int, start: datetime) -> float:
+    """寫入合成事件，返回每秒寫入筆數"""
+    collection = db[INTERACTIONS_COLLECTION]
+    rng = random.Random(42)
+    semaphore = asyncio.Semaphore(CONCURRENT_BATCHES)
+    written = 0
+
+    async def insert(batch):
+        nonlocal written
+        async with semaphore:
+            await collection.insert_many([to_storage(doc, mode) for doc in batch], ordered=False)
+            written += len(batch)
+
+    began = time.perf_counter()
+    pending = []
+    remaining = total
+    while remaining > 0:
+        size = min(BATCH_SIZE, remaining)
+        remaining -= size
+        pending.append(asyncio.create_task(insert(build_batch(rng, size, start))))
+        if len(pending) >= CONCURRENT_BATCHES * 2:
+            await asyncio.gather(*pending)
+            pending = []
+            print(f"  [{mode}] 已寫入 {written:,} / {total:,}", end="\r")
+    await asyncio.gather(*pending)
+    elapsed = time.perf_counter() - began
+    print(f"  [{mode}] 已寫入 {written:,} / {total:,}")
+    return total / elapsed
+
+
+async def run_range_queries(db, mode: str, start: datetime) -> list:
+    """查詢單一顧客 7 天內的互動（API 查詢互動歷史的模式），返回延遲列表（毫秒）"""
+    collection = db[INTERACTIONS_COLLECTION]
+    rng = random.Random(7)
+    user_field = field_path("user_id", mode)
+    latencies = []
+    for _ in range(QUERY_ITERATIONS):
+        window_start = start + timedelta(days=rng.randrange(DAYS - 7))
+        query = {
+            user_field: f"user_{rng.randrange(USER_COUNT)}",
+            "created_at": {"$gte": window_start, "$lt": window_start + timedelta(days=7)},
+        }
+        began = time.perf_counter()
+        await collection.find(query).sort("created_at", -1).limit(100).to_list(length=100)
+        latencies.append((time.perf_counter() - began) * 1000)
+    return latencies
+
+
+async def storage_size_mb(db) -> float:
+    """集合實際儲存大小（MB）"""
+    stats = await db.command("collStats", INTERACTIONS_COLLECTION)
+    return (stats.get("storageSize", 0) + stats.get("totalIndexSize", 0)) / 1024 / 1024
+
+
+async def run_benchmark(total: int, keep: bool):
+    """執行效能測試"""
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    start = datetime.utcnow().replace(microsecond=0) - timedelta(days=DAYS)
+
+    print(f"\n{'='*50}")
+    print(f"事件數量: {total:,}")
+    print(f"批次大小: {BATCH_SIZE:,}（並行 {CONCURRENT_BATCHES} 批）")
+    print(f"顧客數量: {USER_COUNT:,} / 期間: {DAYS} 天")
+    print(f"{'='*50}\n")
+
+    results = {}
+    for mode in (STORAGE_STANDARD, STORAGE_TIMESERIES):
+        db = client[f"{settings.MONGODB_DB_NAME}_benchmark_{mode}"]
+        await db.drop_collection(INTERACTIONS_COLLECTION)
+        await ensure_interactions_collection(db, mode=mode, ttl_days=0)
+
+        print(f"▶ {mode}")
+        throughput = await run_ingest(db, mode, total, start)
+        latencies = sorted(await run_range_queries(db, mode, start))
+        size = await storage_size_mb(db)
+        results[mode] = (throughput, latencies, size)
+
+        if not keep:
+            await client.drop_database(db.name)
+
+    print(f"\n{'模式':<12}{'寫入 (筆/秒)':>16}{'查詢平均':>12}{'中位數':>10}{'p95':>10}{'儲存 (MB)':>12}")
+    for mode, (throughput, latencies, size) in results.items():
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(
+            f"{mode:<12}{throughput:>16,.0f}{mean(latencies):>10.2f}ms"
+            f"{median(latencies):>8.2f}ms{p95:>8.2f}ms{size:>12.1f}"
+        )
+
+    client.close()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    keep_collections = len(sys.argv) > 2 and sys.argv[2] == "keep"
+    asyncio.run(run_benchmark(count, keep_collections))
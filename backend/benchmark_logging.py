@@ -0,0 +1,136 @@
+"""
+日誌管線效能測試
+比較原本的日誌設定（InterceptHandler 逐層查找呼叫端 frame、root level 0、在呼叫端格式化並寫出）與
+佇列 + 背景執行緒轉發、依 logger 限流的新設定，每個模擬請求的日誌耗時（呼叫端執行緒）
+
+每個模擬請求輸出 3 筆 INFO、2 筆 DEBUG（LOG_LEVEL=INFO 時不輸出）與 1 筆熱路徑 INFO，
+日誌寫入暫存檔（避免終端機輸出速度影響結果）
+
+使用方式：
+    python benchmark_logging.py          # 預設 5,000 個請求
+    python benchmark_logging.py 20000    # 指定請求數
+"""
+import logging
+import sys
+import os
+import tempfile
+import time
+
+# 添加專案路徑
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loguru import logger
+
+from app.utils import logger as app_logger
+
+# 每個請求的日誌耗時上限（微秒）
+OVERHEAD_CAP_US = 50
+
+api_logger = logging.getLogger("app.api.v1.topics")
+hot_logger = logging.getLogger("app.services.images.image_service_manager")
+
+
+class LegacyInterceptHandler(logging.Handler):
+    """原本的實作：每筆記錄以 sys._getframe 逐層查找呼叫端"""
+
+    def emit(self, record):
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        frame, depth = sys._getframe(6), 6
+        while frame and frame.f_code.co_filename == logging.__file__:
+            frame = frame.f_back
+            depth += 1
+        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+
+def setup_legacy(stream):
+    """原本的 setup_logging（控制台 sink 同步寫出）"""
+    logger.remove()
+    logger.add(stream, format=app_logger.TEXT_FORMAT, level="INFO", colorize=True)
+    logging.basicConfig(handlers=[LegacyInterceptHandler()], level=0, force=True)
+
+
+def setup_new(stream, log_format: str, rate_limit: float, queue_size: int):
+    """新的 setup_logging（輸出串流暫時替換 sys.stderr）"""
+    stderr = sys.stderr
+    sys.stderr = stream
+    try:
+        app_logger.setup_logging("INFO", log_format=log_format, rate_limit=rate_limit, queue_size=queue_size)
+    finally:
+        sys.stderr = stderr
+
+
+def handle_request(index: int):
+    """模擬一個請求的日誌輸出"""
+    api_logger.info(f"取得主題列表: page={index % 10 + 1}, limit=20")
+    api_logger.debug("查詢條件: category=fashion, status=pending")
+    hot_logger.info(f"[trace-{index}] ✅ unsplash 搜尋成功: 找到 12 張圖片")
+    api_logger.debug(f"主題 {index} 內容字數: 1200")
+    api_logger.info(f"ETag 計算完成: W/\"{index:08x}\"")
+    api_logger.info("回應完成: 20 個主題")
+
+
+def drain():
+    """等待背景執行緒寫出佇列中的日誌"""
+    while app_logger.get_logging_stats()["queued"]:
+        time.sleep(0.001)
+
+
+def measure(count: int, finish) -> tuple:
+    """返回 (呼叫端每請求微秒數, 含全部寫出完成的每請求微秒數)"""
+    for index in range(200):
+        handle_request(index)
+    finish()
+    start = time.perf_counter()
+    for index in range(count):
+        handle_request(index)
+    caller = time.perf_counter() - start
+    finish()
+    total = time.perf_counter() - start
+    return caller / count * 1_000_000, total / count * 1_000_000
+
+
+def run_benchmark(count: int = 5000):
+    """執行效能測試"""
+    print(f"\n{'='*50}")
+    print(f"請求數: {count:,}（每個請求 6 筆日誌，上限 {OVERHEAD_CAP_US} µs/請求）")
+    print(f"{'='*50}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "legacy.log"), "w", encoding="utf-8") as stream:
+            setup_legacy(stream)
+            results.append(("原本（呼叫端寫出、逐層查找 frame）", measure(count, lambda: None)))
+
+        for label, log_format, rate_limit in (
+            ("背景寫出（text）", "text", 0),
+            ("背景寫出（json）", "json", 0),
+            ("背景寫出（json）+ 限流 20/秒", "json", 20),
+        ):
+            with open(os.path.join(directory, f"{log_format}-{rate_limit}.log"), "w", encoding="utf-8") as stream:
+                # 佇列容納全部日誌，避免捨棄影響比較
+                setup_new(stream, log_format, rate_limit, queue_size=(count + 200) * 6)
+                results.append((label, measure(count, drain)))
+                stats = app_logger.get_logging_stats()
+                app_logger.shutdown_logging()
+            if stats["rate_limited"] or stats["dropped"]:
+                print(f"\n{label}: 限流略過 {stats['rate_limited']:,} 筆，佇列捨棄 {stats['dropped']:,} 筆")
+
+    logger.remove()
+    logging.basicConfig(handlers=[logging.StreamHandler()], level=logging.WARNING, force=True)
+
+    print()
+    legacy_caller = results[0][1][0]
+    for label, (caller_us, total_us) in results:
+        status = "✅" if caller_us <= OVERHEAD_CAP_US else "❌"
+        print(f"{label}")
+        print(f"  呼叫端: {caller_us:7.1f} µs/請求 {status}  含寫出完成: {total_us:7.1f} µs/請求  "
+              f"加速: {legacy_caller / caller_us:.1f}x")
+    print(f"\n{'='*50}\n")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    run_benchmark(count)
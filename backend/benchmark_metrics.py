@@ -0,0 +1,100 @@
+"""
+指標記錄效能測試
+測量直方圖單次記錄的耗時，以及 MetricsMiddleware 對每個請求增加的耗時（直接呼叫 ASGI 應用，不經網路）
+
+使用方式：
+    python benchmark_metrics.py          # 預設 20,000 個請求
+    python benchmark_metrics.py 100000   # 指定請求數
+"""
+import asyncio
+import sys
+import os
+import time
+
+# 添加專案路徑
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import APIRouter, FastAPI
+
+from app.middleware.metrics import MetricsMiddleware
+from app.utils.metrics import Histogram, REGISTRY
+
+# 每個請求增加的耗時上限（微秒）
+OVERHEAD_CAP_US = 20
+
+
+def build_app(with_metrics: bool) -> FastAPI:
+    """建立與正式環境相同路由結構（include_router + 前綴）的測試應用"""
+    router = APIRouter()
+
+    @router.get("/topics/{topic_id}")
+    async def get_topic(topic_id: str):
+        return {"id": topic_id}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def call(app, index: int):
+    """以 ASGI 介面送出一個 GET 請求"""
+    path = f"/api/v1/topics/{index % 100}"
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, count: int) -> float:
+    """返回每個請求的平均微秒數"""
+    for index in range(500):
+        await call(app, index)
+    start = time.perf_counter()
+    for index in range(count):
+        await call(app, index)
+    return (time.perf_counter() - start) / count * 1_000_000
+
+
+def run_benchmark(count: int = 20000):
+    """執行效能測試"""
+    print(f"\n{'='*50}")
+    print(f"請求數: {count:,}（中間件上限 {OVERHEAD_CAP_US} µs/請求）")
+    print(f"{'='*50}")
+
+    histogram = Histogram("benchmark_seconds", "benchmark", ("route", "status"))
+    start = time.perf_counter()
+    for index in range(count):
+        histogram.observe(index / count, ("/api/v1/topics/{topic_id}", "200"))
+    observe_us = (time.perf_counter() - start) / count * 1_000_000
+
+    baseline_us = asyncio.run(measure(build_app(False), count))
+    metrics_us = asyncio.run(measure(build_app(True), count))
+    overhead_us = metrics_us - baseline_us
+
+    start = time.perf_counter()
+    REGISTRY.render()
+    render_ms = (time.perf_counter() - start) * 1000
+
+    status = "✅" if overhead_us <= OVERHEAD_CAP_US else "❌"
+    print(f"\n直方圖單次記錄: {observe_us:7.2f} µs")
+    print(f"無指標中間件:   {baseline_us:7.1f} µs/請求")
+    print(f"有指標中間件:   {metrics_us:7.1f} µs/請求")
+    print(f"增加耗時:       {overhead_us:7.1f} µs/請求 {status}")
+    print(f"輸出 /metrics:  {render_ms:7.2f} ms")
+    print(f"\n{'='*50}\n")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    run_benchmark(count)
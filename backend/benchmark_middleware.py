@@ -0,0 +1,188 @@
+"""
+中間件效能測試
+比較原本以 BaseHTTPMiddleware 實作的 CORS / 限流 / API Key 中間件與純 ASGI 中間件
+處理 GET /api/v1/health 的每秒請求數（直接呼叫 ASGI 應用，不經過網路與 HTTP 解析）
+
+使用方式：
+    python benchmark_middleware.py          # 預設 5,000 個請求
+    python benchmark_middleware.py 20000    # 指定請求數
+"""
+import asyncio
+import sys
+import os
+import time
+
+# 添加專案路徑
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.config import settings
+from app.api.v1 import health
+from app.middleware.auth import APIKeyMiddleware
+from app.middleware.cors import CustomCORSMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.rate_limit_backends import MemoryRateLimitBackend
+
+EXCLUDE_PATHS = ["/health", "/api/v1/health", "/docs", "/openapi.json", "/redoc", "/api/v1/images/proxy"]
+API_KEY = "benchmark-key"
+LIMITS = [(10**9, 60, "minute"), (10**9, 3600, "hour")]
+
+
+class LegacyCORSMiddleware(BaseHTTPMiddleware):
+    """原本的實作：每個請求重新解析 CORS_ORIGINS"""
+
+    async def dispatch(self, request: Request, call_next):
+        origin = request.headers.get("origin")
+        allowed_origins = settings.CORS_ORIGINS
+        if isinstance(allowed_origins, str):
+            allowed_origins = [o.strip() for o in allowed_origins.split(',') if o.strip()]
+        elif not isinstance(allowed_origins, list):
+            allowed_origins = list(allowed_origins) if allowed_origins else []
+        if not allowed_origins:
+            allowed_origins = ["*"]
+
+        response = await call_next(request)
+        if "*" in allowed_origins:
+            response.headers["Access-Control-Allow-Origin"] = "*"
+        elif origin:
+            response.headers["Access-Control-Allow-Origin"] = origin
+            response.headers["Access-Control-Allow-Credentials"] = "true"
+        else:
+            response.headers["Access-Control-Allow-Origin"] = allowed_origins[0]
+        response.headers["Access-Control-Expose-Headers"] = "X-RateLimit-Limit, X-RateLimit-Remaining, X-RateLimit-Reset"
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """原本的實作（BaseHTTPMiddleware + 滑動視窗計數器）"""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.backend = MemoryRateLimitBackend(LIMITS)
+
+    async def dispatch(self, request: Request, call_next):
+        if any(request.url.path.startswith(path) for path in EXCLUDE_PATHS):
+            return await call_next(request)
+        current_time = time.time()
+        result = await self.backend.hit(request.client.host if request.client else "unknown", current_time)
+        response = await call_next(request)
+        response.headers["X-RateLimit-Limit"] = str(LIMITS[0][0])
+        response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+        response.headers["X-RateLimit-Reset"] = str(int(current_time + 60))
+        return response
+
+
+class LegacyAPIKeyMiddleware(BaseHTTPMiddleware):
+    """原本的實作（BaseHTTPMiddleware）"""
+
+    async def dispatch(self, request: Request, call_next):
+        if any(request.url.path.startswith(path) for path in EXCLUDE_PATHS):
+            return await call_next(request)
+        if request.headers.get("X-API-Key") == API_KEY:
+            return await call_next(request)
+        return Response(content='{"detail": "Invalid or missing API Key"}', status_code=401)
+
+
+def build_app(legacy: bool) -> FastAPI:
+    """建立與 app.main 相同順序的中間件堆疊"""
+    app = FastAPI()
+    app.include_router(health.router, prefix="/api/v1")
+
+    @app.get("/api/v1/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:5173"],
+        allow_credentials=True,
+        allow_methods=["GET"],
+        allow_headers=["Content-Type"],
+    )
+    if legacy:
+        app.add_middleware(LegacyCORSMiddleware)
+        app.add_middleware(LegacyRateLimitMiddleware)
+        app.add_middleware(LegacyAPIKeyMiddleware)
+    else:
+        app.add_middleware(CustomCORSMiddleware, allowed_origins=["http://localhost:5173"])
+        app.add_middleware(RateLimitMiddleware, backend=MemoryRateLimitBackend(LIMITS))
+        app.add_middleware(APIKeyMiddleware)
+    return app
+
+
+async def call(app: FastAPI, path: str) -> int:
+    """以 ASGI 介面送出一個 GET 請求，返回狀態碼"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"origin", b"http://localhost:5173"),
+            (b"x-api-key", API_KEY.encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+        "app": app,
+    }
+    status_code = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app(scope, receive, send)
+    return status_code
+
+
+async def measure(app: FastAPI, path: str, count: int) -> float:
+    """返回每秒請求數"""
+    for _ in range(200):
+        await call(app, path)
+    start = time.perf_counter()
+    for _ in range(count):
+        status_code = await call(app, path)
+    elapsed = time.perf_counter() - start
+    assert status_code == 200, f"{path} 回應 {status_code}"
+    return count / elapsed
+
+
+async def run_benchmark(count: int = 5000):
+    """執行效能測試"""
+    settings.API_KEY = API_KEY
+    legacy_app = build_app(legacy=True)
+    asgi_app = build_app(legacy=False)
+
+    print(f"\n{'='*50}")
+    print(f"請求數: {count:,}（CORS + 限流 + API Key 中間件）")
+    print(f"{'='*50}")
+
+    for path, note in (
+        ("/api/v1/health", "排除限流與認證"),
+        ("/api/v1/ping", "經過限流與認證"),
+    ):
+        legacy_rps = await measure(legacy_app, path, count)
+        asgi_rps = await measure(asgi_app, path, count)
+        print(f"\nGET {path}（{note}）")
+        print(f"  BaseHTTPMiddleware: {legacy_rps:10,.0f} 請求/秒  ({1_000_000 / legacy_rps:7.1f} µs/請求)")
+        print(f"  純 ASGI 中間件:     {asgi_rps:10,.0f} 請求/秒  ({1_000_000 / asgi_rps:7.1f} µs/請求)")
+        print(f"  加速: {asgi_rps / legacy_rps:.2f}x")
+    print(f"\n{'='*50}\n")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    asyncio.run(run_benchmark(count))
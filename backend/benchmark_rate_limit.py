@@ -0,0 +1,119 @@
+"""
+請求限流效能測試
+比較原本的時間戳記列表實作與滑動視窗計數器（SlidingWindowRateLimiter）
+在每分鐘 1,000 / 10,000 個請求下的每請求耗時與記憶體用量
+
+使用方式：
+    python benchmark_rate_limit.py
+"""
+import random
+import sys
+import os
+import time
+from collections import defaultdict
+
+# 添加專案路徑
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.middleware.rate_limit_backends import SlidingWindowRateLimiter
+
+MINUTES = 10
+CLIENT_COUNT = 50
+PER_MINUTE = 600
+PER_HOUR = 100000
+
+
+class ListRateLimiter:
+    """原本的實作：每個 IP 保存所有請求時間戳記，每次請求掃描三次列表"""
+
+    def __init__(self, requests_per_minute: int, requests_per_hour: int):
+        self.requests_per_minute = requests_per_minute
+        self.requests_per_hour = requests_per_hour
+        self.request_history = defaultdict(list)
+        self.cleanup_interval = 3600
+        self.last_cleanup = None
+
+    def _cleanup_old_requests(self, current_time: float):
+        if self.last_cleanup is None:
+            self.last_cleanup = current_time
+        if current_time - self.last_cleanup < self.cleanup_interval:
+            return
+        self.last_cleanup = current_time
+        cutoff_time = current_time - 3600
+        for ip in list(self.request_history.keys()):
+            self.request_history[ip] = [ts for ts in self.request_history[ip] if ts > cutoff_time]
+            if not self.request_history[ip]:
+                del self.request_history[ip]
+
+    def hit(self, ip: str, current_time: float) -> bool:
+        self._cleanup_old_requests(current_time)
+        requests = self.request_history[ip]
+        recent_minute = [ts for ts in requests if ts > current_time - 60]
+        if len(recent_minute) >= self.requests_per_minute:
+            return False
+        recent_hour = [ts for ts in requests if ts > current_time - 3600]
+        if len(recent_hour) >= self.requests_per_hour:
+            return False
+        requests.append(current_time)
+        # 計算剩餘請求數（響應頭）
+        recent_minute = [ts for ts in requests if ts > current_time - 60]
+        return True
+
+    def tracked_values(self) -> int:
+        return sum(len(history) for history in self.request_history.values())
+
+
+def build_traffic(rate_per_minute: int, seed: int = 42) -> list:
+    """建立 MINUTES 分鐘的請求（時間, IP），IP 依 Zipf 分佈（少數 IP 佔大部分流量）"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(CLIENT_COUNT)]
+    ips = [f"10.0.0.{index}" for index in range(CLIENT_COUNT)]
+    total = rate_per_minute * MINUTES
+    start = 1_700_000_000.0
+    step = 60.0 / rate_per_minute
+    chosen = rng.choices(ips, weights=weights, k=total)
+    return [(start + index * step, ip) for index, ip in enumerate(chosen)]
+
+
+def measure(limiter, traffic: list) -> tuple:
+    """返回 (每請求平均微秒, 允許的請求數)"""
+    allowed = 0
+    start = time.perf_counter()
+    for current_time, ip in traffic:
+        result = limiter.hit(ip, current_time)
+        allowed += bool(result if isinstance(result, bool) else result.allowed)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(traffic) * 1_000_000, allowed
+
+
+def run_benchmark():
+    """執行效能測試"""
+    print(f"\n{'='*50}")
+    print(f"模擬時間: {MINUTES} 分鐘 / 客戶端: {CLIENT_COUNT} 個 IP（Zipf 分佈）")
+    print(f"限制: 每分鐘 {PER_MINUTE} / 每小時 {PER_HOUR}")
+    print(f"{'='*50}")
+
+    for rate in (1_000, 10_000):
+        traffic = build_traffic(rate)
+
+        legacy = ListRateLimiter(PER_MINUTE, PER_HOUR)
+        legacy_us, legacy_allowed = measure(legacy, traffic)
+
+        sliding = SlidingWindowRateLimiter([(PER_MINUTE, 60, "minute"), (PER_HOUR, 3600, "hour")])
+        sliding_us, sliding_allowed = measure(sliding, traffic)
+
+        print(f"\n每分鐘 {rate:,} 個請求（共 {len(traffic):,} 個）")
+        print(
+            f"  時間戳記列表: {legacy_us:8.2f} µs/請求  允許 {legacy_allowed:,}  "
+            f"保存 {legacy.tracked_values():,} 個時間戳記"
+        )
+        print(
+            f"  滑動視窗計數: {sliding_us:8.2f} µs/請求  允許 {sliding_allowed:,}  "
+            f"保存 {len(sliding) * 6:,} 個數值（{len(sliding)} 個 IP × 6）"
+        )
+        print(f"  加速: {legacy_us / sliding_us:.1f}x")
+    print(f"\n{'='*50}\n")
+
+
+if __name__ == "__main__":
+    run_benchmark()
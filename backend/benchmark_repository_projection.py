@@ -0,0 +1,147 @@
+"""
+Repository 投影效能測試
+比較主題列表、排程檢查與內容摘要等熱門查詢在完整文件與投影欄位下的
+BSON 傳輸量與解碼時間（MongoDB 回傳的就是 BSON，driver 在客戶端解碼）
+
+使用方式：
+    python benchmark_repository_projection.py          # 預設 5,000 筆
+    python benchmark_repository_projection.py 20000    # 指定筆數
+"""
+import random
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+from statistics import mean
+
+# 添加專案路徑
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bson
+
+from app.services.repositories.projections import (
+    TOPIC_LIST_FIELDS,
+    TOPIC_SCHEDULE_FIELDS,
+    CONTENT_SUMMARY_FIELDS,
+)
+
+ITERATIONS = 5
+
+PARAGRAPH = (
+    "Dior 2026 春夏系列以白色喱士裙為主角，優雅浪漫的剪裁配合現代感配色，"
+    "在巴黎時裝周上成為焦點。元朗的燒賣皇后亦登上本週街頭美食排行榜第1位。"
+)
+
+
+def build_topics(count: int, seed: int = 42) -> list:
+    """建立合成主題（包含來源列表與關鍵字，與實際生成的主題結構相同）"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    topics = []
+    for index in range(count):
+        topics.append({
+            "_id": bson.ObjectId(),
+            "id": f"topic_{index}",
+            "title": f"主題 {index} " + PARAGRAPH[:20],
+            "category": rng.choice(["fashion", "food", "trend"]),
+            "status": rng.choice(["pending", "confirmed"]),
+            "source": "Vogue HK",
+            "sources": [
+                {
+                    "name": f"來源 {n}",
+                    "url": f"https://example.com/articles/{index}/{n}",
+                    "keywords": [PARAGRAPH[k:k + 4] for k in range(0, 40, 4)],
+                    "summary": PARAGRAPH * 2,
+                    "verified": True,
+                }
+                for n in range(rng.randint(3, 6))
+            ],
+            "generated_at": now - timedelta(minutes=index),
+            "updated_at": now,
+            "created_at": now,
+        })
+    return topics
+
+
+def build_contents(count: int, seed: int = 7) -> list:
+    """建立合成內容（短文約 500 字、腳本約 250 字）"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    contents = []
+    for index in range(count):
+        article = PARAGRAPH * rng.randint(6, 10)
+        script = PARAGRAPH * rng.randint(3, 5)
+        contents.append({
+            "_id": bson.ObjectId(),
+            "id": f"content_topic_{index}",
+            "topic_id": f"topic_{index}",
+            "article": article,
+            "script": script,
+            "word_count": len(article) + len(script),
+            "estimated_duration": (len(article) + len(script)) // 17,
+            "model_used": "qwen-turbo",
+            "prompt_version": "v1.0",
+            "version": 3,
+            "generated_at": now,
+            "updated_at": now,
+        })
+    return contents
+
+
+def project(document: dict, fields) -> dict:
+    """模擬 MongoDB 投影（只保留指定欄位，排除 _id）"""
+    return {field: document[field] for field in fields if field in document}
+
+
+def measure(documents: list) -> tuple:
+    """
+    計算 BSON 大小與解碼時間
+
+    Returns:
+        (總位元組, 平均解碼時間毫秒)
+    """
+    encoded = [bson.encode(doc) for doc in documents]
+    total_bytes = sum(len(data) for data in encoded)
+    payload = b"".join(encoded)
+
+    timings = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        bson.decode_all(payload)
+        timings.append((time.perf_counter() - start) * 1000)
+    return total_bytes, mean(timings)
+
+
+def run_benchmark(count: int):
+    """執行效能測試"""
+    topics = build_topics(count)
+    contents = build_contents(count)
+
+    cases = [
+        ("主題列表 TOPIC_LIST_FIELDS", topics, TOPIC_LIST_FIELDS),
+        ("排程檢查 TOPIC_SCHEDULE_FIELDS", topics, TOPIC_SCHEDULE_FIELDS),
+        ("內容摘要 CONTENT_SUMMARY_FIELDS", contents, CONTENT_SUMMARY_FIELDS),
+    ]
+
+    print(f"\n{'='*50}")
+    print(f"文件數量: {count:,}")
+    print(f"解碼重複次數: {ITERATIONS}")
+    print(f"{'='*50}")
+
+    for name, documents, fields in cases:
+        full_bytes, full_ms = measure(documents)
+        projected_bytes, projected_ms = measure([project(doc, fields) for doc in documents])
+
+        print(f"\n{name}")
+        print(f"  完整文件: {full_bytes / 1024 / 1024:8.2f} MB  解碼 {full_ms:8.2f} ms")
+        print(f"  投影欄位: {projected_bytes / 1024 / 1024:8.2f} MB  解碼 {projected_ms:8.2f} ms")
+        print(
+            f"  傳輸量減少 {(1 - projected_bytes / full_bytes) * 100:.1f}%，"
+            f"解碼加速 {full_ms / projected_ms:.1f}x"
+        )
+    print(f"\n{'='*50}\n")
+
+
+if __name__ == "__main__":
+    document_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    run_benchmark(document_count)
@@ -0,0 +1,217 @@
+"""
+API 回應序列化效能測試
+比較「Pydantic 逐欄位驗證 + response_model 再驗證 + 標準 json」與
+「直接取出回應欄位（已驗證資料不建立模型）+ orjson」在 100 個主題的列表與含完整內容的主題詳情上的耗時
+
+使用方式：
+    python benchmark_serialization.py          # 預設 500 次請求
+    python benchmark_serialization.py 2000     # 指定請求次數
+"""
+import asyncio
+import json
+import random
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# 添加專案路徑
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.models.topic import SourceInfo
+from app.schemas.common import PaginationResponse
+from app.schemas.content import ContentResponse
+from app.schemas.image import ImageResponse
+from app.schemas.topic import TopicDetailResponse, TopicListResponse, TopicResponse
+from app.utils.serialization import DefaultJSONResponse, orjson, project, trusted_response
+
+CATEGORIES = ["fashion", "food", "trend"]
+STATUSES = ["pending", "confirmed"]
+
+
+def build_topic(index: int, rng: random.Random) -> dict:
+    """建立與資料庫文件相同結構的主題（含列表不需要的欄位）"""
+    generated_at = datetime(2024, 1, 1) + timedelta(minutes=index * 37, microseconds=rng.randint(0, 999999))
+    return {
+        "_id": f"{index:024x}",
+        "id": f"topic_{index:06d}",
+        "title": f"香港秋冬流行趨勢第 {index} 篇：{'街頭' * rng.randint(1, 5)}穿搭",
+        "category": rng.choice(CATEGORIES),
+        "status": rng.choice(STATUSES),
+        "source": "rss",
+        "sources": [
+            {
+                "type": "news",
+                "name": f"來源 {n}",
+                "url": f"https://news.example.com/{index}/{n}",
+                "title": f"新聞標題 {n}",
+                "fetched_at": generated_at,
+                "verified": True,
+                "keywords": ["時尚", "秋冬", "穿搭"],
+            }
+            for n in range(8)
+        ],
+        "generated_at": generated_at,
+        "updated_at": generated_at + timedelta(hours=1),
+        "created_at": generated_at,
+        "image_count": rng.randint(0, 12),
+        "word_count": rng.randint(300, 3000),
+    }
+
+
+def build_content(topic: dict) -> dict:
+    article = "本季最受矚目的單品是剪裁俐落的羊毛大衣，搭配寬鬆西褲與樂福鞋。" * 60
+    script = "大家好，今日同大家分享三個秋冬穿搭重點。" * 40
+    return {
+        "_id": "content-object-id",
+        "id": f"content_{topic['id']}",
+        "topic_id": topic["id"],
+        "article": article,
+        "script": script,
+        "word_count": len(article) + len(script),
+        "estimated_duration": (len(article) + len(script)) // 17,
+        "model_used": "deepseek-chat",
+        "prompt_version": "v2.1",
+        "version": 7,
+        "generated_at": topic["generated_at"],
+        "updated_at": topic["updated_at"],
+    }
+
+
+def build_images(topic: dict) -> list:
+    return [
+        {
+            "_id": f"image-object-id-{n}",
+            "id": f"{topic['id']}_img_{n}",
+            "topic_id": topic["id"],
+            "url": f"https://images.example.com/{topic['id']}/{n}.jpg",
+            "source": "Unsplash",
+            "photographer": "Photographer",
+            "photographer_url": "https://unsplash.com/@photographer",
+            "license": "Unsplash License",
+            "keywords": ["fashion", "street", "autumn"],
+            "order": n,
+            "width": 1920,
+            "height": 1280,
+            "link_status": "alive",
+            "verified_at": topic["updated_at"],
+            "fetched_at": topic["generated_at"],
+            "phash": "f0e1d2c3b4a59687",
+            "phash_bands": ["f0e1", "d2c3", "b4a5", "9687"],
+        }
+        for n in range(12)
+    ]
+
+
+def build_app(fast: bool, topics: list, content: dict, images: list) -> FastAPI:
+    """建立只有列表與詳情兩個端點的應用"""
+    app = FastAPI(default_response_class=DefaultJSONResponse if fast else JSONResponse)
+    pagination = PaginationResponse.create(1, len(topics), len(topics))
+    detail = topics[0]
+
+    if fast:
+        @app.get("/topics", response_model=TopicListResponse)
+        async def list_topics():
+            data = [project(TopicResponse, topic) for topic in topics]
+            return trusted_response({"data": data, "pagination": pagination})
+
+        @app.get("/topics/detail", response_model=TopicDetailResponse)
+        async def get_detail():
+            return trusted_response(project(
+                TopicDetailResponse,
+                detail,
+                sources=[project(SourceInfo, source) for source in detail["sources"]],
+                content=project(ContentResponse, content),
+                images=[project(ImageResponse, image) for image in images],
+            ))
+    else:
+        @app.get("/topics", response_model=TopicListResponse)
+        async def list_topics():
+            data = [TopicResponse(**topic) for topic in topics]
+            return TopicListResponse(data=data, pagination=pagination)
+
+        @app.get("/topics/detail", response_model=TopicDetailResponse)
+        async def get_detail():
+            return TopicDetailResponse(
+                **{**detail, "sources": [SourceInfo(**source) for source in detail["sources"]]},
+                content=ContentResponse(**content),
+                images=[ImageResponse(**image) for image in images],
+            )
+
+    return app
+
+
+async def call(app: FastAPI, path: str) -> bytes:
+    """以 ASGI 介面送出 GET 請求，返回回應內容"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+        "app": app,
+    }
+    body = bytearray()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return bytes(body)
+
+
+async def measure(app: FastAPI, path: str, count: int) -> float:
+    """返回每次請求平均毫秒數"""
+    for _ in range(20):
+        await call(app, path)
+    start = time.perf_counter()
+    for _ in range(count):
+        await call(app, path)
+    return (time.perf_counter() - start) / count * 1000
+
+
+async def run_benchmark(count: int = 500):
+    """執行效能測試"""
+    rng = random.Random(42)
+    topics = [build_topic(index, rng) for index in range(100)]
+    content = build_content(topics[0])
+    images = build_images(topics[0])
+
+    legacy_app = build_app(False, topics, content, images)
+    fast_app = build_app(True, topics, content, images)
+
+    print(f"\n{'='*50}")
+    print(f"請求次數: {count:,} / JSON 編碼: {'orjson' if orjson else '標準 json（未安裝 orjson）'}")
+    print(f"{'='*50}")
+
+    for path, label in (("/topics", "主題列表（100 個）"), ("/topics/detail", "主題詳情（完整內容 + 12 張圖片）")):
+        legacy_body = await call(legacy_app, path)
+        fast_body = await call(fast_app, path)
+        same = json.loads(legacy_body) == json.loads(fast_body)
+
+        legacy_ms = await measure(legacy_app, path, count)
+        fast_ms = await measure(fast_app, path, count)
+        print(f"\n{label}，回應 {len(fast_body) / 1024:.1f} KB，輸出{'一致' if same else '不一致！'}")
+        print(f"  驗證 + json:             {legacy_ms:7.3f} ms/請求")
+        print(f"  欄位投影 + orjson:       {fast_ms:7.3f} ms/請求")
+        print(f"  加速: {legacy_ms / fast_ms:.1f}x")
+    print(f"\n{'='*50}\n")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    asyncio.run(run_benchmark(count))
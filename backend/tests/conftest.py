@@ -0,0 +1,8 @@
+"""
+單元測試設定
+"""
+import os
+import sys
+
+# 添加專案路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
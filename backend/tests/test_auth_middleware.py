@@ -0,0 +1,59 @@
+"""
+API Key 中間件單元測試（排除路徑與受保護路徑）
+執行方式（於 backend 目錄）：
+    python -m pytest tests
+"""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.middleware.auth import APIKeyMiddleware
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def request_status(middleware, path: str, headers=()) -> int:
+    """以最小 ASGI 請求呼叫中間件，返回回應狀態碼"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "path": path,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+    }
+    asyncio.run(middleware(scope, receive, send))
+    return messages[0]["status"]
+
+
+@pytest.fixture
+def middleware(monkeypatch):
+    monkeypatch.setattr(settings, "API_KEY", "secret", raising=False)
+    return APIKeyMiddleware(ok_app)
+
+
+class TestAPIKeyMiddleware:
+    @pytest.mark.parametrize("path", [
+        "/health",
+        "/api/v1/health",
+        "/api/v1/health/detailed",
+        "/api/v1/images/proxy/abc",
+        "/docs",
+    ])
+    def test_excluded_paths_need_no_key(self, middleware, path):
+        assert request_status(middleware, path) == 200
+
+    @pytest.mark.parametrize("path", ["/api/v1/health/db-stats", "/api/v1/topics"])
+    def test_protected_paths_require_key(self, middleware, path):
+        assert request_status(middleware, path) == 401
+        assert request_status(middleware, path, [("X-API-Key", "secret")]) == 200
+        assert request_status(middleware, path, [("Authorization", "Bearer secret")]) == 200
@@ -0,0 +1,238 @@
+"""
+內容版本歷史單元測試（差異、壓縮、快照區段與還原）
+執行方式（於 backend 目錄）：
+    python -m pytest tests
+"""
+import asyncio
+import random
+
+import pytest
+
+from app.config import settings
+from app.services.repositories.content_repository import ContentRepository
+from app.services.repositories.content_version_repository import (
+    KIND_DELTA,
+    KIND_FULL,
+    ContentVersionRepository,
+    _decode,
+    _encode,
+    apply_delta,
+    make_delta,
+)
+
+
+def random_edit(rng: random.Random, text: str) -> str:
+    """對文字做隨機的插入、刪除或取代"""
+    alphabet = "abc 內容版本\n"
+    for _ in range(rng.randint(1, 4)):
+        start = rng.randint(0, len(text))
+        end = rng.randint(start, min(len(text), start + 20))
+        insert = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 10)))
+        text = text[:start] + insert + text[end:]
+    return text
+
+
+class TestDelta:
+    @pytest.mark.parametrize("base,target", [
+        ("", ""),
+        ("", "新的內容"),
+        ("舊的內容", ""),
+        ("hello world", "hello brave new world"),
+        ("第一段\n第二段\n第三段", "第一段\n修改後的第二段\n第三段\n第四段"),
+    ])
+    def test_round_trip(self, base, target):
+        assert apply_delta(base, make_delta(base, target)) == target
+
+    def test_random_edits_round_trip(self):
+        rng = random.Random(36)
+        text = "".join(rng.choice("abc 內容\n") for _ in range(200))
+        for _ in range(200):
+            edited = random_edit(rng, text)
+            assert apply_delta(text, make_delta(text, edited)) == edited
+            text = edited
+
+    def test_small_edit_copies_unchanged_ranges(self):
+        base = "x" * 1000
+        delta = make_delta(base, base + "y")
+        assert delta == [["=", 0, 1000], ["+", "y"]]
+
+
+class TestEncoding:
+    @pytest.mark.parametrize("compress", [True, False])
+    def test_round_trip(self, compress):
+        payload = {"article": "短文 ✨", "script": None}
+        encoding, data = _encode(payload, compress)
+        assert _decode({"encoding": encoding, "data": data}) == payload
+
+    def test_compressed_payload_is_binary(self):
+        encoding, data = _encode({"article": "a" * 1000, "script": ""}, True)
+        assert encoding == "zlib"
+        assert isinstance(data, bytes) and len(data) < 1000
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, key, direction):
+        self._docs = sorted(self._docs, key=lambda doc: doc[key], reverse=direction < 0)
+        return self
+
+    def skip(self, count):
+        self._docs = self._docs[count:]
+        return self
+
+    def limit(self, count):
+        self._docs = self._docs[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return list(self._docs)
+
+    def __aiter__(self):
+        self._iter = iter(self._docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class InsertResult:
+    inserted_id = None
+
+
+class FakeVersionsCollection:
+    """只支援版本倉庫用到的查詢（content_id / topic_id 與版本區間）"""
+
+    def __init__(self):
+        self.docs = []
+
+    async def insert_one(self, document):
+        self.docs.append(dict(document))
+        return InsertResult()
+
+    async def count_documents(self, filter):
+        return len(self.find(filter)._docs)
+
+    def find(self, filter, projection=None):
+        def matches(doc):
+            for key, value in filter.items():
+                if key == "version":
+                    if not value["$gte"] <= doc["version"] <= value["$lte"]:
+                        return False
+                elif doc.get(key) != value:
+                    return False
+            return True
+
+        return FakeCursor([dict(doc) for doc in self.docs if matches(doc)])
+
+
+def make_repo() -> ContentVersionRepository:
+    repo = ContentVersionRepository()
+    repo._collection = FakeVersionsCollection()
+    return repo
+
+
+class TestContentVersionRepository:
+    @pytest.fixture(autouse=True)
+    def snapshot_interval(self, monkeypatch):
+        monkeypatch.setattr(settings, "CONTENT_VERSION_SNAPSHOT_INTERVAL", 4)
+        monkeypatch.setattr(settings, "CONTENT_VERSION_COMPRESSION", True)
+
+    def test_snapshot_base(self):
+        assert [ContentVersionRepository._snapshot_base(v, 4) for v in range(1, 10)] == [1, 1, 1, 1, 5, 5, 5, 5, 9]
+
+    def test_versions_round_trip_across_snapshots(self):
+        rng = random.Random(7)
+        article = "".join(rng.choice("abc 內容\n") for _ in range(300))
+        history = []
+
+        async def run():
+            repo = make_repo()
+            nonlocal article
+            for version in range(1, 11):
+                article = random_edit(rng, article)
+                script = None if version % 3 == 0 else f"腳本 {version}"
+                history.append({"article": article, "script": script})
+                await repo.add_version("c1", "t1", version, article, script)
+            return repo, await repo.get_versions_page("t1", page=1, limit=20)
+
+        repo, versions = asyncio.run(run())
+        kinds = [doc["kind"] for doc in sorted(repo._collection.docs, key=lambda doc: doc["version"])]
+        assert [kinds[i] for i in (0, 4, 8)] == [KIND_FULL] * 3
+        assert KIND_DELTA in kinds
+
+        assert [v["version"] for v in versions] == list(range(10, 0, -1))
+        for v in versions:
+            assert {"article": v["article"], "script": v["script"]} == history[v["version"] - 1]
+
+    def test_missing_previous_version_falls_back_to_snapshot(self):
+        async def run():
+            repo = make_repo()
+            await repo.add_version("c1", "t1", 1, "第一版", None)
+            # 版本 2 的記錄遺失（例如寫入失敗），版本 3 無法計算差異
+            await repo.add_version("c1", "t1", 3, "第三版", None)
+            return repo, await repo.get_versions_page("t1")
+
+        repo, versions = asyncio.run(run())
+        assert [doc["kind"] for doc in repo._collection.docs] == [KIND_FULL, KIND_FULL]
+        assert [(v["version"], v["article"]) for v in versions] == [(3, "第三版"), (1, "第一版")]
+
+    def test_rebuild_skips_delta_without_previous(self):
+        encoding, data = _encode({"article": [["+", "x"]], "script": None}, False)
+        texts = ContentVersionRepository._rebuild([
+            {"version": 2, "kind": KIND_DELTA, "encoding": encoding, "data": data},
+        ])
+        assert texts == {}
+
+
+class FakeContentsCollection:
+    """單一 Content 文件；find_one_and_update 返回更新前文件（版本號遞增由 _apply_locally 推算）"""
+
+    def __init__(self, document):
+        self.document = document
+
+    async def find_one_and_update(self, filter, pipeline, projection=None, return_document=None):
+        before = dict(self.document)
+        if projection:
+            for field in projection:
+                before.pop(field, None)
+        self.document = {**self.document, "version": (self.document.get("version") or 1) + 1}
+        return before
+
+    async def update_one(self, filter, update):
+        for field in update.get("$unset", {}):
+            self.document.pop(field, None)
+
+
+class TestEmbeddedVersionMigration:
+    def test_first_edit_migrates_embedded_history(self):
+        contents = FakeContentsCollection({
+            "_id": "oid",
+            "id": "c1",
+            "topic_id": "t1",
+            "article": "第三版",
+            "script": None,
+            "version": 3,
+            "versions": [
+                {"version": 1, "article": "第一版", "script": None, "type": "generated"},
+                {"version": 2, "article": "第二版", "script": None},
+            ],
+        })
+
+        async def run():
+            repo = ContentRepository()
+            repo._collection = contents
+            repo.version_repo._collection = FakeVersionsCollection()
+            updated = await repo.update_content("c1", {"article": "第四版"})
+            return updated, await repo.get_content_versions("t1")
+
+        updated, (versions, total) = asyncio.run(run())
+        assert updated["version"] == 4
+        assert "versions" not in updated
+        assert "versions" not in contents.document
+        assert total == 3
+        assert [(v["version"], v["article"]) for v in versions] == [(3, "第三版"), (2, "第二版"), (1, "第一版")]
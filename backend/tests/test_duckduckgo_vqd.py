@@ -0,0 +1,56 @@
+"""
+DuckDuckGo vqd token 快取單元測試
+執行方式（於 backend 目錄）：
+    python -m pytest tests
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.images import duckduckgo
+from app.services.images.duckduckgo import DuckDuckGoService
+
+
+@pytest.fixture(autouse=True)
+def empty_vqd_cache(monkeypatch):
+    monkeypatch.setattr(duckduckgo, "_vqd_cache", duckduckgo.OrderedDict())
+
+
+class TestVqdCache:
+    def test_token_is_fetched_and_reused_for_normalized_query(self):
+        requested = []
+
+        def handler(request):
+            requested.append(request.url.params["q"])
+            return httpx.Response(200, text=f'vqd="token-{len(requested)}"')
+
+        async def run():
+            service = DuckDuckGoService()
+            query = service._normalize_query("Red  Dress")
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                first = await service._get_vqd(client, query)
+                second = await service._get_vqd(client, service._normalize_query("red dress"))
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert requested == ["red dress"]
+        assert first == ("token-1", False)
+        assert second == ("token-1", True)
+
+    def test_search_uses_the_query_the_token_was_issued_for(self, monkeypatch):
+        searched = []
+
+        def handler(request):
+            if request.url.path == "/i.js":
+                searched.append((request.url.params["q"], request.url.params["vqd"]))
+                return httpx.Response(200, json={"results": []})
+            return httpx.Response(200, text=f'vqd="token-for-{request.url.params["q"]}"')
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                monkeypatch.setattr(duckduckgo, "_get_shared_client", lambda: client)
+                await DuckDuckGoService().search_images("Red Dress", limit=5)
+
+        asyncio.run(run())
+        assert searched == [("red dress", "token-for-red dress")]
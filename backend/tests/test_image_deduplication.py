@@ -0,0 +1,155 @@
+"""
+圖片去重單元測試（URL 正規化、感知雜湊、phash_bands 分桶查詢）
+執行方式（於 backend 目錄）：
+    python -m pytest tests
+"""
+import asyncio
+import io
+
+import numpy as np
+import pytest
+
+from app.services.images.deduplication import (
+    PHASH_BAND_COUNT,
+    canonicalize_url,
+    compute_phash,
+    hamming_distance,
+    phash_bands,
+    phash_to_hex,
+)
+from app.services.repositories.image_repository import ImageRepository
+
+
+def make_image(seed: int, size: int = 256, fmt: str = "PNG") -> bytes:
+    """產生平滑的隨機灰階圖片（低頻結構明顯，pHash 才有意義）"""
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, size=(8, 8), dtype=np.uint8)
+    img = Image.fromarray(coarse, mode="L").resize((size, size), Image.Resampling.BICUBIC)
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class TestCanonicalizeUrl:
+    def test_keeps_query_on_unknown_hosts(self):
+        assert canonicalize_url("https://example.com/show.php?v=1") != canonicalize_url(
+            "https://example.com/show.php?v=2"
+        )
+        assert canonicalize_url("https://example.com/img?id=7&s=2&q=x") == "https://example.com/img?id=7&s=2&q=x"
+
+    def test_strips_all_query_on_stock_hosts(self):
+        small = canonicalize_url("https://images.pexels.com/photos/1/a.jpeg?auto=compress&w=640")
+        large = canonicalize_url("http://images.pexels.com/photos/1/a.jpeg?h=1280")
+        assert small == large == "https://images.pexels.com/photos/1/a.jpeg"
+
+    def test_strips_size_params_on_known_cdns(self):
+        a = canonicalize_url("https://demo.imgix.net/photo.jpg?w=200&auto=format&id=3")
+        b = canonicalize_url("https://demo.imgix.net/photo.jpg?id=3&h=800")
+        assert a == b == "https://demo.imgix.net/photo.jpg?id=3"
+
+    def test_pixabay_size_suffix(self):
+        assert canonicalize_url("https://cdn.pixabay.com/photo/x/abc_640.jpg") == canonicalize_url(
+            "https://cdn.pixabay.com/photo/x/abc_1280.jpg"
+        )
+
+    def test_unwraps_duckduckgo_proxy(self):
+        proxied = "https://external-content.duckduckgo.com/iu/?u=https%3A%2F%2Fimages.pexels.com%2Fa.jpg%3Fw%3D10&f=1"
+        assert canonicalize_url(proxied) == "https://images.pexels.com/a.jpg"
+
+    def test_empty_url(self):
+        assert canonicalize_url("") == ""
+
+
+class TestPhash:
+    def test_resized_and_recompressed_copies_are_near(self):
+        original = compute_phash(make_image(1))
+        resized = compute_phash(make_image(1, size=96))
+        recompressed = compute_phash(make_image(1, fmt="JPEG"))
+        assert original is not None
+        assert hamming_distance(original, resized) <= 6
+        assert hamming_distance(original, recompressed) <= 6
+
+    def test_different_images_are_far(self):
+        assert hamming_distance(compute_phash(make_image(1)), compute_phash(make_image(2))) > 6
+
+    def test_undecodable_bytes_return_none(self):
+        assert compute_phash(b"not an image") is None
+
+    def test_hex_is_fixed_width(self):
+        assert phash_to_hex(1) == "0000000000000001"
+        assert int(phash_to_hex(compute_phash(make_image(3))), 16) == compute_phash(make_image(3))
+
+
+class TestPhashBands:
+    def test_band_keys_are_prefixed_per_band(self):
+        bands = phash_bands(0)
+        assert len(bands) == PHASH_BAND_COUNT
+        assert bands == [f"{i}:00" for i in range(PHASH_BAND_COUNT)]
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_close_hashes_share_a_band(self, seed):
+        rng = np.random.default_rng(seed)
+        value = int(rng.integers(0, 2**63, dtype=np.int64))
+        flipped = value
+        for bit in rng.choice(64, size=PHASH_BAND_COUNT - 1, replace=False):
+            flipped ^= 1 << int(bit)
+        assert set(phash_bands(value)) & set(phash_bands(flipped))
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeImagesCollection:
+    """只支援 find_near_duplicates 用到的查詢（phash_bands $in + topic_id）"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, filter, projection):
+        bands = set(filter["phash_bands"]["$in"])
+        matched = [
+            {k: doc[k] for k in ("id", "topic_id", "url", "phash")}
+            for doc in self.docs
+            if bands & set(doc["phash_bands"])
+            and ("topic_id" not in filter or doc["topic_id"] == filter["topic_id"])
+        ]
+        return FakeCursor(matched)
+
+
+class TestFindNearDuplicates:
+    def stored(self, id, value, topic_id="t1"):
+        return {
+            "id": id,
+            "topic_id": topic_id,
+            "url": f"https://example.com/{id}.jpg",
+            "phash": phash_to_hex(value),
+            "phash_bands": phash_bands(value),
+        }
+
+    def test_returns_close_matches_sorted_by_distance(self):
+        base = 0x0123456789ABCDEF
+        repo = ImageRepository()
+        repo._collection = FakeImagesCollection([
+            self.stored("far", ~base & (2**64 - 1)),
+            self.stored("two", base ^ 0b11),
+            self.stored("same", base),
+            self.stored("seven", base ^ 0x7F),
+            self.stored("other-topic", base, topic_id="t2"),
+        ])
+
+        matches = asyncio.run(repo.find_near_duplicates(phash_to_hex(base), topic_id="t1"))
+        assert [m["id"] for m in matches] == ["same", "two"]
+        assert [m["hamming_distance"] for m in matches] == [0, 2]
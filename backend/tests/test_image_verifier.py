@@ -0,0 +1,81 @@
+"""
+圖片連結驗證單元測試（連結狀態判斷）
+執行方式（於 backend 目錄）：
+    python -m pytest tests
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.images.image_verifier import (
+    LINK_ALIVE,
+    LINK_DEAD,
+    LINK_UNKNOWN,
+    ImageVerifier,
+)
+
+
+def probe_with(handler, needs_dimensions: bool = False):
+    """以 MockTransport 模擬伺服器回應執行 probe"""
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await ImageVerifier().probe(client, "https://cdn.example.com/a.jpg", needs_dimensions)
+
+    return asyncio.run(run())
+
+
+class TestProbe:
+    @pytest.mark.parametrize("error", [httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError])
+    def test_network_failures_are_unknown(self, error):
+        def handler(request):
+            raise error("network down", request=request)
+
+        assert probe_with(handler)["status"] == LINK_UNKNOWN
+
+    @pytest.mark.parametrize("status_code", [404, 410])
+    def test_definitive_missing_is_dead(self, status_code):
+        result = probe_with(lambda request: httpx.Response(status_code))
+        assert result == {"status": LINK_DEAD, "http_status": status_code}
+
+    @pytest.mark.parametrize("status_code", [429, 500, 503])
+    def test_server_errors_are_unknown(self, status_code):
+        assert probe_with(lambda request: httpx.Response(status_code))["status"] == LINK_UNKNOWN
+
+    def test_image_response_is_alive(self):
+        response = httpx.Response(200, headers={"content-type": "image/jpeg"})
+        assert probe_with(lambda request: response)["status"] == LINK_ALIVE
+
+
+class TestSingleRun:
+    def test_scheduled_run_blocks_second_start_and_can_be_cancelled(self, monkeypatch):
+        from app.services.automation.scheduler import SchedulerService
+
+        async def run():
+            verifier = ImageVerifier()
+            release = asyncio.Event()
+
+            async def fake_run(force=False):
+                await release.wait()
+                verifier.progress = verifier._new_progress(
+                    "cancelled" if verifier._cancel_requested else "completed"
+                )
+                return verifier.progress
+
+            monkeypatch.setattr(verifier, "run", fake_run)
+            monkeypatch.setattr(
+                "app.services.images.image_verifier.get_image_verifier", lambda: verifier
+            )
+
+            scheduled = asyncio.create_task(SchedulerService._verify_images(None))
+            await asyncio.sleep(0)
+            assert verifier.is_running
+            assert verifier.start() is False
+            assert verifier.cancel() is True
+            release.set()
+            await scheduled
+            return verifier
+
+        verifier = asyncio.run(run())
+        assert not verifier.is_running
+        assert verifier.progress["status"] == "cancelled"
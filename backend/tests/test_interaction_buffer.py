@@ -0,0 +1,75 @@
+"""
+互動寫入緩衝單元測試（關閉時不遺失記錄）
+執行方式（於 backend 目錄）：
+    python -m pytest tests
+"""
+import asyncio
+
+from app.services.repositories.interaction_buffer import InteractionWriteBuffer
+
+
+class BlockingInteractionRepository:
+    """第一次寫入會等待 release 後才完成，模擬關閉時正在進行的批次寫入"""
+
+    def __init__(self):
+        self.written = []
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def create_interactions(self, interactions):
+        self.started.set()
+        await self.release.wait()
+        self.written.extend(interactions)
+        return len(interactions)
+
+
+def make_interactions(count: int):
+    return [{"topic_id": "t1", "category": "fashion", "seq": i} for i in range(count)]
+
+
+def make_buffer(repo) -> InteractionWriteBuffer:
+    buffer = InteractionWriteBuffer(max_batch_size=10, flush_interval=60, max_pending=1000)
+    buffer.interaction_repo = repo
+    return buffer
+
+
+class TestInteractionWriteBuffer:
+    def test_stop_during_flush_keeps_every_interaction(self):
+        async def run():
+            repo = BlockingInteractionRepository()
+            buffer = make_buffer(repo)
+            buffer.start()
+
+            # 25 筆 → 觸發背景寫入（分 3 批），第一批寫入時呼叫 stop()
+            await buffer.add_many(make_interactions(25))
+            await repo.started.wait()
+            stopping = asyncio.create_task(buffer.stop())
+            await asyncio.sleep(0)
+            await buffer.add_many(make_interactions(5))
+            repo.release.set()
+            await stopping
+            return repo, buffer
+
+        repo, buffer = asyncio.run(run())
+        assert len(repo.written) == 30
+        assert buffer.stats["written"] == 30
+        assert buffer.get_stats()["pending"] == 0
+        assert not buffer.is_running
+
+    def test_cancelled_flush_returns_unwritten_batch(self):
+        async def run():
+            repo = BlockingInteractionRepository()
+            buffer = make_buffer(repo)
+            buffer.start()
+
+            await buffer.add_many(make_interactions(25))
+            await repo.started.wait()
+            # 事件迴圈關閉時背景任務可能被直接取消：進行中的批次應放回緩衝
+            buffer._task.cancel()
+            repo.release.set()
+            await buffer.stop()
+            return repo, buffer
+
+        repo, buffer = asyncio.run(run())
+        assert sorted(doc["seq"] for doc in repo.written) == list(range(25))
+        assert buffer.stats["written"] == 25
@@ -0,0 +1,233 @@
+"""
+互動彙總單元測試（rebuild / backfill 不重複計算）
+執行方式（於 backend 目錄）：
+    python -m pytest tests
+
+測試環境沒有 MongoDB：FakeCollection 只實作彙總倉庫用到的聚合階段與運算子
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services.repositories.interaction_rollup_repository import InteractionRollupRepository
+from app.services.repositories.interaction_storage import ROLLED_UP_FIELD
+
+MISSING = object()
+NOW = datetime(2026, 1, 10)
+
+
+def get_path(document, path):
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return MISSING
+        value = value[part]
+    return value
+
+
+def evaluate(expression, document, variables):
+    """計算聚合運算式（只支援彙總管線用到的運算子）"""
+    if isinstance(expression, str):
+        if expression.startswith("$$"):
+            name, _, path = expression[2:].partition(".")
+            value = variables[name]
+            return get_path(value, path) if path else value
+        if expression.startswith("$"):
+            return get_path(document, expression[1:])
+        return expression
+    if isinstance(expression, list):
+        return [evaluate(item, document, variables) for item in expression]
+    if not isinstance(expression, dict):
+        return expression
+
+    if len(expression) == 1:
+        operator, argument = next(iter(expression.items()))
+        if operator.startswith("$"):
+            def arg(i):
+                value = evaluate(argument[i], document, variables)
+                return None if value is MISSING else value
+
+            if operator == "$eq":
+                return arg(0) == arg(1)
+            if operator == "$ne":
+                return arg(0) != arg(1)
+            if operator == "$and":
+                return all(evaluate(item, document, variables) for item in argument)
+            if operator == "$not":
+                return not evaluate(argument[0], document, variables)
+            if operator == "$cond":
+                return arg(1) if evaluate(argument[0], document, variables) else arg(2)
+            if operator == "$ifNull":
+                return arg(0) if arg(0) is not None else arg(1)
+            if operator == "$type":
+                return "missing" if evaluate(argument, document, variables) is MISSING else "other"
+            if operator == "$year":
+                return evaluate(argument, document, variables).year
+            if operator == "$month":
+                return evaluate(argument, document, variables).month
+            if operator == "$dayOfMonth":
+                return evaluate(argument, document, variables).day
+            if operator == "$dateFromParts":
+                parts = {key: evaluate(value, document, variables) for key, value in argument.items()}
+                return datetime(parts["year"], parts["month"], parts["day"])
+            raise NotImplementedError(operator)
+
+    return {key: evaluate(value, document, variables) for key, value in expression.items()}
+
+
+def matches(document, filter):
+    for key, condition in filter.items():
+        value = get_path(document, key)
+        if isinstance(condition, dict) and "$exists" in condition:
+            if (value is not MISSING) != condition["$exists"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeAggregation:
+    def __init__(self, result):
+        self._result = result
+
+    async def to_list(self, length=None):
+        return self._result
+
+
+class FakeCollection:
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.docs = []
+
+    async def create_index(self, keys, unique=False):
+        return None
+
+    async def count_documents(self, filter):
+        return sum(1 for doc in self.docs if matches(doc, filter))
+
+    async def find_one(self, filter, projection=None):
+        for doc in self.docs:
+            if all(
+                doc.get(key) in condition["$in"] if isinstance(condition, dict) else doc.get(key) == condition
+                for key, condition in filter.items()
+            ):
+                return doc
+        return None
+
+    async def update_one(self, filter, update, upsert=False):
+        doc = await self.find_one(filter)
+        if doc is None:
+            doc = dict(filter)
+            self.docs.append(doc)
+        doc.update(update["$set"])
+
+    def aggregate(self, pipeline):
+        variables = {"NOW": NOW}
+        docs = self.docs
+        for stage in pipeline:
+            (name, spec), = stage.items()
+            if name == "$match":
+                docs = [doc for doc in docs if matches(doc, spec)]
+            elif name == "$group":
+                groups = {}
+                for doc in docs:
+                    key = evaluate(spec["_id"], doc, variables)
+                    group = groups.setdefault(repr(sorted(key.items())), {"_id": key})
+                    for field, accumulator in spec.items():
+                        if field != "_id":
+                            group[field] = group.get(field, 0) + evaluate(accumulator["$sum"], doc, variables)
+                docs = list(groups.values())
+            elif name == "$project":
+                docs = [
+                    evaluate({k: v for k, v in spec.items() if v != 0}, doc, variables)
+                    for doc in docs
+                ]
+            elif name == "$merge":
+                target = self.database[spec["into"]]
+                for new in docs:
+                    existing = next(
+                        (doc for doc in target.docs if all(doc[key] == new[key] for key in spec["on"])),
+                        None,
+                    )
+                    if existing is None:
+                        target.docs.append(dict(new))
+                    elif spec["whenMatched"] == "replace":
+                        existing.clear()
+                        existing.update(new)
+                    else:
+                        for update in spec["whenMatched"]:
+                            existing.update(evaluate(update["$set"], existing, {**variables, "new": new}))
+                docs = []
+            else:
+                raise NotImplementedError(name)
+        return FakeAggregation(docs)
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        collection = self[name] = FakeCollection(self, name)
+        return collection
+
+
+def interaction(action, day, rolled_up, duration=None):
+    doc = {
+        "user_id": "u1",
+        "topic_id": "t1",
+        "category": "fashion",
+        "action": action,
+        "created_at": datetime(2026, 1, day, 12),
+    }
+    if duration is not None:
+        doc["duration"] = duration
+    if rolled_up:
+        doc[ROLLED_UP_FIELD] = True
+    return doc
+
+
+@pytest.fixture
+def repo():
+    database = FakeDatabase()
+    database["interactions"].docs = [
+        # 啟用彙總前的歷史互動
+        interaction("like", 1, rolled_up=False),
+        interaction("view", 1, rolled_up=False, duration=30),
+        interaction("like", 2, rolled_up=False),
+        # 啟用彙總後寫入的互動
+        interaction("like", 2, rolled_up=True),
+        interaction("dislike", 2, rolled_up=True),
+        interaction("view", 3, rolled_up=True, duration=10),
+    ]
+    repo = InteractionRollupRepository()
+    repo._collection = database["interaction_rollups"]
+    return repo
+
+
+def summary(repo):
+    return repo.summarize(repo._collection.docs)
+
+
+class TestRollupRebuild:
+    def test_rebuild_counts_every_interaction_once(self, repo):
+        asyncio.run(repo.rebuild())
+        stats = summary(repo)
+        assert stats["total_likes"] == 3
+        assert stats["total_dislikes"] == 1
+        assert stats["total_views"] == 2
+        assert stats["avg_view_time"] == 20
+        assert stats["category_distribution"] == {"fashion": {"likes": 3, "dislikes": 1}}
+
+    def test_backfill_after_rebuild_does_not_double_count(self, repo):
+        asyncio.run(repo.rebuild())
+        rebuilt = summary(repo)
+        asyncio.run(repo.backfill())
+        asyncio.run(repo.backfill())
+        assert summary(repo) == rebuilt
+
+    def test_rebuild_after_backfill_matches(self, repo):
+        asyncio.run(repo.backfill())
+        asyncio.run(repo.rebuild())
+        backfill_then_rebuild = summary(repo)
+        assert backfill_then_rebuild["total_likes"] == 3
+        assert backfill_then_rebuild["total_views"] == 2
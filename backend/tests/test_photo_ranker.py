@@ -0,0 +1,45 @@
+"""
+照片相關度排序單元測試
+執行方式（於 backend 目錄）：
+    python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+from app.services.images.photo_ranker import PhotoRanker
+
+
+def ranker_with_scores(monkeypatch, scores) -> PhotoRanker:
+    """以固定分數取代 TF-IDF 計算，只測試排序與取前 k 名"""
+    ranker = PhotoRanker()
+    monkeypatch.setattr(ranker, "score", lambda photos, queries: np.asarray(scores, dtype=np.float32))
+    return ranker
+
+
+class TestRank:
+    def test_ties_at_cutoff_keep_original_order(self, monkeypatch):
+        scores = [1.0] * 20 + [2.0]
+        ranker = ranker_with_scores(monkeypatch, scores)
+        ranked = ranker.rank([{}] * len(scores), [("q", 1.0)], top_k=5)
+        assert [index for index, _ in ranked] == [20, 0, 1, 2, 3]
+
+    @pytest.mark.parametrize("top_k", [1, 3, 7, 12, None])
+    def test_matches_stable_sort(self, monkeypatch, top_k):
+        rng = np.random.default_rng(26)
+        scores = rng.integers(0, 4, size=12).astype(np.float32)
+        ranker = ranker_with_scores(monkeypatch, scores)
+        ranked = ranker.rank([{}] * len(scores), [("q", 1.0)], top_k=top_k)
+        expected = np.argsort(-scores, kind="stable")[:top_k]
+        assert [index for index, _ in ranked] == list(expected)
+
+    def test_relevant_photo_ranks_first(self):
+        photos = [
+            {"description": "city skyline at night"},
+            {"description": "bowl of ramen noodles with egg"},
+            {"description": "mountain lake landscape"},
+        ]
+        ranked = PhotoRanker().rank(photos, [("ramen noodles", 1.0)], top_k=1)
+        assert ranked[0][0] == 1
+
+    def test_empty_inputs(self):
+        assert PhotoRanker().rank([], [("q", 1.0)]) == []
@@ -0,0 +1,119 @@
+"""
+限流後端單元測試
+執行方式（於 backend 目錄）：
+    python -m pytest tests
+"""
+import asyncio
+
+import pytest
+
+from app.middleware.rate_limit_backends import (
+    CounterStore,
+    SharedRateLimitBackend,
+    SlidingWindowRateLimiter,
+    retry_after_seconds,
+)
+
+
+def first_allowed_after(limiter, key: str, start: float, step: float = 0.01) -> float:
+    """以 step 為間隔探測第一個會被接受的時間點（探測本身被拒絕時不計入）"""
+    steps = 0
+    while not limiter.hit(key, now=start + steps * step).allowed:
+        steps += 1
+    return start + steps * step
+
+
+class TestRetryAfterSeconds:
+    def test_waits_for_previous_window_to_decay(self):
+        # 上一視窗 10、目前 5、上限 10：需 10 × (1 - t / 60) + 5 + 1 <= 10 → t >= 36
+        assert retry_after_seconds(10, 5, 0, 60, 10) == 36
+        assert retry_after_seconds(10, 5, 30, 60, 10) == 6
+
+    def test_full_current_window_waits_into_next_window(self):
+        # 目前視窗已滿：等到下一視窗後，10 × (1 - t' / 60) + 1 <= 10 → t' >= 6
+        assert retry_after_seconds(0, 10, 20, 60, 10) == 40 + 6
+
+    def test_is_at_least_one_second(self):
+        assert retry_after_seconds(10, 0, 59.9, 60, 10) == 1
+
+
+class TestSlidingWindowRateLimiter:
+    @pytest.mark.parametrize("start", [0.0, 12.5, 45.0])
+    def test_retry_after_matches_first_allowed_time(self, start):
+        limiter = SlidingWindowRateLimiter([(10, 60, "minute")])
+        for second in range(10):
+            assert limiter.hit("client", now=second).allowed
+        # 下一視窗中持續請求直到被拒絕（上一視窗的 10 次仍依比例計入）
+        now = 60 + start
+        result = limiter.hit("client", now=now)
+        while result.allowed:
+            result = limiter.hit("client", now=now)
+
+        allowed_at = first_allowed_after(limiter, "client", now)
+        assert result.retry_after == pytest.approx(allowed_at - now, abs=1)
+        assert now + result.retry_after >= allowed_at
+
+    def test_window_rollover_carries_previous_count(self):
+        limiter = SlidingWindowRateLimiter([(2, 10, "window")])
+        assert limiter.hit("client", now=0).allowed
+        assert limiter.hit("client", now=1).allowed
+        assert not limiter.hit("client", now=5).allowed
+
+        # 新視窗剛開始：上一視窗 2 次幾乎全數計入
+        assert not limiter.hit("client", now=10).allowed
+        # 過了一半：估算值 2 × 0.5 = 1，可再接受一次
+        assert limiter.hit("client", now=15).allowed
+
+    def test_non_adjacent_window_resets_counts(self):
+        limiter = SlidingWindowRateLimiter([(2, 10, "window")])
+        assert limiter.hit("client", now=0).allowed
+        assert limiter.hit("client", now=1).allowed
+        # 中間隔了一整個視窗：不保留舊計數
+        assert limiter.hit("client", now=20).allowed
+        assert limiter.hit("client", now=20).remaining == 0
+
+    def test_rejected_requests_are_not_counted(self):
+        limiter = SlidingWindowRateLimiter([(1, 10, "window")])
+        assert limiter.hit("client", now=0).allowed
+        for _ in range(5):
+            assert not limiter.hit("client", now=1).allowed
+        assert limiter.hit("client", now=20).allowed
+
+    def test_lru_eviction_drops_least_recently_seen_key(self):
+        limiter = SlidingWindowRateLimiter([(1, 60, "minute")], max_keys=2)
+        limiter.hit("a", now=0)
+        limiter.hit("b", now=0)
+        limiter.hit("a", now=1)  # a 成為最近使用
+        limiter.hit("c", now=2)
+
+        assert len(limiter) == 2
+        assert set(limiter._states) == {"a", "c"}
+        # a 仍保留計數
+        assert not limiter.hit("a", now=3).allowed
+
+
+class TestSharedRateLimitBackend:
+    def test_retry_after_includes_other_workers(self):
+        backend = SharedRateLimitBackend(CounterStore(), [(10, 60, "minute")])
+
+        async def run():
+            assert (await backend.hit("client", now=0)).allowed
+            # 模擬同步取回其他 worker 的 9 次
+            backend._states["client"][3] = 9
+            return await backend.hit("client", now=20)
+
+        result = asyncio.run(run())
+        assert not result.allowed
+        # 目前視窗合計 10 已滿：40 秒後換窗，再等 10 × (1 - t / 60) + 1 <= 10 → 6 秒
+        assert result.retry_after == 46
+
+    def test_lru_eviction_clears_dirty_key(self):
+        backend = SharedRateLimitBackend(CounterStore(), [(10, 60, "minute")], max_keys=1)
+
+        async def run():
+            await backend.hit("a", now=0)
+            await backend.hit("b", now=0)
+
+        asyncio.run(run())
+        assert list(backend._states) == ["b"]
+        assert backend._dirty == {"b"}
@@ -0,0 +1,105 @@
+"""
+JSON 序列化單元測試（預設回應類別、已驗證文件的欄位投影）
+執行方式（於 backend 目錄）：
+    python -m pytest tests
+"""
+import json
+import math
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, Field, ValidationError
+
+from app.schemas.image import ImageResponse
+from app.utils.serialization import DefaultJSONResponse, project
+
+
+class Item(BaseModel):
+    id: str
+    name: str
+    note: Optional[str] = None
+    tags: List[str] = Field(default_factory=list)
+    score: Optional[float] = Field(...)
+
+
+def make_client(payload, response_model=None) -> TestClient:
+    app = FastAPI(default_response_class=DefaultJSONResponse)
+
+    @app.get("/", response_model=response_model)
+    async def endpoint():
+        return payload
+
+    return TestClient(app)
+
+
+class TestDefaultJSONResponse:
+    def test_matches_standard_encoding(self):
+        payload = {"text": "中文 ✨", "when": datetime(2026, 1, 2, 3, 4, 5), "nested": [1, 2.5, None, True]}
+        response = make_client(payload).get("/")
+        assert response.json() == {
+            "text": "中文 ✨",
+            "when": "2026-01-02T03:04:05",
+            "nested": [1, 2.5, None, True],
+        }
+        assert "中文".encode("utf-8") in response.content
+
+    def test_non_str_keys(self):
+        response = make_client({"counts": {1: "a", 2: "b"}}).get("/")
+        assert response.status_code == 200
+        assert response.json() == {"counts": {"1": "a", "2": "b"}}
+
+    def test_render_object_ids(self):
+        # 直接回傳 Response 時不經過 jsonable_encoder
+        oid = ObjectId()
+        response = DefaultJSONResponse({"oid": oid, "counts": {1: 2}})
+        assert json.loads(response.body) == {"oid": str(oid), "counts": {"1": 2}}
+
+    def test_nan_is_encoded_as_null(self):
+        class Stats(BaseModel):
+            values: Dict[str, float]
+
+        response = make_client({"values": {"avg": math.nan}}, response_model=Stats).get("/")
+        assert response.status_code == 200
+        assert json.loads(response.content) == {"values": {"avg": None}}
+
+
+class TestProject:
+    def test_complete_document_skips_validation(self):
+        document = {"_id": ObjectId(), "id": "1", "name": "a", "score": None}
+        assert project(Item, document) == {"id": "1", "name": "a", "note": None, "tags": [], "score": None}
+
+    def test_defaults_are_copied(self):
+        first = project(Item, {"id": "1", "name": "a", "score": 1.0})
+        first["tags"].append("x")
+        assert project(Item, {"id": "2", "name": "b", "score": 1.0})["tags"] == []
+
+    def test_values_override_document(self):
+        assert project(Item, {"id": "1", "name": "a", "score": 1.0}, name="b")["name"] == "b"
+
+    @pytest.mark.parametrize("document", [
+        {"id": "1", "score": 1.0},              # 缺少必填欄位
+        {"id": "1", "name": None, "score": 1.0},  # 必填欄位不接受 None
+        {"id": "1", "name": "a"},               # 可為 None 但必須存在
+    ])
+    def test_incomplete_document_is_validated(self, document):
+        with pytest.raises(ValidationError):
+            project(Item, document)
+
+    def test_incomplete_document_matches_model_output(self):
+        # 缺少 fetched_at 的圖片文件：與建立模型的結果相同（而不是輸出 null）
+        document = {
+            "id": "img1",
+            "topic_id": "t1",
+            "url": "https://example.com/a.jpg",
+            "source": "unsplash",
+            "license": "Unsplash",
+            "order": 0,
+        }
+        with pytest.raises(ValidationError):
+            project(ImageResponse, document)
+        document["fetched_at"] = datetime(2026, 1, 1)
+        assert project(ImageResponse, document)["fetched_at"] == datetime(2026, 1, 1)
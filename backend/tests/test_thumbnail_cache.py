@@ -0,0 +1,51 @@
+"""
+縮圖磁碟快取單元測試
+執行方式（於 backend 目錄）：
+    python -m pytest tests
+"""
+import asyncio
+import io
+
+from app.services.images.thumbnail_cache import ThumbnailCache, source_version
+
+
+def make_jpeg(width: int = 800, height: int = 600) -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 80, 40)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class TestThumbnailCache:
+    def test_peek_etag_matches_generated_thumbnail(self, tmp_path):
+        url = "https://cdn.example.com/a.jpg"
+        source = make_jpeg()
+        downloads = []
+
+        async def fake_download(requested_url):
+            downloads.append(requested_url)
+            return source
+
+        async def run():
+            cache = ThumbnailCache(cache_dir=str(tmp_path), max_bytes=10 * 1024 * 1024, workers=1)
+            cache._download = fake_download
+            try:
+                before = await cache.peek_etag(url, 320, "jpeg")
+                content, etag, media_type = await cache.get_thumbnail(url, 300, "jpeg")
+                after = await cache.peek_etag(url, 320, "jpeg")
+                cached, cached_etag, _ = await cache.get_thumbnail(url, 320, "jpeg")
+                return before, etag, media_type, after, content, cached, cached_etag
+            finally:
+                cache.shutdown()
+
+        before, etag, media_type, after, content, cached, cached_etag = asyncio.run(run())
+        assert before is None
+        assert media_type == "image/jpeg"
+        assert after == etag == cached_etag
+        assert cached == content
+        assert downloads == [url]
+
+    def test_source_version_changes_with_url(self):
+        assert source_version("https://a.example/1.jpg") != source_version("https://a.example/2.jpg")
+        assert len(source_version("")) == 8
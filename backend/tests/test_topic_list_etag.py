@@ -0,0 +1,82 @@
+"""
+主題列表 ETag 單元測試（每頁固定次數的批次查詢、條件請求）
+執行方式（於 backend 目錄）：
+    python -m pytest tests
+"""
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import topics
+from app.utils.response_cache import get_response_cache
+
+
+def make_topic(index: int):
+    return {
+        "id": f"t{index}",
+        "title": f"主題 {index}",
+        "category": "fashion",
+        "status": "pending",
+        "source": "test",
+        "generated_at": datetime(2026, 1, 1),
+        "updated_at": datetime(2026, 1, 1),
+    }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = {"image_counts": 0, "word_counts": 0}
+    state = {"image_counts": {"t0": 3}}
+
+    async def list_topics(**kwargs):
+        return [make_topic(i) for i in range(5)], 5
+
+    async def count_by_topic_ids(topic_ids):
+        calls["image_counts"] += 1
+        return dict(state["image_counts"])
+
+    async def get_word_counts_by_topic_ids(topic_ids):
+        calls["word_counts"] += 1
+        return {"t1": 1200}
+
+    async def per_topic_query(*args, **kwargs):
+        raise AssertionError("主題列表不應逐一查詢每個主題")
+
+    monkeypatch.setattr(topics.topic_repo, "list_topics", list_topics)
+    monkeypatch.setattr(topics.image_repo, "count_by_topic_ids", count_by_topic_ids)
+    monkeypatch.setattr(topics.image_repo, "count_by_topic_id", per_topic_query)
+    monkeypatch.setattr(topics.content_repo, "get_word_counts_by_topic_ids", get_word_counts_by_topic_ids)
+    monkeypatch.setattr(topics.content_repo, "get_content_by_topic_id", per_topic_query)
+    get_response_cache().clear()
+
+    app = FastAPI()
+    app.include_router(topics.router)
+    yield TestClient(app), calls, state
+    get_response_cache().clear()
+
+
+class TestListTopicsEtag:
+    def test_counts_use_one_batched_query_each(self, client):
+        http, calls, _ = client
+        response = http.get("/topics")
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert [topic["image_count"] for topic in data] == [3, 0, 0, 0, 0]
+        assert [topic["word_count"] for topic in data] == [0, 1200, 0, 0, 0]
+        assert calls == {"image_counts": 1, "word_counts": 1}
+
+    def test_not_modified_until_image_count_changes(self, client):
+        http, _, state = client
+        etag = http.get("/topics").headers["etag"]
+        get_response_cache().clear()
+
+        assert http.get("/topics", headers={"If-None-Match": etag}).status_code == 304
+
+        # 新增圖片不會更新主題的 updated_at，ETag 仍需改變
+        state["image_counts"] = {"t0": 4}
+        get_response_cache().clear()
+        response = http.get("/topics", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
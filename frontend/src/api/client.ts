@@ -133,6 +133,7 @@ export const api = {
   updateTopic: topicsAPI.updateTopic,
   updateTopicStatus: topicsAPI.updateTopicStatus,
   deleteTopic: topicsAPI.deleteTopic,
+  bulkTopics: topicsAPI.bulkTopics,
 
   // 內容相關（使用專用 API）
   getContent: contentsAPI.getContent,
@@ -169,6 +170,7 @@ export const api = {
 
   // 排程相關（使用專用 API）
   getSchedules: schedulesAPI.getSchedules,
+  getSchedulesByMonth: schedulesAPI.getSchedulesByMonth,
   manualGenerateTopics: schedulesAPI.manualGenerateTopics,
   startScheduler: schedulesAPI.startScheduler,
   stopScheduler: schedulesAPI.stopScheduler,
@@ -3,7 +3,7 @@
  * 只使用真實後端 API，不使用 Mock 數據
  */
 
-import { fetchAPI } from './client'
+import { fetchAPI, fetchAPIWithPagination } from './client'
 import type { Content } from '@/types'
 
 /**
@@ -42,6 +42,8 @@ export interface GenerateContentParams {
 export interface ContentUpdate {
   article?: string
   script?: string
+  // 編輯時讀取的版本號；已被其他編輯更新時返回 409
+  version?: number
 }
 
 /**
@@ -103,9 +105,15 @@ export const contentsAPI = {
   /**
    * 取得內容版本歷史
    */
-  getContentVersions: async (topicId: string): Promise<Content[]> => {
-    const versions = await fetchAPI<any[]>(`/contents/${topicId}/versions`)
-    return versions.map(convertContent)
+  getContentVersions: async (
+    topicId: string,
+    page: number = 1,
+    limit: number = 20
+  ): Promise<Content[]> => {
+    const response = await fetchAPIWithPagination<any>(
+      `/contents/${topicId}/versions?page=${page}&limit=${limit}`
+    )
+    return response.data.map(convertContent)
   },
 
   /**
@@ -21,6 +21,26 @@ function convertImage(apiImage: any): Image {
   }
 }
 
+/**
+ * 原圖 URL 的版本碼（FNV-1a 32 位元，與後端 source_version 相同）
+ * 圖片 URL 被修改後代理網址隨之改變，瀏覽器不會繼續使用長期快取的舊縮圖
+ */
+function getSourceVersion(url: string): string {
+  let hash = 0x811c9dc5
+  for (const byte of new TextEncoder().encode(url)) {
+    hash = Math.imul(hash ^ byte, 0x01000193) >>> 0
+  }
+  return hash.toString(16).padStart(8, '0')
+}
+
+/**
+ * 取得圖片縮圖代理 URL（由後端下載並快取縮圖，避免直接載入原始大圖）
+ */
+export function getImageProxyUrl(image: Pick<Image, 'id' | 'url'>, width: number = 640): string {
+  const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api/v1'
+  return `${API_BASE_URL}/images/proxy/${encodeURIComponent(image.id)}?w=${width}&v=${getSourceVersion(image.url)}`
+}
+
 /**
  * 圖片搜尋參數
  */
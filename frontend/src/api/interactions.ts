@@ -87,6 +87,18 @@ export const interactionsAPI = {
     })
   },
 
+  /**
+   * 批次記錄互動（例如累積的瀏覽時間事件，最多 500 筆）
+   */
+  createInteractionsBatch: async (
+    interactions: CreateInteractionRequest[]
+  ): Promise<{ accepted: number }> => {
+    return await fetchAPI<{ accepted: number }>('/interactions/batch', {
+      method: 'POST',
+      body: JSON.stringify({ interactions }),
+    })
+  },
+
   /**
    * 查詢互動歷史
    */
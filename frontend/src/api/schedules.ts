@@ -19,6 +19,13 @@ export const schedulesAPI = {
     return schedules
   },
 
+  /**
+   * 取得多日排程摘要（行事曆檢視，month 格式 YYYY-MM）
+   */
+  getSchedulesByMonth: async (month: string): Promise<Schedule[]> => {
+    return await fetchAPI<Schedule[]>(`/schedules/range?month=${month}`)
+  },
+
   /**
    * 手動觸發主題生成
    */
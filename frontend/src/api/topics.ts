@@ -23,6 +23,23 @@ function convertTopic(apiTopic: any): Topic {
   }
 }
 
+/**
+ * 批次主題操作
+ */
+export type TopicBulkOperation = 'status' | 'soft_delete' | 'hard_delete'
+
+/**
+ * 批次主題操作結果
+ */
+export interface TopicBulkResult {
+  operation: TopicBulkOperation
+  matched: number
+  modified: number
+  results: { id: string; outcome: 'updated' | 'unchanged' | 'deleted' | 'not_found' }[]
+  deleted_contents: number
+  deleted_images: number
+}
+
 /**
  * 主題篩選參數
  */
@@ -161,4 +178,18 @@ export const topicsAPI = {
       method: 'DELETE',
     })
   },
+
+  /**
+   * 批次主題操作（批次更新狀態、軟刪除或硬刪除）
+   */
+  bulkTopics: async (
+    ids: string[],
+    operation: TopicBulkOperation,
+    status?: 'pending' | 'confirmed' | 'deleted'
+  ): Promise<TopicBulkResult> => {
+    return fetchAPI<TopicBulkResult>('/topics/bulk', {
+      method: 'POST',
+      body: JSON.stringify({ ids, operation, status }),
+    })
+  },
 }
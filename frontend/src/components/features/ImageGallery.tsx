@@ -7,7 +7,7 @@ import { useMutation, useQueryClient } from '@tanstack/react-query'
 import { imagesAPI } from '@/api/client'
 import { showSuccess, showError } from '@/utils/toast'
 import type { Image } from '@/types'
-import type { ImageReorderItem } from '@/api/images'
+import { getImageProxyUrl, type ImageReorderItem } from '@/api/images'
 import ImagePreview from './ImagePreview'
 
 interface ImageGalleryProps {
@@ -204,10 +204,16 @@ export default function ImageGallery({
           >
             {/* 圖片 */}
             <img
-              src={image.url}
+              src={getImageProxyUrl(image, 640)}
               alt={`Image ${image.order}`}
               className="w-full h-full object-cover pointer-events-none"
               onError={(e) => {
+                // 代理失敗時改用原始 URL，原始 URL 也失敗才顯示佔位圖
+                if (!e.currentTarget.dataset.fallback) {
+                  e.currentTarget.dataset.fallback = 'original'
+                  e.currentTarget.src = image.url
+                  return
+                }
                 e.currentTarget.src =
                   'https://via.placeholder.com/400x400?text=Image'
               }}
@@ -3,6 +3,7 @@
  */
 
 import type { Image } from '@/types'
+import { getImageProxyUrl } from '@/api/images'
 
 interface ImagePreviewProps {
   image: Image
@@ -33,10 +34,16 @@ export default function ImagePreview({
         {/* 圖片 */}
         <div className="bg-white rounded-lg overflow-hidden">
           <img
-            src={image.url}
+            src={getImageProxyUrl(image, 1280)}
             alt={`Preview ${image.id}`}
             className="max-w-full max-h-[80vh] object-contain"
             onError={(e) => {
+              // 代理失敗時改用原始 URL，原始 URL 也失敗才顯示佔位圖
+              if (!e.currentTarget.dataset.fallback) {
+                e.currentTarget.dataset.fallback = 'original'
+                e.currentTarget.src = image.url
+                return
+              }
               e.currentTarget.src =
                 'https://via.placeholder.com/800x600?text=Image+Not+Found'
             }}